@@ -1,773 +1,711 @@
-import streamlit as st
-import plotly.express as px
-import pandas as pd
-import numpy as np
-from typing import Dict, Any
-
-st.set_page_config(page_title="Revised ESG Performance Scorecard", page_icon="📈", layout="wide")
-
-# --- Custom Styling (Injecting CSS for a cleaner look) ---
-st.markdown("""
-<style>
-    .reportview-container .main {
-        padding-top: 2rem;
-    }
-    .stButton>button {
-        background-color: #4CAF50;
-        color: white;
-        border-radius: 12px;
-        padding: 10px 24px;
-        font-size: 16px;
-        font-weight: bold;
-    }
-    h2, h3, h4 {
-        color: #2e6c80; /* A nice shade of blue */
-    }
-    /* Style for KPI boxes for visual separation */
-    [data-testid="stMetric"] {
-        background-color: #f0f2f6;
-        padding: 15px;
-        border-radius: 10px;
-        border: 1px solid #e0e0e0;
-        box-shadow: 2px 2px 5px rgba(0,0,0,0.1);
-    }
-    /* Use CSS for a color-coded grade/risk banner */
-    .grade-A-plus, .grade-A, .grade-B-plus, .grade-B, .grade-C-plus, .grade-C {
-        padding: 10px 15px;
-        border-radius: 8px;
-        font-size: 1.5em;
-        font-weight: 700;
-        text-align: center;
-        margin-bottom: 20px;
-        color: white;
-        text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.4);
-    }
-    /* RISK VIEW: Green/Yellow/Red reflects the ESG Score (High Score = Low Risk) */
-    .grade-A-plus, .grade-A { background-color: #28a745; } /* Low Risk (High Score) */
-    .grade-B-plus, .grade-B { background-color: #ffc107; color: black; } /* Medium Risk */
-    .grade-C-plus, .grade-C { background-color: #dc3545; } /* High Risk (Low Score) */
-
-</style>
-""", unsafe_allow_html=True)
-
-st.title("✨ Performance-Focused ESG Scorecard Dashboard")
-st.markdown(
-    "**Objective:** Evaluate your company's ESG performance based on new, performance-oriented criteria. Please complete all inputs.")
-
-# --- Company Profile and Context ---
-st.header("🏢 Company Profile and Context")
-st.markdown("---")
-
-# Define industry options for the selectbox
-INDUSTRY_OPTIONS = [
-    "Select Industry...",
-    "Technology",
-    "Financial Services",
-    "Manufacturing",
-    "Construction",
-    "Energy & Utilities",
-    "Healthcare",
-    "Retail",
-    "Other"
-]
-
-col_name, col_industry = st.columns([1, 1])
-
-with col_name:
-    st.text_input("Company Name:", key="company_name")
-with col_industry:
-    selected_industry = st.selectbox("Company Industry:", options=INDUSTRY_OPTIONS, key="company_industry")
-
-st.text_area("✍️ Describe any significant ESG-related achievements or challenges not covered:",
-             key="company_context", height=100)
-st.markdown("---")
-
-# --- Define NEW Question Structure with Alphanumeric Numbering ---
-detailed_questions: Dict[str, Any] = {
-    "E": {
-        "title": "A. ENVIRONMENTAL PERFORMANCE (15 Questions)",
-        "sections": [
-            ("1. Energy & Emissions", [
-                "Is the company actively increasing the share of renewable energy in its total energy consumption?",
-                "Does the company measure and manage Scope 1, 2, and 3 emissions as part of a structured emissions-reduction strategy?",
-                "Has the company set measurable and time-bound GHG reduction targets aligned with industry or national climate goals?",
-                "Does the company demonstrate year-on-year reduction or stable performance in Scope 1 and Scope 2 emissions?",
-            ]),
-            ("2. Water Management", [
-                "Does the company show responsible water usage through reductions, recycling, or efficiency improvements?",
-                "Does the company proactively assess and mitigate water-related risks in high water-stress regions?",
-            ]),
-            ("3. Waste & Resource Management", [
-                "Is the company increasing the proportion of waste that is recycled or reused instead of sent to landfill?",
-            ]),
-            ("4. Pollution & Compliance", [
-                "Has the company maintained a clean environmental compliance record with minimal or no penalties in the last three years?",
-                "Does the company maintain certified environmental management systems (e.g., ISO 14001) to ensure continued compliance?",
-            ]),
-            ("5. Energy Efficiency & Biodiversity", [
-                "Does the company actively implement energy-efficiency initiatives to reduce energy intensity over time?",
-                "Has the company identified and taken steps to protect biodiversity in ecologically sensitive operating regions?",
-            ])
-        ]
-    },
-    "S": {
-        "title": "B. SOCIAL PERFORMANCE (20 Questions)",
-        "sections": [
-            ("1. Workforce Composition & Diversity", [
-                "Does the company demonstrate a healthy gender balance that is reasonable for the industry?",
-                "Is the representation of women in managerial roles improving or maintained at a competitive level relative to industry norms?",
-            ]),
-            ("2. Employee Wellbeing, Training & Safety", [
-                "Is the company’s workplace injury rate (LTI/LTIFR) low compared to industry benchmarks?",
-                "Does the company provide sufficient annual training hours to support employee development across all levels?",
-                "Is the company certified under recognized occupational health and safety standards (e.g., ISO 45001)?",
-            ]),
-            ("3. Human Rights & Labour Standards", [
-                "Are there strong human-rights practices in place with no indicators of child or forced labour risks?",
-                "Does the company consistently comply with statutory labour laws (working hours, wages, benefits)?",
-                "Does the company have mechanisms to identify and address labour-related grievances effectively?",
-            ]),
-            ("4. Social Impact & Community Relations", [
-                "Does the company deliver CSR initiatives that show measurable community impact?",
-                "Does the company ensure timely and effective resolution of customer grievances?",
-            ]),
-            ("5. Pay Equality & Turnover", [
-                "Is the gender pay gap within a reasonable range, indicating fair compensation practices?",
-            ])
-        ]
-    },
-    "G": {
-        "title": "C. GOVERNANCE PERFORMANCE (15 Questions)",
-        "sections": [
-            ("1. Board Structure & Oversight", [
-                "Does the company maintain a well-balanced board with adequate independent and women directors?",
-                "Is there a competency matrix showing that board members possess relevant and diverse expertise?",
-                "Is ESG oversight integrated at the board or senior leadership level?",
-            ]),
-            ("2. Ethical Business Conduct & Transparency", [
-                "Does the company maintain an effective whistleblower mechanism with prompt investigations?",
-                "Is the company actively training employees and directors on anti-corruption and ethical conduct?",
-                "Does the company consistently publish audited financial statements without delays or qualifications?",
-            ]),
-            ("3. Executive Compensation", [
-                "Is executive compensation aligned with long-term business sustainability and ESG goals?",
-            ]),
-            ("4. Risk Management & Internal Controls", [
-                "Does the company identify and manage ESG-related risks through defined mitigation strategies?",
-                "Does the company maintain a robust enterprise risk-management (ERM) framework?",
-            ]),
-            ("5. Compliance & Legal", [
-                "Has the company maintained a strong legal compliance record with limited penalties or litigations?",
-                "Does the company have a strong data-protection and cybersecurity program?",
-            ]),
-            ("6. Supply Chain Governance", [
-                "Does the company evaluate suppliers for ESG risks and compliance?",
-                "Has the company demonstrated awareness and mitigation of ESG risks within its supply chain?",
-            ])
-        ]
-    }
-}
-
-# --- Industry-Specific Thresholds Definition (Kept for Social Scoring) ---
-INDUSTRY_THRESHOLDS_MAP: Dict[str, Dict[str, float]] = {
-    "Technology": {"div_high": 0.35, "div_medium": 0.20, "pay_gap_low": 0.08, "pay_gap_medium": 0.20,
-                   "attrition_gap_low": 0.04, "attrition_gap_medium": 0.10},
-    "Financial Services": {"div_high": 0.45, "div_medium": 0.30, "pay_gap_low": 0.10, "pay_gap_medium": 0.22,
-                           "attrition_gap_low": 0.06, "attrition_gap_medium": 0.12},
-    "Manufacturing": {"div_high": 0.20, "div_medium": 0.10, "pay_gap_low": 0.12, "pay_gap_medium": 0.28,
-                      "attrition_gap_low": 0.08, "attrition_gap_medium": 0.15},
-    "Construction": {"div_high": 0.15, "div_medium": 0.08, "pay_gap_low": 0.15, "pay_gap_medium": 0.30,
-                     "attrition_gap_low": 0.10, "attrition_gap_medium": 0.20},
-    "Energy & Utilities": {"div_high": 0.25, "div_medium": 0.15, "pay_gap_low": 0.10, "pay_gap_medium": 0.25,
-                           "attrition_gap_low": 0.07, "attrition_gap_medium": 0.14},
-    "Healthcare": {"div_high": 0.55, "div_medium": 0.40, "pay_gap_low": 0.05, "pay_gap_medium": 0.15,
-                   "attrition_gap_low": 0.03, "attrition_gap_medium": 0.08},
-    "Retail": {"div_high": 0.50, "div_medium": 0.35, "pay_gap_low": 0.08, "pay_gap_medium": 0.20,
-               "attrition_gap_low": 0.05, "attrition_gap_medium": 0.12},
-    "DEFAULT": {"div_high": 0.40, "div_medium": 0.25, "pay_gap_low": 0.10, "pay_gap_medium": 0.25,
-                "attrition_gap_low": 0.05, "attrition_gap_medium": 0.12},
-}
-
-# --- Fixed Performance Thresholds for NEW Metrics ---
-PERFORMANCE_THRESHOLDS: Dict[str, float] = {
-    "ghg_high": 500, "ghg_medium": 150,  # Tonnes CO2e: <=150=1, 151-500=0.5, >500=0
-    "water_high": 10000, "water_medium": 50000,  # KL: <10k=1, 10k-50k=0.5, >50k=0 (Rough Example)
-    "waste_haz_high": 10, "waste_haz_medium": 50,  # Tonnes: <10=1, 10-50=0.5, >50=0 (Rough Example)
-    "renew_high": 0.50, "renew_medium": 0.20,  # % Renewable: >=50=1, 20-49=0.5, <20=0
-    "csr_high": 1.10, "csr_medium": 1.00,  # CSR Utilisation: >=110%=1, 100-109=0.5, <100=0
-}
-
-# --- Initialize Response Containers ---
-all_responses: list[int] = []  # Stores 0 or 1 for all Yes/No questions
-env_responses: list[int] = []
-social_responses: list[int] = []
-gov_responses: list[int] = []
-q_key_index = 1  # Used for unique key generation across all Streamlit radios
-
-
-# --- Display Sections and Collect Responses ---
-
-def collect_responses(category_key: str, response_list: list[int]):
-    global q_key_index
-    data = detailed_questions[category_key]
-
-    # Calculate total questions in this category for the expander title
-    total_q_count = sum(len(q) for _, q in data["sections"])
-
-    with st.expander(f"**{data['title']}** - Click to answer {total_q_count} Questions", expanded=False):
-        category_prefix = category_key
-
-        for sub_index, (section_title, questions) in enumerate(data["sections"], 1):
-            num_questions = len(questions)
-            st.markdown(f"**{category_prefix}.{sub_index}. {section_title}** ({num_questions} questions)")
-
-            for q_sub_index, q in enumerate(questions, 1):
-                question_prefix = f"{category_prefix}.{sub_index}.{q_sub_index}"
-
-                response = st.radio(
-                    f"**{question_prefix}** {q}",
-                    options=["Yes", "No"],
-                    index=None,
-                    key=f"q{q_key_index}_{category_key}",
-                    horizontal=True
-                )
-                score_val = 1 if response == "Yes" else 0
-                response_list.append(score_val)
-                all_responses.append(score_val)
-                q_key_index += 1
-
-
-# 1. Environmental Section (A)
-collect_responses("E", env_responses)
-
-# 2. Social Section (B)
-collect_responses("S", social_responses)
-
-# 3. Governance Section (C)
-collect_responses("G", gov_responses)
-
-# --- D. MANDATORY SOCIAL INPUTS (NUMERIC ENTRIES) ---
-st.header("🔢 D. Mandatory Workforce & Pay Inputs")
-st.caption("These inputs drive calculations for Gender Diversity, Pay Equity, and Attrition Gap scores.")
-st.markdown("---")
-
-col_s1, col_s2, col_s3 = st.columns(3)
-
-# S. Mandatory Inputs
-with col_s1:
-    male_employees = st.number_input("1. Male Employees:", min_value=0, step=1, key="male_count_new", value=500)
-    female_employees = st.number_input("2. Female Employees:", min_value=0, step=1, key="female_count_new", value=200)
-    avg_male_pay = st.number_input("3. Avg. Male Pay (₹):", min_value=0.0, step=10000.0,
-                                   key="male_pay_new", value=1500000.0)
-
-with col_s2:
-    male_attrition = st.number_input("4. Male Attrition (Count):", min_value=0, step=1,
-                                     key="male_attrition_new", value=50)
-    female_attrition = st.number_input("5. Female Attrition (Count):", min_value=0, step=1,
-                                       key="female_attrition_new", value=25)
-    avg_female_pay = st.number_input("6. Avg. Female Pay (₹):", min_value=0.0, step=10000.0,
-                                     key="female_pay_new", value=1300000.0)
-
-with col_s3:
-    women_manager_pct = st.number_input("7. % of women in managerial roles:", min_value=0.0, max_value=100.0,
-                                        key="women_manager_pct", value=25.0)  # S.1.4
-    employee_turnover_pct = st.number_input("8. Total Employee Turnover Rate (%):", min_value=0.0, max_value=100.0,
-                                            key="employee_turnover_pct", value=15.0)  # S.5.2
-st.markdown("---")
-
-# --- F. CORE PERFORMANCE METRICS (QUANTITATIVE) - NEW SECTION ---
-st.header("📈 E. Core Performance Metrics (Environmental & Governance)")
-st.caption("Quantitative inputs driving performance scores.")
-st.markdown("---")
-
-# E. Numeric Inputs
-st.subheader("E.1 Environmental Metrics")
-col_e1, col_e2 = st.columns(2)
-with col_e1:
-    ghg_emissions = st.number_input("1. Total GHG emissions (tonnes CO₂e):", min_value=0.0, key="ghg_emissions_new",
-                                    value=300.0)  # E.1.5
-    water_consumption = st.number_input("2. Annual water consumption (kilolitres):", min_value=0.0,
-                                        key="water_consumption", value=15000.0)  # E.2.3
-with col_e2:
-    hazardous_waste = st.number_input("3. Total hazardous waste generated (tonnes):", min_value=0.0,
-                                      key="hazardous_waste", value=15.0)  # E.3.2
-    renewable_pct = st.number_input("4. % of total energy from renewable sources:", min_value=0.0, max_value=100.0,
-                                    key="renewable_pct", value=30.0)  # E.5.3
-
-# S. Numeric Inputs
-st.subheader("E.2 Social & Governance Metrics")
-col_s_g1, col_s_g2 = st.columns(2)
-with col_s_g1:
-    workplace_injuries = st.number_input("5. Total workplace injuries/accidents last year:", min_value=0, step=1,
-                                         key="workplace_injuries", value=1)  # S.2.3
-    csr_utilisation_pct = st.number_input("6. CSR utilisation vs mandated (%):", min_value=0.0, step=1.0,
-                                          key="csr_utilisation_pct", value=105.0)  # S.4.2
-with col_s_g2:
-    whistleblower_resolved = st.number_input("7. Whistleblower complaints resolved:", min_value=0, step=1,
-                                             key="whistleblower_resolved", value=5)  # G.4.3
-    regulatory_noncompliance = st.number_input("8. Regulatory non-compliance incidents (3 years):", min_value=0,
-                                               step=1, key="regulatory_noncompliance", value=0)  # G.5.2
-st.markdown("---")
-
-# --- Initialize Score Calculation Logic ---
-# FIX: Recalculate the total number of non-numeric questions for comparison
-total_disclosure_questions = sum(
-    len(questions)
-    for category_data in detailed_questions.values()
-    for _, questions in category_data["sections"]
-)
-
-
-def get_grade_class(score: float) -> str:
-    """Returns a CSS class for the grade banner based on the ESG Score."""
-    if score >= 90:
-        return "grade-A-plus"
-    elif score >= 80:
-        return "grade-A"
-    elif score >= 70:
-        return "grade-B-plus"
-    elif score >= 60:
-        return "grade-B"
-    elif score >= 50:
-        return "grade-C-plus"
-    else:
-        return "grade-C"
-
-
-# --- Calculate Score ---
-if st.button("🚀 Calculate Detailed ESG Risk and Dashboard"):
-    # 1. Input Validation (Using st.empty for cleaner error display)
-    error_placeholder = st.empty()
-    if selected_industry == "Select Industry...":
-        error_placeholder.error("🛑 **Input Error:** Please select a valid Industry.")
-        st.stop()
-
-    # The length of all_responses is populated across multiple calls, check against the expected total.
-    if len(all_responses) != total_disclosure_questions:
-        error_placeholder.error(
-            f"⚠️ **Input Error:** Please answer all {total_disclosure_questions} Yes/No questions. ({len(all_responses)} answered)")
-        st.stop()
-
-    # All checks passed, clear error placeholder
-    error_placeholder.empty()
-
-    # Get thresholds based on selected industry or default
-    thresholds_key = selected_industry if selected_industry in INDUSTRY_THRESHOLDS_MAP else "DEFAULT"
-    TH = INDUSTRY_THRESHOLDS_MAP[thresholds_key]
-    PT = PERFORMANCE_THRESHOLDS  # Performance Thresholds
-
-    # ----------------------------------------------------
-    # --- 1. DISCLOSURE SCORES (A, B, C) ---
-    # ----------------------------------------------------
-
-    env_score_sum = sum(env_responses)
-    social_disclosure_sum = sum(social_responses)
-    gov_score_sum = sum(gov_responses)
-    total_disclosure_score = sum(all_responses)
-
-    # ----------------------------------------------------
-    # --- 2. PERFORMANCE METRIC SCORES (D & F) ---
-    # ----------------------------------------------------
-
-    # A. GENDER DIVERSITY (D.1, D.2)
-    total_employees = male_employees + female_employees
-    if total_employees > 0:
-        gender_diversity_pct = female_employees / total_employees
-        if gender_diversity_pct > TH['div_high']:
-            diversity_score = 1.0
-        elif gender_diversity_pct >= TH['div_medium']:
-            diversity_score = 0.5
-        else:
-            diversity_score = 0.0
-    else:
-        gender_diversity_pct = 0.0
-        diversity_score = 0.0
-
-    # B. PAY EQUITY (D.3, D.6)
-    if avg_male_pay > 0:
-        pay_gap = (avg_male_pay - avg_female_pay) / avg_male_pay
-        if pay_gap <= TH['pay_gap_low']:
-            pay_equity_score = 1.0
-        elif pay_gap <= TH['pay_gap_medium']:
-            pay_equity_score = 0.5
-        else:
-            pay_equity_score = 0.0
-    else:
-        pay_gap = 0.0
-        pay_equity_score = 0.0
-
-    # C. ATTRITION GAP (D.4, D.5)
-    male_attrition_rate = (male_attrition / male_employees) if male_employees > 0 else 0.0
-    female_attrition_rate = (female_attrition / female_employees) if female_employees > 0 else 0.0
-    attrition_gap = abs(male_attrition_rate - female_attrition_rate)
-
-    if attrition_gap <= TH['attrition_gap_low']:
-        attrition_score = 1.0
-    elif attrition_gap <= TH['attrition_gap_medium']:
-        attrition_score = 0.5
-    else:
-        attrition_score = 0.0
-
-    # D. GHG Emissions Score (E.1)
-    if ghg_emissions <= PT['ghg_medium']:
-        ghg_score = 1.0
-    elif ghg_emissions <= PT['ghg_high']:
-        ghg_score = 0.5
-    else:
-        ghg_score = 0.0
-
-    # E. Renewable Energy Score (E.4)
-    renewable_ratio = renewable_pct / 100
-    if renewable_ratio >= PT['renew_high']:
-        renewable_score = 1.0
-    elif renewable_ratio >= PT['renew_medium']:
-        renewable_score = 0.5
-    else:
-        renewable_score = 0.0
-
-    # F. Hazardous Waste Score (E.3)
-    if hazardous_waste <= PT['waste_haz_high']:
-        waste_score = 1.0
-    elif hazardous_waste <= PT['waste_haz_medium']:
-        waste_score = 0.5
-    else:
-        waste_score = 0.0
-
-    # G. Water Consumption Score (E.2 - Lower is better)
-    if water_consumption <= PT['water_high']:
-        water_score = 1.0
-    elif water_consumption <= PT['water_medium']:
-        water_score = 0.5
-    else:
-        water_score = 0.0
-
-    # H. CSR Utilisation Score (E.6)
-    csr_ratio = csr_utilisation_pct / 100
-    if csr_ratio >= PT['csr_high']:
-        csr_score = 1.0
-    elif csr_ratio >= PT['csr_medium']:
-        csr_score = 0.5
-    else:
-        csr_score = 0.0
-
-    # I. Regulatory Compliance Score (E.8 - Lower is better)
-    if regulatory_noncompliance == 0:
-        compliance_score = 1.0
-    elif regulatory_noncompliance <= 2:
-        compliance_score = 0.5
-    else:
-        compliance_score = 0.0
-
-    # J. Injury Score (E.5)
-    if workplace_injuries == 0:
-        injury_score = 1.0
-    elif workplace_injuries <= 2:
-        injury_score = 0.5
-    else:
-        injury_score = 0.0
-
-    # K. Employee Turnover Rate (D.8)
-    if employee_turnover_pct <= 10.0:
-        turnover_score = 1.0
-    elif employee_turnover_pct <= 20.0:
-        turnover_score = 0.5
-    else:
-        turnover_score = 0.0
-
-    # L. Whistleblower Resolved (E.7)
-    # C.2.2 is the 4th question in gov_responses (index 3)
-    whistleblower_mechanism_disclosed = gov_responses[3] if len(gov_responses) > 3 else 0
-    if whistleblower_mechanism_disclosed == 1 and whistleblower_resolved > 0:
-        whistleblower_score = 1.0
-    elif whistleblower_mechanism_disclosed == 1:
-        whistleblower_score = 0.5  # Mechanism exists, but no resolutions (neutral)
-    else:
-        whistleblower_score = 0.0
-
-    # TOTAL PERFORMANCE METRICS (Unweighted for simplicity/correct identification of worst metric)
-    unweighted_performance_metrics = {
-        "Gender Diversity Score": diversity_score,
-        "Pay Equity Score": pay_equity_score,
-        "Attrition Equality Score": attrition_score,
-        "GHG Emissions Score": ghg_score,
-        "Renewable Energy Score": renewable_score,
-        "Hazardous Waste Score": waste_score,
-        "Water Consumption Score": water_score,
-        "CSR Utilisation Score": csr_score,
-        "Regulatory Compliance Score": compliance_score,
-        "Workplace Injury Score": injury_score,
-        "Employee Turnover Score": turnover_score,
-        "Whistleblower Score": whistleblower_score,
-    }
-
-    # ----------------------------------------------------
-    # --- 3. WEIGHTED SCORE CALCULATION (UNIFORM WEIGHT=3) ---
-    # ----------------------------------------------------
-
-    DISCLOSURE_WEIGHT = 1
-    # UNIFORM weight for all performance metrics, as requested
-    PERFORMANCE_WEIGHT = 3
-
-    # Calculate Weighted Performance Scores (All use the same weight)
-    performance_metrics_weighted = {
-        k: v * PERFORMANCE_WEIGHT for k, v in unweighted_performance_metrics.items()
-    }
-
-    # Calculate Max Weighted Scores (All use the same weight)
-    max_scores = {
-        k: PERFORMANCE_WEIGHT for k in unweighted_performance_metrics.keys()
-    }
-
-    total_weighted_performance_score = sum(performance_metrics_weighted.values())
-    TOTAL_PERFORMANCE_METRICS_COUNT = len(unweighted_performance_metrics)
-    TOTAL_PERFORMANCE_METRICS_WEIGHTED = TOTAL_PERFORMANCE_METRICS_COUNT * PERFORMANCE_WEIGHT
-
-    TOTAL_WEIGHTED_MAX_SCORE = (total_disclosure_questions * DISCLOSURE_WEIGHT) + TOTAL_PERFORMANCE_METRICS_WEIGHTED
-
-    total_weighted_score = (total_disclosure_score * DISCLOSURE_WEIGHT) + total_weighted_performance_score
-
-    # Final Score and Risk Score
-    score = (total_weighted_score / TOTAL_WEIGHTED_MAX_SCORE) * 100
-    risk_score = 100 - score  # ESG Risk is the inverse of the ESG Score
-
-    # --- ESG Grade Logic ---
-    if score >= 90:
-        grade = "A+"
-    elif score >= 80:
-        grade = "A"
-    elif score >= 70:
-        grade = "B+"
-    elif score >= 60:
-        grade = "B"
-    elif score >= 50:
-        grade = "C+"
-    else:
-        grade = "C"
-
-    # --- Calculate Percentage Variables for Output ---
-    env_pct = env_score_sum / len(env_responses) * 100 if len(env_responses) > 0 else 0
-    social_pct = social_disclosure_sum / len(social_responses) * 100 if len(social_responses) > 0 else 0
-    gov_pct = gov_score_sum / len(gov_responses) * 100 if len(gov_responses) > 0 else 0
-
-    # Attrition Rate (Total)
-    total_attrition = male_attrition + female_attrition
-    total_attrition_rate = (total_attrition / total_employees) * 100 if total_employees > 0 else 0
-
-    # --- Display Summary Results ---
-    st.markdown("---")
-    st.header("✅ ESG Risk Management Dashboard")
-    company_name = st.session_state.get('company_name', 'Unnamed Company')
-    st.subheader(f"Results for: **{company_name}** ({thresholds_key} Industry)")
-
-    ## 1. SCORE BANNER
-    grade_class = get_grade_class(score)
-    col_score, col_grade = st.columns(2)
-    with col_score:
-        # DISPLAY RISK SCORE
-        st.markdown(
-            f"<div class='{grade_class}'>📉 OVERALL ESG RISK: **{risk_score:.1f}%**</div>",
-            unsafe_allow_html=True
-        )
-    with col_grade:
-        # DISPLAY ESG GRADE
-        st.markdown(
-            f"<div class='{grade_class}'>⭐ ESG GRADE: **{grade}**</div>",
-            unsafe_allow_html=True
-        )
-
-    st.caption(
-        f"Performance Score: {score:.1f}% (100% - Risk Score) | All performance metrics are uniformly weighted **{PERFORMANCE_WEIGHT}x**.")
-    # Progress bar reflects the Performance Score (higher = better)
-    st.progress(int(score))
-
-    st.markdown("---")
-
-    ## 2. RISK ALERTS
-    st.subheader("🚨 Risk Alerts")
-    alerts = []
-    if pay_gap > TH['pay_gap_medium']:
-        alerts.append("High **Gender Pay Inequity** Risk (Gap exceeds medium industry threshold)")
-    if regulatory_noncompliance > 0:
-        alerts.append("Significant **Compliance** Risk (Non-compliance incidents recorded in the last 3 years)")
-    if ghg_emissions > PT['ghg_high']:
-        alerts.append("Severe **Carbon Emissions** Risk (GHG exceeds 500 Tonnes CO₂e)")
-    if renewable_ratio < PT['renew_medium']:
-        alerts.append("Moderate **Climate Transition** Risk (Low adoption of renewable energy sources)")
-    if workplace_injuries > 2:
-        alerts.append("High **Operational Safety** Risk (Multiple workplace injuries recorded)")
-
-    if alerts:
-        alert_cols = st.columns(min(3, len(alerts)))  # Limit to 3 columns for better layout
-        for i, alert in enumerate(alerts):
-            alert_cols[i % len(alert_cols)].error(alert)
-    else:
-        st.success("🎉 No immediate, high-priority risk alerts triggered.")
-
-    st.markdown("---")
-
-    ## 3. DASHBOARD KPI CARDS
-    st.subheader("💎 Key Performance Indicators (KPIs)")
-
-    kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
-
-    kpi1.metric("Gender Diversity", f"{gender_diversity_pct * 100:.1f}%",
-                help="Percentage of female employees in the workforce.")
-    # Use delta to show how far the pay gap is from 0% (ideal)
-    kpi2.metric("Gender Pay Gap", f"{pay_gap * 100:.1f}%",
-                delta=f"vs Target {TH['pay_gap_low'] * 100:.1f}%", delta_color="inverse",
-                help="Difference between average male and female pay (Male higher). Lower is better.")
-    kpi3.metric("GHG Emissions", f"{ghg_emissions:.0f} tCO₂e",
-                delta=f"vs High {PT['ghg_high']:.0f} tCO₂e", delta_color="inverse",
-                help="Total Scope 1 & 2 Emissions.")
-    kpi4.metric("Renewable Energy %", f"{renewable_pct:.1f}%",
-                delta=f"vs Target {PT['renew_high'] * 100:.0f}%",
-                help="Percentage of total energy sourced from renewables.")
-    kpi5.metric("Workplace Injuries", f"{workplace_injuries:.0f}",
-                delta="0 is ideal", delta_color="inverse",
-                help="Total workplace injuries/accidents last year. Lower is better.")
-
-    st.markdown("---")
-
-    ## 4. DETAILED BREAKDOWN & VISUALS
-    st.write("### 📊 Performance and Disclosure Breakdown")
-
-    # Detailed scores in an expander
-    with st.expander("📝 Disclosure vs. Performance Breakdown", expanded=False):
-        st.markdown(
-            f"**Total Disclosure Score:** {total_disclosure_score}/{total_disclosure_questions} Questions Answered")
-        st.markdown(
-            f"**Total Performance Score (Weighted):** {total_weighted_performance_score}/{TOTAL_PERFORMANCE_METRICS_WEIGHTED} Weighted Performance Points")
-        st.markdown("---")
-
-        # Disclosure Scores
-        st.markdown("#### Disclosure Completion")
-        col_disc1, col_disc2, col_disc3 = st.columns(3)
-        col_disc1.info(f"**Environmental:** {env_score_sum}/{len(env_responses)} ({env_pct:.1f}% Yes)")
-        col_disc2.info(f"**Social:** {social_disclosure_sum}/{len(social_responses)} ({social_pct:.1f}% Yes)")
-        col_disc3.info(f"**Governance:** {gov_score_sum}/{len(gov_responses)} ({gov_pct:.1f}% Yes)")
-
-        st.markdown("#### Unweighted Performance Metric Results (Score out of 100%)")
-        col_d1, col_d2, col_d3 = st.columns(3)
-
-        # Use unweighted scores for displaying % performance here
-        performance_list = list(unweighted_performance_metrics.items())
-
-        for i, (metric_name, score_val) in enumerate(performance_list):
-            display_score = score_val * 100
-
-            if i < 4:
-                col_d = col_d1
-            elif i < 8:
-                col_d = col_d2
-            else:
-                col_d = col_d3
-
-            # Use formatted text for the performance score
-            col_d.metric(f"**{i + 1}.** {metric_name.replace(' Score', '')}", f"{display_score:.1f}%")
-
-    ## Interactive Plotly Charts Section
-    st.write("### 📈 Visual Metrics")
-
-    col_charts1, col_charts2 = st.columns(2)
-
-    # 1. GENDER DIVERSITY PIE CHART (Plotly)
-    with col_charts1:
-        if total_employees > 0:
-            df_diversity = pd.DataFrame({
-                'Gender': ['Male', 'Female'],
-                'Count': [male_employees, female_employees]
-            })
-            fig1 = px.pie(
-                df_diversity,
-                values='Count',
-                names='Gender',
-                title='1. Workforce Gender Diversity',
-                color_discrete_sequence=['#1f77b4', '#ff7f0e']  # Blue/Orange
-            )
-            fig1.update_traces(textinfo='percent+label', marker=dict(line=dict(color='#000000', width=1)))
-            st.plotly_chart(fig1, use_container_width=True)
-
-    # 2. CORE ENVIRONMENTAL PERFORMANCE RADAR CHART (New)
-    with col_charts2:
-        df_env_radar = pd.DataFrame(dict(
-            r=[ghg_score * 100, renewable_score * 100, water_score * 100, waste_score * 100],
-            theta=['GHG Score', 'Renewable Energy Score', 'Water Mgmt Score', 'Waste Mgmt Score'],
-            Metric=['Environmental'] * 4
-        ))
-        fig_radar_env = px.line_polar(
-            df_env_radar,
-            r='r',
-            theta='theta',
-            line_close=True,
-            range_r=[0, 100],
-            color_discrete_sequence=['#28a745'],  # Green
-            title="2. Core Environmental Performance Radar"
-        )
-        fig_radar_env.update_traces(fill='toself')
-        st.plotly_chart(fig_radar_env, use_container_width=True)
-
-    # 3. GENDER PAY BAR CHART
-    chart3, chart4 = st.columns(2)
-    with chart3:
-        if avg_male_pay > 0 or avg_female_pay > 0:
-            df_pay = pd.DataFrame({
-                'Gender': ['Male', 'Female'],
-                'Average Pay (₹)': [avg_male_pay, avg_female_pay]
-            })
-            fig3 = px.bar(
-                df_pay,
-                x='Gender',
-                y='Average Pay (₹)',
-                title='3. Average Annual Pay Comparison',
-                color='Gender',
-                color_discrete_map={'Male': '#1f77b4', 'Female': '#ff7f0e'},
-                text='Average Pay (₹)'
-            )
-            fig3.update_traces(texttemplate='₹%{text:,.0f}', textposition='outside')
-            fig3.update_layout(uniformtext_minsize=8, uniformtext_mode='hide')
-            st.plotly_chart(fig3, use_container_width=True)
-
-    # 4. SOCIAL & GOVERNANCE PERFORMANCE BAR CHART
-    with chart4:
-        df_social_gov = pd.DataFrame({
-            'Metric': ['Pay Equity Score', 'Injury Score', 'Compliance Score', 'Turnover Score'],
-            'Score (%)': [pay_equity_score * 100, injury_score * 100, compliance_score * 100, turnover_score * 100]
-        })
-        fig4 = px.bar(
-            df_social_gov,
-            x='Metric',
-            y='Score (%)',
-            title='4. Key Social & Governance Performance Scores',
-            color='Metric',
-            color_discrete_sequence=px.colors.qualitative.Set1,
-            range_y=[0, 100]
-        )
-        fig4.update_traces(texttemplate='%{y:.0f}%', textposition='outside')
-        st.plotly_chart(fig4, use_container_width=True)
-
-    st.markdown("---")
-
-    ## 5. TOP AREA FOR IMPROVEMENT (Single Worst Core Metric)
-    st.header("🎯 Highest Priority Area for Improvement")
-
-    # Filter for only Core Performance Metrics
-    core_performance_data = {
-        k.replace(' Score', ''): v * 100 for k, v in unweighted_performance_metrics.items()
-    }
-
-    # Sort parameters by score (ascending)
-    sorted_core_improvement = sorted(core_performance_data.items(), key=lambda item: item[1])
-
-    # Get the weakest metric (the one with the lowest score)
-    if sorted_core_improvement:
-        weakest_param, weakest_score = sorted_core_improvement[0]
-
-        # Display ONLY the parameter and the instruction to improve it
-        st.markdown(f"### 🛑 Worst Core Performance Metric: **{weakest_param}**")
-
-        st.info(
-            f"**Action:** The parameter **{weakest_param}** is the weakest performance metric. You must prioritize efforts to improve it."
-        )
-    else:
-        st.success(
-            "All core performance metrics are currently excellent or not enough data was provided to calculate a weakest metric.")
\ No newline at end of file
+import streamlit as st
+import plotly.express as px
+import pandas as pd
+import datetime
+from typing import Dict, Any, Optional
+
+from esg_alerts import alert_messages
+from esg_cache import ResultCache, company_fingerprint
+from esg_peers import MIN_PEERS, PeerIndex, peer_standing
+from esg_profiling import Profiler
+from esg_scoring import (
+    CONFIG_STORE, QUESTION_IDS, METRIC_LABELS, total_disclosure_questions,
+    get_config, get_grade, get_grade_class, score_portfolio,
+)
+from esg_sensitivity import rank_actions
+from esg_store import AS_OF_COLUMN, COMPANY_COLUMN, ResultStore, record_row
+from esg_trends import TREND_COLUMNS, yoy_deltas
+
+st.set_page_config(page_title="Revised ESG Performance Scorecard", page_icon="📈", layout="wide")
+
+# --- Profiling (per-stage timings; enable with ESG_PROFILE=1 or ?profile=1) ---
+if "profiler" not in st.session_state:
+    st.session_state["profiler"] = Profiler.from_env()
+profiler: Profiler = st.session_state["profiler"]
+if st.query_params.get("profile") == "1":
+    profiler.enabled = True
+profiler.start_run()
+profiler.stage("page_setup")
+
+# --- Scoring Configuration ---
+# Compiled once per config file version and shared by every session; this only stats the file
+config = get_config()
+if CONFIG_STORE.last_error:
+    st.sidebar.warning(f"⚠️ Scoring config reload failed; still using version {config.label} "
+                       f"({config.version}).\n\n{CONFIG_STORE.last_error}")
+
+# --- Custom Styling (Injecting CSS for a cleaner look) ---
+st.markdown("""
+<style>
+    .reportview-container .main {
+        padding-top: 2rem;
+    }
+    .stButton>button {
+        background-color: #4CAF50;
+        color: white;
+        border-radius: 12px;
+        padding: 10px 24px;
+        font-size: 16px;
+        font-weight: bold;
+    }
+    h2, h3, h4 {
+        color: #2e6c80; /* A nice shade of blue */
+    }
+    /* Style for KPI boxes for visual separation */
+    [data-testid="stMetric"] {
+        background-color: #f0f2f6;
+        padding: 15px;
+        border-radius: 10px;
+        border: 1px solid #e0e0e0;
+        box-shadow: 2px 2px 5px rgba(0,0,0,0.1);
+    }
+    /* Use CSS for a color-coded grade/risk banner */
+    .grade-A-plus, .grade-A, .grade-B-plus, .grade-B, .grade-C-plus, .grade-C {
+        padding: 10px 15px;
+        border-radius: 8px;
+        font-size: 1.5em;
+        font-weight: 700;
+        text-align: center;
+        margin-bottom: 20px;
+        color: white;
+        text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.4);
+    }
+    /* RISK VIEW: Green/Yellow/Red reflects the ESG Score (High Score = Low Risk) */
+    .grade-A-plus, .grade-A { background-color: #28a745; } /* Low Risk (High Score) */
+    .grade-B-plus, .grade-B { background-color: #ffc107; color: black; } /* Medium Risk */
+    .grade-C-plus, .grade-C { background-color: #dc3545; } /* High Risk (Low Score) */
+
+</style>
+""", unsafe_allow_html=True)
+
+st.title("✨ Performance-Focused ESG Scorecard Dashboard")
+st.markdown(
+    "**Objective:** Evaluate your company's ESG performance based on new, performance-oriented criteria. Please complete all inputs.")
+
+# --- Initialize Response Containers ---
+all_responses: list[int] = []  # Stores 0 or 1 for all Yes/No questions
+env_responses: list[int] = []
+social_responses: list[int] = []
+gov_responses: list[int] = []
+q_key_index = 1  # Used for unique key generation across all Streamlit radios
+
+
+# --- Display Sections and Collect Responses ---
+
+def collect_responses(category_key: str, response_list: list[int]):
+    global q_key_index
+    data = config.detailed_questions[category_key]
+
+    # Calculate total questions in this category for the expander title
+    total_q_count = sum(len(q) for _, q in data["sections"])
+
+    with st.expander(f"**{data['title']}** - Click to answer {total_q_count} Questions", expanded=False):
+        category_prefix = category_key
+
+        for sub_index, (section_title, questions) in enumerate(data["sections"], 1):
+            num_questions = len(questions)
+            st.markdown(f"**{category_prefix}.{sub_index}. {section_title}** ({num_questions} questions)")
+
+            for q_sub_index, q in enumerate(questions, 1):
+                question_prefix = f"{category_prefix}.{sub_index}.{q_sub_index}"
+
+                response = st.radio(
+                    f"**{question_prefix}** {q}",
+                    options=["Yes", "No"],
+                    index=None,
+                    key=f"q{q_key_index}_{category_key}",
+                    horizontal=True
+                )
+                score_val = 1 if response == "Yes" else 0
+                response_list.append(score_val)
+                all_responses.append(score_val)
+                q_key_index += 1
+
+
+# --- Prefill from the Portfolio Overview ---
+# Widget key of every numeric input; the integer ones must be set as ints
+NUMERIC_WIDGET_KEYS = {
+    "male_employees": "male_count_new", "female_employees": "female_count_new", "avg_male_pay": "male_pay_new",
+    "male_attrition": "male_attrition_new", "female_attrition": "female_attrition_new",
+    "avg_female_pay": "female_pay_new", "women_manager_pct": "women_manager_pct",
+    "employee_turnover_pct": "employee_turnover_pct", "ghg_emissions": "ghg_emissions_new",
+    "water_consumption": "water_consumption", "hazardous_waste": "hazardous_waste", "renewable_pct": "renewable_pct",
+    "workplace_injuries": "workplace_injuries", "csr_utilisation_pct": "csr_utilisation_pct",
+    "whistleblower_resolved": "whistleblower_resolved", "regulatory_noncompliance": "regulatory_noncompliance",
+}
+INTEGER_INPUTS = {"male_employees", "female_employees", "male_attrition", "female_attrition",
+                  "workplace_injuries", "whistleblower_resolved", "regulatory_noncompliance"}
+NUMERIC_DEFAULTS = {
+    "male_employees": 500, "female_employees": 200, "avg_male_pay": 1500000.0, "male_attrition": 50,
+    "female_attrition": 25, "avg_female_pay": 1300000.0, "women_manager_pct": 25.0, "employee_turnover_pct": 15.0,
+    "ghg_emissions": 300.0, "water_consumption": 15000.0, "hazardous_waste": 15.0, "renewable_pct": 30.0,
+    "workplace_injuries": 1, "csr_utilisation_pct": 105.0, "whistleblower_resolved": 5, "regulatory_noncompliance": 0,
+}
+
+
+def prefill_form(inputs: Dict[str, Any]):
+    """Loads a stored snapshot (from ``esg_overview.dashboard_inputs``) into the form widgets."""
+    st.session_state["company_name"] = str(inputs[COMPANY_COLUMN])
+    if inputs["industry"] in config.industry_options:
+        st.session_state["company_industry"] = inputs["industry"]
+    st.session_state["as_of_date"] = datetime.date.fromisoformat(str(inputs[AS_OF_COLUMN])[:10])
+    for index, qid in enumerate(QUESTION_IDS, 1):  # radio keys run q1..q35 across E, S and G
+        st.session_state[f"q{index}_{qid.split('.')[0]}"] = "Yes" if inputs[qid] else "No"
+    for column, widget_key in NUMERIC_WIDGET_KEYS.items():
+        value = inputs[column]
+        st.session_state[widget_key] = int(round(value)) if column in INTEGER_INPUTS else float(value)
+
+
+# Opening an obligor on the overview page fills the form and scores it at once
+prefill = st.session_state.pop("prefill_company", None)
+if prefill is not None:
+    prefill_form(prefill)
+# Defaults are set through session state, not value=: a widget given both a value and a
+# prefilled key makes Streamlit warn
+st.session_state.setdefault("as_of_date", datetime.date.today())
+for column, widget_key in NUMERIC_WIDGET_KEYS.items():
+    st.session_state.setdefault(widget_key, NUMERIC_DEFAULTS[column])
+
+# --- Input Form ---
+profiler.stage("questionnaire")
+# Every input lives in one form: answering a question or editing a number does not rerun the
+# script; scoring and charting run only when the form is submitted.
+with st.form("esg_inputs"):
+    # --- Company Profile and Context ---
+    st.header("🏢 Company Profile and Context")
+    st.markdown("---")
+
+    col_name, col_industry, col_as_of = st.columns([2, 2, 1])
+
+    with col_name:
+        st.text_input("Company Name:", key="company_name")
+    with col_industry:
+        selected_industry = st.selectbox("Company Industry:", options=config.industry_options, key="company_industry")
+    with col_as_of:
+        as_of_date = st.date_input("Reporting as-of date:", key="as_of_date")
+
+    st.text_area("✍️ Describe any significant ESG-related achievements or challenges not covered:",
+                 key="company_context", height=100)
+    st.markdown("---")
+
+    # 1. Environmental Section (A)
+    collect_responses("E", env_responses)
+
+    # 2. Social Section (B)
+    collect_responses("S", social_responses)
+
+    # 3. Governance Section (C)
+    collect_responses("G", gov_responses)
+
+    # --- D. MANDATORY SOCIAL INPUTS (NUMERIC ENTRIES) ---
+    st.header("🔢 D. Mandatory Workforce & Pay Inputs")
+    st.caption("These inputs drive calculations for Gender Diversity, Pay Equity, and Attrition Gap scores.")
+    st.markdown("---")
+
+    col_s1, col_s2, col_s3 = st.columns(3)
+
+    # S. Mandatory Inputs
+    with col_s1:
+        male_employees = st.number_input("1. Male Employees:", min_value=0, step=1, key="male_count_new")
+        female_employees = st.number_input("2. Female Employees:", min_value=0, step=1, key="female_count_new")
+        avg_male_pay = st.number_input("3. Avg. Male Pay (₹):", min_value=0.0, step=10000.0, key="male_pay_new")
+
+    with col_s2:
+        male_attrition = st.number_input("4. Male Attrition (Count):", min_value=0, step=1, key="male_attrition_new")
+        female_attrition = st.number_input("5. Female Attrition (Count):", min_value=0, step=1,
+                                           key="female_attrition_new")
+        avg_female_pay = st.number_input("6. Avg. Female Pay (₹):", min_value=0.0, step=10000.0,
+                                         key="female_pay_new")
+
+    with col_s3:
+        women_manager_pct = st.number_input("7. % of women in managerial roles:", min_value=0.0, max_value=100.0,
+                                            key="women_manager_pct")  # S.1.4
+        employee_turnover_pct = st.number_input("8. Total Employee Turnover Rate (%):", min_value=0.0, max_value=100.0,
+                                                key="employee_turnover_pct")  # S.5.2
+    st.markdown("---")
+
+    # --- F. CORE PERFORMANCE METRICS (QUANTITATIVE) - NEW SECTION ---
+    st.header("📈 E. Core Performance Metrics (Environmental & Governance)")
+    st.caption("Quantitative inputs driving performance scores.")
+    st.markdown("---")
+
+    # E. Numeric Inputs
+    st.subheader("E.1 Environmental Metrics")
+    col_e1, col_e2 = st.columns(2)
+    with col_e1:
+        ghg_emissions = st.number_input("1. Total GHG emissions (tonnes CO₂e):", min_value=0.0,
+                                        key="ghg_emissions_new")  # E.1.5
+        water_consumption = st.number_input("2. Annual water consumption (kilolitres):", min_value=0.0,
+                                            key="water_consumption")  # E.2.3
+    with col_e2:
+        hazardous_waste = st.number_input("3. Total hazardous waste generated (tonnes):", min_value=0.0,
+                                          key="hazardous_waste")  # E.3.2
+        renewable_pct = st.number_input("4. % of total energy from renewable sources:", min_value=0.0, max_value=100.0,
+                                        key="renewable_pct")  # E.5.3
+
+    # S. Numeric Inputs
+    st.subheader("E.2 Social & Governance Metrics")
+    col_s_g1, col_s_g2 = st.columns(2)
+    with col_s_g1:
+        workplace_injuries = st.number_input("5. Total workplace injuries/accidents last year:", min_value=0, step=1,
+                                             key="workplace_injuries")  # S.2.3
+        csr_utilisation_pct = st.number_input("6. CSR utilisation vs mandated (%):", min_value=0.0, step=1.0,
+                                              key="csr_utilisation_pct")  # S.4.2
+    with col_s_g2:
+        whistleblower_resolved = st.number_input("7. Whistleblower complaints resolved:", min_value=0, step=1,
+                                                 key="whistleblower_resolved")  # G.4.3
+        regulatory_noncompliance = st.number_input("8. Regulatory non-compliance incidents (3 years):", min_value=0,
+                                                   step=1, key="regulatory_noncompliance")  # G.5.2
+    st.markdown("---")
+
+    submitted = st.form_submit_button("🚀 Calculate Detailed ESG Risk and Dashboard") or prefill is not None
+
+
+def build_figures(inputs: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds the dashboard charts (Plotly figures are only read when rendered, so they can be cached)."""
+    figures = {}
+
+    # 1. GENDER DIVERSITY PIE CHART (Plotly)
+    if inputs["male_employees"] + inputs["female_employees"] > 0:
+        df_diversity = pd.DataFrame({
+            'Gender': ['Male', 'Female'],
+            'Count': [inputs["male_employees"], inputs["female_employees"]]
+        })
+        fig1 = px.pie(
+            df_diversity,
+            values='Count',
+            names='Gender',
+            title='1. Workforce Gender Diversity',
+            color_discrete_sequence=['#1f77b4', '#ff7f0e']  # Blue/Orange
+        )
+        fig1.update_traces(textinfo='percent+label', marker=dict(line=dict(color='#000000', width=1)))
+        figures["diversity"] = fig1
+
+    # 2. CORE ENVIRONMENTAL PERFORMANCE RADAR CHART (New)
+    df_env_radar = pd.DataFrame(dict(
+        r=[result["ghg_score"] * 100, result["renewable_score"] * 100, result["water_score"] * 100,
+           result["waste_score"] * 100],
+        theta=['GHG Score', 'Renewable Energy Score', 'Water Mgmt Score', 'Waste Mgmt Score'],
+        Metric=['Environmental'] * 4
+    ))
+    fig_radar_env = px.line_polar(
+        df_env_radar,
+        r='r',
+        theta='theta',
+        line_close=True,
+        range_r=[0, 100],
+        color_discrete_sequence=['#28a745'],  # Green
+        title="2. Core Environmental Performance Radar"
+    )
+    fig_radar_env.update_traces(fill='toself')
+    figures["env_radar"] = fig_radar_env
+
+    # 3. GENDER PAY BAR CHART
+    if inputs["avg_male_pay"] > 0 or inputs["avg_female_pay"] > 0:
+        df_pay = pd.DataFrame({
+            'Gender': ['Male', 'Female'],
+            'Average Pay (₹)': [inputs["avg_male_pay"], inputs["avg_female_pay"]]
+        })
+        fig3 = px.bar(
+            df_pay,
+            x='Gender',
+            y='Average Pay (₹)',
+            title='3. Average Annual Pay Comparison',
+            color='Gender',
+            color_discrete_map={'Male': '#1f77b4', 'Female': '#ff7f0e'},
+            text='Average Pay (₹)'
+        )
+        fig3.update_traces(texttemplate='₹%{text:,.0f}', textposition='outside')
+        fig3.update_layout(uniformtext_minsize=8, uniformtext_mode='hide')
+        figures["pay"] = fig3
+
+    # 4. SOCIAL & GOVERNANCE PERFORMANCE BAR CHART
+    df_social_gov = pd.DataFrame({
+        'Metric': ['Pay Equity Score', 'Injury Score', 'Compliance Score', 'Turnover Score'],
+        'Score (%)': [result["pay_equity_score"] * 100, result["injury_score"] * 100,
+                      result["compliance_score"] * 100, result["turnover_score"] * 100]
+    })
+    fig4 = px.bar(
+        df_social_gov,
+        x='Metric',
+        y='Score (%)',
+        title='4. Key Social & Governance Performance Scores',
+        color='Metric',
+        color_discrete_sequence=px.colors.qualitative.Set1,
+        range_y=[0, 100]
+    )
+    fig4.update_traces(texttemplate='%{y:.0f}%', textposition='outside')
+    figures["social_gov"] = fig4
+    return figures
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """One result cache shared by every session of this server process."""
+    return ResultCache.from_env()
+
+
+@st.cache_resource
+def get_result_store() -> Optional[ResultStore]:
+    """One results store (and background writer) shared by every session; None when ESG_STORE=off."""
+    return ResultStore.from_env()
+
+
+@st.cache_resource
+def get_peer_index() -> Optional[PeerIndex]:
+    """Industry peers of the companies in the results store, kept current as scorecards are submitted."""
+    result_store = get_result_store()
+    return None if result_store is None else PeerIndex.from_store(result_store)
+
+
+# --- Calculate Score ---
+if submitted:
+    profiler.stage("validation")
+    # 1. Input Validation (Using st.empty for cleaner error display)
+    error_placeholder = st.empty()
+    if selected_industry == config.industry_options[0]:  # the "Select Industry..." placeholder
+        error_placeholder.error("🛑 **Input Error:** Please select a valid Industry.")
+        profiler.end_run()
+        st.stop()
+
+    # The length of all_responses is populated across multiple calls, check against the expected total.
+    if len(all_responses) != total_disclosure_questions:
+        error_placeholder.error(
+            f"⚠️ **Input Error:** Please answer all {total_disclosure_questions} Yes/No questions. ({len(all_responses)} answered)")
+        profiler.end_run()
+        st.stop()
+
+    # All checks passed, clear error placeholder
+    error_placeholder.empty()
+
+    profiler.stage("scoring")
+    # Score the company through the shared portfolio engine (one-row frame)
+    company_inputs = {
+        "industry": selected_industry,
+        **dict(zip(QUESTION_IDS, all_responses)),
+        "male_employees": male_employees,
+        "female_employees": female_employees,
+        "avg_male_pay": avg_male_pay,
+        "male_attrition": male_attrition,
+        "female_attrition": female_attrition,
+        "avg_female_pay": avg_female_pay,
+        "women_manager_pct": women_manager_pct,
+        "employee_turnover_pct": employee_turnover_pct,
+        "ghg_emissions": ghg_emissions,
+        "water_consumption": water_consumption,
+        "hazardous_waste": hazardous_waste,
+        "renewable_pct": renewable_pct,
+        "workplace_injuries": workplace_injuries,
+        "csr_utilisation_pct": csr_utilisation_pct,
+        "whistleblower_resolved": whistleblower_resolved,
+        "regulatory_noncompliance": regulatory_noncompliance,
+    }
+    # Repeat submissions of the same inputs (under the same config) are served from the cache
+    result_cache = get_result_cache()
+    cache_key = company_fingerprint(company_inputs, config.version)
+    cached = result_cache.get(cache_key)
+    if cached is None:
+        with profiler.span("metric_scoring"):
+            result = score_portfolio(pd.DataFrame([company_inputs]), config).iloc[0].to_dict()
+        with profiler.span("build_figures"):
+            cached = {"result": result, "figures": build_figures(company_inputs, result)}
+        result_cache.put(cache_key, cached)
+    result, figures = cached["result"], cached["figures"]
+    # The name keys the store, peer index and trends; unnamed scorecards are shown but never recorded,
+    # so unrelated companies are not merged into one obligor
+    company_name = (st.session_state.get('company_name') or "").strip()
+
+    # Record the snapshot on the store's writer thread; the script does not wait for the disk.
+    # A snapshot opened from the overview page is already stored.
+    result_store = get_result_store()
+    if result_store is not None and prefill is None and company_name:
+        result_store.submit([record_row(company_inputs, result, config.version, company_name, as_of_date)])
+        if result_store.last_error:
+            st.sidebar.warning(f"⚠️ Saving results failed: {result_store.last_error}")
+
+    # Get thresholds based on selected industry or default
+    thresholds_key = result["thresholds_key"]
+    TH = config.industry_thresholds[thresholds_key]
+    PT = config.performance_thresholds  # Performance Thresholds
+
+    # --- 1. DISCLOSURE SCORES (A, B, C) ---
+    env_score_sum = int(result["env_score_sum"])
+    social_disclosure_sum = int(result["social_disclosure_sum"])
+    gov_score_sum = int(result["gov_score_sum"])
+    total_disclosure_score = int(result["total_disclosure_score"])
+
+    # --- 2. PERFORMANCE METRIC SCORES (D & F) ---
+    gender_diversity_pct = float(result["gender_diversity_pct"])
+    pay_gap = float(result["pay_gap"])
+    renewable_ratio = float(result["renewable_ratio"])
+
+    # TOTAL PERFORMANCE METRICS (Unweighted for simplicity/correct identification of worst metric)
+    unweighted_performance_metrics = {
+        label: float(result[col]) for col, label in METRIC_LABELS.items()
+    }
+    pay_equity_score = unweighted_performance_metrics["Pay Equity Score"]
+    ghg_score = unweighted_performance_metrics["GHG Emissions Score"]
+    renewable_score = unweighted_performance_metrics["Renewable Energy Score"]
+    waste_score = unweighted_performance_metrics["Hazardous Waste Score"]
+    water_score = unweighted_performance_metrics["Water Consumption Score"]
+    compliance_score = unweighted_performance_metrics["Regulatory Compliance Score"]
+    injury_score = unweighted_performance_metrics["Workplace Injury Score"]
+    turnover_score = unweighted_performance_metrics["Employee Turnover Score"]
+
+    # --- 3. WEIGHTED SCORE, RISK SCORE AND GRADE ---
+    total_weighted_performance_score = float(result["total_weighted_performance_score"])
+    score = float(result["score"])
+    risk_score = float(result["risk_score"])  # ESG Risk is the inverse of the ESG Score
+    grade = result["grade"]
+
+    # --- Percentage Variables for Output ---
+    env_pct = float(result["env_pct"])
+    social_pct = float(result["social_pct"])
+    gov_pct = float(result["gov_pct"])
+
+    # --- Display Summary Results ---
+    profiler.stage("summary_banner")
+    st.markdown("---")
+    st.header("✅ ESG Risk Management Dashboard")
+    st.subheader(f"Results for: **{company_name or 'Unnamed Company'}** ({thresholds_key} Industry)")
+
+    ## 1. SCORE BANNER
+    grade_class = get_grade_class(score, config)
+    col_score, col_grade = st.columns(2)
+    with col_score:
+        # DISPLAY RISK SCORE
+        st.markdown(
+            f"<div class='{grade_class}'>📉 OVERALL ESG RISK: **{risk_score:.1f}%**</div>",
+            unsafe_allow_html=True
+        )
+    with col_grade:
+        # DISPLAY ESG GRADE
+        st.markdown(
+            f"<div class='{grade_class}'>⭐ ESG GRADE: **{grade}**</div>",
+            unsafe_allow_html=True
+        )
+
+    st.caption(
+        f"Performance Score: {score:.1f}% (100% - Risk Score) | All performance metrics are uniformly weighted **{config.performance_weight}x**.")
+    # Progress bar reflects the Performance Score (higher = better)
+    st.progress(int(score))
+
+    st.markdown("---")
+
+    ## 2. RISK ALERTS
+    profiler.stage("alerts")
+    st.subheader("🚨 Risk Alerts")
+    alerts = alert_messages(company_inputs, config)
+
+    if alerts:
+        alert_cols = st.columns(min(3, len(alerts)))  # Limit to 3 columns for better layout
+        for i, alert in enumerate(alerts):
+            alert_cols[i % len(alert_cols)].error(alert)
+    else:
+        st.success("🎉 No immediate, high-priority risk alerts triggered.")
+
+    st.markdown("---")
+
+    ## 3. DASHBOARD KPI CARDS
+    profiler.stage("kpi_cards")
+    st.subheader("💎 Key Performance Indicators (KPIs)")
+
+    kpi1, kpi2, kpi3, kpi4, kpi5 = st.columns(5)
+
+    kpi1.metric("Gender Diversity", f"{gender_diversity_pct * 100:.1f}%",
+                help="Percentage of female employees in the workforce.")
+    # Use delta to show how far the pay gap is from 0% (ideal)
+    kpi2.metric("Gender Pay Gap", f"{pay_gap * 100:.1f}%",
+                delta=f"vs Target {TH['pay_gap_low'] * 100:.1f}%", delta_color="inverse",
+                help="Difference between average male and female pay (Male higher). Lower is better.")
+    kpi3.metric("GHG Emissions", f"{ghg_emissions:.0f} tCO₂e",
+                delta=f"vs High {PT['ghg_high']:.0f} tCO₂e", delta_color="inverse",
+                help="Total Scope 1 & 2 Emissions.")
+    kpi4.metric("Renewable Energy %", f"{renewable_pct:.1f}%",
+                delta=f"vs Target {PT['renew_high'] * 100:.0f}%",
+                help="Percentage of total energy sourced from renewables.")
+    kpi5.metric("Workplace Injuries", f"{workplace_injuries:.0f}",
+                delta="0 is ideal", delta_color="inverse",
+                help="Total workplace injuries/accidents last year. Lower is better.")
+
+    # Percentile rank among the industry's other recorded companies (this one is added once ranked)
+    peer_index = get_peer_index()
+    if peer_index is not None:
+        peer_key = company_name or None
+        peer_values = {"gender_diversity_pct": gender_diversity_pct, "pay_gap": pay_gap,
+                       "ghg_emissions": ghg_emissions, "renewable_pct": renewable_pct,
+                       "workplace_injuries": workplace_injuries, "risk_score": risk_score}
+        n_peers = peer_index.peer_count(selected_industry, exclude=peer_key)
+        if n_peers >= MIN_PEERS:
+            peer_pct = peer_index.percentiles(selected_industry, peer_values, exclude=peer_key)
+            standing = {col: peer_standing(col, pct) for col, pct in peer_pct.items()}
+            for kpi, col in zip((kpi1, kpi2, kpi3, kpi4, kpi5), list(peer_values)[:5]):
+                kpi.caption(f"Better than **{standing[col]:.0f}%** of peers")
+            st.caption(f"Compared with {n_peers} {selected_industry} peers; higher is better on every KPI "
+                       f"(a low pay gap, GHG emissions or injury count ranks high, 50 = industry median). "
+                       f"Lower risk than **{standing['risk_score']:.0f}%** of peers.")
+        if company_name:
+            peer_index.add(pd.DataFrame([{COMPANY_COLUMN: company_name, **company_inputs, **peer_values}]))
+
+    st.markdown("---")
+
+    ## 4. DETAILED BREAKDOWN & VISUALS
+    profiler.stage("breakdown")
+    st.write("### 📊 Performance and Disclosure Breakdown")
+
+    # Detailed scores in an expander
+    with st.expander("📝 Disclosure vs. Performance Breakdown", expanded=False):
+        st.markdown(
+            f"**Total Disclosure Score:** {total_disclosure_score}/{total_disclosure_questions} Questions Answered")
+        st.markdown(
+            f"**Total Performance Score (Weighted):** {total_weighted_performance_score}/{config.total_performance_metrics_weighted} Weighted Performance Points")
+        st.markdown("---")
+
+        # Disclosure Scores
+        st.markdown("#### Disclosure Completion")
+        col_disc1, col_disc2, col_disc3 = st.columns(3)
+        col_disc1.info(f"**Environmental:** {env_score_sum}/{len(env_responses)} ({env_pct:.1f}% Yes)")
+        col_disc2.info(f"**Social:** {social_disclosure_sum}/{len(social_responses)} ({social_pct:.1f}% Yes)")
+        col_disc3.info(f"**Governance:** {gov_score_sum}/{len(gov_responses)} ({gov_pct:.1f}% Yes)")
+
+        st.markdown("#### Unweighted Performance Metric Results (Score out of 100%)")
+        col_d1, col_d2, col_d3 = st.columns(3)
+
+        # Use unweighted scores for displaying % performance here
+        performance_list = list(unweighted_performance_metrics.items())
+
+        for i, (metric_name, score_val) in enumerate(performance_list):
+            display_score = score_val * 100
+
+            if i < 4:
+                col_d = col_d1
+            elif i < 8:
+                col_d = col_d2
+            else:
+                col_d = col_d3
+
+            # Use formatted text for the performance score
+            col_d.metric(f"**{i + 1}.** {metric_name.replace(' Score', '')}", f"{display_score:.1f}%")
+
+    ## Interactive Plotly Charts Section
+    profiler.stage("charts")
+    st.write("### 📈 Visual Metrics")
+
+    col_charts1, col_charts2 = st.columns(2)
+
+    # Figures come pre-built from the result cache (see build_figures)
+    # 1. GENDER DIVERSITY PIE CHART (Plotly)
+    with col_charts1:
+        if "diversity" in figures:
+            st.plotly_chart(figures["diversity"], use_container_width=True)
+
+    # 2. CORE ENVIRONMENTAL PERFORMANCE RADAR CHART (New)
+    with col_charts2:
+        st.plotly_chart(figures["env_radar"], use_container_width=True)
+
+    # 3. GENDER PAY BAR CHART
+    chart3, chart4 = st.columns(2)
+    with chart3:
+        if "pay" in figures:
+            st.plotly_chart(figures["pay"], use_container_width=True)
+
+    # 4. SOCIAL & GOVERNANCE PERFORMANCE BAR CHART
+    with chart4:
+        st.plotly_chart(figures["social_gov"], use_container_width=True)
+
+    st.markdown("---")
+
+    ## 5. TOP AREAS FOR IMPROVEMENT (what-if: next threshold band per metric)
+    profiler.stage("improvement")
+    st.header("🎯 Highest Priority Areas for Improvement")
+
+    actions = rank_actions(pd.DataFrame([company_inputs]), k=3, config=config).iloc[0]
+    ranked = [i for i in range(1, 4) if actions[f"action_{i}_metric"] is not None]
+
+    if ranked:
+        st.caption("Each action moves one metric into its next threshold band; "
+                   "ties in risk reduction go to the smallest relative change.")
+        for rank, i in enumerate(ranked, 1):
+            metric = actions[f"action_{i}_metric"]
+            value_name = config.metric_ladders[metric][0]
+            reduction = actions[f"action_{i}_risk_reduction"]
+            new_risk = risk_score - reduction
+            new_grade = get_grade(100 - new_risk, config)
+            grade_note = f" (grade {grade} → **{new_grade}**)" if new_grade != grade else ""
+            st.markdown(
+                f"**{rank}. {METRIC_LABELS[metric].replace(' Score', '')}** — move "
+                f"`{value_name}` from {actions[f'action_{i}_value']:,.4g} to {actions[f'action_{i}_target']:,.4g}: "
+                f"risk −{reduction:.1f} pts → **{new_risk:.1f}%**{grade_note}"
+            )
+        first = METRIC_LABELS[actions[f"action_{ranked[0]}_metric"]].replace(' Score', '')
+        st.info(f"**Action:** Prioritize **{first}**: it lowers the ESG risk score the most for the least change.")
+    else:
+        st.success(
+            "All core performance metrics are already in their best band, or not enough data was provided to suggest an improvement.")
+
+    ## 6. TRENDS (earlier reporting periods from the results store)
+    profiler.stage("trends")
+    if result_store is not None:
+        st.markdown("---")
+        st.header("📅 Year-on-Year Trends")
+        current_period = as_of_date.isoformat()
+        if company_name:
+            earlier = result_store.history(company_name, end=as_of_date, columns=[AS_OF_COLUMN] + TREND_COLUMNS)
+        else:
+            earlier = pd.DataFrame(columns=[AS_OF_COLUMN] + TREND_COLUMNS)
+        earlier = earlier[earlier[AS_OF_COLUMN] != current_period].drop_duplicates(AS_OF_COLUMN, keep="last")
+        current = {AS_OF_COLUMN: current_period, "risk_score": risk_score,
+                   **{col: company_inputs[col] for col in TREND_COLUMNS if col != "risk_score"}}
+        periods = pd.concat([earlier, pd.DataFrame([current])], ignore_index=True)
+        periods[COMPANY_COLUMN] = company_name
+        if not company_name:
+            st.caption("Enter a company name to record this scorecard and see year-on-year trends.")
+        elif len(periods) < 2:
+            st.caption("No earlier reporting periods are stored for this company yet; "
+                       "submit it with an earlier as-of date to see year-on-year trends.")
+        else:
+            # Column -> (label, unit); only renewables are better when they rise
+            trend_display = {
+                "ghg_emissions": ("GHG Emissions", " tCO₂e"),
+                "water_consumption": ("Water Consumption", " KL"),
+                "hazardous_waste": ("Hazardous Waste", " t"),
+                "renewable_pct": ("Renewable Energy", "%"),
+                "risk_score": ("ESG Risk", "%"),
+            }
+            trend = yoy_deltas(periods)
+            latest = trend.iloc[-1]
+            for col, (name, (label, unit)) in zip(st.columns(len(trend_display)), trend_display.items()):
+                col.metric(label, f"{latest[name]:,.1f}{unit}", delta=f"{latest[name + '_yoy']:+,.1f}{unit} YoY",
+                           delta_color="normal" if name == "renewable_pct" else "inverse")
+            long = trend.melt(id_vars=[AS_OF_COLUMN], value_vars=TREND_COLUMNS, var_name="metric")
+            long["metric"] = long["metric"].map({name: label for name, (label, _) in trend_display.items()})
+            fig_trend = px.line(long, x=AS_OF_COLUMN, y="value", facet_col="metric", facet_col_wrap=3,
+                                markers=True, title="Reported Values by Period")
+            fig_trend.update_yaxes(matches=None, title_text="")
+            fig_trend.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+            st.plotly_chart(fig_trend, use_container_width=True)
+
+
+# --- Profiling Panel ---
+def render_profiling_panel(profiler: Profiler):
+    """Sidebar breakdown of the latest run, session statistics and a JSON export of the spans."""
+    with st.sidebar:
+        st.header("⏱️ Profiling")
+        run = profiler.last_run
+        if run is None:
+            st.caption("No completed run yet.")
+            return
+        st.caption(f"Run {run['run']} ({run['started_at']}): **{run['total_ms']:.1f} ms**")
+        st.dataframe(pd.DataFrame([
+            {"Stage": "\u00a0\u00a0" * span["depth"] + span["name"], "ms": round(span["duration_ms"], 2)}
+            for span in run["spans"]
+        ]), hide_index=True, use_container_width=True)
+        st.markdown(f"**Session statistics** ({len(profiler.history)} runs)")
+        st.dataframe(pd.DataFrame.from_dict(profiler.stats(), orient="index").round(2), use_container_width=True)
+        st.download_button("Download spans (JSON)", profiler.to_json(), file_name="esg_profile.json",
+                           mime="application/json")
+
+
+profiler.end_run()
+if profiler.enabled:
+    render_profiling_panel(profiler)
@@ -0,0 +1,195 @@
+"""Declarative risk alerts, evaluated over a whole portfolio at once.
+
+Alert rules live in the scoring config (``alert_rules`` in ``esg_config.json``).
+Each rule compares one ladder value (``esg_scoring.ladder_values``: a numeric
+input or a derived ratio such as ``pay_gap``) with a literal threshold or a
+named industry/performance threshold, and carries the message the dashboard
+shows. The message may use ``{threshold}`` (the company's resolved threshold)
+and ``{value}``. Editing the file changes the alerts without touching code.
+
+* ``alert_masks`` evaluates every rule over every row in one vectorized pass:
+  an ``(n_rows, n_rules)`` bool matrix.
+* ``alert_messages`` formats the triggered rules of one company.
+* ``AlertIndex`` keeps the inverse view of a portfolio, rule -> sorted row
+  positions of the obligors that trigger it, so "who breaches this rule" is a
+  lookup. ``update`` re-evaluates only the rows passed in and patches only the
+  rule lists whose membership changed.
+"""
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+from esg_config import ScoringConfig
+from esg_scoring import (
+    INDUSTRY_COLUMN, NUMERIC_INPUTS, WHISTLEBLOWER_QUESTION_ID,
+    get_config, industry_codes, ladder_values, threshold_index,
+)
+from esg_thresholds import OPERATORS, _resolve
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ALERT_INPUTS = NUMERIC_INPUTS + [WHISTLEBLOWER_QUESTION_ID]
+
+
+def rule_thresholds(config: Optional[ScoringConfig] = None) -> np.ndarray:
+    """Resolved threshold of every rule for every industry code: ``(n_rules, n_industries)``."""
+    config = config or get_config()
+    thresholds = np.empty((len(config.alert_rules), len(config.industry_thresholds)), dtype=np.float64)
+    for r, (_, _, _, threshold, _) in enumerate(config.alert_rules):
+        thresholds[r] = [_resolve(threshold, th, config.performance_thresholds)
+                         for th in config.industry_thresholds.values()]
+    return thresholds
+
+
+def evaluate_rules(values: Mapping[str, np.ndarray], codes: np.ndarray,
+                   config: Optional[ScoringConfig] = None) -> np.ndarray:
+    """
+    ``(n_rows, n_rules)`` bool matrix of triggered rules, in ``config.alert_rules`` order.
+
+    ``values`` come from ``ladder_values`` and ``codes`` from ``industry_codes`` on
+    the same rows. NaN values never trigger a rule.
+    """
+    config = config or get_config()
+    thresholds = rule_thresholds(config)
+    masks = np.zeros((len(codes), len(config.alert_rules)), dtype=bool)
+    for r, (_, value, op, _, _) in enumerate(config.alert_rules):
+        row = thresholds[r]
+        limit = row[0] if (row == row[0]).all() else row.take(codes)
+        masks[:, r] = OPERATORS[op](np.asarray(values[value], dtype=np.float64), limit)
+    return masks
+
+
+def alert_masks(companies: "pd.DataFrame", config: Optional[ScoringConfig] = None) -> np.ndarray:
+    """Triggered rules of every company (row) of ``companies``; see ``evaluate_rules``."""
+    config = config or get_config()
+    codes = industry_codes(companies[INDUSTRY_COLUMN], config)
+    values = ladder_values({col: companies[col].to_numpy() for col in ALERT_INPUTS})
+    return evaluate_rules(values, codes, config)
+
+
+def alert_messages(company: Mapping[str, Any], config: Optional[ScoringConfig] = None) -> list[str]:
+    """Messages of the rules one company (a dict of inputs, as scored by the dashboard) triggers, in rule order."""
+    config = config or get_config()
+    code = threshold_index(company[INDUSTRY_COLUMN], config)
+    values = ladder_values({col: np.array([company[col]]) for col in ALERT_INPUTS})
+    triggered = evaluate_rules(values, np.array([code], dtype=np.intp), config)[0]
+    thresholds = rule_thresholds(config)[:, code]
+    return [message.format(threshold=thresholds[r], value=float(values[value][0]))
+            for r, (_, value, _, _, message) in enumerate(config.alert_rules) if triggered[r]]
+
+
+class AlertIndex:
+    """
+    Rule -> obligor index of a portfolio, kept current by re-evaluating only updated rows.
+
+    Obligors are keyed by the ``key`` column of the frames passed to ``update``
+    (the frame index when ``key`` is None). The index is built for one config;
+    build a new one when the rules change.
+    """
+
+    def __init__(self, key: Optional[str] = None, config: Optional[ScoringConfig] = None, capacity: int = 1024):
+        self.config = config or get_config()
+        self.key = key
+        self.rule_ids = [rule[0] for rule in self.config.alert_rules]
+        self._positions: dict = {}
+        self._keys = np.empty(capacity, dtype=object)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._masks = np.zeros((capacity, len(self.rule_ids)), dtype=bool)
+        self._members = {rule: np.empty(0, dtype=np.intp) for rule in self.rule_ids}
+
+    @classmethod
+    def from_portfolio(cls, companies: "pd.DataFrame", key: Optional[str] = None,
+                       config: Optional[ScoringConfig] = None) -> "AlertIndex":
+        index = cls(key, config, capacity=max(16, len(companies)))
+        index.update(companies)
+        return index
+
+    def __len__(self) -> int:
+        return int(self._active[:len(self._positions)].sum())
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._keys)
+        if needed <= capacity:
+            return
+        new = max(needed, 2 * capacity)
+        for name in ("_keys", "_active", "_masks"):
+            old = getattr(self, name)
+            grown = np.zeros((new,) + old.shape[1:], dtype=old.dtype)
+            grown[:capacity] = old
+            setattr(self, name, grown)
+
+    def _rows(self, keys: np.ndarray) -> np.ndarray:
+        rows = np.empty(len(keys), dtype=np.intp)
+        start, added = len(self._positions), []
+        for i, company in enumerate(keys):
+            row = self._positions.get(company)
+            if row is None:
+                row = self._positions[company] = start + len(added)
+                added.append(company)
+            rows[i] = row
+        self._grow(start + len(added))
+        self._keys[start:start + len(added)] = added
+        return rows
+
+    def _keys_of(self, companies: "pd.DataFrame") -> np.ndarray:
+        keys = companies.index.to_numpy() if self.key is None else companies[self.key].to_numpy()
+        if len(np.unique(keys)) != len(keys):
+            raise ValueError("update() takes at most one row per obligor")
+        return keys
+
+    def _apply(self, rows: np.ndarray, masks: np.ndarray) -> Dict[str, tuple]:
+        old = self._masks[rows]
+        changes = {}
+        for r, rule in enumerate(self.rule_ids):
+            entered = rows[masks[:, r] & ~old[:, r]]
+            cleared = rows[old[:, r] & ~masks[:, r]]
+            if not len(entered) and not len(cleared):
+                continue
+            # Members stay sorted: splice at the binary-search positions instead of re-sorting
+            members = self._members[rule]
+            members = np.delete(members, np.searchsorted(members, np.sort(cleared)))
+            entered_sorted = np.sort(entered)
+            self._members[rule] = np.insert(members, np.searchsorted(members, entered_sorted), entered_sorted)
+            changes[rule] = (self._keys[entered], self._keys[cleared])
+        self._masks[rows] = masks
+        return changes
+
+    def update(self, companies: "pd.DataFrame") -> Dict[str, tuple]:
+        """
+        Adds or re-evaluates the obligors in ``companies`` (one row each, with the
+        industry and the alert inputs). Returns ``{rule_id: (entered, cleared)}``
+        key arrays for the rules whose membership changed.
+        """
+        rows = self._rows(self._keys_of(companies))
+        self._active[rows] = True
+        return self._apply(rows, alert_masks(companies, self.config))
+
+    def remove(self, keys: Iterable) -> Dict[str, tuple]:
+        """Drops obligors from every rule; returns the changes like ``update``."""
+        rows = np.array([self._positions[k] for k in keys if k in self._positions], dtype=np.intp)
+        self._active[rows] = False
+        return self._apply(rows, np.zeros((len(rows), len(self.rule_ids)), dtype=bool))
+
+    def obligors(self, rule_id: str) -> np.ndarray:
+        """Keys of the obligors triggering ``rule_id``, in the order they were first added."""
+        return self._keys[self._members[rule_id]]
+
+    def rules_for(self, key: Any) -> list[str]:
+        """Ids of the rules one obligor triggers (empty for unknown obligors)."""
+        row = self._positions.get(key)
+        if row is None:
+            return []
+        return [rule for rule, hit in zip(self.rule_ids, self._masks[row]) if hit]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of obligors triggering each rule."""
+        return {rule: len(members) for rule, members in self._members.items()}
+
+    def to_frame(self) -> "pd.DataFrame":
+        """The active obligors' triggered-rule matrix, one bool column per rule id."""
+        import pandas as pd
+
+        rows = np.flatnonzero(self._active[:len(self._positions)])
+        return pd.DataFrame(self._masks[rows], index=pd.Index(self._keys[rows], name=self.key),
+                            columns=self.rule_ids)
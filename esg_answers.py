@@ -0,0 +1,165 @@
+"""Bit-packed disclosure answers.
+
+A portfolio's Yes/No answers are an N x 35 matrix of bits. ``AnswerMatrix`` keeps
+it packed with ``np.packbits`` (5 bytes per company instead of 35 int8 columns,
+or 35 Python ints in per-category lists) and computes disclosure sums straight
+from the packed form: each row is widened to one 64-bit word, and the E/S/G and
+per-section sums are popcounts of that word masked by the segment's bit layout
+in ``detailed_questions``.
+
+The packed bytes are the serialized form (``to_bytes`` / ``from_bytes``), so
+storing or shipping answers costs one memcpy plus a 16-byte header.
+"""
+import struct
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from esg_config import ScoringConfig
+from esg_scoring import QUESTION_IDS, WHISTLEBLOWER_QUESTION_ID, detailed_questions, score_columns
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+N_QUESTIONS = len(QUESTION_IDS)
+ROW_BYTES = (N_QUESTIONS + 7) // 8
+
+_HEADER = struct.Struct("<4sHHQ")  # magic, format version, questions per row, rows
+_MAGIC = b"ESGA"
+_FORMAT_VERSION = 1
+
+
+def _segments() -> Dict[str, slice]:
+    """Question positions of every category ('E') and section ('E.1'), in QUESTION_IDS order."""
+    segments = {}
+    start = 0
+    for category_key, data in detailed_questions.items():
+        category_start = start
+        for sub_index, (_, questions) in enumerate(data["sections"], 1):
+            segments[f"{category_key}.{sub_index}"] = slice(start, start + len(questions))
+            start += len(questions)
+        segments[category_key] = slice(category_start, start)
+    return segments
+
+
+SEGMENTS = _segments()
+CATEGORY_KEYS = list(detailed_questions)
+SECTION_KEYS = [key for key in SEGMENTS if key not in detailed_questions]
+
+
+def _word_mask(positions: slice) -> np.uint64:
+    """The uint64 mask selecting ``positions`` in a row widened by ``_words``."""
+    bits = np.zeros(8 * 8, dtype=bool)
+    bits[positions] = True
+    return np.packbits(bits).view(np.uint64)[0]
+
+
+_MASKS = {key: _word_mask(positions) for key, positions in SEGMENTS.items()}
+
+if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+    _popcount = np.bitwise_count
+else:
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        return _BYTE_COUNTS[words.view(np.uint8)].reshape(len(words), 8).sum(axis=1, dtype=np.uint8)
+
+
+class AnswerMatrix:
+    """N companies x 35 Yes/No answers, stored as ``np.packbits`` rows (``(N, 5)`` uint8)."""
+
+    def __init__(self, packed: np.ndarray, n_rows: int):
+        packed = np.ascontiguousarray(packed, dtype=np.uint8).reshape(n_rows, ROW_BYTES)
+        self.packed = packed
+        self.n_rows = n_rows
+        self._words = None
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    # --- Construction ---
+
+    @classmethod
+    def from_bits(cls, bits: np.ndarray) -> "AnswerMatrix":
+        """Packs an ``(N, 35)`` array of 0/1 (any nonzero counts as Yes)."""
+        bits = np.asarray(bits)
+        if bits.ndim != 2 or bits.shape[1] != N_QUESTIONS:
+            raise ValueError(f"expected an (N, {N_QUESTIONS}) answer array, got shape {bits.shape}")
+        return cls(np.packbits(bits != 0, axis=1), len(bits))
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, np.ndarray]) -> "AnswerMatrix":
+        """Packs one 0/1 array per id in ``QUESTION_IDS`` (e.g. a normalized frame)."""
+        first = np.asarray(columns[QUESTION_IDS[0]])
+        bits = np.empty((len(first), N_QUESTIONS), dtype=bool)
+        for i, qid in enumerate(QUESTION_IDS):
+            np.not_equal(columns[qid], 0, out=bits[:, i])
+        return cls(np.packbits(bits, axis=1), len(bits))
+
+    @classmethod
+    def from_frame(cls, frame: "pd.DataFrame") -> "AnswerMatrix":
+        """Packs the answer columns of a frame whose answers are already 0/1."""
+        return cls.from_columns({qid: frame[qid].to_numpy() for qid in QUESTION_IDS})
+
+    @classmethod
+    def from_lists(cls, rows: Sequence[Sequence[int]]) -> "AnswerMatrix":
+        """Packs per-company lists of 35 answers (the order ``collect_responses`` appends them in)."""
+        return cls.from_bits(np.array(rows, dtype=np.uint8).reshape(len(rows), N_QUESTIONS))
+
+    # --- Access ---
+
+    def bits(self) -> np.ndarray:
+        """Unpacked ``(N, 35)`` uint8 answers."""
+        return np.unpackbits(self.packed, axis=1, count=N_QUESTIONS)
+
+    def column(self, qid: str) -> np.ndarray:
+        """The 0/1 answers to one question, read from its bit without unpacking the matrix."""
+        position = QUESTION_IDS.index(qid)
+        byte, bit = divmod(position, 8)
+        return (self.packed[:, byte] >> (7 - bit)) & 1
+
+    def _row_words(self) -> np.ndarray:
+        """Each packed row zero-padded to 8 bytes and viewed as one uint64."""
+        if self._words is None:
+            padded = np.zeros((self.n_rows, 8), dtype=np.uint8)
+            padded[:, :ROW_BYTES] = self.packed
+            self._words = padded.view(np.uint64).ravel()
+        return self._words
+
+    def segment_sum(self, key: str) -> np.ndarray:
+        """Yes count per company in a category ('E') or section ('E.1')."""
+        return _popcount(self._row_words() & _MASKS[key]).astype(np.int64)
+
+    def category_sums(self) -> Dict[str, np.ndarray]:
+        """E, S and G disclosure sums."""
+        return {key: self.segment_sum(key) for key in CATEGORY_KEYS}
+
+    def section_sums(self) -> Dict[str, np.ndarray]:
+        """Disclosure sums per section ('E.1' ... 'G.6'), in questionnaire order."""
+        return {key: self.segment_sum(key) for key in SECTION_KEYS}
+
+    # --- Serialization ---
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(_MAGIC, _FORMAT_VERSION, N_QUESTIONS, self.n_rows) + self.packed.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "AnswerMatrix":
+        magic, version, n_questions, n_rows = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError("not a serialized AnswerMatrix (or an unsupported format version)")
+        if n_questions != N_QUESTIONS:
+            raise ValueError(f"answer matrix has {n_questions} questions per row, expected {N_QUESTIONS}")
+        packed = np.frombuffer(data, dtype=np.uint8, count=n_rows * ROW_BYTES, offset=_HEADER.size)
+        return cls(packed, n_rows)
+
+    def __reduce__(self):
+        return AnswerMatrix.from_bytes, (self.to_bytes(),)
+
+
+def score_packed(answers: AnswerMatrix, numeric: Mapping[str, np.ndarray], codes: np.ndarray,
+                 config: Optional[ScoringConfig] = None) -> Dict[str, np.ndarray]:
+    """``score_columns`` with the disclosure sums taken from a packed answer matrix."""
+    columns = dict(numeric)
+    columns[WHISTLEBLOWER_QUESTION_ID] = answers.column(WHISTLEBLOWER_QUESTION_ID)
+    return score_columns(columns, codes, disclosure_sums=answers.category_sums(), config=config)
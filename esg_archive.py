@@ -0,0 +1,224 @@
+"""Columnar archive of scored portfolio runs (Arrow IPC files, memory-mapped on read).
+
+Each run (one as-of date) is one uncompressed Arrow IPC file,
+``run_<as_of>.arrow``, holding the obligor key, ``industry``, the 12 metric
+scores, ``score``, ``risk_score`` and ``grade`` (the output columns of the
+dashboard's Calculate block). The as-of date and config version are kept in the
+schema metadata, so listing runs reads only the file footers.
+
+Reading maps the file into memory: selecting columns is zero-copy and only the
+pages of the selected columns are ever touched, so years of quarterly runs load
+in well under a second when a trend chart needs two or three columns.
+
+pyarrow is an optional dependency, needed only by this module.
+"""
+import datetime
+import glob
+import os
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional
+
+from esg_scoring import INDUSTRY_COLUMN, METRIC_COLUMNS, get_config
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+ARCHIVE_COLUMNS = [INDUSTRY_COLUMN] + METRIC_COLUMNS + ["score", "risk_score", "grade"]
+DEFAULT_KEY = "obligor_id"
+_PREFIX = "run_"
+_SUFFIX = ".arrow"
+SKETCH_SUFFIX = ".sketch.json"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("The snapshot archive needs the optional 'pyarrow' package (pip install pyarrow).") from exc
+    return pa
+
+
+def _schema(key: str, key_type: "pa.DataType", as_of: str, config_version: str) -> "pa.Schema":
+    pa = _require_pyarrow()
+    fields = [pa.field(key, key_type), pa.field(INDUSTRY_COLUMN, pa.string())]
+    fields += [pa.field(col, pa.float32()) for col in METRIC_COLUMNS]  # 0 / 0.5 / 1 are exact in float32
+    fields += [pa.field("score", pa.float64()), pa.field("risk_score", pa.float64()),
+               pa.field("grade", pa.dictionary(pa.int8(), pa.string()))]
+    metadata = {"as_of": as_of, "config_version": config_version,
+                "created_at": datetime.datetime.now().isoformat(timespec="seconds")}
+    return pa.schema(fields, metadata=metadata)
+
+
+def _as_of(value: Any) -> str:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()[:10]
+    return str(value)[:10]
+
+
+def run_path(directory: str, as_of: Any) -> str:
+    return os.path.join(directory, f"{_PREFIX}{_as_of(as_of)}{_SUFFIX}")
+
+
+def sketch_path(path: str) -> str:
+    """The distribution sketch saved next to the run file ``path`` (see ``archive_file``)."""
+    return path[:-len(_SUFFIX)] + SKETCH_SUFFIX
+
+
+class RunWriter:
+    """Streams scored chunks into one run file (one record batch per chunk)."""
+
+    def __init__(self, directory: str, as_of: Any, key_column: str = DEFAULT_KEY,
+                 config_version: Optional[str] = None):
+        self.pa = _require_pyarrow()
+        os.makedirs(directory, exist_ok=True)
+        self.path = run_path(directory, as_of)
+        self.as_of = _as_of(as_of)
+        self.key_column = key_column
+        config = get_config()
+        self.config_version = config_version or config.version
+        self.grades = list(config.grades)
+        self.rows = 0
+        self._tmp = self.path + ".tmp"
+        self._sink = None
+        self._writer = None
+        self._schema = None
+
+    def write(self, scored: "pd.DataFrame") -> None:
+        """Appends a frame with the key column (or the index) and ``ARCHIVE_COLUMNS``."""
+        import pandas as pd
+
+        pa = self.pa
+        keys = scored[self.key_column] if self.key_column in scored.columns else scored.index.to_series()
+        key_array = pa.array(keys.to_numpy() if keys.dtype != object else keys.astype(str).to_numpy())
+        if self._writer is None:
+            self._schema = _schema(self.key_column, key_array.type, self.as_of, self.config_version)
+            self._sink = pa.OSFile(self._tmp, "wb")
+            self._writer = pa.ipc.new_file(self._sink, self._schema)
+        industry = pa.array(scored[INDUSTRY_COLUMN], type=pa.string(), from_pandas=True)
+        if isinstance(industry, pa.ChunkedArray):  # arrow-backed string columns (e.g. read_csv dtype="string")
+            industry = industry.combine_chunks()
+        arrays = [key_array.cast(self._schema.field(0).type), industry]
+        for col in METRIC_COLUMNS + ["score", "risk_score"]:
+            arrays.append(pa.array(scored[col].to_numpy(dtype=self._schema.field(col).type.to_pandas_dtype())))
+        # The IPC file format needs one dictionary for all batches: the config's grades, in band order
+        codes = pd.Categorical(scored["grade"], categories=self.grades).codes
+        arrays.append(pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int8(), mask=codes < 0),
+                                                     pa.array(self.grades, type=pa.string())))
+        self._writer.write_batch(pa.record_batch(arrays, schema=self._schema))
+        self.rows += len(scored)
+
+    def close(self) -> str:
+        """Finishes the file and moves it into place (readers never see a partial run)."""
+        if self._writer is None:
+            raise ValueError("no rows were written to the run")
+        self._writer.close()
+        self._sink.close()
+        os.replace(self._tmp, self.path)
+        return self.path
+
+    def __enter__(self) -> "RunWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            os.remove(self._tmp)
+
+
+def write_run(scored: "pd.DataFrame", directory: str, as_of: Any, key_column: str = DEFAULT_KEY,
+              config_version: Optional[str] = None) -> str:
+    """Archives one scored portfolio frame as the run for ``as_of``; returns the file path."""
+    with RunWriter(directory, as_of, key_column, config_version) as writer:
+        writer.write(scored)
+    return writer.path
+
+
+def archive_file(src: str, directory: str, as_of: Any, key_column: str = DEFAULT_KEY,
+                 chunksize: Optional[int] = None) -> str:
+    """
+    Scores a portfolio file chunk by chunk (``esg_batch``) straight into the run for ``as_of``.
+
+    The per-industry distribution sketches of the run (``esg_sketches``), which
+    also cover raw inputs the run file does not keep, are saved at ``sketch_path``.
+    """
+    from esg_batch import DEFAULT_CHUNKSIZE, read_portfolio_chunks, score_chunks
+    from esg_sketches import PortfolioSketch
+
+    config = get_config()
+    sketch = PortfolioSketch()
+    with RunWriter(directory, as_of, key_column, config.version) as writer:
+        for scored in sketch.observe(score_chunks(read_portfolio_chunks(src, chunksize or DEFAULT_CHUNKSIZE),
+                                                  config=config)):
+            writer.write(scored)
+    sketch.save(sketch_path(writer.path))
+    return writer.path
+
+
+# --- Reading ---
+
+def list_runs(directory: str, start: Any = None, end: Any = None) -> list[Dict[str, Any]]:
+    """Runs in ``directory`` (oldest first) with their metadata; reads only the file footers."""
+    pa = _require_pyarrow()
+    runs = []
+    for path in sorted(glob.glob(os.path.join(directory, f"{_PREFIX}*{_SUFFIX}"))):
+        as_of = os.path.basename(path)[len(_PREFIX):-len(_SUFFIX)]
+        if (start is not None and as_of < _as_of(start)) or (end is not None and as_of > _as_of(end)):
+            continue
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            metadata = {k.decode(): v.decode() for k, v in (reader.schema.metadata or {}).items()}
+            rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        runs.append({"path": path, "as_of": as_of, "rows": rows, **metadata})
+    return runs
+
+
+def open_run(path: str, columns: Optional[Iterable[str]] = None) -> "pa.Table":
+    """The run as a memory-mapped Arrow table; ``columns`` are selected without copying."""
+    pa = _require_pyarrow()
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table if columns is None else table.select(list(columns))
+
+
+def iter_runs(directory: str, columns: Optional[Iterable[str]] = None, start: Any = None,
+              end: Any = None) -> Iterator[tuple[str, "pa.Table"]]:
+    """``(as_of, table)`` for every run in range, oldest first."""
+    for run in list_runs(directory, start, end):
+        yield run["as_of"], open_run(run["path"], columns)
+
+
+def load_runs(directory: str, columns: Optional[Iterable[str]] = None, start: Any = None,
+              end: Any = None) -> "pd.DataFrame":
+    """Selected columns of every run in range as one long frame with an ``as_of`` column."""
+    import pandas as pd
+
+    frames = []
+    for as_of, table in iter_runs(directory, columns, start, end):
+        frame = table.to_pandas()
+        frame.insert(0, "as_of", as_of)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def run_summary(directory: str, by: Optional[str] = None, start: Any = None, end: Any = None) -> "pd.DataFrame":
+    """
+    Per run (and per ``by`` column, e.g. ``industry``): obligor count, mean score and
+    risk_score, and the share of every grade. Only those columns are read.
+    """
+    import pandas as pd
+
+    grades = list(get_config().grades)
+    parts = []
+    for as_of, table in iter_runs(directory, ["score", "risk_score", "grade"] + ([by] if by else []), start, end):
+        frame = table.to_pandas()
+        group = frame[by] if by else pd.Series("all", index=frame.index, name="portfolio")
+        stats = frame.groupby(group, observed=True).agg(
+            obligors=("score", "size"), mean_score=("score", "mean"), mean_risk_score=("risk_score", "mean"))
+        shares = pd.crosstab(group, frame["grade"].astype(str), normalize="index")
+        part = stats.join(shares.reindex(columns=grades, fill_value=0.0).add_prefix("share_")).reset_index()
+        part.insert(0, "as_of", as_of)
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
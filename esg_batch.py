@@ -0,0 +1,251 @@
+"""Chunked batch scoring of portfolio files (CSV or Parquet).
+
+Each row is one obligor: an ``industry`` column, the 35 Yes/No disclosure answers
+(columns named by question id, e.g. ``E.1.1``) and the 16 ``NUMERIC_INPUTS``.
+Files are read, scored and written one chunk at a time, so memory stays bounded
+by ``chunksize`` no matter how large the book is.
+"""
+import os
+from typing import Callable, Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from esg_config import ScoringConfig
+from esg_scoring import QUESTION_IDS, NUMERIC_INPUTS, INDUSTRY_COLUMN, ANSWER_VALUES, get_config, score_portfolio
+
+DEFAULT_CHUNKSIZE = 100_000
+# Parquet output holds back up to this many rows while a column is still entirely null,
+# so that column's type can come from a later chunk
+SCHEMA_LOOKAHEAD_ROWS = 1_000_000
+
+
+def _is_parquet(path: str) -> bool:
+    return os.path.splitext(str(path))[1].lower() in (".parquet", ".pq")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("Parquet input/output needs the optional 'pyarrow' package (pip install pyarrow).") from exc
+    return pq
+
+
+def normalize_answers(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Converts Yes/No (or 1/0, True/False) answer columns to 0/1 ints; unanswered counts as 0 like the UI."""
+    chunk = chunk.copy()
+    for qid in QUESTION_IDS:
+        col = chunk[qid]
+        if pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+            chunk[qid] = col.fillna(0).astype(np.int8)
+        else:
+            chunk[qid] = col.astype("string").str.strip().str.lower().map(ANSWER_VALUES).fillna(0).astype(np.int8)
+    return chunk
+
+
+def read_portfolio_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Yields the portfolio file in chunks of at most ``chunksize`` rows."""
+    if _is_parquet(path):
+        pq = _require_pyarrow()
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        # round_trip parsing keeps the numeric inputs bit-identical to what was written
+        yield from pd.read_csv(path, chunksize=chunksize, dtype={INDUSTRY_COLUMN: "string"},
+                               float_precision="round_trip")
+
+
+def empty_frame(path: str) -> pd.DataFrame:
+    """A zero-row frame with the columns (and, for Parquet, the types) of the file at ``path``."""
+    if _is_parquet(path):
+        return _require_pyarrow().ParquetFile(path).schema_arrow.empty_table().to_pandas()
+    return pd.read_csv(path, nrows=0, dtype={INDUSTRY_COLUMN: "string"})
+
+
+def _score_columns() -> list[str]:
+    """Names of the columns ``score_portfolio`` adds, in order."""
+    probe = pd.DataFrame({INDUSTRY_COLUMN: pd.Series(dtype="string"),
+                          **{qid: pd.Series(dtype=np.int8) for qid in QUESTION_IDS},
+                          **{col: pd.Series(dtype=np.float64) for col in NUMERIC_INPUTS}})
+    return list(score_portfolio(probe).columns)
+
+
+def score_chunks(chunks: Iterator[pd.DataFrame], scorer=None, config: Optional[ScoringConfig] = None,
+                 reject: Optional[Callable[[pd.DataFrame], None]] = None,
+                 key: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Scores each chunk and yields the input columns followed by the scoring columns.
+
+    ``scorer`` is an optional ``esg_parallel.ParallelScorer``; it spreads each chunk
+    over a process pool and yields the metric scores, weighted totals and grade.
+    Every chunk is scored with the same config (by default the one live when scoring
+    starts), even if the config file is reloaded mid-stream.
+
+    With ``reject``, every chunk is validated first (``esg_validation``): invalid
+    rows are left out of the output and ``reject`` receives their error report
+    (``row`` in the file, the ``key`` column if given, ``errors``).
+    """
+    config = config or get_config()
+    if scorer is not None:
+        score = scorer.score
+    else:
+        def score(chunk: pd.DataFrame) -> pd.DataFrame:
+            return score_portfolio(chunk, config)
+    required = [INDUSTRY_COLUMN] + QUESTION_IDS + NUMERIC_INPUTS
+    first_row = 0
+    for chunk in chunks:
+        if reject is None:
+            missing = [c for c in required if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"Portfolio file is missing required columns: {', '.join(missing)}")
+            chunk = normalize_answers(chunk)
+        else:
+            from esg_validation import validate_portfolio
+
+            checked = validate_portfolio(chunk, config)  # also normalizes the answers
+            if checked.n_invalid:
+                reject(checked.report(key, first_row))
+            chunk = checked.valid_companies()
+            first_row += len(checked.failed)
+        yield pd.concat([chunk, score(chunk)], axis=1)
+
+
+def _null_typed(table):
+    """``table``'s schema with every entirely-null column typed as null."""
+    import pyarrow as pa
+
+    return pa.schema([pa.field(f.name, pa.null()) if table.column(i).null_count == len(table) else f
+                      for i, f in enumerate(table.schema)], metadata=table.schema.metadata)
+
+
+def _parquet_schema(tables: list):
+    """
+    One schema for the buffered tables: types are unified across chunks (null and
+    int64 promote to the other chunks' type). Columns that are null throughout keep
+    the first chunk's type, or become strings if that is null too.
+    """
+    import pyarrow as pa
+
+    schema = pa.unify_schemas([_null_typed(t) for t in tables], promote_options="permissive")
+    first = tables[0].schema
+    fields = []
+    for f in schema:
+        if pa.types.is_null(f.type):
+            fallback = first.field(f.name).type if f.name in first.names else pa.null()
+            f = f.with_type(pa.string() if pa.types.is_null(fallback) else fallback)
+        fields.append(f)
+    return pa.schema(fields, metadata=first.metadata)
+
+
+def _conform(table, schema):
+    """``table`` cast to the file schema; entirely-null and missing columns become typed nulls."""
+    import pyarrow as pa
+
+    extra = [name for name in table.column_names if name not in schema.names]
+    if extra:
+        raise ValueError(f"chunk has columns not in the file's first chunks: {', '.join(extra)}")
+    arrays = []
+    for f in schema:
+        if f.name not in table.column_names or table[f.name].null_count == len(table):
+            arrays.append(pa.nulls(len(table), f.type))
+            continue
+        column = table[f.name]
+        try:
+            arrays.append(column.cast(f.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as exc:
+            raise ValueError(f"column {f.name!r} holds {column.type} values in a later chunk, "
+                             f"but the file stores it as {f.type}") from exc
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_chunks(chunks: Iterator[pd.DataFrame], dst: str, columns: Optional[Sequence[str]] = None) -> int:
+    """
+    Writes frames one after another to ``dst`` (CSV or Parquet by extension); returns the row count.
+
+    Parquet column types are unified across chunks, so a column that is empty in the
+    first chunks takes its type from the first chunk that has values. With no chunks
+    at all, ``columns`` (if given) are written as an empty file.
+    """
+    rows = 0
+    written = False
+    writer = None
+    pending: list = []
+    pending_rows = 0
+
+    def open_writer():
+        nonlocal writer
+        schema = _parquet_schema(pending)
+        writer = _require_pyarrow().ParquetWriter(dst, schema)
+        for buffered in pending:
+            writer.write_table(_conform(buffered, schema))
+        pending.clear()
+
+    try:
+        for frame in chunks:
+            written = True
+            if _is_parquet(dst):
+                import pyarrow as pa
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is not None:
+                    writer.write_table(_conform(table, writer.schema))
+                else:
+                    pending.append(table)
+                    pending_rows += len(table)
+                    unresolved = any(pa.types.is_null(f.type) for f in
+                                     pa.unify_schemas([_null_typed(t) for t in pending], promote_options="permissive"))
+                    if not unresolved or pending_rows >= SCHEMA_LOOKAHEAD_ROWS:
+                        open_writer()
+            else:
+                frame.to_csv(dst, mode="w" if not rows else "a", header=not rows, index=False)
+            rows += len(frame)
+        if pending:
+            open_writer()
+    finally:
+        if writer is not None:
+            writer.close()
+    if not written and columns is not None:
+        write_chunks(iter([pd.DataFrame(columns=list(columns))]), dst)
+    return rows
+
+
+def score_file(src: str, dst: str, chunksize: int = DEFAULT_CHUNKSIZE,
+               columns: Optional[list[str]] = None, workers: Optional[int] = None,
+               errors: Optional[str] = None, key: Optional[str] = None,
+               distributions: Optional[str] = None) -> int:
+    """
+    Streams ``src`` through the scoring engine into ``dst`` (CSV or Parquet by extension).
+
+    ``columns`` optionally restricts the written columns (e.g. an obligor id plus
+    ``score``, ``risk_score`` and ``grade``). ``workers`` > 1 scores each chunk on a
+    shared-memory process pool. ``errors`` validates every row first: invalid rows
+    are not scored, and their error report (with the ``key`` column, if given) is
+    written to that file; no file is written when every row is valid.
+    ``distributions`` saves per-industry quantile sketches of the scored rows
+    (``esg_sketches.PortfolioSketch``) to that JSON file. Returns the number of
+    rows scored.
+    """
+    scorer = None
+    if workers is not None and workers > 1:
+        from esg_parallel import ParallelScorer
+        scorer = ParallelScorer(workers=workers, capacity=chunksize)
+    reports: list[pd.DataFrame] = []
+    # Written as an empty file when the source has no rows
+    expected = columns if columns is not None else list(empty_frame(src).columns) + _score_columns()
+    try:
+        scored = score_chunks(read_portfolio_chunks(src, chunksize), scorer,
+                              reject=reports.append if errors else None, key=key)
+        if distributions:
+            from esg_sketches import PortfolioSketch
+            sketch = PortfolioSketch()
+            scored = sketch.observe(scored)
+        rows = write_chunks(scored if columns is None else (frame[columns] for frame in scored), dst, expected)
+    finally:
+        if scorer is not None:
+            scorer.close()
+    if reports:
+        write_chunks(iter(reports), errors)
+    if distributions:
+        sketch.save(distributions)
+    return rows
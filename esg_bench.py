@@ -0,0 +1,311 @@
+"""Performance baseline for the scoring engine and the Streamlit app.
+
+Times company scoring at several portfolio sizes (default 1, 1k, 100k and 10M
+rows) through each engine entry point, with peak traced memory, and measures the
+Streamlit script with ``streamlit.testing.v1.AppTest``: questionnaire render and
+rerun latency, the dashboard render after "Calculate" (cold and cached), and the
+memory one session allocates and retains. Results are written as JSON so runs can
+be compared between commits::
+
+    python esg_bench.py --out bench-main.json
+    python esg_bench.py --out bench-branch.json --compare bench-main.json
+
+Engines:
+
+* ``score_records`` - list of dicts, the ``score-json`` CLI path (up to 100k rows);
+* ``score_portfolio`` - one DataFrame, the UI and batch path (up to 1M rows);
+* ``score_columns`` / ``score_packed`` - the NumPy core on column arrays / a
+  bit-packed answer matrix, in chunks of ``--chunk-rows`` so 10M rows fit in memory.
+
+Input generation is excluded from every timing. Timings are the best of
+``--repeat`` runs; memory is measured in one extra run under ``tracemalloc``
+(which NumPy reports its buffers to), so it does not slow the timed runs.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+from esg_scoring import (
+    INDUSTRY_COLUMN, NUMERIC_INPUTS, QUESTION_IDS, THRESHOLD_KEYS,
+    get_config, score_columns, score_portfolio, score_records,
+)
+
+DEFAULT_SIZES = [1, 1_000, 100_000, 10_000_000]
+DEFAULT_CHUNK_ROWS = 1_000_000
+# Largest size each engine is run at (None: unlimited, chunked)
+ENGINE_MAX_ROWS: Dict[str, Optional[int]] = {
+    "score_records": 100_000,
+    "score_portfolio": 1_000_000,
+    "score_columns": None,
+    "score_packed": None,
+}
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ESG_.py")
+# Relative slowdown (new / baseline - 1) reported as a regression by --compare
+DEFAULT_TOLERANCE = 0.10
+
+
+# --- Synthetic inputs ---
+
+def synthetic_columns(n: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Random but valid scoring inputs: 0/1 answers, plausible numeric ranges, industry codes."""
+    rng = np.random.default_rng(seed)
+    columns: Dict[str, np.ndarray] = {qid: (rng.random(n) < 0.6).astype(np.int8) for qid in QUESTION_IDS}
+    for col in NUMERIC_INPUTS:
+        columns[col] = np.round(rng.random(n) * 100, 2)
+    columns["avg_male_pay"] = np.round(rng.uniform(20_000, 200_000, n), 2)
+    columns["avg_female_pay"] = np.round(rng.uniform(20_000, 200_000, n), 2)
+    columns["ghg_emissions"] = np.round(rng.uniform(0, 1_000, n), 2)
+    columns["water_consumption"] = np.round(rng.uniform(0, 100_000, n), 2)
+    columns["codes"] = rng.integers(0, len(THRESHOLD_KEYS), n)
+    return columns
+
+
+def _chunks(n: int, chunk_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    for seed, start in enumerate(range(0, n, chunk_rows)):
+        yield synthetic_columns(min(chunk_rows, n - start), seed)
+
+
+def as_frame(columns: Dict[str, np.ndarray]):
+    """``synthetic_columns`` as a portfolio frame: the answer and numeric columns plus ``industry`` names."""
+    import pandas as pd
+
+    frame = pd.DataFrame({col: columns[col] for col in QUESTION_IDS + NUMERIC_INPUTS})
+    frame[INDUSTRY_COLUMN] = np.array(THRESHOLD_KEYS, dtype=object)[columns["codes"]]
+    return frame
+
+
+def _as_records(columns: Dict[str, np.ndarray]) -> list[dict]:
+    return as_frame(columns).to_dict("records")
+
+
+# --- Engine runners: prepare(columns) is untimed, run(prepared) is timed ---
+
+def _engine(name: str) -> tuple[Callable[[Dict[str, np.ndarray]], Any], Callable[[Any], Any]]:
+    if name == "score_records":
+        return _as_records, score_records
+    if name == "score_portfolio":
+        return as_frame, score_portfolio
+    if name == "score_columns":
+        return (lambda c: c), (lambda c: score_columns(c, c["codes"]))
+    if name == "score_packed":
+        from esg_answers import AnswerMatrix, score_packed
+
+        def prepare(columns):
+            return AnswerMatrix.from_columns(columns), {col: columns[col] for col in NUMERIC_INPUTS}, columns["codes"]
+        return prepare, (lambda p: score_packed(*p))
+    raise ValueError(f"unknown engine {name!r}")
+
+
+def _run_once(name: str, rows: int, chunk_rows: int, trace: bool) -> tuple[float, int]:
+    """Scores ``rows`` rows chunk by chunk; returns (scoring seconds, peak traced bytes)."""
+    prepare, run = _engine(name)
+    seconds, peak = 0.0, 0
+    for columns in _chunks(rows, chunk_rows):
+        prepared = prepare(columns)
+        gc.collect()
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        result = run(prepared)
+        seconds += time.perf_counter() - started
+        if trace:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        del result, prepared, columns
+    return seconds, peak
+
+
+def bench_scoring(sizes: list[int], engines: list[str], repeat: int, chunk_rows: int,
+                  log: Callable[[str], None] = print) -> list[Dict[str, Any]]:
+    results = []
+    for engine in engines:
+        for rows in sizes:
+            limit = ENGINE_MAX_ROWS[engine]
+            if limit is not None and rows > limit:
+                continue
+            # Large sizes take seconds per run; one timed run is enough there
+            runs = repeat if rows <= chunk_rows else 1
+            best = min(_run_once(engine, rows, chunk_rows, trace=False)[0] for _ in range(runs))
+            _, peak = _run_once(engine, rows, chunk_rows, trace=True)
+            entry = {
+                "engine": engine,
+                "rows": rows,
+                "seconds": best,
+                "rows_per_second": rows / best if best > 0 else None,
+                "peak_mb": peak / 2**20,
+                "chunk_rows": min(rows, chunk_rows),
+            }
+            log(f"{engine:>16} {rows:>11,} rows  {best * 1000:10.2f} ms  peak {entry['peak_mb']:9.1f} MB")
+            results.append(entry)
+    return results
+
+
+# --- Streamlit AppTest ---
+
+def _fill_questionnaire(at) -> None:
+    at.selectbox(key="company_industry").select("Technology")
+    for i, radio in enumerate(at.radio):
+        radio.set_value("Yes" if i % 3 else "No")
+
+
+def _timed_run(at, timeout: float) -> float:
+    started = time.perf_counter()
+    at.run(timeout=timeout)
+    if at.exception:
+        raise RuntimeError(f"app raised during benchmark: {at.exception[0].value}")
+    return time.perf_counter() - started
+
+
+def _session(timeout: float):
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+
+def bench_app(repeat: int, timeout: float = 60.0, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """AppTest timings (ms, median of ``repeat``) and per-session memory (MB) of ESG_.py."""
+    saved_store = os.environ.get("ESG_STORE")
+    os.environ["ESG_STORE"] = "off"  # AppTest runs the real script; keep its snapshots out of the results store
+    try:
+        return _bench_app(repeat, timeout, log)
+    finally:
+        if saved_store is None:
+            os.environ.pop("ESG_STORE", None)
+        else:
+            os.environ["ESG_STORE"] = saved_store
+
+
+def _bench_app(repeat: int, timeout: float, log: Callable[[str], None]) -> Dict[str, Any]:
+    import streamlit as st
+
+    timings: Dict[str, list[float]] = {"first_render": [], "questionnaire_rerun": [],
+                                       "dashboard_cold": [], "dashboard_cached": []}
+    _timed_run(_session(timeout), timeout)  # warm imports so first_render measures the script, not the interpreter
+    for _ in range(repeat):
+        st.cache_resource.clear()  # cold result cache for dashboard_cold
+        at = _session(timeout)
+        timings["first_render"].append(_timed_run(at, timeout))
+        timings["questionnaire_rerun"].append(_timed_run(at, timeout))
+        _fill_questionnaire(at)
+        at.button[0].click()
+        timings["dashboard_cold"].append(_timed_run(at, timeout))
+        at.button[0].click()
+        timings["dashboard_cached"].append(_timed_run(at, timeout))
+    result: Dict[str, Any] = {f"{key}_ms": statistics.median(values) * 1000 for key, values in timings.items()}
+
+    # Memory of one session from first render through a dashboard render, in a separate traced pass
+    st.cache_resource.clear()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    at = _session(timeout)
+    _timed_run(at, timeout)
+    questionnaire_bytes = tracemalloc.get_traced_memory()[0] - before
+    _fill_questionnaire(at)
+    at.button[0].click()
+    _timed_run(at, timeout)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result.update({
+        "session_questionnaire_mb": questionnaire_bytes / 2**20,
+        "session_dashboard_mb": (current - before) / 2**20,
+        "session_peak_mb": (peak - before) / 2**20,
+    })
+    for key, value in result.items():
+        log(f"{key:>26} {value:10.2f}")
+    return result
+
+
+# --- Reporting ---
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(APP_PATH),
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> Dict[str, Any]:
+    import pandas as pd
+
+    return {
+        "commit": _git_commit(),
+        "config_version": get_config().version,
+        "config_label": get_config().label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """Lines describing every timing or memory figure that got worse than ``baseline`` by more than ``tolerance``."""
+    regressions = []
+    base_scoring = {(r["engine"], r["rows"]): r for r in baseline.get("scoring", [])}
+    for entry in current.get("scoring", []):
+        old = base_scoring.get((entry["engine"], entry["rows"]))
+        if old is None:
+            continue
+        for key in ("seconds", "peak_mb"):
+            if old[key] > 0 and entry[key] / old[key] - 1 > tolerance:
+                regressions.append(f"{entry['engine']} {entry['rows']:,} rows {key}: "
+                                   f"{old[key]:.4g} -> {entry[key]:.4g} ({entry[key] / old[key] - 1:+.0%})")
+    old_app, new_app = baseline.get("app") or {}, current.get("app") or {}
+    for key, value in new_app.items():
+        old = old_app.get(key)
+        if old and value / old - 1 > tolerance:
+            regressions.append(f"app {key}: {old:.4g} -> {value:.4g} ({value / old - 1:+.0%})")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="esg_bench", description="Benchmark ESG scoring and the Streamlit app.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated row counts.")
+    parser.add_argument("--engines", default=",".join(ENGINE_MAX_ROWS), help="Comma-separated engines to time.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement (best/median is kept).")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows scored per chunk.")
+    parser.add_argument("--no-app", action="store_true", help="Skip the Streamlit AppTest measurements.")
+    parser.add_argument("--no-scoring", action="store_true", help="Skip the scoring engine measurements.")
+    parser.add_argument("--out", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run; exit 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative slowdown before --compare reports a regression.")
+    args = parser.parse_args(argv)
+
+    report: Dict[str, Any] = {"environment": environment(), "scoring": [], "app": None}
+    if not args.no_scoring:
+        sizes = [int(size) for size in args.sizes.split(",")]
+        report["scoring"] = bench_scoring(sizes, args.engines.split(","), args.repeat, args.chunk_rows)
+    if not args.no_app:
+        report["app"] = bench_app(args.repeat)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            regressions = compare(report, json.load(fh), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
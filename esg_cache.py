@@ -0,0 +1,147 @@
+"""Content-addressed cache for scoring results and rendered dashboard figures.
+
+Keys are SHA-256 fingerprints of the scoring inputs (industry, the 35 answers,
+the 16 numeric inputs) together with the scoring config version, so the same company
+submitted twice hits the cache while any threshold/weight/grade change produces
+new keys. Stale entries are never served; they simply age out of the tiers.
+
+Two tiers:
+
+* an in-process LRU (``max_entries`` values), shared by all Streamlit sessions of
+  one server process;
+* an optional on-disk tier (one pickle per key under ``directory``), evicted
+  least-recently-used first once it grows beyond ``max_bytes``.
+
+The disk tier is enabled for the app with the ``ESG_CACHE_DIR`` environment
+variable (``ESG_CACHE_MAX_MB`` caps its size, default 256 MB).
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Mapping, Optional
+
+from esg_scoring import INDUSTRY_COLUMN, NUMERIC_INPUTS, QUESTION_IDS, answer_value, get_config
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_SUFFIX = ".pkl"
+
+
+def company_fingerprint(record: Mapping[str, Any], config_version: Optional[str] = None) -> str:
+    """Cache key of one company's scoring inputs under a config version (default: the live config)."""
+    payload = [
+        config_version or get_config().version,
+        record.get(INDUSTRY_COLUMN),
+        [answer_value(record.get(qid)) for qid in QUESTION_IDS],
+        # float.hex is exact, and 500 (int widget) and 500.0 (file) give the same key
+        [float(record[col]).hex() for col in NUMERIC_INPUTS],
+    ]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe two-tier (memory LRU + optional disk) cache of picklable values."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, directory: Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Memory cache, plus a disk tier when ``ESG_CACHE_DIR`` is set."""
+        max_mb = float(os.environ.get("ESG_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024)))
+        return cls(directory=os.environ.get("ESG_CACHE_DIR") or None, max_bytes=int(max_mb * 1024 * 1024))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _disk_entries(self) -> list[tuple[float, str, int]]:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as fh:
+                    value = pickle.load(fh)
+                os.utime(path)  # mtime doubles as the disk tier's LRU clock
+            except (OSError, pickle.UnpicklingError, EOFError):
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                    self._remember(key, value)
+                return value
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._remember(key, value)
+        if self.directory:
+            self._write(key, value)
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _write(self, key: str, value: Any) -> None:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp, path)  # atomic: readers never see a partial entry
+        with self._lock:
+            self._disk_bytes += len(data) - previous
+            if self._disk_bytes > self.max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Deletes least-recently-used files until the tier is back under 90% of ``max_bytes``."""
+        entries = sorted(self._disk_entries())
+        self._disk_bytes = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for _, path, size in entries:
+            if self._disk_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._disk_bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self.directory:
+                for _, path, _ in self._disk_entries():
+                    os.remove(path)
+                self._disk_bytes = 0
@@ -0,0 +1,430 @@
+"""Headless command-line scoring.
+
+Scores portfolio files or JSON company records with the ``esg_scoring`` core only;
+Streamlit and Plotly are never imported, and pandas is only loaded for file
+scoring. Examples::
+
+    python esg_cli.py score-file portfolio.csv scored.parquet --chunksize 200000
+    python esg_cli.py score-file portfolio.csv scored.parquet --errors rejected.csv --id-column obligor_id
+    python esg_cli.py validate portfolio.csv errors.csv --id-column obligor_id
+    echo '{"industry": "Retail", "E.1.1": "Yes", ...}' | python esg_cli.py score-json
+    python esg_cli.py --timing score-json companies.json
+    python esg_cli.py score-json companies.json --cache-dir .esg-cache
+    python esg_cli.py archive portfolio.parquet runs/ --as-of 2024-12-31
+    python esg_cli.py stress portfolio.parquet flips.csv --scenarios 10000 --sigma ghg_high=0.2
+    python esg_cli.py alerts portfolio.parquet alerts.csv --id-column obligor_id
+    python esg_cli.py credit-overlay loans.parquet runs/run_2024-12-31.arrow overlaid.parquet --summary sectors.csv
+    python esg_cli.py portfolio loans.parquet runs/run_2024-12-31.arrow --add booked.csv --migration migration.csv
+    python esg_cli.py reports portfolio.parquet scorecards/ --id-column obligor_id --workers 8 --excel
+    python esg_cli.py distributions portfolio.parquet --out sketch.json --workers 4 --column ghg_emissions
+    python esg_cli.py serve --port 8765
+    python esg_cli.py load-test http://127.0.0.1:8765 --requests 20000 --concurrency 64
+
+``--timing`` reports the time from this module being imported to the first
+result being written (stderr), so scheduler start-up overhead can be tracked.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Iterator, Optional
+
+_STARTED = time.perf_counter()
+
+
+def _elapsed_ms() -> float:
+    return (time.perf_counter() - _STARTED) * 1000
+
+
+def _read_json_records(text: str) -> Iterator[dict[str, Any]]:
+    """Accepts a single JSON object, a JSON array of objects, or JSON Lines."""
+    stripped = text.strip()
+    if not stripped:
+        return
+    try:
+        payload = json.loads(stripped)
+    except json.JSONDecodeError:
+        for line in stripped.splitlines():
+            if line.strip():
+                yield json.loads(line)
+        return
+    if isinstance(payload, dict):
+        yield payload
+    else:
+        yield from payload
+
+
+def _open_cache(args: argparse.Namespace):
+    if not args.cache_dir:
+        return None
+    from esg_cache import ResultCache
+    return ResultCache(directory=args.cache_dir)
+
+
+def _score_records_cached(records: list[dict[str, Any]], cache) -> list[dict[str, Any]]:
+    """score_records, serving companies already in ``cache`` and scoring only the rest."""
+    from esg_cache import company_fingerprint
+    from esg_scoring import NUMERIC_INPUTS, QUESTION_IDS, get_config, score_records
+
+    config = get_config()
+    keys = [company_fingerprint(record, config.version) for record in records]
+    scored = [cache.get(key) for key in keys]
+    misses = [i for i, hit in enumerate(scored) if hit is None]
+    for i, result in zip(misses, score_records([records[i] for i in misses], config) if misses else []):
+        scored[i] = {k: v for k, v in result.items() if k not in records[i]}
+        cache.put(keys[i], scored[i])
+    inputs = set(QUESTION_IDS) | set(NUMERIC_INPUTS)
+    return [{**{k: v for k, v in record.items() if k not in inputs}, **result}
+            for record, result in zip(records, scored)]
+
+
+def score_json(args: argparse.Namespace) -> int:
+    from esg_scoring import score_records
+
+    source = sys.stdin if args.path in (None, "-") else open(args.path, encoding="utf-8")
+    with source:
+        records = list(_read_json_records(source.read()))
+    cache = _open_cache(args)
+    first_result_ms: Optional[float] = None
+    if records:
+        results = score_records(records) if cache is None else _score_records_cached(records, cache)
+        for result in results:
+            sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+            if first_result_ms is None:
+                sys.stdout.flush()
+                first_result_ms = _elapsed_ms()
+    if args.timing:
+        print(f"startup-to-first-result: {first_result_ms or _elapsed_ms():.1f} ms "
+              f"({len(records)} record(s), total {_elapsed_ms():.1f} ms)", file=sys.stderr)
+    return 0
+
+
+def score_file(args: argparse.Namespace) -> int:
+    from esg_batch import score_file as stream_score_file
+
+    columns = args.columns.split(",") if args.columns else None
+    rows = stream_score_file(args.src, args.dst, chunksize=args.chunksize, columns=columns, workers=args.workers,
+                             errors=args.errors, key=args.id_column, distributions=args.distributions)
+    if args.timing:
+        print(f"scored {rows} row(s) in {_elapsed_ms():.1f} ms", file=sys.stderr)
+    return 0
+
+
+def validate(args: argparse.Namespace) -> int:
+    from esg_validation import validate_file
+
+    rows, counts = validate_file(args.src, args.dst, chunksize=args.chunksize, key=args.id_column)
+    failures = ", ".join(f"{code}={n}" for code, n in sorted(counts.items(), key=lambda item: -item[1]))
+    print(f"{rows} row(s) checked" + (f"; failed checks: {failures}" if counts else "; all valid"), file=sys.stderr)
+    return 1 if counts else 0
+
+
+def archive(args: argparse.Namespace) -> int:
+    from esg_archive import archive_file
+
+    path = archive_file(args.src, args.directory, args.as_of, key_column=args.id_column, chunksize=args.chunksize)
+    if args.timing:
+        print(f"archived {path} in {_elapsed_ms():.1f} ms", file=sys.stderr)
+    return 0
+
+
+def _sigma(text: str) -> tuple[str, float]:
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected NAME=SIGMA, got {text!r}")
+    return name.strip(), float(value)
+
+
+def _write_frame(frame, path: str) -> None:
+    from esg_batch import _is_parquet, _require_pyarrow
+
+    if _is_parquet(path):
+        _require_pyarrow()
+        frame.to_parquet(path)
+    else:
+        frame.to_csv(path)
+
+
+def stress(args: argparse.Namespace) -> int:
+    import pandas as pd
+    from esg_batch import normalize_answers, read_portfolio_chunks
+    from esg_scoring import INDUSTRY_COLUMN, NUMERIC_INPUTS, QUESTION_IDS
+    from esg_stress import StressSpec, stress_test
+
+    portfolio = pd.concat(list(read_portfolio_chunks(args.src)), ignore_index=True)
+    missing = [c for c in [INDUSTRY_COLUMN] + QUESTION_IDS + NUMERIC_INPUTS if c not in portfolio.columns]
+    if missing:
+        raise ValueError(f"Portfolio file is missing required columns: {', '.join(missing)}")
+    if args.id_column:
+        portfolio = portfolio.set_index(args.id_column)
+    spec = StressSpec(n_scenarios=args.scenarios, threshold_sigma=args.threshold_sigma,
+                      weight_sigma=args.weight_sigma, sigmas=dict(args.sigma), seed=args.seed)
+    result = stress_test(normalize_answers(portfolio), spec, workers=args.workers, obligor_chunk=args.chunk)
+    _write_frame(result.obligors, args.dst)
+    if args.scenario_out:
+        _write_frame(result.scenarios, args.scenario_out)
+    if args.timing:
+        print(f"stressed {len(portfolio)} obligor(s) x {args.scenarios} scenario(s) in {_elapsed_ms():.1f} ms",
+              file=sys.stderr)
+    return 0
+
+
+def alerts(args: argparse.Namespace) -> int:
+    import pandas as pd
+    from esg_alerts import AlertIndex
+    from esg_batch import normalize_answers, read_portfolio_chunks
+    from esg_scoring import INDUSTRY_COLUMN, NUMERIC_INPUTS, QUESTION_IDS
+
+    index = AlertIndex(key=args.id_column)
+    for chunk in read_portfolio_chunks(args.src):
+        if args.id_column is None:
+            chunk.index = pd.RangeIndex(len(index), len(index) + len(chunk))
+        missing = [c for c in [INDUSTRY_COLUMN] + QUESTION_IDS + NUMERIC_INPUTS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Portfolio file is missing required columns: {', '.join(missing)}")
+        index.update(normalize_answers(chunk))
+    frame = index.to_frame()
+    _write_frame(frame[frame.any(axis=1)] if args.triggered_only else frame, args.dst)
+    counts = ", ".join(f"{rule}={n}" for rule, n in index.counts().items())
+    print(f"{len(index)} obligor(s): {counts}", file=sys.stderr)
+    return 0
+
+
+def _read_obligors(path: str, key: str):
+    """Scored obligors from an archive run, a scored file, or a raw portfolio file (scored here)."""
+    import pandas as pd
+    from esg_batch import read_portfolio_chunks, score_chunks
+
+    if path.endswith(".arrow"):
+        from esg_archive import open_run
+        return open_run(path).to_pandas()
+    frames = list(read_portfolio_chunks(path))
+    if frames and "grade" not in frames[0].columns:
+        frames = list(score_chunks(iter(frames)))
+    obligors = pd.concat(frames, ignore_index=True)
+    if key not in obligors.columns:
+        raise ValueError(f"Obligor file has no {key!r} column")
+    return obligors
+
+
+def credit_overlay(args: argparse.Namespace) -> int:
+    from esg_credit import OverlaySpec, overlay_file
+
+    spec = OverlaySpec.load(args.overlay_config) if args.overlay_config else OverlaySpec()
+    obligors = _read_obligors(args.obligors, args.obligor_key)
+    summary = overlay_file(args.src, args.dst, obligors, spec, key=args.obligor_key, chunksize=args.chunksize)
+    if args.summary:
+        _write_frame(summary, args.summary)
+    else:
+        sys.stdout.write(summary.to_string() + "\n")
+    if args.timing:
+        print(f"overlaid {int(summary.loc['TOTAL', 'facilities'])} facilities in {_elapsed_ms():.1f} ms",
+              file=sys.stderr)
+    return 0
+
+
+def portfolio(args: argparse.Namespace) -> int:
+    import pandas as pd
+    from esg_batch import read_portfolio_chunks
+    from esg_portfolio import OBLIGOR_COLUMN, Portfolio
+
+    def read(path: str) -> pd.DataFrame:
+        return pd.concat(list(read_portfolio_chunks(path)), ignore_index=True)
+
+    obligors = _read_obligors(args.obligors, OBLIGOR_COLUMN)
+    baseline = _read_obligors(args.baseline, OBLIGOR_COLUMN) if args.baseline else None
+    book = Portfolio.from_frames(obligors, read(args.facilities), baseline)
+    for path in args.remove or []:
+        book.remove_facilities(read(path))
+    for path in args.add or []:
+        booked = read(path)
+        book.add_facilities(booked)
+        # Obligors new to the book start as not rated; give them their scores
+        book.rescore_frame(obligors[obligors[OBLIGOR_COLUMN].isin(booked[OBLIGOR_COLUMN])])
+    for path in args.rescore or []:
+        book.rescore_frame(_read_obligors(path, OBLIGOR_COLUMN))
+    breakdown = book.breakdown(args.by)
+    if args.breakdown:
+        _write_frame(breakdown, args.breakdown)
+    else:
+        sys.stdout.write(breakdown.to_string() + "\n")
+    if args.migration:
+        _write_frame(book.migration_table(), args.migration)
+    print(f"exposure-weighted risk score {book.exposure_weighted_risk():.4f} over {book.total_ead:,.0f} EAD"
+          + (f" in {_elapsed_ms():.1f} ms" if args.timing else ""), file=sys.stderr)
+    return 0
+
+
+def reports(args: argparse.Namespace) -> int:
+    from esg_reports import export_reports
+
+    formats = ("html", "xlsx") if args.excel else ("html",)
+    written = export_reports(args.src, args.directory, key=args.id_column, formats=formats, workers=args.workers,
+                             chunksize=args.chunksize, batch=args.batch)
+    print(f"wrote {written} scorecard(s) to {args.directory}"
+          + (f" in {_elapsed_ms():.1f} ms" if args.timing else ""), file=sys.stderr)
+    return 0
+
+
+def distributions(args: argparse.Namespace) -> int:
+    from esg_sketches import DEFAULT_QUANTILES, PortfolioSketch, sketch_file
+
+    if args.src.endswith(".json"):
+        sketch = PortfolioSketch.load(args.src)
+    else:
+        sketch = sketch_file(args.src, k=args.k, chunksize=args.chunksize, workers=args.workers)
+    if args.out:
+        sketch.save(args.out)
+    quantiles = [float(q) for q in args.quantiles.split(",")] if args.quantiles else DEFAULT_QUANTILES
+    for column in args.column or sketch.columns:
+        sys.stdout.write(f"{column}\n{sketch.quantiles(column, quantiles).to_string()}\n\n")
+    if args.timing:
+        print(f"sketched in {_elapsed_ms():.1f} ms", file=sys.stderr)
+    return 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    from esg_service import serve as run_service
+
+    print(f"serving on http://{args.host}:{args.port} (POST /score, GET /metrics)", file=sys.stderr)
+    run_service(args.host, args.port, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, verbose=args.verbose)
+    return 0
+
+
+def load_test(args: argparse.Namespace) -> int:
+    from esg_service import load_test as run_load_test
+
+    report = run_load_test(args.url, requests=args.requests, concurrency=args.concurrency,
+                           batch_size=args.batch_size)
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+    return 0 if report["errors"] == 0 else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="esg_cli", description="Headless ESG risk scoring.")
+    parser.add_argument("--timing", action="store_true", help="Report start-up and run time on stderr.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_json = sub.add_parser("score-json", help="Score JSON company records (object, array or JSON Lines).")
+    p_json.add_argument("path", nargs="?", help="Input file; '-' or omitted reads stdin.")
+    p_json.add_argument("--cache-dir", help="Reuse per-company results stored here by earlier runs.")
+    p_json.set_defaults(func=score_json)
+
+    p_file = sub.add_parser("score-file", help="Stream-score a CSV/Parquet portfolio file.")
+    p_file.add_argument("src", help="Portfolio CSV or Parquet file.")
+    p_file.add_argument("dst", help="Output CSV or Parquet file.")
+    p_file.add_argument("--chunksize", type=int, default=100_000, help="Rows scored per chunk.")
+    p_file.add_argument("--workers", type=int, help="Score each chunk on this many processes (shared memory).")
+    p_file.add_argument("--columns", help="Comma-separated output columns (default: inputs + all scores).")
+    p_file.add_argument("--errors", help="Validate rows first; write invalid rows' error report here, score the rest.")
+    p_file.add_argument("--id-column", help="Input column to use as the obligor key in the error report.")
+    p_file.add_argument("--distributions", help="Also save per-industry quantile sketches of the scores here (JSON).")
+    p_file.set_defaults(func=score_file)
+
+    p_valid = sub.add_parser("validate", help="Check a portfolio file's inputs and write a per-row error report.")
+    p_valid.add_argument("src", help="Portfolio CSV or Parquet file.")
+    p_valid.add_argument("dst", help="Error report CSV or Parquet file (one row per invalid obligor).")
+    p_valid.add_argument("--id-column", help="Input column to use as the obligor key in the report.")
+    p_valid.add_argument("--chunksize", type=int, default=100_000, help="Rows validated per chunk.")
+    p_valid.set_defaults(func=validate)
+
+    p_archive = sub.add_parser("archive", help="Score a portfolio file into the columnar run archive.")
+    p_archive.add_argument("src", help="Portfolio CSV or Parquet file.")
+    p_archive.add_argument("directory", help="Archive directory (one Arrow file per as-of date).")
+    p_archive.add_argument("--as-of", required=True, help="As-of date of the run (YYYY-MM-DD).")
+    p_archive.add_argument("--id-column", default="obligor_id", help="Obligor key column.")
+    p_archive.add_argument("--chunksize", type=int, default=100_000, help="Rows scored per chunk.")
+    p_archive.set_defaults(func=archive)
+
+    p_stress = sub.add_parser("stress", help="Monte Carlo grade-flip and risk_score distribution per obligor.")
+    p_stress.add_argument("src", help="Portfolio CSV or Parquet file.")
+    p_stress.add_argument("dst", help="Per-obligor output CSV or Parquet file.")
+    p_stress.add_argument("--scenarios", type=int, default=1_000, help="Number of scenarios.")
+    p_stress.add_argument("--threshold-sigma", type=float, default=0.10,
+                          help="Lognormal shock size for every named threshold.")
+    p_stress.add_argument("--weight-sigma", type=float, default=0.10,
+                          help="Lognormal shock size for the disclosure and performance weights.")
+    p_stress.add_argument("--sigma", type=_sigma, action="append", default=[], metavar="NAME=SIGMA",
+                          help="Shock size for one threshold or weight, e.g. ghg_high=0.2 (repeatable).")
+    p_stress.add_argument("--seed", type=int, default=0, help="Random seed for the scenario draws.")
+    p_stress.add_argument("--id-column", help="Input column to use as the obligor key in the output.")
+    p_stress.add_argument("--workers", type=int, help="Stress obligor chunks on this many processes.")
+    p_stress.add_argument("--chunk", type=int, default=1_000, help="Obligors evaluated against all scenarios at once.")
+    p_stress.add_argument("--scenario-out", help="Also write per-scenario factors and portfolio summaries here.")
+    p_stress.set_defaults(func=stress)
+
+    p_alerts = sub.add_parser("alerts", help="Evaluate the config's alert rules over a portfolio file.")
+    p_alerts.add_argument("src", help="Portfolio CSV or Parquet file.")
+    p_alerts.add_argument("dst", help="Output CSV or Parquet file (one bool column per rule).")
+    p_alerts.add_argument("--id-column", help="Input column to use as the obligor key in the output.")
+    p_alerts.add_argument("--triggered-only", action="store_true", help="Write only obligors with an alert.")
+    p_alerts.set_defaults(func=alerts)
+
+    p_credit = sub.add_parser("credit-overlay", help="ESG-adjusted PD, LGD, expected loss and capital per facility.")
+    p_credit.add_argument("src", help="Loan book CSV or Parquet file (obligor key, ead, pd, lgd, optional maturity).")
+    p_credit.add_argument("obligors", help="Scored obligors: an archive run (.arrow), a scored or a raw portfolio file.")
+    p_credit.add_argument("dst", help="Per-facility output CSV or Parquet file.")
+    p_credit.add_argument("--summary", help="Write the per-sector summary here (default: print it).")
+    p_credit.add_argument("--overlay-config", help="JSON file with PD/LGD multipliers and sensitivities.")
+    p_credit.add_argument("--obligor-key", default="obligor_id", help="Obligor key column in both files.")
+    p_credit.add_argument("--chunksize", type=int, default=500_000, help="Facilities processed per chunk.")
+    p_credit.set_defaults(func=credit_overlay)
+
+    p_book = sub.add_parser("portfolio", help="Exposure-weighted ESG risk and grade migration of a loan book.")
+    p_book.add_argument("facilities", help="Facilities CSV or Parquet file (obligor_id, ead, sector, region).")
+    p_book.add_argument("obligors", help="Scored obligors: an archive run (.arrow), a scored or a raw portfolio file.")
+    p_book.add_argument("--baseline", help="Obligors whose grades the migration starts from (default: obligors).")
+    p_book.add_argument("--remove", action="append", help="Facilities repaid or sold since (repeatable).")
+    p_book.add_argument("--add", action="append", help="Facilities booked since (repeatable).")
+    p_book.add_argument("--rescore", action="append", help="Obligors rescored since (repeatable).")
+    p_book.add_argument("--by", choices=["sector", "region"], default="sector", help="Breakdown dimension.")
+    p_book.add_argument("--breakdown", help="Write the breakdown here (default: print it).")
+    p_book.add_argument("--migration", help="Write the grade migration table (EAD) here.")
+    p_book.set_defaults(func=portfolio)
+
+    p_reports = sub.add_parser("reports", help="Write a self-contained HTML (optionally Excel) scorecard per obligor.")
+    p_reports.add_argument("src", help="Portfolio CSV or Parquet file.")
+    p_reports.add_argument("directory", help="Output directory (one file per obligor and format).")
+    p_reports.add_argument("--id-column", help="Input column naming each obligor and its files (default: row_<n>).")
+    p_reports.add_argument("--excel", action="store_true", help="Also write an .xlsx scorecard (needs openpyxl).")
+    p_reports.add_argument("--workers", type=int, help="Render scorecards on this many processes.")
+    p_reports.add_argument("--chunksize", type=int, default=100_000, help="Rows scored per chunk.")
+    p_reports.add_argument("--batch", type=int, default=500, help="Scorecards rendered per pool task.")
+    p_reports.set_defaults(func=reports)
+
+    p_dist = sub.add_parser("distributions", help="Per-industry percentiles from streaming quantile sketches.")
+    p_dist.add_argument("src", help="Portfolio CSV or Parquet file, or a saved sketch (.json).")
+    p_dist.add_argument("--out", help="Save the sketches here (JSON) for later queries.")
+    p_dist.add_argument("--column", action="append", help="Column to report (repeatable; default: all sketched).")
+    p_dist.add_argument("--quantiles", help="Comma-separated quantiles to report, e.g. 0.1,0.5,0.9.")
+    p_dist.add_argument("--k", type=int, default=400, help="Sketch size; rank error is about 4/k.")
+    p_dist.add_argument("--workers", type=int, help="Score and sketch chunks on this many processes.")
+    p_dist.add_argument("--chunksize", type=int, default=100_000, help="Rows scored per chunk.")
+    p_dist.set_defaults(func=distributions)
+
+    p_serve = sub.add_parser("serve", help="Run the local HTTP scoring service (micro-batched).")
+    p_serve.add_argument("--host", default="127.0.0.1", help="Interface to listen on.")
+    p_serve.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    p_serve.add_argument("--max-batch", type=int, default=1024, help="Most companies scored in one batch.")
+    p_serve.add_argument("--max-wait-ms", type=float, default=1.0,
+                         help="How long a batch waits for more requests before it is scored.")
+    p_serve.add_argument("--verbose", action="store_true", help="Log every request.")
+    p_serve.set_defaults(func=serve)
+
+    p_load = sub.add_parser("load-test", help="Drive a running scoring service and report throughput.")
+    p_load.add_argument("url", nargs="?", default="http://127.0.0.1:8765", help="Service base URL.")
+    p_load.add_argument("--requests", type=int, default=10_000, help="Requests to send.")
+    p_load.add_argument("--concurrency", type=int, default=32, help="Concurrent keep-alive connections.")
+    p_load.add_argument("--batch-size", type=int, default=1, help="Companies per request (1 sends an object).")
+    p_load.set_defaults(func=load_test)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
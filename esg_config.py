@@ -0,0 +1,436 @@
+"""Externalized scoring configuration: loading, validation, compilation and hot reload.
+
+The questionnaire, industry and performance thresholds, metric ladders, weights,
+grade bands and risk-alert rules live in a JSON (or, with PyYAML installed, YAML)
+file such as ``esg_config.json``. ``parse_config`` validates the whole document,
+reporting every problem at once, and compiles it into a frozen ``ScoringConfig``:
+read-only mappings, tuples and read-only threshold arrays that every session and
+thread can share.
+
+``ConfigStore`` serves the compiled config for one file and re-reads it only when
+the file's modification time or size changes, so thresholds can be edited
+without a redeploy. A reload that fails validation is reported through
+``ConfigStore.last_error`` and the previous config keeps being served.
+"""
+import hashlib
+import json
+import math
+import os
+import string
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+from esg_thresholds import OPERATORS, ThresholdTable, compile_ladders
+
+SCHEMA_VERSION = 1
+CATEGORY_KEYS = ("E", "S", "G")
+DEFAULT_INDUSTRY = "DEFAULT"
+MAX_QUESTIONS = 64  # esg_answers packs a company's answers into one 64-bit word
+ALERT_MESSAGE_FIELDS = ("threshold", "value")  # the only fields an alert message may format
+
+
+class ConfigError(ValueError):
+    """The configuration file is unreadable or fails validation."""
+
+    def __init__(self, source: str, problems: Sequence[str]):
+        self.source = source
+        self.problems = list(problems)
+        super().__init__(f"invalid scoring config {source}:\n  - " + "\n  - ".join(self.problems))
+
+
+@dataclass(frozen=True, eq=False)
+class ScoringConfig:
+    """One validated, compiled and immutable scoring configuration."""
+    source: str
+    label: str  # free-form "version" field of the file, for display and audit
+    version: str  # content hash of everything that affects a score (cache keys use it)
+    industry_options: Tuple[str, ...]
+    detailed_questions: Mapping[str, Mapping[str, Any]]  # {'E': {'title', 'sections': ((title, (q, ...)), ...)}}
+    industry_thresholds: Mapping[str, Mapping[str, float]]
+    performance_thresholds: Mapping[str, float]
+    metric_ladders: Mapping[str, Tuple[str, Tuple[Tuple[str, Any, float], ...]]]
+    metric_columns: Tuple[str, ...]  # weighting order of the metric scores
+    value_names: Tuple[str, ...]  # inputs a ladder may be evaluated on
+    disclosure_weight: float
+    performance_weight: float
+    grade_bands: Tuple[Tuple[float, str, str], ...]  # (minimum score, grade, CSS class), best first
+    lowest_grade: Tuple[str, str]
+    alert_rules: Tuple[Tuple[str, str, str, Any, str], ...]  # (id, value, operator, threshold, message)
+    document: str = field(repr=False)  # the validated document as JSON, for pickling
+    # --- Compiled lookups ---
+    question_ids: Mapping[str, Tuple[str, ...]] = field(init=False, repr=False)
+    threshold_keys: Tuple[str, ...] = field(init=False, repr=False)
+    threshold_index: Mapping[str, int] = field(init=False, repr=False)
+    tables: Mapping[str, ThresholdTable] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        question_ids = {
+            category_key: tuple(
+                f"{category_key}.{sub_index}.{q_sub_index}"
+                for sub_index, (_, questions) in enumerate(self.detailed_questions[category_key]["sections"], 1)
+                for q_sub_index, _ in enumerate(questions, 1)
+            )
+            for category_key in CATEGORY_KEYS
+        }
+        tables = compile_ladders(self.metric_ladders, self.industry_thresholds, self.performance_thresholds)
+        for table in tables.values():
+            table.cuts.flags.writeable = False
+            table.levels.flags.writeable = False
+        threshold_keys = tuple(self.industry_thresholds)
+        object.__setattr__(self, "question_ids", MappingProxyType(question_ids))
+        object.__setattr__(self, "threshold_keys", threshold_keys)
+        object.__setattr__(self, "threshold_index", MappingProxyType({k: i for i, k in enumerate(threshold_keys)}))
+        object.__setattr__(self, "tables", MappingProxyType(tables))
+
+    def __reduce__(self):
+        # Mapping proxies do not pickle; workers rebuild the config from the validated document
+        return _parse_json, (self.document, self.source, self.metric_columns, self.value_names)
+
+    @property
+    def all_question_ids(self) -> Tuple[str, ...]:
+        return sum((self.question_ids[key] for key in CATEGORY_KEYS), ())
+
+    @property
+    def total_disclosure_questions(self) -> int:
+        return len(self.all_question_ids)
+
+    @property
+    def total_performance_metrics_weighted(self) -> float:
+        return len(self.metric_columns) * self.performance_weight
+
+    @property
+    def total_weighted_max_score(self) -> float:
+        return self.total_disclosure_questions * self.disclosure_weight + self.total_performance_metrics_weighted
+
+    @property
+    def default_threshold_index(self) -> int:
+        return self.threshold_index[DEFAULT_INDUSTRY]
+
+    @property
+    def grades(self) -> Tuple[str, ...]:
+        return tuple(grade for _, grade, _ in self.grade_bands) + (self.lowest_grade[0],)
+
+    @property
+    def grade_classes(self) -> Tuple[str, ...]:
+        return tuple(grade_class for _, _, grade_class in self.grade_bands) + (self.lowest_grade[1],)
+
+
+# --- Validation ---
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _check_questions(questions: Any, problems: list[str]) -> None:
+    if not isinstance(questions, dict) or list(questions) != list(CATEGORY_KEYS):
+        problems.append(f"detailed_questions must have exactly the categories {list(CATEGORY_KEYS)} in that order")
+        return
+    for key, category in questions.items():
+        if not isinstance(category, dict) or not isinstance(category.get("title"), str):
+            problems.append(f"detailed_questions.{key} needs a string 'title'")
+            continue
+        sections = category.get("sections")
+        if not isinstance(sections, list) or not sections:
+            problems.append(f"detailed_questions.{key}.sections must be a non-empty list")
+            continue
+        for i, section in enumerate(sections, 1):
+            if (not isinstance(section, list) or len(section) != 2 or not isinstance(section[0], str)
+                    or not isinstance(section[1], list) or not section[1]
+                    or not all(isinstance(q, str) and q for q in section[1])):
+                problems.append(f"detailed_questions.{key}.sections[{i}] must be [title, [question, ...]]")
+    count = sum(len(section[1]) for category in questions.values() if isinstance(category, dict)
+                and isinstance(category.get("sections"), list)
+                for section in category["sections"] if isinstance(section, list) and len(section) == 2
+                and isinstance(section[1], list))
+    if count > MAX_QUESTIONS:
+        problems.append(f"detailed_questions has {count} questions; at most {MAX_QUESTIONS} are supported")
+
+
+def _check_number_map(name: str, mapping: Any, problems: list[str]) -> None:
+    if not isinstance(mapping, dict) or not mapping:
+        problems.append(f"{name} must be a non-empty mapping")
+        return
+    for key, value in mapping.items():
+        if not _is_number(value):
+            problems.append(f"{name}.{key} must be a finite number, got {value!r}")
+
+
+def _check_ladders(data: Mapping[str, Any], metric_columns: Sequence[str], value_names: Sequence[str],
+                   problems: list[str]) -> None:
+    ladders = data.get("metric_ladders")
+    if not isinstance(ladders, dict):
+        problems.append("metric_ladders must be a mapping of metric column -> {value, ladder}")
+        return
+    missing, unknown = set(metric_columns) - set(ladders), set(ladders) - set(metric_columns)
+    if missing:
+        problems.append(f"metric_ladders is missing {sorted(missing)}")
+    if unknown:
+        problems.append(f"metric_ladders has unknown metrics {sorted(unknown)}")
+    industries = data.get("industry_thresholds") if isinstance(data.get("industry_thresholds"), dict) else {}
+    performance = data.get("performance_thresholds") if isinstance(data.get("performance_thresholds"), dict) else {}
+    for column, spec in ladders.items():
+        where = f"metric_ladders.{column}"
+        if not isinstance(spec, dict) or spec.get("value") not in value_names:
+            problems.append(f"{where}.value must be one of {list(value_names)}")
+            continue
+        rows = spec.get("ladder")
+        if not isinstance(rows, list) or not rows:
+            problems.append(f"{where}.ladder must be a non-empty list of [operator, threshold, score]")
+            continue
+        for i, row in enumerate(rows, 1):
+            if not isinstance(row, list) or len(row) != 3:
+                problems.append(f"{where}.ladder[{i}] must be [operator, threshold, score]")
+                continue
+            op, threshold, score = row
+            if op not in OPERATORS:
+                problems.append(f"{where}.ladder[{i}] operator {op!r} is not one of {list(OPERATORS)}")
+            if not _is_number(score):
+                problems.append(f"{where}.ladder[{i}] score must be a finite number")
+            if isinstance(threshold, str):
+                unresolved = [name for name, th in industries.items()
+                              if isinstance(th, dict) and threshold not in th and threshold not in performance]
+                if unresolved:
+                    problems.append(f"{where}.ladder[{i}] threshold {threshold!r} is not defined for "
+                                    f"{unresolved} nor in performance_thresholds")
+            elif not _is_number(threshold):
+                problems.append(f"{where}.ladder[{i}] threshold must be a number or a threshold name")
+
+
+def _check_grades(data: Mapping[str, Any], problems: list[str]) -> None:
+    bands = data.get("grade_bands")
+    if not isinstance(bands, list) or not bands:
+        problems.append("grade_bands must be a non-empty list of {min_score, grade, css_class}")
+        return
+    previous = math.inf
+    for i, band in enumerate(bands, 1):
+        if (not isinstance(band, dict) or not _is_number(band.get("min_score"))
+                or not isinstance(band.get("grade"), str) or not isinstance(band.get("css_class"), str)):
+            problems.append(f"grade_bands[{i}] must be {{min_score: number, grade: str, css_class: str}}")
+            continue
+        if band["min_score"] >= previous:
+            problems.append("grade_bands must be ordered best first with strictly decreasing min_score")
+        previous = band["min_score"]
+    lowest = data.get("lowest_grade")
+    if not isinstance(lowest, dict) or not isinstance(lowest.get("grade"), str) \
+            or not isinstance(lowest.get("css_class"), str):
+        problems.append("lowest_grade must be {grade: str, css_class: str}")
+
+
+def _check_message(message: str) -> Optional[str]:
+    """Why an alert message would fail to format at trigger time (None when it formats)."""
+    try:
+        fields = {name for _, name, _, _ in string.Formatter().parse(message) if name is not None}
+    except ValueError as exc:
+        return f"is not a valid format string: {exc}"
+    unknown = sorted(fields - set(ALERT_MESSAGE_FIELDS))
+    if unknown:
+        return f"uses unknown field(s) {unknown}; only {{threshold}} and {{value}} are available"
+    try:
+        message.format(threshold=0.0, value=0.0)
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError) as exc:
+        return f"cannot be formatted: {exc}"
+    return None
+
+
+def _check_alerts(data: Mapping[str, Any], value_names: Sequence[str], problems: list[str]) -> None:
+    rules = data.get("alert_rules", [])
+    if not isinstance(rules, list):
+        problems.append("alert_rules must be a list of {id, value, op, threshold, message}")
+        return
+    industries = data.get("industry_thresholds") if isinstance(data.get("industry_thresholds"), dict) else {}
+    performance = data.get("performance_thresholds") if isinstance(data.get("performance_thresholds"), dict) else {}
+    seen = set()
+    for i, rule in enumerate(rules, 1):
+        where = f"alert_rules[{i}]"
+        if not isinstance(rule, dict) or not isinstance(rule.get("id"), str) or not rule["id"] \
+                or not isinstance(rule.get("message"), str):
+            problems.append(f"{where} must be {{id: str, value, op, threshold, message: str}}")
+            continue
+        if rule["id"] in seen:
+            problems.append(f"{where} repeats the id {rule['id']!r}")
+        message_problem = _check_message(rule["message"])
+        if message_problem:
+            problems.append(f"{where}.message {message_problem}")
+        seen.add(rule["id"])
+        if rule.get("value") not in value_names:
+            problems.append(f"{where}.value must be one of {list(value_names)}")
+        if rule.get("op") not in OPERATORS:
+            problems.append(f"{where}.op {rule.get('op')!r} is not one of {list(OPERATORS)}")
+        threshold = rule.get("threshold")
+        if isinstance(threshold, str):
+            unresolved = [name for name, th in industries.items()
+                          if isinstance(th, dict) and threshold not in th and threshold not in performance]
+            if unresolved:
+                problems.append(f"{where}.threshold {threshold!r} is not defined for "
+                                f"{unresolved} nor in performance_thresholds")
+        elif not _is_number(threshold):
+            problems.append(f"{where}.threshold must be a number or a threshold name")
+
+
+def validate(data: Any, metric_columns: Sequence[str], value_names: Sequence[str]) -> list[str]:
+    """Every problem found in a parsed config document (empty when it is valid)."""
+    if not isinstance(data, dict):
+        return ["the document must be a mapping"]
+    problems: list[str] = []
+    if data.get("schema_version") != SCHEMA_VERSION:
+        problems.append(f"schema_version must be {SCHEMA_VERSION}, got {data.get('schema_version')!r}")
+    options = data.get("industry_options")
+    if not isinstance(options, list) or not options or not all(isinstance(o, str) and o for o in options):
+        problems.append("industry_options must be a non-empty list of strings")
+    _check_questions(data.get("detailed_questions"), problems)
+    industries = data.get("industry_thresholds")
+    if not isinstance(industries, dict) or DEFAULT_INDUSTRY not in industries:
+        problems.append(f"industry_thresholds must be a mapping that includes {DEFAULT_INDUSTRY!r}")
+    else:
+        for name, thresholds in industries.items():
+            _check_number_map(f"industry_thresholds.{name}", thresholds, problems)
+    _check_number_map("performance_thresholds", data.get("performance_thresholds"), problems)
+    _check_ladders(data, metric_columns, value_names, problems)
+    for name in ("disclosure_weight", "performance_weight"):
+        if not _is_number(data.get(name)) or data[name] <= 0:
+            problems.append(f"{name} must be a positive number")
+    _check_grades(data, problems)
+    _check_alerts(data, value_names, problems)
+    return problems
+
+
+# --- Compilation ---
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def content_hash(data: Mapping[str, Any]) -> str:
+    """Short hash of everything in a config document that affects a score."""
+    ladders = {column: [spec["value"], spec["ladder"]] for column, spec in data["metric_ladders"].items()}
+    bands = [[b["min_score"], b["grade"], b["css_class"]] for b in data["grade_bands"]]
+    lowest = [data["lowest_grade"]["grade"], data["lowest_grade"]["css_class"]]
+    payload = json.dumps([data["detailed_questions"], data["industry_thresholds"], data["performance_thresholds"],
+                          ladders, data["disclosure_weight"], data["performance_weight"], bands, lowest],
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_config(data: Any, source: str, metric_columns: Sequence[str], value_names: Sequence[str]) -> ScoringConfig:
+    """Validates a parsed document and compiles it; raises ``ConfigError`` listing every problem."""
+    problems = validate(data, metric_columns, value_names)
+    if problems:
+        raise ConfigError(source, problems)
+    ladders = {column: (data["metric_ladders"][column]["value"],
+                        tuple(tuple(row) for row in data["metric_ladders"][column]["ladder"]))
+               for column in metric_columns}
+    return ScoringConfig(
+        source=source,
+        label=str(data.get("version", "")),
+        version=content_hash(data),
+        industry_options=tuple(data["industry_options"]),
+        detailed_questions=_freeze(data["detailed_questions"]),
+        industry_thresholds=_freeze(data["industry_thresholds"]),
+        performance_thresholds=_freeze(data["performance_thresholds"]),
+        metric_ladders=MappingProxyType(ladders),
+        metric_columns=tuple(metric_columns),
+        value_names=tuple(value_names),
+        disclosure_weight=data["disclosure_weight"],
+        performance_weight=data["performance_weight"],
+        grade_bands=tuple((b["min_score"], b["grade"], b["css_class"]) for b in data["grade_bands"]),
+        lowest_grade=(data["lowest_grade"]["grade"], data["lowest_grade"]["css_class"]),
+        alert_rules=tuple((r["id"], r["value"], r["op"], r["threshold"], r["message"])
+                          for r in data.get("alert_rules", [])),
+        document=json.dumps(data),
+    )
+
+
+def _parse_json(document: str, source: str, metric_columns: Sequence[str], value_names: Sequence[str]):
+    return parse_config(json.loads(document), source, metric_columns, value_names)
+
+
+def _require_yaml():
+    try:
+        import yaml
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("YAML scoring configs need the optional 'PyYAML' package (pip install pyyaml).") from exc
+    return yaml
+
+
+def read_document(path: str) -> Any:
+    """Parses a JSON or YAML (by extension) config file; a syntax error is raised as ``ConfigError``."""
+    with open(path, encoding="utf-8") as fh:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            yaml = _require_yaml()
+            try:
+                return yaml.safe_load(fh)
+            except yaml.YAMLError as exc:
+                raise ConfigError(path, [f"invalid YAML: {exc}"]) from exc
+        try:
+            return json.load(fh)
+        except ValueError as exc:  # json.JSONDecodeError, or bytes that are not UTF-8
+            raise ConfigError(path, [f"invalid JSON: {exc}"]) from exc
+
+
+# --- Hot reload ---
+
+class ConfigStore:
+    """
+    The compiled config of one file, re-read only when its mtime or size changes.
+
+    ``check(previous, new)`` may return problems that make a reload unacceptable
+    (e.g. a changed question layout); such a reload is rejected like an invalid one.
+    """
+
+    def __init__(self, path: str, metric_columns: Sequence[str], value_names: Sequence[str],
+                 check: Optional[Callable[[ScoringConfig, ScoringConfig], list[str]]] = None):
+        self.path = path
+        self.metric_columns = tuple(metric_columns)
+        self.value_names = tuple(value_names)
+        self.check = check
+        self.last_error: Optional[str] = None
+        self.reloads = 0
+        self._config: Optional[ScoringConfig] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ScoringConfig:
+        """The current config; costs one ``os.stat`` when the file has not changed."""
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError as exc:
+            if self._config is None:
+                raise
+            self.last_error = f"cannot stat {self.path}: {exc}"
+            return self._config
+        if stamp == self._stamp:
+            return self._config
+        with self._lock:
+            if stamp != self._stamp:
+                self._load(stamp)
+        return self._config
+
+    def _load(self, stamp: Tuple[int, int]) -> None:
+        try:
+            config = parse_config(read_document(self.path), self.path, self.metric_columns, self.value_names)
+            if self._config is not None and self.check is not None:
+                problems = self.check(self._config, config)
+                if problems:
+                    raise ConfigError(self.path, problems)
+        except (OSError, ValueError) as exc:  # ConfigError (including syntax errors) is a ValueError
+            if self._config is None:
+                raise
+            # Keep serving the previous config; remember the stamp so the broken file is not re-parsed every call
+            self.last_error = str(exc)
+            self._stamp = stamp
+            return
+        if self._config is not None:
+            self.reloads += 1
+        self._config, self._stamp, self.last_error = config, stamp, None
+
+    def status(self) -> Dict[str, Any]:
+        config = self._config
+        return {"path": self.path, "version": config.version if config else None,
+                "label": config.label if config else None, "reloads": self.reloads, "last_error": self.last_error}
@@ -0,0 +1,271 @@
+"""ESG credit-risk overlay: ESG-adjusted PD, LGD, expected loss and capital per facility.
+
+Each facility of a loan book (exposure ``ead``, ``pd``, ``lgd`` and optionally
+``maturity`` in years) belongs to a scored obligor. The obligor's grade and metric
+scores set two multipliers, computed once per obligor:
+
+    pd_factor  = pd_multipliers[grade]  * (1 + sum(pd_sensitivity[m]  * (1 - score_m)))
+    lgd_factor = lgd_multipliers[grade] * (1 + sum(lgd_sensitivity[m] * (1 - score_m)))
+
+``pd_esg = clip(pd * pd_factor, pd_floor, 1)`` and ``lgd_esg = min(lgd * lgd_factor, 1)``.
+Expected loss is ``pd * lgd * ead``. Capital uses the Basel IRB formula for corporate
+exposures (asset correlation from PD, maturity adjustment, 99.9% confidence).
+Climate-adjusted capital applies that formula to the ESG-adjusted PD and LGD, and
+base capital applies it to the book's own PD and LGD. Facilities whose obligor has
+no ESG score keep factors of 1.0 and fall under the ``UNSCORED`` sector.
+
+The book is processed in chunks: obligor keys are resolved with one hash lookup
+per chunk (``pd.Index.get_indexer``) and everything else is array arithmetic, so
+millions of facilities take seconds. ``sector_summary`` aggregates exposure,
+expected loss and capital per sector (the obligor's industry) across chunks.
+
+The normal CDF and its inverse are computed with NumPy approximations (relative
+error below 1.2e-7 and 1.2e-9); SciPy is not needed.
+"""
+import json
+from dataclasses import dataclass, field, fields
+from typing import TYPE_CHECKING, Any, Iterator, Mapping, Optional
+
+import numpy as np
+
+from esg_scoring import INDUSTRY_COLUMN, METRIC_COLUMNS, get_config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_OBLIGOR_KEY = "obligor_id"
+SECTOR_COLUMN = "sector"
+UNSCORED = "UNSCORED"
+FACILITY_INPUTS = ("ead", "pd", "lgd")
+SUMMARY_SUMS = ["ead", "el", "el_esg", "capital", "capital_esg"]
+
+
+@dataclass(frozen=True)
+class OverlaySpec:
+    """PD/LGD multipliers of the overlay and the capital-formula settings."""
+    pd_multipliers: Mapping[str, float] = field(default_factory=lambda: {
+        "A+": 0.85, "A": 0.90, "B+": 1.00, "B": 1.10, "C+": 1.25, "C": 1.50})
+    lgd_multipliers: Mapping[str, float] = field(default_factory=lambda: {
+        "A+": 0.95, "A": 1.00, "B+": 1.00, "B": 1.00, "C+": 1.05, "C": 1.10})
+    # Metric score column -> relative PD / LGD add-on for a metric score of 0 (none at a score of 1)
+    pd_sensitivity: Mapping[str, float] = field(default_factory=lambda: {
+        "ghg_score": 0.10, "renewable_score": 0.05, "compliance_score": 0.10})
+    lgd_sensitivity: Mapping[str, float] = field(default_factory=lambda: {
+        "ghg_score": 0.05, "waste_score": 0.05, "water_score": 0.03})
+    pd_floor: float = 0.0003
+    maturity: float = 2.5  # years, for facilities without a maturity column
+    confidence: float = 0.999
+
+    def __post_init__(self):
+        grades = set(get_config().grades)
+        problems = []
+        for name in ("pd_multipliers", "lgd_multipliers"):
+            unknown = set(getattr(self, name)) - grades
+            if unknown:
+                problems.append(f"{name} has unknown grade(s) {sorted(unknown)}; grades are {sorted(grades)}")
+        for name in ("pd_sensitivity", "lgd_sensitivity"):
+            unknown = set(getattr(self, name)) - set(METRIC_COLUMNS)
+            if unknown:
+                problems.append(f"{name} has unknown metric(s) {sorted(unknown)}")
+        if any(v < 0 for name in ("pd_multipliers", "lgd_multipliers") for v in getattr(self, name).values()):
+            problems.append("multipliers must not be negative")
+        if not 0 < self.pd_floor < 1 or not 0 < self.confidence < 1 or self.maturity <= 0:
+            problems.append("pd_floor and confidence must be in (0, 1) and maturity positive")
+        if problems:
+            raise ValueError("; ".join(problems))
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "OverlaySpec":
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"unknown overlay setting(s) {sorted(unknown)}; expected some of {sorted(known)}")
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path: str) -> "OverlaySpec":
+        """Reads the settings that differ from the defaults from a JSON file."""
+        with open(path, encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
+
+
+# --- Normal distribution (vectorized) ---
+
+_ERFC = (-1.26551223, 1.00002368, 0.37409196, 0.09678418, -0.18628806,
+         0.27886807, -1.13520398, 1.48851587, -0.82215223, 0.17087277)
+_PPF_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+          1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_PPF_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+          6.680131188771972e+01, -1.328068155288572e+01, 1.0)
+_PPF_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+          -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_PPF_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00, 1.0)
+_PPF_LOW = 0.02425
+
+
+def _poly(coefficients: tuple, x: np.ndarray) -> np.ndarray:
+    out = np.full_like(x, coefficients[0])
+    for c in coefficients[1:]:
+        out = out * x + c
+    return out
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF (Chebyshev erfc approximation, relative error < 1.2e-7)."""
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.5 * z)
+    erfc = t * np.exp(-z * z + _poly(_ERFC[::-1], t))
+    return np.where(x >= 0, 1.0 - 0.5 * erfc, 0.5 * erfc)
+
+
+def norm_ppf(p: np.ndarray) -> np.ndarray:
+    """Inverse standard normal CDF for p in (0, 1) (Acklam's rational approximation, relative error < 1.2e-9)."""
+    p = np.asarray(p, dtype=np.float64)
+    tail = np.minimum(p, 1.0 - p)
+    q = np.sqrt(-2.0 * np.log(np.maximum(tail, np.finfo(np.float64).tiny)))
+    outer = _poly(_PPF_C, q) / _poly(_PPF_D, q)
+    outer = np.where(p < 0.5, outer, -outer)
+    r = (p - 0.5) ** 2
+    central = (p - 0.5) * _poly(_PPF_A, r) / _poly(_PPF_B, r)
+    return np.where(tail < _PPF_LOW, outer, central)
+
+
+def irb_capital(pd_: np.ndarray, lgd: np.ndarray, maturity: np.ndarray, confidence: float = 0.999) -> np.ndarray:
+    """
+    Basel IRB capital requirement K per unit of exposure for corporate exposures.
+    Defaulted facilities (PD of 1) get 0: their loss sits in expected loss.
+    """
+    pd_ = np.asarray(pd_, dtype=np.float64)
+    live = pd_ < 1.0
+    p = np.where(live, pd_, 0.5)  # keeps the formula finite on defaulted rows
+    weight = (1.0 - np.exp(-50.0 * p)) / (1.0 - np.exp(-50.0))
+    correlation = 0.12 * weight + 0.24 * (1.0 - weight)
+    b = (0.11852 - 0.05478 * np.log(p)) ** 2
+    stressed = norm_cdf((norm_ppf(p) + np.sqrt(correlation) * norm_ppf(np.array(confidence)))
+                        / np.sqrt(1.0 - correlation))
+    k = lgd * (stressed - p) * (1.0 + (maturity - 2.5) * b) / (1.0 - 1.5 * b)
+    return np.where(live, np.maximum(k, 0.0), 0.0)
+
+
+# --- Overlay ---
+
+class ObligorOverlay:
+    """Per-obligor PD/LGD factors and sector, looked up by obligor key for every facility chunk."""
+
+    def __init__(self, obligors: "pd.DataFrame", spec: Optional[OverlaySpec] = None,
+                 key: str = DEFAULT_OBLIGOR_KEY):
+        """``obligors`` holds scored obligors: the key (column or index), ``industry``, ``grade`` and the metric scores."""
+        import pandas as pd
+
+        self.spec = spec or OverlaySpec()
+        required = dict.fromkeys([INDUSTRY_COLUMN, "grade", *self.spec.pd_sensitivity, *self.spec.lgd_sensitivity])
+        missing = [c for c in required if c not in obligors.columns]
+        if missing:
+            raise ValueError(f"Scored obligors are missing required columns: {', '.join(missing)}")
+        keys = obligors[key] if key in obligors.columns else obligors.index.to_series()
+        if keys.duplicated().any():
+            raise ValueError(f"obligor key {key!r} is not unique")
+        self.index = pd.Index(keys.to_numpy())
+        grades = obligors["grade"].astype(object).to_numpy()
+        pd_factor = pd.Series(grades).map(self.spec.pd_multipliers).fillna(1.0).to_numpy(dtype=np.float64)
+        lgd_factor = pd.Series(grades).map(self.spec.lgd_multipliers).fillna(1.0).to_numpy(dtype=np.float64)
+        pd_addon, lgd_addon = np.ones(len(obligors)), np.ones(len(obligors))
+        for column, sensitivity in self.spec.pd_sensitivity.items():
+            pd_addon += sensitivity * (1.0 - obligors[column].to_numpy(dtype=np.float64))
+        for column, sensitivity in self.spec.lgd_sensitivity.items():
+            lgd_addon += sensitivity * (1.0 - obligors[column].to_numpy(dtype=np.float64))
+        # A trailing neutral row serves facilities whose obligor is not scored (get_indexer -> -1)
+        self.pd_factor = np.append(pd_factor * pd_addon, 1.0)
+        self.lgd_factor = np.append(lgd_factor * lgd_addon, 1.0)
+        self.sector = np.append(obligors[INDUSTRY_COLUMN].astype(object).to_numpy(), UNSCORED)
+
+    def apply(self, facilities: "pd.DataFrame", key: str = DEFAULT_OBLIGOR_KEY) -> "pd.DataFrame":
+        """
+        ``facilities`` with ``sector``, ``pd_esg``, ``lgd_esg``, expected loss (``el``,
+        ``el_esg``) and capital (``capital``, ``capital_esg``) columns appended.
+        """
+        missing = [c for c in (key,) + FACILITY_INPUTS if c not in facilities.columns]
+        if missing:
+            raise ValueError(f"Loan book is missing required columns: {', '.join(missing)}")
+        spec = self.spec
+        rows = self.index.get_indexer(facilities[key].to_numpy())
+        ead = facilities["ead"].to_numpy(dtype=np.float64)
+        pd_ = np.clip(facilities["pd"].to_numpy(dtype=np.float64), spec.pd_floor, 1.0)
+        lgd = facilities["lgd"].to_numpy(dtype=np.float64)
+        maturity = facilities["maturity"].to_numpy(dtype=np.float64) if "maturity" in facilities.columns \
+            else np.full(len(facilities), spec.maturity)
+        maturity = np.clip(np.nan_to_num(maturity, nan=spec.maturity), 1.0, 5.0)  # IRB bounds on M
+
+        pd_esg = np.clip(pd_ * self.pd_factor[rows], spec.pd_floor, 1.0)
+        lgd_esg = np.minimum(lgd * self.lgd_factor[rows], 1.0)
+        out = facilities.copy()
+        out[SECTOR_COLUMN] = self.sector[rows]
+        out["pd_esg"] = pd_esg
+        out["lgd_esg"] = lgd_esg
+        out["el"] = pd_ * lgd * ead
+        out["el_esg"] = pd_esg * lgd_esg * ead
+        out["capital"] = irb_capital(pd_, lgd, maturity, spec.confidence) * ead
+        out["capital_esg"] = irb_capital(pd_esg, lgd_esg, maturity, spec.confidence) * ead
+        return out
+
+
+def overlay_chunks(chunks: Iterator["pd.DataFrame"], overlay: ObligorOverlay,
+                   key: str = DEFAULT_OBLIGOR_KEY) -> Iterator["pd.DataFrame"]:
+    """Applies the overlay to every loan-book chunk."""
+    for chunk in chunks:
+        yield overlay.apply(chunk, key)
+
+
+class SectorTotals:
+    """Running per-sector sums of facilities, exposure, expected loss and capital across chunks."""
+
+    def __init__(self):
+        self._totals: Optional["pd.DataFrame"] = None
+
+    def add(self, chunk: "pd.DataFrame") -> None:
+        grouped = chunk.groupby(SECTOR_COLUMN, sort=False)[SUMMARY_SUMS]
+        part = grouped.sum()
+        part.insert(0, "facilities", grouped.size())
+        self._totals = part if self._totals is None else self._totals.add(part, fill_value=0)
+
+    def summary(self) -> "pd.DataFrame":
+        """One row per sector plus ``TOTAL``, with expected-loss and capital uplifts in percent."""
+        import pandas as pd
+
+        if self._totals is None:
+            return pd.DataFrame(columns=["facilities"] + SUMMARY_SUMS)
+        table = self._totals.sort_index()
+        table.loc["TOTAL"] = table.sum()
+        table["facilities"] = table["facilities"].astype(np.int64)
+        table["el_uplift_pct"] = (table["el_esg"] / table["el"] - 1) * 100
+        table["capital_uplift_pct"] = (table["capital_esg"] / table["capital"] - 1) * 100
+        table.index.name = SECTOR_COLUMN
+        return table
+
+
+def sector_summary(facilities: "pd.DataFrame") -> "pd.DataFrame":
+    """Per-sector totals of an overlaid loan book (see ``SectorTotals.summary``)."""
+    totals = SectorTotals()
+    totals.add(facilities)
+    return totals.summary()
+
+
+def overlay_file(src: str, dst: str, obligors: "pd.DataFrame", spec: Optional[OverlaySpec] = None,
+                 key: str = DEFAULT_OBLIGOR_KEY, chunksize: Optional[int] = None) -> "pd.DataFrame":
+    """
+    Streams a loan-book file (CSV or Parquet) through the overlay into ``dst`` and
+    returns the sector summary. ``obligors`` is a scored obligor frame.
+    """
+    from esg_batch import DEFAULT_CHUNKSIZE, empty_frame, read_portfolio_chunks, write_chunks
+
+    overlay = ObligorOverlay(obligors, spec, key)
+    totals = SectorTotals()
+
+    def tracked() -> Iterator["pd.DataFrame"]:
+        for chunk in overlay_chunks(read_portfolio_chunks(src, chunksize or DEFAULT_CHUNKSIZE), overlay, key):
+            totals.add(chunk)
+            yield chunk
+
+    write_chunks(tracked(), dst, overlay.apply(empty_frame(src), key).columns)
+    return totals.summary()
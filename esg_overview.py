@@ -0,0 +1,184 @@
+"""Server-side paging, sorting, filtering and chart aggregation for the portfolio overview page.
+
+``PortfolioView`` holds one scored row per obligor: the latest results-store
+snapshot per company, or an archive run. Filters are vectorized masks over
+pre-factorized industry and grade codes. Each sort order is computed once per
+column and reused. Only the requested page is materialized as a DataFrame, so the
+browser receives ``page_size`` rows whatever the portfolio size. Chart data is
+aggregated here too (histogram counts, grade and industry-by-grade counts), so a
+chart draws a few dozen bars instead of one mark per obligor. Per-industry
+percentiles come from quantile sketches (``esg_sketches``), built once per view.
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import numpy as np
+
+from esg_scoring import INDUSTRY_COLUMN, NUMERIC_INPUTS, QUESTION_IDS, get_config
+from esg_store import AS_OF_COLUMN, COMPANY_COLUMN
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from esg_sketches import PortfolioSketch
+    from esg_store import ResultStore
+
+OVERVIEW_COLUMNS = ["score", "risk_score", "grade", "ghg_emissions", "water_consumption",
+                    "hazardous_waste", "renewable_pct"]
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_BINS = 40
+
+
+@dataclass(frozen=True)
+class OverviewFilter:
+    """Row filter of the overview table and charts; empty fields do not filter."""
+    industries: tuple = ()
+    grades: tuple = ()
+    risk_range: Optional[tuple[float, float]] = None
+    search: str = ""  # case-insensitive substring of the obligor key
+
+
+class PortfolioView:
+    """A read-only scored portfolio with cached sort orders; one instance is shared by every session."""
+
+    def __init__(self, frame: "pd.DataFrame", key: str = COMPANY_COLUMN):
+        import pandas as pd
+
+        self.key = key
+        self.frame = frame.reset_index(drop=True)
+        self.grades = list(get_config().grades)
+        self.industry_codes, industries = pd.factorize(self.frame[INDUSTRY_COLUMN].astype(object), sort=True)
+        self.industries = list(industries)
+        self.grade_codes = pd.Categorical(self.frame["grade"].astype(object), categories=self.grades).codes
+        self.risk = self.frame["risk_score"].to_numpy(dtype=np.float64)
+        self._orders: Dict[tuple, np.ndarray] = {}
+        self._search_keys: Optional["pd.Series"] = None
+        self._sketch: Optional["PortfolioSketch"] = None
+
+    @classmethod
+    def from_store(cls, store: "ResultStore", as_of: Any = None) -> "PortfolioView":
+        """Latest snapshot per company (on or before ``as_of``) in a results store."""
+        columns = [COMPANY_COLUMN, INDUSTRY_COLUMN, AS_OF_COLUMN] + OVERVIEW_COLUMNS
+        return cls(store.cohort(as_of=as_of, columns=columns), COMPANY_COLUMN)
+
+    @classmethod
+    def from_archive(cls, path: str) -> "PortfolioView":
+        """One archive run; its key column is the first field of the file."""
+        from esg_archive import open_run
+
+        table = open_run(path)
+        key = table.schema.names[0]
+        columns = [key, INDUSTRY_COLUMN] + [c for c in OVERVIEW_COLUMNS if c in table.schema.names]
+        return cls(table.select(columns).to_pandas(), key)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    # --- Filtering and sorting ---
+
+    def mask(self, flt: OverviewFilter) -> np.ndarray:
+        """Rows passing ``flt``."""
+        keep = np.ones(len(self.frame), dtype=bool)
+        if flt.industries:
+            wanted = [self.industries.index(i) for i in flt.industries if i in self.industries]
+            keep &= np.isin(self.industry_codes, wanted)
+        if flt.grades:
+            keep &= np.isin(self.grade_codes, [self.grades.index(g) for g in flt.grades if g in self.grades])
+        if flt.risk_range is not None:
+            low, high = flt.risk_range
+            keep &= (self.risk >= low) & (self.risk <= high)
+        if flt.search:
+            if self._search_keys is None:
+                self._search_keys = self.frame[self.key].astype(str).str.lower()
+            keep &= self._search_keys.str.contains(flt.search.lower(), regex=False).to_numpy()
+        return keep
+
+    def order(self, column: str, ascending: bool = True) -> np.ndarray:
+        """Row positions sorted by ``column`` (missing values last), computed once per column and direction."""
+        import pandas as pd
+
+        cached = self._orders.get((column, ascending))
+        if cached is not None:
+            return cached
+        if column == "grade":
+            values = self.grade_codes.astype(np.float64)  # band order, best grade first
+            values[self.grade_codes < 0] = np.nan
+        elif column == INDUSTRY_COLUMN:
+            values = np.where(self.industry_codes < 0, np.nan, self.industry_codes).astype(np.float64)
+        elif pd.api.types.is_numeric_dtype(self.frame[column]):
+            values = self.frame[column].to_numpy(dtype=np.float64)
+        else:
+            codes, _ = pd.factorize(self.frame[column], sort=True)
+            values = np.where(codes < 0, np.nan, codes).astype(np.float64)
+        order = np.argsort(values if ascending else -values, kind="stable")  # NaN sorts last either way
+        self._orders[(column, ascending)] = order
+        return order
+
+    def page(self, flt: OverviewFilter, sort_by: str, ascending: bool = True, page: int = 1,
+             page_size: int = DEFAULT_PAGE_SIZE) -> tuple["pd.DataFrame", int]:
+        """One page of the filtered, sorted rows and the number of matching rows."""
+        order = self.order(sort_by, ascending)
+        matching = order[self.mask(flt)[order]]
+        start = max(page - 1, 0) * page_size
+        return self.frame.iloc[matching[start:start + page_size]], len(matching)
+
+    # --- Aggregates for charts ---
+
+    def summary(self, keep: np.ndarray) -> Dict[str, Any]:
+        n = int(keep.sum())
+        risk = self.risk[keep]
+        return {"obligors": n, "mean_risk_score": float(np.nanmean(risk)) if n else float("nan"),
+                "median_risk_score": float(np.nanmedian(risk)) if n else float("nan")}
+
+    def risk_histogram(self, keep: np.ndarray, bins: int = DEFAULT_BINS) -> "pd.DataFrame":
+        """Obligor counts per ``risk_score`` bin over 0-100."""
+        import pandas as pd
+
+        counts, edges = np.histogram(self.risk[keep], bins=bins, range=(0.0, 100.0))
+        return pd.DataFrame({"risk_from": edges[:-1], "risk_to": edges[1:],
+                             "risk_score": (edges[:-1] + edges[1:]) / 2, "obligors": counts})
+
+    def sketch(self) -> "PortfolioSketch":
+        """Per-industry distribution sketches of the ``SKETCH_COLUMNS`` this view holds, built on first use."""
+        from esg_sketches import SKETCH_COLUMNS, PortfolioSketch
+
+        if self._sketch is None:
+            self._sketch = PortfolioSketch([c for c in SKETCH_COLUMNS if c in self.frame.columns]).update(self.frame)
+        return self._sketch
+
+    def grade_counts(self, keep: np.ndarray) -> "pd.DataFrame":
+        import pandas as pd
+
+        codes = self.grade_codes[keep]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.grades))
+        return pd.DataFrame({"grade": self.grades, "obligors": counts})
+
+    def industry_grade_counts(self, keep: np.ndarray) -> "pd.DataFrame":
+        """Obligor counts with one row per industry and one column per grade."""
+        import pandas as pd
+
+        rows, cols = self.industry_codes[keep], self.grade_codes[keep]
+        valid = (rows >= 0) & (cols >= 0)
+        counts = np.bincount(rows[valid] * len(self.grades) + cols[valid],
+                             minlength=len(self.industries) * len(self.grades))
+        return pd.DataFrame(counts.reshape(len(self.industries), len(self.grades)),
+                            index=pd.Index(self.industries, name=INDUSTRY_COLUMN), columns=self.grades)
+
+
+# --- Drill-down ---
+
+def dashboard_inputs(store: "ResultStore", company: str) -> Optional[Dict[str, Any]]:
+    """
+    The latest stored snapshot of ``company`` as dashboard inputs: company, industry,
+    as-of date, the 35 answers (0/1 by question id) and the numeric inputs; None when
+    the store has no snapshot of it. Only this one row is read and decoded.
+    """
+    history = store.history(company)
+    if history.empty:
+        return None
+    latest = history.iloc[[-1]]
+    answers = store.answers(latest).bits()[0]
+    row = latest.iloc[0]
+    return {COMPANY_COLUMN: row[COMPANY_COLUMN], INDUSTRY_COLUMN: row[INDUSTRY_COLUMN], AS_OF_COLUMN: row[AS_OF_COLUMN],
+            **{qid: int(bit) for qid, bit in zip(QUESTION_IDS, answers)},
+            **{col: float(row[col]) for col in NUMERIC_INPUTS}}
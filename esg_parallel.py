@@ -0,0 +1,171 @@
+"""Multi-core portfolio scoring over ``multiprocessing.shared_memory``.
+
+The numeric input columns are copied once into a shared block laid out
+column-major (one contiguous row per input column) and the answers into a
+bit-packed block (``esg_answers``, 5 bytes per company); a process pool then scores row slices
+in place. Workers receive only ``(start, stop)`` bounds, read their slice
+through zero-copy views and write every numeric output of ``score_portfolio``
+(metric scores, disclosure sums, ratios, weighted totals) and the grade index
+straight into a shared result block. The parent rebuilds the label columns
+(``thresholds_key``, ``grade``, ``grade_class``) from the industry codes and
+grade indexes, so the output matches ``score_portfolio`` column for column.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Dict, Optional
+
+import numpy as np
+
+from esg_answers import ROW_BYTES, AnswerMatrix, score_packed
+from esg_config import ScoringConfig
+from esg_scoring import NUMERIC_INPUTS, INDUSTRY_COLUMN, METRIC_COLUMNS, get_config, grade_index, industry_codes
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Numeric outputs written by the workers, in result-block row order (= score_portfolio order)
+RESULT_COLUMNS = METRIC_COLUMNS + [
+    "env_score_sum", "social_disclosure_sum", "gov_score_sum", "total_disclosure_score",
+    "env_pct", "social_pct", "gov_pct", "gender_diversity_pct", "pay_gap", "attrition_gap",
+    "renewable_ratio", "csr_ratio", "total_attrition_rate",
+    "total_weighted_performance_score", "total_weighted_score", "score", "risk_score",
+]
+# Disclosure counts travel as float64 in the result block and are restored to int64
+COUNT_COLUMNS = ["env_score_sum", "social_disclosure_sum", "gov_score_sum", "total_disclosure_score"]
+# Every column of score_portfolio, in its order; the labels are rebuilt in the parent from the codes
+OUTPUT_COLUMNS = ["thresholds_key"] + RESULT_COLUMNS + ["grade", "grade_class"]
+
+# Slices per worker; more than one keeps cores busy when slices finish unevenly
+SLICES_PER_WORKER = 4
+# Below this many rows per worker the pool costs more than it saves
+MIN_ROWS_PER_WORKER = 20_000
+
+# Per-worker views onto the shared blocks and the parent's scoring config, set by _attach()
+_views: Dict[str, np.ndarray] = {}
+_segments: list[shared_memory.SharedMemory] = []
+_config: Optional[ScoringConfig] = None
+
+
+def _block(shape: tuple, dtype) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _attach(layout: Dict[str, tuple], config: ScoringConfig) -> None:
+    """Pool initializer: maps every shared block named in ``layout`` into this worker."""
+    global _config
+    _config = config  # industry codes were computed against this config, so score with it too
+    for key, (name, shape, dtype) in layout.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _segments.append(shm)
+        _views[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _score_slice(start: int, stop: int, views: Optional[Dict[str, np.ndarray]] = None,
+                 config: Optional[ScoringConfig] = None) -> int:
+    """Scores rows [start, stop) from the shared inputs into the shared results."""
+    views = _views if views is None else views
+    config = config or _config
+    numeric, answers, codes = views["numeric"], views["answers"], views["codes"]
+    columns = {col: numeric[i, start:stop] for i, col in enumerate(NUMERIC_INPUTS)}
+    scored = score_packed(AnswerMatrix(answers[start:stop], stop - start), columns, codes[start:stop], config)
+    results = views["results"]
+    for i, col in enumerate(RESULT_COLUMNS):
+        results[i, start:stop] = scored[col]
+    views["grades"][start:stop] = grade_index(scored["score"], config)
+    return stop - start
+
+
+class ParallelScorer:
+    """
+    Process pool plus shared input/result blocks sized for ``capacity`` rows.
+
+    Use as a context manager and call :meth:`score` any number of times (e.g. once
+    per chunk of a streamed file); the pool and shared memory are reused. All
+    chunks are scored with the config that was live when the scorer was created.
+    """
+
+    def __init__(self, workers: Optional[int] = None, capacity: int = 1_000_000,
+                 config: Optional[ScoringConfig] = None):
+        self.config = config or get_config()
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.capacity = capacity
+        self._shm: list[shared_memory.SharedMemory] = []
+        self._views: Dict[str, np.ndarray] = {}
+        layout = {}
+        for key, shape, dtype in (
+            ("numeric", (len(NUMERIC_INPUTS), capacity), np.float64),
+            ("answers", (capacity, ROW_BYTES), np.uint8),
+            ("codes", (capacity,), np.intp),
+            ("results", (len(RESULT_COLUMNS), capacity), np.float64),
+            ("grades", (capacity,), np.int8),
+        ):
+            shm, view = _block(shape, dtype)
+            self._shm.append(shm)
+            self._views[key] = view
+            layout[key] = (shm.name, shape, np.dtype(dtype).str)
+        self._layout = layout
+        self._pool: Optional[ProcessPoolExecutor] = None  # started on the first input large enough to split
+
+    def __enter__(self) -> "ParallelScorer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._views.clear()
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+        self._shm = []
+
+    def score(self, companies: "pd.DataFrame") -> "pd.DataFrame":
+        """Scores ``companies`` (answers already 0/1); returns the same columns as ``score_portfolio``."""
+        import pandas as pd
+
+        parts = [self._score_block(companies.iloc[i:i + self.capacity])
+                 for i in range(0, len(companies), self.capacity)]
+        if not parts:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS, index=companies.index)
+        return pd.concat(parts)
+
+    def _score_block(self, companies: "pd.DataFrame") -> "pd.DataFrame":
+        import pandas as pd
+
+        n = len(companies)
+        views = self._views
+        for i, col in enumerate(NUMERIC_INPUTS):
+            views["numeric"][i, :n] = companies[col].to_numpy(dtype=np.float64)
+        views["answers"][:n] = AnswerMatrix.from_frame(companies).packed
+        views["codes"][:n] = industry_codes(companies[INDUSTRY_COLUMN], self.config)
+
+        n_slices = min(n, self.workers * SLICES_PER_WORKER) if n >= self.workers * MIN_ROWS_PER_WORKER else 1
+        bounds = np.linspace(0, n, n_slices + 1, dtype=np.int64)
+        if n_slices == 1:
+            _score_slice(0, n, views, self.config)  # small input: score in-process against the same blocks
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_attach,
+                                                 initargs=(self._layout, self.config))
+            list(self._pool.map(_score_slice, bounds[:-1].tolist(), bounds[1:].tolist()))
+
+        out = pd.DataFrame(views["results"][:, :n].T.copy(), columns=RESULT_COLUMNS, index=companies.index)
+        out[COUNT_COLUMNS] = out[COUNT_COLUMNS].astype(np.int64)
+        grades = views["grades"][:n]
+        out.insert(0, "thresholds_key", np.array(self.config.threshold_keys, dtype=object)[views["codes"][:n]])
+        out["grade"] = np.array(self.config.grades)[grades]
+        out["grade_class"] = np.array(self.config.grade_classes)[grades]
+        return out
+
+
+def score_parallel(companies: "pd.DataFrame", workers: Optional[int] = None,
+                   config: Optional[ScoringConfig] = None) -> "pd.DataFrame":
+    """One-shot parallel scoring of a whole frame (answers already 0/1)."""
+    with ParallelScorer(workers=workers, capacity=max(1, len(companies)), config=config) as scorer:
+        return scorer.score(companies)
@@ -0,0 +1,233 @@
+"""Peer benchmarking: percentile rank of a company's inputs and risk score within its industry.
+
+``PeerIndex`` keeps, for every industry and tracked column (the numeric inputs,
+the derived ``gender_diversity_pct`` and ``pay_gap`` the KPI cards show, and
+``risk_score``), the peer values as a sorted array plus a small unsorted insert
+buffer:
+
+* a percentile lookup is two binary searches on the sorted array plus a scan of
+  at most ``buffer_rows`` buffered values, so it costs O(log n) per column;
+* adding companies appends to the buffer; a full buffer is merged into the sorted
+  arrays in one pass (``kind="stable"`` sorts the two sorted runs in linear time),
+  so the O(n) merge is paid once per ``buffer_rows`` inserts.
+
+The percentile rank is the mid-rank share of peers, ``100 * (below + equal / 2) / n``:
+50 is the industry median, and a company equal to every peer sits at 50. Missing
+(NaN) values are not peers. When rows carry a company key, re-adding a company
+replaces its previous values, so every company counts once.
+"""
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterable, Mapping, Optional
+
+import numpy as np
+
+from esg_scoring import INDUSTRY_COLUMN, NUMERIC_INPUTS, WHISTLEBLOWER_QUESTION_ID, ladder_values
+from esg_store import COMPANY_COLUMN
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from esg_store import ResultStore
+
+PEER_COLUMNS = NUMERIC_INPUTS + ["gender_diversity_pct", "pay_gap", "risk_score"]
+DEFAULT_BUFFER_ROWS = 256
+MIN_PEERS = 5  # fewer peers than this make a percentile meaningless; the dashboard hides it
+# Columns where a lower value is the better outcome; their percentiles are inverted for display
+LOWER_IS_BETTER = frozenset({"pay_gap", "ghg_emissions", "workplace_injuries", "risk_score"})
+
+
+def peer_standing(column: str, percentile: float) -> float:
+    """Share of peers (0-100) this value beats: ``percentile``, inverted for ``LOWER_IS_BETTER`` columns."""
+    return 100 - percentile if column in LOWER_IS_BETTER else percentile
+
+
+class _Peers:
+    """One industry: ``merged`` is ``(n_columns, n)`` with every row sorted (NaN last)."""
+    __slots__ = ("merged", "pending", "n_pending")
+
+    def __init__(self, n_columns: int, buffer_rows: int):
+        self.merged = np.empty((n_columns, 0))
+        self.pending = np.empty((buffer_rows, n_columns))
+        self.n_pending = 0
+
+
+class PeerIndex:
+    """Per-industry sorted peer values with O(log n) percentile lookups and incremental inserts."""
+
+    def __init__(self, columns: Iterable[str] = PEER_COLUMNS, key: str = COMPANY_COLUMN,
+                 buffer_rows: int = DEFAULT_BUFFER_ROWS):
+        self.columns = list(columns)
+        self.key = key
+        self.buffer_rows = buffer_rows
+        self._column_positions = {col: j for j, col in enumerate(self.columns)}
+        self._peers: Dict[str, _Peers] = {}
+        self._companies: Dict[Hashable, tuple] = {}  # key -> (industry, values) of the counted row
+        self._lock = threading.Lock()  # one index is shared by every dashboard session
+
+    @classmethod
+    def from_frame(cls, frame: "pd.DataFrame", columns: Iterable[str] = PEER_COLUMNS, key: str = COMPANY_COLUMN,
+                   buffer_rows: int = DEFAULT_BUFFER_ROWS) -> "PeerIndex":
+        index = cls(columns, key, buffer_rows)
+        index.add(frame)
+        return index
+
+    @classmethod
+    def from_store(cls, store: "ResultStore", as_of: Any = None, columns: Iterable[str] = PEER_COLUMNS,
+                   buffer_rows: int = DEFAULT_BUFFER_ROWS) -> "PeerIndex":
+        """Peers from the latest snapshot per company in a results store (on or before ``as_of``)."""
+        frame = store.cohort(as_of=as_of, columns=[COMPANY_COLUMN, INDUSTRY_COLUMN] + NUMERIC_INPUTS + ["risk_score"])
+        return cls.from_frame(frame, columns, COMPANY_COLUMN, buffer_rows)
+
+    def __len__(self) -> int:
+        return sum(p.merged.shape[1] + p.n_pending for p in self._peers.values())
+
+    def industries(self) -> list[str]:
+        return list(self._peers)
+
+    def _values(self, frame: "pd.DataFrame") -> np.ndarray:
+        """``(n_rows, n_columns)`` float64 values; derived columns missing from ``frame`` are computed."""
+        derived = None
+        values = np.empty((len(frame), len(self.columns)))
+        for j, col in enumerate(self.columns):
+            if col in frame.columns:
+                values[:, j] = frame[col].to_numpy(dtype=np.float64)
+                continue
+            if derived is None:
+                inputs = {c: frame[c].to_numpy() for c in NUMERIC_INPUTS}
+                inputs[WHISTLEBLOWER_QUESTION_ID] = np.zeros(len(frame))  # whistleblower_status is not a peer column
+                derived = ladder_values(inputs)
+            values[:, j] = derived[col]
+        return values
+
+    # --- Updates ---
+
+    def add(self, frame: "pd.DataFrame") -> None:
+        """
+        Adds the rows of ``frame`` (``industry``, the tracked columns or the numeric
+        inputs they derive from, and optionally the key column) to their industries.
+        """
+        import pandas as pd
+
+        values = self._values(frame)
+        industries = frame[INDUSTRY_COLUMN].astype(str).to_numpy()
+        keys = frame[self.key].to_numpy() if self.key in frame.columns else None
+        with self._lock:
+            if keys is not None:
+                last = pd.Series(np.arange(len(keys))).groupby(keys, sort=False, dropna=False).last().to_numpy()
+                keep = np.zeros(len(keys), dtype=bool)
+                keep[last] = True  # the last row of a company repeated within the frame wins
+                for i in last:
+                    previous = self._companies.get(keys[i])
+                    if previous is not None:
+                        self._remove(*previous)
+                    self._companies[keys[i]] = (industries[i], values[i].copy())
+                values, industries = values[keep], industries[keep]
+            codes, uniques = pd.factorize(industries)
+            for c, industry in enumerate(uniques):
+                self._insert(industry, values[codes == c])
+
+    def remove(self, key: Hashable) -> bool:
+        """Drops one company (added with a key); returns whether it was present."""
+        with self._lock:
+            previous = self._companies.pop(key, None)
+            if previous is None:
+                return False
+            self._remove(*previous)
+            return True
+
+    def _insert(self, industry: str, rows: np.ndarray) -> None:
+        peers = self._peers.get(industry)
+        if peers is None:
+            peers = self._peers[industry] = _Peers(len(self.columns), self.buffer_rows)
+        if peers.n_pending + len(rows) <= self.buffer_rows:
+            peers.pending[peers.n_pending:peers.n_pending + len(rows)] = rows
+            peers.n_pending += len(rows)
+            return
+        # Full buffer: one merge of the sorted arrays with every buffered and new value
+        combined = np.concatenate([peers.merged, peers.pending[:peers.n_pending].T, rows.T], axis=1)
+        peers.merged = np.sort(combined, axis=1, kind="stable")
+        peers.n_pending = 0
+
+    def _remove(self, industry: str, row: np.ndarray) -> None:
+        peers = self._peers[industry]
+        pending = peers.pending[:peers.n_pending]
+        same = ((pending == row) | (np.isnan(pending) & np.isnan(row))).all(axis=1)
+        if same.any():
+            i = np.flatnonzero(same)[0]
+            pending[i] = pending[peers.n_pending - 1]
+            peers.n_pending -= 1
+            return
+        merged = peers.merged
+        positions = [np.searchsorted(merged[j], row[j]) for j in range(len(self.columns))]
+        peers.merged = np.stack([np.delete(merged[j], p) for j, p in enumerate(positions)])
+
+    # --- Lookups ---
+
+    def _counts(self, industry: str, j: int, values: np.ndarray, exclude: Optional[Hashable]) -> tuple:
+        """Peers below, equal to and in total (non-NaN) for each of ``values`` in column ``j``."""
+        peers = self._peers.get(industry)
+        if peers is None:
+            zeros = np.zeros(len(values))
+            return zeros, zeros, 0
+        merged = peers.merged[j]
+        below = np.searchsorted(merged, values, side="left").astype(np.float64)
+        equal = np.searchsorted(merged, values, side="right") - below
+        total = int(np.searchsorted(merged, np.nan, side="left"))  # NaN sorts last
+        pending = peers.pending[:peers.n_pending, j]
+        if len(pending):
+            below += (pending[None, :] < values[:, None]).sum(axis=1)
+            equal += (pending[None, :] == values[:, None]).sum(axis=1)
+            total += int((~np.isnan(pending)).sum())
+        counted = self._companies.get(exclude) if exclude is not None else None
+        if counted is not None and counted[0] == industry and not np.isnan(counted[1][j]):
+            own = counted[1][j]
+            below -= own < values
+            equal -= own == values
+            total -= 1
+        return below, equal, total
+
+    def peer_count(self, industry: str, column: str = "risk_score", exclude: Optional[Hashable] = None) -> int:
+        """Number of peers with a value of ``column`` in ``industry``."""
+        with self._lock:
+            return self._counts(industry, self._column_positions[column], np.empty(0), exclude)[2]
+
+    def percentile(self, industry: str, column: str, value: float, exclude: Optional[Hashable] = None) -> float:
+        """Percentile rank (0-100) of ``value`` among the industry's peers; NaN without peers."""
+        return self.percentiles(industry, {column: value}, exclude)[column]
+
+    def percentiles(self, industry: str, values: Mapping[str, float],
+                    exclude: Optional[Hashable] = None) -> Dict[str, float]:
+        """
+        Percentile rank of every ``{column: value}`` among the industry's peers.
+        ``exclude`` leaves one company (by key) out, e.g. the company being benchmarked.
+        """
+        out = {}
+        with self._lock:
+            for column, value in values.items():
+                below, equal, total = self._counts(industry, self._column_positions[column],
+                                                   np.array([value], dtype=np.float64), exclude)
+                out[column] = float(100 * (below[0] + equal[0] / 2) / total) if total and not np.isnan(value) \
+                    else float("nan")
+        return out
+
+    def rank(self, frame: "pd.DataFrame") -> "pd.DataFrame":
+        """
+        Percentile rank of every row of ``frame`` against its industry's peers, one
+        ``<column>_pct`` column per tracked column. Rows already in the index count
+        among their own peers.
+        """
+        import pandas as pd
+
+        values = self._values(frame)
+        industries = frame[INDUSTRY_COLUMN].astype(str).to_numpy()
+        out = np.full(values.shape, np.nan)
+        codes, uniques = pd.factorize(industries)
+        with self._lock:
+            for c, industry in enumerate(uniques):
+                rows = np.flatnonzero(codes == c)
+                for j in range(len(self.columns)):
+                    below, equal, total = self._counts(industry, j, values[rows, j], None)
+                    if total:
+                        out[rows, j] = 100 * (below + equal / 2) / total
+        out[np.isnan(values)] = np.nan
+        return pd.DataFrame(out, index=frame.index, columns=[f"{col}_pct" for col in self.columns])
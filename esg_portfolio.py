@@ -0,0 +1,249 @@
+"""Exposure-weighted bank portfolio aggregation.
+
+Joins scored obligors (``obligor_id``, ``risk_score``, ``grade``) with facility
+exposures (``obligor_id``, ``ead``, ``sector``, ``region``) and keeps running
+totals: exposure-weighted ESG risk overall and by sector/region, exposure by
+grade, and a grade migration table against a baseline grade. Rescoring one
+obligor, or booking and repaying its facilities, only moves that obligor's own
+contributions, so updates cost O(sectors + regions of the obligor) instead of a
+full regroup.
+
+Totals are maintained by adding and subtracting floats, so after a very long
+run of updates they can drift in the last bits; :meth:`Portfolio.rebuild`
+recomputes them from the per-obligor state.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from esg_scoring import GRADES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+OBLIGOR_COLUMN = "obligor_id"
+EAD_COLUMN = "ead"
+SECTOR_COLUMN = "sector"
+REGION_COLUMN = "region"
+
+FACILITY_COLUMNS = (OBLIGOR_COLUMN, EAD_COLUMN, SECTOR_COLUMN, REGION_COLUMN)
+
+# Grade used for obligors that have exposure but no score (yet)
+NOT_RATED = "NR"
+MIGRATION_GRADES = GRADES + [NOT_RATED]
+# Exposure left after a removal below this is treated as fully repaid
+EAD_TOLERANCE = 1e-6
+
+
+def _exposure(facilities: "pd.DataFrame", by: str) -> "pd.Series":
+    """EAD per (obligor, sector) or (obligor, region)."""
+    missing = [c for c in FACILITY_COLUMNS if c not in facilities.columns]
+    if missing:
+        raise ValueError(f"Facilities are missing required columns: {', '.join(missing)}")
+    return facilities.groupby([OBLIGOR_COLUMN, by], sort=False, dropna=False)[EAD_COLUMN].sum()
+
+
+@dataclass
+class _Group:
+    ead: float = 0.0
+    scored_ead: float = 0.0
+    ead_risk: float = 0.0  # sum of ead * risk_score
+    grade_ead: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+
+
+@dataclass
+class _Obligor:
+    ead: float
+    ead_by_sector: Dict[str, float]
+    ead_by_region: Dict[str, float]
+    risk_score: Optional[float] = None
+    grade: str = NOT_RATED
+    baseline_grade: str = NOT_RATED
+
+
+class Portfolio:
+    """Incrementally maintained exposure-weighted ESG aggregates of a loan book."""
+
+    def __init__(self):
+        self._obligors: Dict[object, _Obligor] = {}
+        self._total = _Group()
+        self._by_sector: Dict[str, _Group] = defaultdict(_Group)
+        self._by_region: Dict[str, _Group] = defaultdict(_Group)
+        self._migration_ead: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._migration_count: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    # --- Loading ---
+
+    @classmethod
+    def from_frames(cls, scored: "pd.DataFrame", facilities: "pd.DataFrame",
+                    baseline: Optional["pd.DataFrame"] = None) -> "Portfolio":
+        """
+        Builds a portfolio from scored obligors and facility exposures.
+
+        ``baseline`` (``obligor_id``, ``grade``) sets the grades the migration table
+        starts from; by default it is the grade at load time. Facilities of obligors
+        missing from ``scored`` are kept as not rated until :meth:`rescore` is called.
+        """
+        portfolio = cls()
+        by_sector, by_region = _exposure(facilities, SECTOR_COLUMN), _exposure(facilities, REGION_COLUMN)
+        for (obligor_id, sector), ead in by_sector.items():
+            portfolio._obligor(obligor_id).ead_by_sector[sector] = float(ead)
+        for (obligor_id, region), ead in by_region.items():
+            portfolio._obligor(obligor_id).ead_by_region[region] = float(ead)
+        for obligor in portfolio._obligors.values():
+            obligor.ead = sum(obligor.ead_by_sector.values())
+
+        scores = scored.set_index(OBLIGOR_COLUMN)[["risk_score", "grade"]]
+        scores = scores[scores.index.isin(list(portfolio._obligors))]
+        for obligor_id, risk_score, grade in zip(scores.index, scores["risk_score"].to_numpy(),
+                                                 scores["grade"].to_numpy()):
+            obligor = portfolio._obligors[obligor_id]
+            obligor.risk_score, obligor.grade = float(risk_score), str(grade)
+        if baseline is not None:
+            for obligor_id, grade in zip(baseline[OBLIGOR_COLUMN], baseline["grade"]):
+                if obligor_id in portfolio._obligors:
+                    portfolio._obligors[obligor_id].baseline_grade = str(grade)
+        else:
+            for obligor in portfolio._obligors.values():
+                obligor.baseline_grade = obligor.grade
+        portfolio.rebuild()
+        return portfolio
+
+    def _obligor(self, obligor_id) -> _Obligor:
+        if obligor_id not in self._obligors:
+            self._obligors[obligor_id] = _Obligor(0.0, {}, {})
+        return self._obligors[obligor_id]
+
+    def rebuild(self) -> None:
+        """Recomputes every running total from the per-obligor state."""
+        self._total = _Group()
+        self._by_sector = defaultdict(_Group)
+        self._by_region = defaultdict(_Group)
+        self._migration_ead = defaultdict(float)
+        self._migration_count = defaultdict(int)
+        for obligor in self._obligors.values():
+            self._apply(obligor, +1)
+
+    # --- Incremental updates ---
+
+    def _apply(self, obligor: _Obligor, sign: int) -> None:
+        """Adds (sign=+1) or removes (sign=-1) one obligor's contributions."""
+        scored = obligor.risk_score is not None
+        risk = obligor.risk_score if scored else 0.0
+        parts = [(self._total, obligor.ead)]
+        parts += [(self._by_sector[s], ead) for s, ead in obligor.ead_by_sector.items()]
+        parts += [(self._by_region[r], ead) for r, ead in obligor.ead_by_region.items()]
+        for group, ead in parts:
+            group.ead += sign * ead
+            group.grade_ead[obligor.grade] += sign * ead
+            if scored:
+                group.scored_ead += sign * ead
+                group.ead_risk += sign * ead * risk
+        cell = (obligor.baseline_grade, obligor.grade)
+        self._migration_ead[cell] += sign * obligor.ead
+        self._migration_count[cell] += sign
+
+    def rescore(self, obligor_id, risk_score: float, grade: str) -> None:
+        """Replaces one obligor's score and updates every aggregate in place."""
+        obligor = self._obligors.get(obligor_id)
+        if obligor is None:  # scored before any exposure was booked
+            obligor = self._obligors[obligor_id] = _Obligor(0.0, {}, {})
+        else:
+            self._apply(obligor, -1)
+        obligor.risk_score, obligor.grade = float(risk_score), str(grade)
+        self._apply(obligor, +1)
+
+    def rescore_frame(self, scored: "pd.DataFrame") -> None:
+        """Applies :meth:`rescore` for every row of a scored frame."""
+        for obligor_id, risk_score, grade in zip(scored[OBLIGOR_COLUMN], scored["risk_score"], scored["grade"]):
+            self.rescore(obligor_id, risk_score, grade)
+
+    def add_facilities(self, facilities: "pd.DataFrame") -> None:
+        """
+        Books new facilities (``obligor_id``, ``ead``, ``sector``, ``region``). Obligors
+        seen for the first time are not rated until :meth:`rescore` is called.
+        """
+        self._book(facilities, +1)
+
+    def remove_facilities(self, facilities: "pd.DataFrame") -> None:
+        """
+        Removes repaid or sold facilities, given with the same columns as they were
+        booked. Obligors left without exposure or a score are dropped.
+        """
+        self._book(facilities, -1)
+
+    def _book(self, facilities: "pd.DataFrame", sign: int) -> None:
+        by_sector, by_region = _exposure(facilities, SECTOR_COLUMN), _exposure(facilities, REGION_COLUMN)
+        if sign < 0:
+            over = []
+            for attribute, exposure in (("ead_by_sector", by_sector), ("ead_by_region", by_region)):
+                for (obligor_id, group), ead in exposure.items():
+                    obligor = self._obligors.get(obligor_id)
+                    booked = getattr(obligor, attribute).get(group, 0.0) if obligor else 0.0
+                    if ead > booked + EAD_TOLERANCE:
+                        over.append(f"{obligor_id!r} in {group!r} ({ead:,.2f} > {booked:,.2f})")
+            if over:
+                raise ValueError(f"cannot remove more exposure than is booked: {'; '.join(over[:5])}")
+
+        touched = {}
+        for obligor_id, _ in by_sector.index:
+            if obligor_id not in touched:
+                if obligor_id in self._obligors:
+                    self._apply(self._obligors[obligor_id], -1)
+                touched[obligor_id] = self._obligor(obligor_id)
+        for attribute, exposure in (("ead_by_sector", by_sector), ("ead_by_region", by_region)):
+            for (obligor_id, group), ead in exposure.items():
+                amounts = getattr(touched[obligor_id], attribute)
+                amount = amounts.get(group, 0.0) + sign * float(ead)
+                if amount > EAD_TOLERANCE:
+                    amounts[group] = amount
+                else:
+                    amounts.pop(group, None)
+        for obligor_id, obligor in touched.items():
+            obligor.ead = sum(obligor.ead_by_sector.values())
+            if not obligor.ead_by_sector and obligor.risk_score is None:
+                del self._obligors[obligor_id]
+            else:
+                self._apply(obligor, +1)
+
+    # --- Queries ---
+
+    def exposure_weighted_risk(self) -> float:
+        """Exposure-weighted ESG risk score of all scored exposure."""
+        total = self._total
+        return total.ead_risk / total.scored_ead if total.scored_ead > 0 else 0.0
+
+    @property
+    def total_ead(self) -> float:
+        return self._total.ead
+
+    def breakdown(self, by: str = SECTOR_COLUMN) -> "pd.DataFrame":
+        """EAD, exposure-weighted risk and exposure per grade for each sector or region."""
+        import pandas as pd
+
+        groups = {SECTOR_COLUMN: self._by_sector, REGION_COLUMN: self._by_region}[by]
+        rows = {}
+        for key, group in groups.items():
+            if group.ead <= 0:
+                continue
+            row = {
+                EAD_COLUMN: group.ead,
+                "ead_share": group.ead / self._total.ead,
+                "weighted_risk_score": group.ead_risk / group.scored_ead if group.scored_ead > 0 else float("nan"),
+            }
+            row.update({f"ead_{grade}": group.grade_ead.get(grade, 0.0) for grade in MIGRATION_GRADES})
+            rows[key] = row
+        frame = pd.DataFrame.from_dict(rows, orient="index")
+        frame.index.name = by
+        return frame.sort_values(EAD_COLUMN, ascending=False) if len(frame) else frame
+
+    def migration_table(self, values: str = "ead") -> "pd.DataFrame":
+        """Baseline grade (rows) x current grade (columns) by exposure (``ead``) or obligor ``count``."""
+        import pandas as pd
+
+        cells = self._migration_ead if values == "ead" else self._migration_count
+        table = pd.DataFrame(0.0 if values == "ead" else 0, index=MIGRATION_GRADES, columns=MIGRATION_GRADES)
+        for (baseline, current), value in cells.items():
+            table.loc[baseline, current] = value
+        table.index.name, table.columns.name = "baseline_grade", "current_grade"
+        return table
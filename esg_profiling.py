@@ -0,0 +1,141 @@
+"""Lightweight timing spans for the Streamlit script and other hot paths.
+
+A ``Profiler`` records one *run* (a script execution) as a list of named spans.
+Spans are opened either as context managers (``with profiler.span("figures"):``)
+or as consecutive stages (``profiler.stage("alerts")`` closes the previous stage
+and opens the next), which suits a top-to-bottom script without re-indenting it.
+
+Disabled profilers cost one attribute check per call: ``stage`` returns at once
+and ``span`` hands back a shared no-op context manager.
+
+Finished runs are kept in a bounded history for session statistics, and can be
+exported as JSON (``to_json``) or appended as JSON Lines to ``sink_path`` for
+external monitoring. Profiling is switched on for the app with ``ESG_PROFILE=1``
+(or the ``?profile=1`` query parameter); ``ESG_PROFILE_LOG`` names the sink.
+"""
+import json
+import os
+import statistics
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_HISTORY = 100
+
+_NULL_SPAN = nullcontext()
+
+
+def enabled_from_env() -> bool:
+    return os.environ.get("ESG_PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class Profiler:
+    """Named timing spans per run, plus a bounded history of finished runs."""
+
+    def __init__(self, enabled: bool = False, history: int = DEFAULT_HISTORY, sink_path: Optional[str] = None):
+        self.enabled = enabled
+        self.sink_path = sink_path
+        self.history: "deque[Dict[str, Any]]" = deque(maxlen=history)
+        self.runs_started = 0
+        self._run: Optional[Dict[str, Any]] = None
+        self._t0 = 0.0
+        self._depth = 0
+        self._stage: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        return cls(enabled=enabled_from_env(), sink_path=os.environ.get("ESG_PROFILE_LOG") or None)
+
+    # --- Recording ---
+
+    def start_run(self) -> None:
+        """Starts a new run; an unfinished previous run (e.g. ended by ``st.stop``) is dropped."""
+        if not self.enabled:
+            return
+        self.runs_started += 1
+        self._run = {"run": self.runs_started, "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "spans": []}
+        self._t0 = time.perf_counter()
+        self._depth = 0
+        self._stage = None
+
+    def _open(self, name: str) -> Dict[str, Any]:
+        span = {"name": name, "depth": self._depth, "start_ms": (time.perf_counter() - self._t0) * 1000}
+        self._run["spans"].append(span)
+        return span
+
+    def _close(self, span: Dict[str, Any]) -> None:
+        span["duration_ms"] = (time.perf_counter() - self._t0) * 1000 - span["start_ms"]
+
+    def stage(self, name: str) -> None:
+        """Ends the current top-level stage (if any) and starts ``name``."""
+        if not self.enabled or self._run is None:
+            return
+        if self._stage is not None:
+            self._close(self._stage)
+            self._depth -= 1
+        self._stage = self._open(name)
+        self._depth += 1
+
+    def span(self, name: str):
+        """Context manager timing a nested block (no-op when disabled)."""
+        if not self.enabled or self._run is None:
+            return _NULL_SPAN
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name: str) -> Iterator[None]:
+        span = self._open(name)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self._close(span)
+
+    def end_run(self) -> Optional[Dict[str, Any]]:
+        """Closes the open stage, stores the run in the history and the sink, and returns it."""
+        if not self.enabled or self._run is None:
+            return None
+        if self._stage is not None:
+            self._close(self._stage)
+            self._stage = None
+        run, self._run = self._run, None
+        run["total_ms"] = (time.perf_counter() - self._t0) * 1000
+        self.history.append(run)
+        if self.sink_path:
+            with open(self.sink_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(run) + "\n")
+        return run
+
+    # --- Reporting ---
+
+    @property
+    def last_run(self) -> Optional[Dict[str, Any]]:
+        return self.history[-1] if self.history else None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per span name over the history: count, mean, median, p95 and max duration (ms)."""
+        durations: Dict[str, list[float]] = {"total": [run["total_ms"] for run in self.history]}
+        for run in self.history:
+            for span in run["spans"]:
+                durations.setdefault(span["name"], []).append(span["duration_ms"])
+        stats = {}
+        for name, values in durations.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            stats[name] = {
+                "count": len(values),
+                "mean_ms": statistics.fmean(values),
+                "median_ms": statistics.median(ordered),
+                "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                "max_ms": ordered[-1],
+            }
+        return stats
+
+    def to_json(self, runs: str = "all") -> str:
+        """JSON export: the ``last`` run only, or ``all`` runs in the history plus stats."""
+        if runs == "last":
+            return json.dumps(self.last_run, indent=2)
+        return json.dumps({"runs": list(self.history), "stats": self.stats()}, indent=2)
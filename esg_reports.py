@@ -0,0 +1,446 @@
+"""Bulk export of per-obligor ESG scorecards as self-contained HTML (optionally Excel) files.
+
+Each scorecard carries what the dashboard shows for one company: the risk/grade
+banner, the triggered risk alerts, the KPI values, the disclosure and metric
+breakdown and the four charts. The charts are inline SVG, so a report is one file
+with no scripts, fonts or external images.
+
+Portfolio files are scored chunk by chunk in the parent process (``esg_batch``),
+alert rules are evaluated over each chunk in one vectorized pass
+(``esg_alerts.evaluate_rules``), and the chart geometry is computed per chunk with
+NumPy. Rendering and writing then run on a process pool: each task is a block of
+column arrays, like the ``esg_stress`` chunks. Every worker compiles one
+``ScorecardTemplate`` when it starts: the page is a single ``str.format`` template
+with the CSS, the config's labels and targets and the static SVG frames (axes,
+grids, legends) already filled in, so a report costs one ``format`` call and one
+file write.
+"""
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Mapping, Optional
+
+import numpy as np
+
+from esg_alerts import ALERT_INPUTS, evaluate_rules, rule_thresholds
+from esg_config import CATEGORY_KEYS, ScoringConfig
+from esg_scoring import INDUSTRY_COLUMN, METRIC_LABELS, get_config, industry_codes, ladder_values
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+REPORT_FORMATS = ("html", "xlsx")
+# Obligors rendered per pool task
+DEFAULT_BATCH = 500
+
+# Inputs and scoring outputs a scorecard reads, besides the metric scores
+REPORT_INPUTS = ["male_employees", "female_employees", "avg_male_pay", "avg_female_pay",
+                 "ghg_emissions", "renewable_pct", "workplace_injuries"]
+REPORT_SCORES = ["env_score_sum", "social_disclosure_sum", "gov_score_sum", "total_disclosure_score",
+                 "env_pct", "social_pct", "gov_pct", "gender_diversity_pct", "pay_gap",
+                 "total_weighted_performance_score", "score", "risk_score"]
+
+# Same colours as the dashboard banner (ESG_.py)
+CSS = """
+body { font-family: -apple-system, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; margin: 2rem; color: #222; }
+h1 { margin-bottom: 0.2rem; } h2, h3 { color: #2e6c80; }
+.banner { display: flex; gap: 1rem; }
+.banner div { flex: 1; padding: 10px 15px; border-radius: 8px; font-size: 1.5em; font-weight: 700;
+  text-align: center; color: white; text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.4); }
+.grade-A-plus, .grade-A { background-color: #28a745; }
+.grade-B-plus, .grade-B { background-color: #ffc107; color: black !important; }
+.grade-C-plus, .grade-C { background-color: #dc3545; }
+.caption { color: #666; font-size: 0.9em; }
+.alert { background: #fdecea; color: #7d1a1a; border-radius: 6px; padding: 8px 12px; margin: 4px 0; }
+.ok { background: #e8f5e9; color: #1b5e20; border-radius: 6px; padding: 8px 12px; }
+.kpis, .metrics { display: grid; gap: 0.8rem; }
+.kpis { grid-template-columns: repeat(5, 1fr); } .metrics { grid-template-columns: repeat(3, 1fr); }
+.kpi, .metric { border: 1px solid #e0e0e0; border-radius: 8px; padding: 10px 14px; }
+.kpi b, .metric b { display: block; font-size: 1.4em; }
+.kpi small { color: #666; }
+.charts { display: grid; grid-template-columns: repeat(2, 1fr); gap: 1rem; }
+svg { width: 100%; height: auto; font-size: 11px; }
+"""
+
+# Chart canvases (SVG user units) and the plot areas inside them
+_W, _H = 360, 240
+_PLOT_X, _PLOT_Y, _PLOT_W, _PLOT_H = 60, 40, 280, 160
+_PIE_CX, _PIE_CY, _PIE_R = 120, 130, 80
+_RADAR_CX, _RADAR_CY, _RADAR_R = 180, 135, 80
+RADAR_METRICS = ["ghg_score", "renewable_score", "water_score", "waste_score"]
+SOCIAL_GOV_METRICS = ["pay_equity_score", "injury_score", "compliance_score", "turnover_score"]
+_MALE, _FEMALE = "#1f77b4", "#ff7f0e"
+_SET1 = ["#e41a1c", "#377eb8", "#4daf4a", "#984ea3"]  # px.colors.qualitative.Set1, as on the dashboard
+# Radar axes start at the top and run clockwise; unit vectors in SVG coordinates (y down)
+_RADAR_ANGLES = np.pi / 2 - 2 * np.pi * np.arange(len(RADAR_METRICS)) / len(RADAR_METRICS)
+_RADAR_UNIT = (np.cos(_RADAR_ANGLES), -np.sin(_RADAR_ANGLES))
+
+
+def _markdown(text: str) -> str:
+    """HTML for a config message: escaped, with ``**bold**`` spans kept."""
+    return re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html.escape(text))
+
+
+def _braces(text: str) -> str:
+    """Escapes literal braces so ``text`` survives being embedded in a format template."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _svg(title: str, body: str) -> str:
+    return (f'<svg viewBox="0 0 {_W} {_H}" xmlns="http://www.w3.org/2000/svg" role="img">'
+            f'<text x="10" y="18" font-size="13" font-weight="bold">{html.escape(title)}</text>{body}</svg>')
+
+
+def _bar_frame(labels: list[str], y_labels: list[str]) -> str:
+    """Axes, horizontal grid lines with ``y_labels`` (bottom to top) and the category labels."""
+    parts = [f'<line x1="{_PLOT_X}" y1="{_PLOT_Y + _PLOT_H}" x2="{_PLOT_X + _PLOT_W}" '
+             f'y2="{_PLOT_Y + _PLOT_H}" stroke="#444"/>']
+    for i, label in enumerate(y_labels):
+        y = _PLOT_Y + _PLOT_H - _PLOT_H * i / (len(y_labels) - 1)
+        parts.append(f'<line x1="{_PLOT_X}" y1="{y:.1f}" x2="{_PLOT_X + _PLOT_W}" y2="{y:.1f}" stroke="#eee"/>'
+                     f'<text x="{_PLOT_X - 6}" y="{y + 4:.1f}" text-anchor="end">{label}</text>')
+    slot = _PLOT_W / len(labels)
+    for i, label in enumerate(labels):
+        parts.append(f'<text x="{_PLOT_X + slot * (i + 0.5):.1f}" y="{_PLOT_Y + _PLOT_H + 16}" '
+                     f'text-anchor="middle">{html.escape(label)}</text>')
+    return "".join(parts)
+
+
+def _bar_slots(n: int) -> tuple[np.ndarray, float]:
+    """Left edge of each of ``n`` bars and the bar width."""
+    slot = _PLOT_W / n
+    return _PLOT_X + slot * (np.arange(n) + 0.2), slot * 0.6
+
+
+def _bars(heights: np.ndarray, colors: list[str], labels: np.ndarray) -> np.ndarray:
+    """SVG rects plus value labels of a bar chart, one string per row of ``heights`` (rows x bars, 0..1)."""
+    lefts, width = _bar_slots(heights.shape[1])
+    tops = _PLOT_Y + _PLOT_H * (1 - np.clip(heights, 0, 1))
+    out = np.full(len(heights), "", dtype=object)
+    for j, (left, color) in enumerate(zip(lefts, colors)):
+        out += [f'<rect x="{left:.1f}" y="{top:.1f}" width="{width:.1f}" height="{_PLOT_Y + _PLOT_H - top:.1f}" '
+                f'fill="{color}"/><text x="{left + width / 2:.1f}" y="{top - 4:.1f}" '
+                f'text-anchor="middle">{label}</text>' for top, label in zip(tops[:, j], labels[:, j])]
+    return out
+
+
+def chart_svgs(arrays: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Data-dependent SVG fragments of the four charts for every row of a chunk.
+
+    Geometry (slice angles, radar vertices, bar heights) is computed column-wise
+    with NumPy; only the final string formatting runs per row. Charts the dashboard
+    leaves out (no workforce, no pay data) come back as empty strings.
+    """
+    male, female = (np.asarray(arrays[c], dtype=np.float64) for c in ("male_employees", "female_employees"))
+    total = male + female
+    share = np.divide(female, total, out=np.zeros_like(total), where=total > 0)
+    angle = 2 * np.pi * share
+    x = _PIE_CX + _PIE_R * np.sin(angle)
+    y = _PIE_CY - _PIE_R * np.cos(angle)
+    pie = np.array([
+        "" if t <= 0 else
+        f'<circle cx="{_PIE_CX}" cy="{_PIE_CY}" r="{_PIE_R}" fill="{_FEMALE if s >= 1 else _MALE}" stroke="#000"/>'
+        + ("" if s <= 0 or s >= 1 else
+           f'<path d="M{_PIE_CX},{_PIE_CY} L{_PIE_CX},{_PIE_CY - _PIE_R} A{_PIE_R},{_PIE_R} 0 {int(s > 0.5)} 1 '
+           f'{px:.2f},{py:.2f} Z" fill="{_FEMALE}" stroke="#000"/>')
+        + f'<text x="250" y="{_PIE_CY - 10}">Male {1 - s:.1%}</text>'
+          f'<text x="250" y="{_PIE_CY + 10}">Female {s:.1%}</text>'
+        for t, s, px, py in zip(total, share, x, y)
+    ], dtype=object)
+
+    radii = np.column_stack([np.asarray(arrays[c], dtype=np.float64) for c in RADAR_METRICS]) * _RADAR_R
+    px_, py_ = _RADAR_CX + radii * _RADAR_UNIT[0], _RADAR_CY + radii * _RADAR_UNIT[1]
+    radar = np.array([
+        '<polygon points="' + " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(xs, ys))
+        + '" fill="#28a745" fill-opacity="0.35" stroke="#28a745" stroke-width="2"/>'
+        for xs, ys in zip(px_, py_)
+    ], dtype=object)
+
+    pay = np.column_stack([np.asarray(arrays[c], dtype=np.float64) for c in ("avg_male_pay", "avg_female_pay")])
+    top = pay.max(axis=1, keepdims=True)
+    scaled = np.divide(pay, top, out=np.zeros_like(pay), where=top > 0)
+    pay_labels = np.array([[f"₹{v:,.0f}" for v in row] for row in pay], dtype=object).reshape(pay.shape)
+    pay_bars = _bars(scaled, [_MALE, _FEMALE], pay_labels)
+    pay_bars[top[:, 0] <= 0] = ""
+
+    scores = np.column_stack([np.asarray(arrays[c], dtype=np.float64) for c in SOCIAL_GOV_METRICS])
+    score_labels = np.array([[f"{v * 100:.0f}%" for v in row] for row in scores], dtype=object).reshape(scores.shape)
+    return {"pie": pie, "radar": radar, "pay": pay_bars,
+            "social_gov": _bars(scores, _SET1, score_labels)}
+
+
+def _radar_frame() -> str:
+    parts = []
+    for level in (0.25, 0.5, 0.75, 1.0):
+        points = " ".join(f"{_RADAR_CX + _RADAR_R * level * ux:.1f},{_RADAR_CY + _RADAR_R * level * uy:.1f}"
+                          for ux, uy in zip(*_RADAR_UNIT))
+        parts.append(f'<polygon points="{points}" fill="none" stroke="#ddd"/>')
+    for metric, ux, uy in zip(RADAR_METRICS, *_RADAR_UNIT):
+        end_x, end_y = _RADAR_CX + _RADAR_R * ux, _RADAR_CY + _RADAR_R * uy
+        anchor = "middle" if abs(ux) < 0.1 else ("start" if ux > 0 else "end")
+        parts.append(f'<line x1="{_RADAR_CX}" y1="{_RADAR_CY}" x2="{end_x:.1f}" y2="{end_y:.1f}" stroke="#ccc"/>'
+                     f'<text x="{end_x + 6 * ux:.1f}" y="{end_y + 6 * uy + (4 if uy >= 0 else -2):.1f}" '
+                     f'text-anchor="{anchor}">{html.escape(METRIC_LABELS[metric].replace(" Score", ""))}</text>')
+    return "".join(parts)
+
+
+class ScorecardTemplate:
+    """
+    The scorecard page for one config, compiled once per process.
+
+    Everything that does not depend on the obligor (CSS, section titles, metric
+    labels, chart frames, alert message markup, per-industry KPI targets) is
+    resolved here; ``render`` only formats one row's values into the template.
+    """
+
+    def __init__(self, config: Optional[ScoringConfig] = None):
+        self.config = config = config or get_config()
+        pt = config.performance_thresholds
+        self.pay_gap_targets = [th["pay_gap_low"] * 100 for th in config.industry_thresholds.values()]
+        self.alert_messages = [_markdown(message) for _, _, _, _, message in config.alert_rules]
+        self.category_sizes = [len(config.question_ids[key]) for key in CATEGORY_KEYS]
+        charts = {
+            "pie": _svg("1. Workforce Gender Diversity", "{pie}"),
+            "radar": _svg("2. Core Environmental Performance Radar", _braces(_radar_frame()) + "{radar}"),
+            "pay": _svg("3. Average Annual Pay Comparison",
+                        _braces(_bar_frame(["Male", "Female"], ["", "", "", "", ""])) + "{pay}"),
+            "social_gov": _svg("4. Key Social & Governance Performance Scores", _braces(_bar_frame(
+                [METRIC_LABELS[m].replace(" Score", "") for m in SOCIAL_GOV_METRICS],
+                ["0", "25", "50", "75", "100"])) + "{social_gov}"),
+        }
+        metrics = "".join(
+            f'<div class="metric"><small>{i}. {html.escape(METRIC_LABELS[col].replace(" Score", ""))}</small>'
+            f'<b>{{{col}:.1f}}%</b></div>' for i, col in enumerate(config.metric_columns, 1))
+        self.page = (
+            '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>ESG Scorecard - {name}</title>'
+            f"<style>{_braces(CSS)}</style></head><body>"
+            "<h1>ESG Risk Scorecard</h1><p>Results for: <strong>{name}</strong> ({thresholds_key} Industry)</p>"
+            '<div class="banner"><div class="{grade_class}">OVERALL ESG RISK: {risk_score:.1f}%</div>'
+            '<div class="{grade_class}">ESG GRADE: {grade}</div></div>'
+            '<p class="caption">Performance Score: {score:.1f}% (100% - Risk Score) | All performance metrics are '
+            f"uniformly weighted {config.performance_weight}x. Config {html.escape(config.label)} "
+            f"({config.version}).</p>"
+            "<h2>Risk Alerts</h2>{alerts}"
+            "<h2>Key Performance Indicators (KPIs)</h2><div class=\"kpis\">"
+            '<div class="kpi">Gender Diversity<b>{gender_diversity_pct:.1f}%</b></div>'
+            '<div class="kpi">Gender Pay Gap<b>{pay_gap:.1f}%</b><small>vs Target {pay_gap_target:.1f}%</small></div>'
+            '<div class="kpi">GHG Emissions<b>{ghg_emissions:.0f} tCO₂e</b>'
+            f"<small>vs High {pt['ghg_high']:.0f} tCO₂e</small></div>"
+            '<div class="kpi">Renewable Energy %<b>{renewable_pct:.1f}%</b>'
+            f"<small>vs Target {pt['renew_high'] * 100:.0f}%</small></div>"
+            '<div class="kpi">Workplace Injuries<b>{workplace_injuries:.0f}</b><small>0 is ideal</small></div></div>'
+            "<h2>Performance and Disclosure Breakdown</h2>"
+            "<p><strong>Total Disclosure Score:</strong> {total_disclosure_score}/"
+            f"{config.total_disclosure_questions} Questions Answered<br>"
+            "<strong>Total Performance Score (Weighted):</strong> {total_weighted_performance_score}/"
+            f"{config.total_performance_metrics_weighted} Weighted Performance Points</p>"
+            "<h3>Disclosure Completion</h3><div class=\"metrics\">"
+            '<div class="metric">Environmental<b>{env_score_sum}/'
+            f"{self.category_sizes[0]}" " ({env_pct:.1f}% Yes)</b></div>"
+            '<div class="metric">Social<b>{social_disclosure_sum}/'
+            f"{self.category_sizes[1]}" " ({social_pct:.1f}% Yes)</b></div>"
+            '<div class="metric">Governance<b>{gov_score_sum}/'
+            f"{self.category_sizes[2]}" " ({gov_pct:.1f}% Yes)</b></div></div>"
+            "<h3>Unweighted Performance Metric Results (Score out of 100%)</h3>"
+            f'<div class="metrics">{metrics}</div>'
+            "<h2>Visual Metrics</h2><div class=\"charts\">{chart_pie}" + charts["radar"]
+            + "{chart_pay}" + charts["social_gov"] + "</div></body></html>"
+        )
+        self._pie, self._pay = charts["pie"], charts["pay"]
+
+    def alerts_html(self, mask: np.ndarray, values: np.ndarray, thresholds: np.ndarray) -> str:
+        """The triggered rules of one row (``evaluate_rules`` mask, rule values and resolved thresholds)."""
+        hits = np.flatnonzero(mask)
+        if not len(hits):
+            return '<p class="ok">No immediate, high-priority risk alerts triggered.</p>'
+        return "".join(f'<div class="alert">{self.alert_messages[r].format(threshold=thresholds[r], value=values[r])}'
+                       "</div>" for r in hits)
+
+    def render(self, row: Mapping[str, Any]) -> str:
+        """The HTML page of one row of a report block (see ``report_blocks``)."""
+        fields = {col: row[col] * 100 for col in self.config.metric_columns}
+        fields.update(
+            name=html.escape(str(row["name"])), thresholds_key=html.escape(str(row["thresholds_key"])),
+            grade=html.escape(str(row["grade"])), grade_class=row["grade_class"],
+            score=row["score"], risk_score=row["risk_score"],
+            alerts=self.alerts_html(row["alert_mask"], row["alert_value"], row["alert_threshold"]),
+            gender_diversity_pct=row["gender_diversity_pct"] * 100, pay_gap=row["pay_gap"] * 100,
+            pay_gap_target=self.pay_gap_targets[row["code"]],
+            ghg_emissions=row["ghg_emissions"], renewable_pct=row["renewable_pct"],
+            workplace_injuries=row["workplace_injuries"],
+            total_disclosure_score=int(row["total_disclosure_score"]),
+            total_weighted_performance_score=row["total_weighted_performance_score"],
+            env_score_sum=int(row["env_score_sum"]), social_disclosure_sum=int(row["social_disclosure_sum"]),
+            gov_score_sum=int(row["gov_score_sum"]),
+            env_pct=row["env_pct"], social_pct=row["social_pct"], gov_pct=row["gov_pct"],
+            chart_pie=self._pie.format(pie=row["pie"]) if row["pie"] else "",
+            chart_pay=self._pay.format(pay=row["pay"]) if row["pay"] else "",
+            radar=row["radar"], social_gov=row["social_gov"],
+        )
+        return self.page.format(**fields)
+
+    def workbook_rows(self, row: Mapping[str, Any]) -> Iterator[tuple]:
+        """(section, item, value) rows of the Excel scorecard: the same figures as the HTML page, without charts."""
+        yield "Obligor", "Name", str(row["name"])
+        yield "Obligor", "Industry thresholds", str(row["thresholds_key"])
+        yield "Banner", "ESG risk (%)", round(float(row["risk_score"]), 4)
+        yield "Banner", "ESG grade", str(row["grade"])
+        yield "Banner", "Performance score (%)", round(float(row["score"]), 4)
+        for r in np.flatnonzero(row["alert_mask"]):
+            yield "Risk alert", self.config.alert_rules[r][0], float(row["alert_value"][r])
+        yield "KPI", "Gender diversity (%)", float(row["gender_diversity_pct"]) * 100
+        yield "KPI", "Gender pay gap (%)", float(row["pay_gap"]) * 100
+        yield "KPI", "GHG emissions (tCO2e)", float(row["ghg_emissions"])
+        yield "KPI", "Renewable energy (%)", float(row["renewable_pct"])
+        yield "KPI", "Workplace injuries", float(row["workplace_injuries"])
+        for key, column, size in zip(CATEGORY_KEYS, ("env_score_sum", "social_disclosure_sum", "gov_score_sum"),
+                                     self.category_sizes):
+            yield "Disclosure", f"{self.config.detailed_questions[key]['title']} (of {size})", int(row[column])
+        for col in self.config.metric_columns:
+            yield "Metric score (%)", METRIC_LABELS[col].replace(" Score", ""), float(row[col]) * 100
+
+
+def _require_openpyxl():
+    try:
+        import openpyxl
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("Excel scorecards need the optional 'openpyxl' package (pip install openpyxl).") from exc
+    return openpyxl
+
+
+def _file_stem(key: Any) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(key)).strip("._") or "obligor"
+
+
+def _file_stems(names: np.ndarray, seen: set) -> np.ndarray:
+    """
+    File stems for ``names``, unique among themselves and ``seen`` (updated in place).
+    A stem already taken, e.g. ``A B`` and ``A/B`` both giving ``A_B`` or a repeated key,
+    gets the first free ``_2``, ``_3`` ... suffix. Stems compare case-insensitively, as
+    on Windows and macOS file systems.
+    """
+    stems = np.empty(len(names), dtype=object)
+    for i, name in enumerate(names):
+        stem = base = _file_stem(name)
+        n = 1
+        while stem.lower() in seen:
+            n += 1
+            stem = f"{base}_{n}"
+        seen.add(stem.lower())
+        stems[i] = stem
+    return stems
+
+
+def report_blocks(scored: "pd.DataFrame", names: np.ndarray, config: ScoringConfig,
+                  batch: int = DEFAULT_BATCH, seen: Optional[set] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Splits one scored chunk (inputs plus ``score_portfolio`` columns) into render tasks.
+
+    Each task is a dict of equal-length column arrays: the fields a scorecard
+    shows, the alert matrices and the per-row chart fragments. File stems are
+    unique within the chunk and against ``seen`` (pass one set for every chunk of
+    an export), so no scorecard overwrites another.
+    """
+    codes = industry_codes(scored[INDUSTRY_COLUMN], config)
+    values = ladder_values({col: scored[col].to_numpy() for col in ALERT_INPUTS})
+    arrays: Dict[str, np.ndarray] = {
+        "name": np.asarray(names, dtype=object),
+        "file": _file_stems(names, set() if seen is None else seen),
+        "code": codes,
+        "alert_mask": evaluate_rules(values, codes, config),
+        "alert_value": np.column_stack([values[value] for _, value, _, _, _ in config.alert_rules])
+        if config.alert_rules else np.zeros((len(codes), 0)),
+        "alert_threshold": rule_thresholds(config)[:, codes].T,
+    }
+    for col in REPORT_INPUTS + REPORT_SCORES + list(config.metric_columns) + ["thresholds_key", "grade",
+                                                                            "grade_class"]:
+        arrays[col] = scored[col].to_numpy()
+    arrays.update(chart_svgs(arrays))
+    for start in range(0, len(codes), batch):
+        yield {key: array[start:start + batch] for key, array in arrays.items()}
+
+
+def write_block(block: Mapping[str, np.ndarray], template: ScorecardTemplate, directory: str,
+                formats: tuple = ("html",)) -> int:
+    """Renders and writes the scorecards of one block; returns the number of obligors written."""
+    openpyxl = _require_openpyxl() if "xlsx" in formats else None
+    n = len(block["name"])
+    for i in range(n):
+        row = {key: array[i] for key, array in block.items()}
+        path = os.path.join(directory, row["file"])
+        if "html" in formats:
+            with open(path + ".html", "w", encoding="utf-8") as handle:
+                handle.write(template.render(row))
+        if openpyxl is not None:
+            workbook = openpyxl.Workbook(write_only=True)
+            sheet = workbook.create_sheet("Scorecard")
+            sheet.append(("Section", "Item", "Value"))
+            for line in template.workbook_rows(row):
+                sheet.append(line)
+            workbook.save(path + ".xlsx")
+    return n
+
+
+# Pool worker state, set by _init_worker()
+_worker_template: Optional[ScorecardTemplate] = None
+_worker_target: tuple = ()
+
+
+def _init_worker(config: ScoringConfig, directory: str, formats: tuple) -> None:
+    global _worker_template, _worker_target
+    _worker_template = ScorecardTemplate(config)
+    _worker_target = (directory, formats)
+
+
+def _write_block(block: Dict[str, np.ndarray]) -> int:
+    return write_block(block, _worker_template, *_worker_target)
+
+
+def export_reports(src: str, directory: str, key: Optional[str] = None, formats: tuple = ("html",),
+                   workers: Optional[int] = None, chunksize: Optional[int] = None, batch: int = DEFAULT_BATCH,
+                   config: Optional[ScoringConfig] = None) -> int:
+    """
+    Scores the portfolio file ``src`` and writes one scorecard per obligor into ``directory``.
+
+    Files are named after the ``key`` column (``<key>.html``/``<key>.xlsx``, with
+    characters unsafe in file names replaced by ``_``), or ``row_<n>`` by file row
+    without one. Keys that map to the same file name, or repeat, get a ``_2``,
+    ``_3`` ... suffix in file order; the scorecard itself shows the original key.
+    ``formats`` is any of ``REPORT_FORMATS``. ``workers`` > 1 renders blocks of
+    ``batch`` obligors on a process pool. Returns the number of obligors written.
+    """
+    from esg_batch import DEFAULT_CHUNKSIZE, read_portfolio_chunks, score_chunks
+
+    unknown = [f for f in formats if f not in REPORT_FORMATS]
+    if unknown or not formats:
+        raise ValueError(f"report formats must be among {REPORT_FORMATS}, got {list(formats)}")
+    if "xlsx" in formats:
+        _require_openpyxl()
+    config = config or get_config()
+    os.makedirs(directory, exist_ok=True)
+    pool = None
+    if workers is not None and workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(config, directory, tuple(formats)))
+    template = ScorecardTemplate(config) if pool is None else None
+    written = 0
+    seen: set = set()  # file stems used so far in this export
+    try:
+        for chunk in score_chunks(read_portfolio_chunks(src, chunksize or DEFAULT_CHUNKSIZE), config=config):
+            if key is not None:
+                if key not in chunk.columns:
+                    raise ValueError(f"Portfolio file has no {key!r} column")
+                names = chunk[key].to_numpy()
+            else:
+                names = np.array([f"row_{written + i}" for i in range(len(chunk))], dtype=object)
+            blocks = report_blocks(chunk, names, config, batch, seen)
+            if pool is None:
+                written += sum(write_block(block, template, directory, tuple(formats)) for block in blocks)
+            else:
+                written += sum(pool.map(_write_block, blocks))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return written
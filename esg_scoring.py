@@ -0,0 +1,380 @@
+"""Streamlit-free ESG scoring core.
+
+Scores companies with a vectorized version of the "Calculate" block of
+``ESG_.py`` for a whole portfolio (one row per company) in a single NumPy pass.
+The questionnaire, thresholds, ladders, weights and grade bands come from the
+scoring config (``esg_config.json``, or the file named by ``ESG_CONFIG``), which
+is re-read when it changes; scoring functions take an optional ``config`` and
+default to the live one from ``get_config()``. Only NumPy is imported at module
+level; pandas is loaded by the functions that need it.
+"""
+import math
+import os
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
+
+import numpy as np
+
+from esg_config import ConfigStore, ScoringConfig
+
+if TYPE_CHECKING:  # pandas is imported lazily so headless callers can skip it
+    import pandas as pd
+
+# --- Numeric Inputs (D. Workforce & Pay, E. Core Performance Metrics) ---
+NUMERIC_INPUTS = [
+    "male_employees",
+    "female_employees",
+    "avg_male_pay",
+    "male_attrition",
+    "female_attrition",
+    "avg_female_pay",
+    "women_manager_pct",
+    "employee_turnover_pct",
+    "ghg_emissions",
+    "water_consumption",
+    "hazardous_waste",
+    "renewable_pct",
+    "workplace_injuries",
+    "csr_utilisation_pct",
+    "whistleblower_resolved",
+    "regulatory_noncompliance",
+]
+
+INDUSTRY_COLUMN = "industry"
+
+# Output column -> label used by the dashboard (same order as the Calculate block)
+METRIC_LABELS: Dict[str, str] = {
+    "diversity_score": "Gender Diversity Score",
+    "pay_equity_score": "Pay Equity Score",
+    "attrition_score": "Attrition Equality Score",
+    "ghg_score": "GHG Emissions Score",
+    "renewable_score": "Renewable Energy Score",
+    "waste_score": "Hazardous Waste Score",
+    "water_score": "Water Consumption Score",
+    "csr_score": "CSR Utilisation Score",
+    "compliance_score": "Regulatory Compliance Score",
+    "injury_score": "Workplace Injury Score",
+    "turnover_score": "Employee Turnover Score",
+    "whistleblower_score": "Whistleblower Score",
+}
+METRIC_COLUMNS = list(METRIC_LABELS)
+
+# Values a metric ladder can score: the raw numeric inputs plus the ratios derived by ladder_values()
+LADDER_VALUES = NUMERIC_INPUTS + [
+    "total_employees", "gender_diversity_pct", "pay_gap", "attrition_gap", "renewable_ratio", "csr_ratio",
+    "whistleblower_status",
+]
+
+# Diversity and pay equity score 0.0 when there is no workforce / male pay to compare against
+METRIC_GUARDS = {"diversity_score": "total_employees", "pay_equity_score": "avg_male_pay"}
+
+# --- Scoring Configuration ---
+CONFIG_PATH = os.environ.get("ESG_CONFIG") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           "esg_config.json")
+
+
+def _same_layout(previous: ScoringConfig, new: ScoringConfig) -> list[str]:
+    """Hot reloads may change wording, thresholds, weights and cutoffs, but not the question or grade layout."""
+    problems = []
+    if dict(previous.question_ids) != dict(new.question_ids):
+        problems.append("the number of sections/questions changed; restart the app to apply it")
+    if previous.grades != new.grades:
+        problems.append("the grade names changed; restart the app to apply them")
+    return problems
+
+
+CONFIG_STORE = ConfigStore(CONFIG_PATH, METRIC_COLUMNS, LADDER_VALUES, check=_same_layout)
+
+
+def get_config() -> ScoringConfig:
+    """The live scoring config; re-read (and recompiled) only when the file's mtime changes."""
+    return CONFIG_STORE.get()
+
+
+# Module-level values below are the config at import time. The question layout and grade
+# names cannot change while the process runs, so they are safe to use as constants;
+# thresholds, weights and cutoffs should be read from get_config() to follow hot reloads.
+_CONFIG = get_config()
+
+# Define industry options for the selectbox
+INDUSTRY_OPTIONS = list(_CONFIG.industry_options)
+detailed_questions = _CONFIG.detailed_questions
+INDUSTRY_THRESHOLDS_MAP = _CONFIG.industry_thresholds
+PERFORMANCE_THRESHOLDS = _CONFIG.performance_thresholds
+METRIC_LADDERS = _CONFIG.metric_ladders
+
+# --- Weights ---
+DISCLOSURE_WEIGHT = _CONFIG.disclosure_weight
+PERFORMANCE_WEIGHT = _CONFIG.performance_weight
+
+# --- Grade Bands (minimum score, grade, CSS class), best first ---
+GRADE_BANDS = list(_CONFIG.grade_bands)
+LOWEST_GRADE = _CONFIG.lowest_grade
+GRADES = list(_CONFIG.grades)
+GRADE_CLASSES = list(_CONFIG.grade_classes)
+
+
+def question_ids(category_key: str) -> list[str]:
+    """Returns the alphanumeric prefixes (e.g. 'E.1.1') used to number a category's questions."""
+    return list(_CONFIG.question_ids[category_key])
+
+
+ENV_QUESTION_IDS = question_ids("E")
+SOCIAL_QUESTION_IDS = question_ids("S")
+GOV_QUESTION_IDS = question_ids("G")
+QUESTION_IDS = ENV_QUESTION_IDS + SOCIAL_QUESTION_IDS + GOV_QUESTION_IDS
+
+total_disclosure_questions = len(QUESTION_IDS)
+
+# C.2.1 (whistleblower mechanism) is the 4th governance question
+WHISTLEBLOWER_QUESTION_ID = GOV_QUESTION_IDS[3]
+
+TOTAL_PERFORMANCE_METRICS_COUNT = len(METRIC_COLUMNS)
+TOTAL_PERFORMANCE_METRICS_WEIGHTED = _CONFIG.total_performance_metrics_weighted
+TOTAL_WEIGHTED_MAX_SCORE = _CONFIG.total_weighted_max_score
+
+THRESHOLD_KEYS = list(_CONFIG.threshold_keys)
+DEFAULT_THRESHOLD_INDEX = _CONFIG.default_threshold_index
+
+# Ladders compiled into cut/level arrays indexed by industry code (row order = THRESHOLD_KEYS)
+THRESHOLD_TABLES = _CONFIG.tables
+
+# Changes whenever the scoring configuration changes; cached results are keyed on it
+CONFIG_VERSION = _CONFIG.version
+
+
+def get_grade(score: float, config: Optional[ScoringConfig] = None) -> str:
+    """Returns the ESG grade (A+ ... C) for an ESG Score."""
+    config = config or get_config()
+    for cutoff, grade, _ in config.grade_bands:
+        if score >= cutoff:
+            return grade
+    return config.lowest_grade[0]
+
+
+def get_grade_class(score: float, config: Optional[ScoringConfig] = None) -> str:
+    """Returns a CSS class for the grade banner based on the ESG Score."""
+    config = config or get_config()
+    for cutoff, _, grade_class in config.grade_bands:
+        if score >= cutoff:
+            return grade_class
+    return config.lowest_grade[1]
+
+
+def grade_index(score: np.ndarray, config: Optional[ScoringConfig] = None) -> np.ndarray:
+    """Vectorized grade lookup: index into ``GRADES``/``GRADE_CLASSES`` for each score."""
+    bands = (config or get_config()).grade_bands
+    masks = [score >= cutoff for cutoff, _, _ in bands]
+    return np.select(masks, np.arange(len(bands), dtype=np.int8), np.int8(len(bands)))
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator, or 0.0 where the denominator is not positive."""
+    out = np.zeros(len(numerator), dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+# Accepted spellings of a disclosure answer; anything else (or no answer) scores 0 like the UI
+ANSWER_VALUES = {"yes": 1, "y": 1, "true": 1, "1": 1, "no": 0, "n": 0, "false": 0, "0": 0}
+
+
+def answer_value(answer: Any) -> int:
+    """Converts one Yes/No (or 1/0, True/False) answer to 0/1."""
+    if isinstance(answer, str):
+        return ANSWER_VALUES.get(answer.strip().lower(), 0)
+    return 1 if answer == 1 else 0
+
+
+_NUMBER_TYPES = (int, float, np.integer, np.floating)
+
+
+def check_record(record: Any) -> Optional[str]:
+    """Why one company dict cannot be scored (not a dict, or a missing or non-finite numeric input), else None."""
+    if not isinstance(record, dict):
+        return "every company must be a JSON object"
+    missing = [col for col in NUMERIC_INPUTS if col not in record]
+    if missing:
+        return f"missing numeric input(s): {', '.join(missing)}"
+    # bool is an int subclass; NaN and Infinity are accepted by json.loads but are not scores
+    invalid = [col for col in NUMERIC_INPUTS if isinstance(record[col], bool)
+               or not isinstance(record[col], _NUMBER_TYPES) or not math.isfinite(record[col])]
+    if invalid:
+        return f"numeric input(s) must be finite numbers: {', '.join(invalid)}"
+    return None
+
+
+def threshold_index(industry: Any, config: Optional[ScoringConfig] = None) -> int:
+    """Row of the config's threshold keys used for an industry (unknown industries -> DEFAULT)."""
+    config = config or get_config()
+    return config.threshold_index.get(industry, config.default_threshold_index)
+
+
+def industry_codes(industries: "pd.Series", config: Optional[ScoringConfig] = None) -> np.ndarray:
+    """``threshold_index`` of every row, computed once per distinct industry."""
+    import pandas as pd
+
+    config = config or get_config()
+    codes, uniques = pd.factorize(industries)
+    lookup = np.array([threshold_index(u, config) for u in uniques] + [config.default_threshold_index],
+                      dtype=np.intp)
+    return lookup[codes]  # the -1 NA sentinel picks the trailing DEFAULT
+
+
+def ladder_values(columns: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """The numeric inputs (as float64) plus the derived values the metric ladders are evaluated on."""
+    x = {col: np.asarray(columns[col], dtype=np.float64) for col in NUMERIC_INPUTS}
+    total_employees = x["male_employees"] + x["female_employees"]
+    avg_male_pay = x["avg_male_pay"]
+    male_attrition_rate = _safe_ratio(x["male_attrition"], x["male_employees"])
+    female_attrition_rate = _safe_ratio(x["female_attrition"], x["female_employees"])
+    mechanism_disclosed = np.asarray(columns[WHISTLEBLOWER_QUESTION_ID]) == 1
+    values = dict(x)
+    values.update({
+        "total_employees": total_employees,
+        "gender_diversity_pct": _safe_ratio(x["female_employees"], total_employees),
+        "pay_gap": _safe_ratio(avg_male_pay - x["avg_female_pay"], avg_male_pay),
+        "attrition_gap": np.abs(male_attrition_rate - female_attrition_rate),
+        "renewable_ratio": x["renewable_pct"] / 100,
+        "csr_ratio": x["csr_utilisation_pct"] / 100,
+        "whistleblower_status": mechanism_disclosed * (1.0 + (x["whistleblower_resolved"] > 0)),
+    })
+    return values
+
+
+def score_columns(columns: Mapping[str, np.ndarray], codes: np.ndarray,
+                  disclosure_sums: Optional[Mapping[str, np.ndarray]] = None,
+                  config: Optional[ScoringConfig] = None) -> Dict[str, np.ndarray]:
+    """
+    Vectorized Calculate block over column arrays.
+
+    ``columns`` maps every id in ``QUESTION_IDS`` (0/1) and every ``NUMERIC_INPUTS``
+    name to a 1-D array; ``codes`` indexes the config's threshold keys per row
+    (computed with the same ``config``, by default the live one). Returns one
+    array per output column (metric scores, weighted score, ``score``,
+    ``risk_score``, ``grade`` ...).
+
+    ``disclosure_sums`` ({'E': ..., 'S': ..., 'G': ...}) replaces summing the answer
+    columns, e.g. popcounts of an ``esg_answers.AnswerMatrix``; ``columns`` then only
+    needs the whistleblower question among the answers.
+    """
+    config = config or get_config()
+    n = len(codes)
+    x = values = ladder_values(columns)
+
+    def disclosure_sum(ids: list[str]) -> np.ndarray:
+        total = np.zeros(n, dtype=np.int64)
+        for qid in ids:
+            np.add(total, columns[qid], out=total)  # no int64 copy of narrow (e.g. int8) answer columns
+        return total
+
+    # --- 1. DISCLOSURE SCORES (A, B, C) ---
+    if disclosure_sums is None:
+        env_score_sum = disclosure_sum(ENV_QUESTION_IDS)
+        social_disclosure_sum = disclosure_sum(SOCIAL_QUESTION_IDS)
+        gov_score_sum = disclosure_sum(GOV_QUESTION_IDS)
+    else:
+        env_score_sum, social_disclosure_sum, gov_score_sum = (
+            np.asarray(disclosure_sums[key], dtype=np.int64) for key in ("E", "S", "G"))
+    total_disclosure_score = env_score_sum + social_disclosure_sum + gov_score_sum
+
+    # --- 2. PERFORMANCE METRIC SCORES (D & F) ---
+    out: Dict[str, Any] = {"thresholds_key": np.array(config.threshold_keys, dtype=object)[codes]}
+
+    for col, table in config.tables.items():
+        out[col] = table.score(values[table.value], codes)
+    for col, guard in METRIC_GUARDS.items():
+        out[col] = np.where(values[guard] > 0, out[col], 0.0)
+    total_employees = values["total_employees"]
+
+    # --- 3. WEIGHTED SCORE CALCULATION ---
+    # Accumulate in metric order so the float sums match the scalar path bit for bit.
+    total_weighted_performance_score = np.zeros(n, dtype=np.float64)
+    for col in config.metric_columns:
+        total_weighted_performance_score = total_weighted_performance_score + out[col] * config.performance_weight
+
+    total_weighted_score = (total_disclosure_score * config.disclosure_weight) + total_weighted_performance_score
+    score = (total_weighted_score / config.total_weighted_max_score) * 100
+    risk_score = 100 - score  # ESG Risk is the inverse of the ESG Score
+
+    grade_idx = grade_index(score, config)
+    grade = np.array(config.grades)[grade_idx]
+    grade_class = np.array(config.grade_classes)[grade_idx]
+
+    # --- Percentage Variables for Output ---
+    total_attrition = x["male_attrition"] + x["female_attrition"]
+
+    out.update({
+        "env_score_sum": env_score_sum,
+        "social_disclosure_sum": social_disclosure_sum,
+        "gov_score_sum": gov_score_sum,
+        "total_disclosure_score": total_disclosure_score,
+        "env_pct": env_score_sum / len(ENV_QUESTION_IDS) * 100,
+        "social_pct": social_disclosure_sum / len(SOCIAL_QUESTION_IDS) * 100,
+        "gov_pct": gov_score_sum / len(GOV_QUESTION_IDS) * 100,
+        "gender_diversity_pct": values["gender_diversity_pct"],
+        "pay_gap": values["pay_gap"],
+        "attrition_gap": values["attrition_gap"],
+        "renewable_ratio": values["renewable_ratio"],
+        "csr_ratio": values["csr_ratio"],
+        "total_attrition_rate": _safe_ratio(total_attrition, total_employees) * 100,
+        "total_weighted_performance_score": total_weighted_performance_score,
+        "total_weighted_score": total_weighted_score,
+        "score": score,
+        "risk_score": risk_score,
+        "grade": grade,
+        "grade_class": grade_class,
+    })
+    return out
+
+
+def score_portfolio(companies: "pd.DataFrame", config: Optional[ScoringConfig] = None) -> "pd.DataFrame":
+    """
+    Scores every company (row) of ``companies`` in one vectorized pass.
+
+    ``companies`` needs an ``industry`` column, one 0/1 column per question id in
+    ``QUESTION_IDS`` and the ``NUMERIC_INPUTS`` columns. Returns a frame on the same
+    index with every metric score, the weighted score, ``score``, ``risk_score`` and
+    ``grade``; values match the single-company Calculate block exactly.
+    """
+    import pandas as pd
+
+    config = config or get_config()
+    codes = industry_codes(companies[INDUSTRY_COLUMN], config)
+    columns = {col: companies[col].to_numpy() for col in QUESTION_IDS + NUMERIC_INPUTS}
+    return pd.DataFrame(score_columns(columns, codes, config=config), index=companies.index)
+
+
+def score_records(records: list[Mapping[str, Any]], config: Optional[ScoringConfig] = None) -> list[Dict[str, Any]]:
+    """
+    Scores a list of company dicts without pandas (used by the CLI for fast startup).
+
+    Answers may be Yes/No strings or 0/1; keys that are not scoring inputs are
+    copied through to each result. Returns plain-Python dicts. A company with a
+    missing or non-finite numeric input raises a ValueError naming the company and
+    the inputs (the ``check_record`` message).
+    """
+    config = config or get_config()
+    columns: Dict[str, np.ndarray] = {}
+    try:
+        for col in NUMERIC_INPUTS:
+            columns[col] = np.array([r[col] for r in records], dtype=np.float64)
+        valid = all(np.isfinite(values).all() for values in columns.values())
+    except (KeyError, TypeError, ValueError):
+        valid = False
+    if not valid:
+        # Only a failing batch pays for the per-record check, which names the company and inputs
+        for i, record in enumerate(records):
+            problem = check_record(record)
+            if problem:
+                raise ValueError(f"company {i}: {problem}")
+    codes = np.array([threshold_index(r.get(INDUSTRY_COLUMN), config) for r in records], dtype=np.intp)
+    columns.update({
+        qid: np.array([answer_value(r.get(qid)) for r in records], dtype=np.int64) for qid in QUESTION_IDS
+    })
+    scored = score_columns(columns, codes, config=config)
+    inputs = set(QUESTION_IDS) | set(NUMERIC_INPUTS)
+    return [
+        {**{k: v for k, v in record.items() if k not in inputs},
+         **{k: v[i].item() if isinstance(v[i], np.generic) else v[i] for k, v in scored.items()}}
+        for i, record in enumerate(records)
+    ]
@@ -0,0 +1,136 @@
+"""What-if sensitivity: which metric improvements lower a company's risk score the most.
+
+For every company and performance metric, ``metric_moves`` finds the *next band*:
+the nearest bin of the metric's compiled threshold table (``esg_thresholds``) that
+scores higher than the company's current bin, the input value that reaches it,
+and the resulting risk-score reduction. Metrics already in their best band, with
+missing (NaN) inputs, or zeroed by a guard (e.g. no employees reported) have no
+move.
+
+``top_actions`` ranks the moves of every company at once with ``np.argpartition``.
+Every band step is worth the same weighted points in the shipped config, so ties
+are common; they go to the move needing the smallest relative change of its input.
+"""
+from typing import TYPE_CHECKING, Dict, Mapping, Optional
+
+import numpy as np
+
+from esg_config import ScoringConfig
+from esg_scoring import (
+    INDUSTRY_COLUMN, METRIC_GUARDS, NUMERIC_INPUTS, QUESTION_IDS,
+    get_config, industry_codes, ladder_values, score_columns,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_TOP_K = 3
+
+# Weight of the relative input change in the ranking key: far below any real difference in
+# risk reduction, so it only orders moves that reduce risk equally
+_EFFORT_TIEBREAK = 1e-6
+
+
+def metric_moves(values: Mapping[str, np.ndarray], codes: np.ndarray, scored: Mapping[str, np.ndarray],
+                 config: Optional[ScoringConfig] = None) -> Dict[str, np.ndarray]:
+    """
+    Next-band move of every metric, as ``(n_companies, n_metrics)`` arrays in ``config.metric_columns`` order.
+
+    ``values`` come from ``ladder_values`` and ``scored`` from ``score_columns`` on
+    the same rows. Returns ``value`` (current input), ``target`` (input value that
+    reaches the next band), ``target_score`` (the band's metric score),
+    ``risk_reduction`` (points of ``risk_score``; 0 where there is no move) and
+    ``effort`` (relative change of the input, ``|target - value| / max(|target|, |value|)``).
+    """
+    config = config or get_config()
+    n, n_metrics = len(codes), len(config.metric_columns)
+    points = config.performance_weight / config.total_weighted_max_score * 100  # risk points per unit of metric score
+    moves = {key: np.full((n, n_metrics), np.nan) for key in ("value", "target", "target_score")}
+    moves["risk_reduction"] = np.zeros((n, n_metrics))
+    moves["effort"] = np.full((n, n_metrics), np.inf)
+
+    for m, column in enumerate(config.metric_columns):
+        table = config.tables[column]
+        value = np.asarray(values[table.value], dtype=np.float64)
+        bins = table.bins(value, codes)
+        if table.industry_specific:
+            cuts, levels = table.cuts.take(codes, axis=0), table.levels.take(codes, axis=0)
+        else:
+            cuts = np.broadcast_to(table.cuts[0], (n, table.cuts.shape[1]))
+            levels = np.broadcast_to(table.levels[0], (n, table.levels.shape[1]))
+        level = np.take_along_axis(levels, bins[:, None], axis=1)[:, 0]
+
+        best_target = np.full(n, np.nan)
+        best_score = np.full(n, np.nan)
+        best_distance = np.full(n, np.inf)
+        for j in range(levels.shape[1]):
+            # Bin j spans cuts[j - 1] <= v < cuts[j]: enter it from above just below cuts[j], from below at cuts[j - 1]
+            below = np.nextafter(cuts[:, j], -np.inf) if j < cuts.shape[1] else np.full(n, np.nan)
+            above = cuts[:, j - 1] if j > 0 else np.full(n, np.nan)
+            target = np.where(j < bins, below, above)
+            distance = np.abs(target - value)
+            better = (levels[:, j] > level) & (j != bins) & (distance < best_distance)  # NaN distance is never better
+            best_target = np.where(better, target, best_target)
+            best_score = np.where(better, levels[:, j], best_score)
+            best_distance = np.where(better, distance, best_distance)
+
+        has_move = np.isfinite(best_distance)
+        if column in METRIC_GUARDS:
+            has_move &= values[METRIC_GUARDS[column]] > 0
+        current = np.asarray(scored[column], dtype=np.float64)
+        scale = np.maximum(np.abs(best_target), np.abs(value))
+        moves["value"][:, m] = value
+        moves["target"][:, m] = np.where(has_move, best_target, np.nan)
+        moves["target_score"][:, m] = np.where(has_move, best_score, np.nan)
+        moves["risk_reduction"][:, m] = np.where(has_move, (best_score - current) * points, 0.0)
+        moves["effort"][:, m] = np.where(
+            has_move, np.divide(best_distance, scale, out=np.zeros(n), where=scale > 0), np.inf)
+    return moves
+
+
+def top_actions(moves: Mapping[str, np.ndarray], k: int = DEFAULT_TOP_K) -> Dict[str, np.ndarray]:
+    """
+    The ``k`` best moves per company, best first, as ``(n_companies, k)`` arrays.
+
+    ``metric`` is the index into ``config.metric_columns`` (-1 where a company has
+    fewer than ``k`` moves); the other keys are those of ``metric_moves``.
+    """
+    reduction = moves["risk_reduction"]
+    n, n_metrics = reduction.shape
+    k = min(k, n_metrics)
+    effort = np.where(reduction > 0, moves["effort"], 0.0)  # inf (no move) would make the key NaN
+    key = np.where(reduction > 0, reduction - _EFFORT_TIEBREAK * (effort / (1 + effort)), -np.inf)
+    if k < n_metrics:
+        candidates = np.argpartition(-key, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_metrics), (n, n_metrics))
+    order = np.argsort(-np.take_along_axis(key, candidates, axis=1), axis=1, kind="stable")
+    metric = np.take_along_axis(candidates, order, axis=1)
+    actions = {name: np.take_along_axis(array, metric, axis=1) for name, array in moves.items()}
+    actions["metric"] = np.where(actions["risk_reduction"] > 0, metric, -1)
+    return actions
+
+
+def rank_actions(companies: "pd.DataFrame", k: int = DEFAULT_TOP_K,
+                 config: Optional[ScoringConfig] = None) -> "pd.DataFrame":
+    """
+    Top-``k`` improvement actions for every company (row) of ``companies``, in one vectorized pass.
+
+    Returns a frame on the same index with ``action_{i}_metric`` (score column, or
+    ``None``), ``action_{i}_value``, ``action_{i}_target``, ``action_{i}_target_score``
+    and ``action_{i}_risk_reduction`` for ``i`` = 1..k.
+    """
+    import pandas as pd
+
+    config = config or get_config()
+    codes = industry_codes(companies[INDUSTRY_COLUMN], config)
+    columns = {col: companies[col].to_numpy() for col in QUESTION_IDS + NUMERIC_INPUTS}
+    scored = score_columns(columns, codes, config=config)
+    actions = top_actions(metric_moves(ladder_values(columns), codes, scored, config), k)
+    names = np.array(list(config.metric_columns) + [None], dtype=object)  # index -1 -> None
+    out = {}
+    for i in range(actions["metric"].shape[1]):
+        out[f"action_{i + 1}_metric"] = names[actions["metric"][:, i]]
+        for key in ("value", "target", "target_score", "risk_reduction"):
+            out[f"action_{i + 1}_{key}"] = actions[key][:, i]
+    return pd.DataFrame(out, index=companies.index)
@@ -0,0 +1,372 @@
+"""Local HTTP scoring service with micro-batching (standard library only).
+
+Endpoints::
+
+    POST /score    one company object -> one result object,
+                   or a JSON array of companies -> an array of results
+    GET  /metrics  request, company and batch counters, latency percentiles and throughput
+    GET  /health   {"status": "ok", "config_version": ...}
+
+Companies use the ``score-json`` record format (``industry``, Yes/No or 0/1
+answers keyed by question id, the numeric inputs); keys that are not scoring
+inputs are echoed back, so callers can pass their own ids. Results are those of
+``esg_scoring.score_records``, i.e. the same numbers as the dashboard.
+
+Every request thread hands its companies to one ``MicroBatcher`` thread and
+waits. The batcher takes everything queued, waits up to ``max_wait_ms`` for more
+while the batch is below ``max_batch`` companies, and scores the whole batch in
+one vectorized ``score_records`` call. Under load, requests queue while the
+previous batch is scored, so batches grow with traffic and the per-company cost
+falls; an idle service answers a single request after at most ``max_wait_ms``.
+
+``load_test`` is a local load generator: ``concurrency`` threads with keep-alive
+connections send ``requests`` requests and report achieved throughput and
+latency percentiles (run it in its own process, e.g. ``esg_cli.py load-test``).
+"""
+import collections
+import http.client
+import json
+import queue
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+from esg_scoring import INDUSTRY_COLUMN, NUMERIC_INPUTS, check_record, get_config, score_records
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 1024
+DEFAULT_MAX_WAIT_MS = 1.0
+MAX_BODY_BYTES = 64 * 1024 * 1024
+LATENCY_WINDOW = 10_000  # requests kept for the latency percentiles
+THROUGHPUT_WINDOW_S = 10.0
+
+
+# --- Micro-batching ---
+
+class _Job:
+    __slots__ = ("records", "results", "error", "done")
+
+    def __init__(self, records: list):
+        self.records = records
+        self.results: Optional[list] = None
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into batches scored by one background thread."""
+
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 metrics: Optional["ServiceMetrics"] = None):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="esg-micro-batcher", daemon=True)
+        self._thread.start()
+
+    def score(self, records: list[Mapping[str, Any]]) -> list[Dict[str, Any]]:
+        """Scores ``records`` as part of the next batch; blocks until their results are ready."""
+        job = _Job(records)
+        self._queue.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.results
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: _Job) -> tuple[list[_Job], bool]:
+        jobs, size, stop = [first], len(first.records), False
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if job is None:
+                stop = True
+                break
+            jobs.append(job)
+            size += len(job.records)
+        return jobs, stop
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            jobs, stop = self._collect(first)
+            self._score(jobs)
+            if stop:
+                return
+
+    def _score(self, jobs: list[_Job]) -> None:
+        records = [record for job in jobs for record in job.records]
+        started = time.perf_counter()
+        try:
+            results = score_records(records) if records else []
+        except Exception:  # a bad company fails only its own request: rescore job by job
+            for job in jobs:
+                try:
+                    job.results = score_records(job.records) if job.records else []
+                except Exception as exc:
+                    job.error = exc
+                job.done.set()
+        else:
+            offset = 0
+            for job in jobs:
+                job.results = results[offset:offset + len(job.records)]
+                offset += len(job.records)
+                job.done.set()
+        if self.metrics is not None:
+            self.metrics.record_batch(len(records), (time.perf_counter() - started) * 1000)
+
+
+# --- Metrics ---
+
+class ServiceMetrics:
+    """Thread-safe counters plus rolling request latencies for ``/metrics``."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.companies = 0
+        self.batches = 0
+        self.batch_companies = 0
+        self.scoring_ms = 0.0
+        self._finished: collections.deque = collections.deque(maxlen=window)  # (finish time, latency ms)
+
+    def record_request(self, companies: int, latency_ms: float, ok: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += not ok
+            self.companies += companies
+            self._finished.append((time.time(), latency_ms))
+
+    def record_batch(self, companies: int, scoring_ms: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.batch_companies += companies
+            self.scoring_ms += scoring_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = np.array(self._finished, dtype=np.float64).reshape(-1, 2)
+            now = time.time()
+            recent = finished[finished[:, 0] >= now - THROUGHPUT_WINDOW_S]
+            latency = finished[:, 1]
+            uptime = now - self.started
+            # A full latency window may cover less than THROUGHPUT_WINDOW_S of traffic
+            span = min(THROUGHPUT_WINDOW_S, uptime)
+            if len(recent) == self._finished.maxlen:
+                span = now - recent[0, 0]
+            out = {
+                "uptime_s": round(uptime, 3),
+                "requests": self.requests,
+                "errors": self.errors,
+                "companies": self.companies,
+                "batches": self.batches,
+                "mean_batch_size": self.batch_companies / self.batches if self.batches else 0.0,
+                "mean_batch_scoring_ms": self.scoring_ms / self.batches if self.batches else 0.0,
+                "requests_per_s": len(recent) / span if span > 0 else 0.0,
+                "latency_window": len(latency),
+            }
+        for q in (50, 95, 99):
+            out[f"latency_p{q}_ms"] = float(np.percentile(latency, q)) if len(latency) else None
+        out["latency_max_ms"] = float(latency.max()) if len(latency) else None
+        return out
+
+
+# --- HTTP ---
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    server: "ScoringServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @staticmethod
+    def _encode(payload: Any) -> bytes:
+        # Strict JSON: a NaN or Infinity raises here instead of reaching the client as a bare token
+        return json.dumps(payload, ensure_ascii=False, allow_nan=False).encode("utf-8")
+
+    def _reply(self, status: int, payload: Any) -> None:
+        self._send(status, self._encode(payload))
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        path = urllib.parse.urlsplit(self.path).path
+        if path == "/metrics":
+            self._reply(200, {**self.server.metrics.snapshot(), "config_version": get_config().version})
+        elif path == "/health":
+            self._reply(200, {"status": "ok", "config_version": get_config().version})
+        else:
+            self._reply(404, {"error": f"unknown path {path}"})
+
+    def do_POST(self) -> None:
+        started = time.perf_counter()
+        try:
+            status, payload, companies = self._score_request()
+            body = self._encode(payload)
+        except Exception as exc:  # anything unexpected is still answered, and counted as an error
+            self.log_error("internal error: %r", exc)
+            status, body, companies = 500, self._encode({"error": f"internal error: {exc!r}"}), 0
+        self._send(status, body)
+        self.server.metrics.record_request(companies, (time.perf_counter() - started) * 1000, status == 200)
+
+    def _score_request(self) -> tuple[int, Any, int]:
+        if urllib.parse.urlsplit(self.path).path != "/score":
+            return 404, {"error": f"unknown path {self.path}"}, 0
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return 400, {"error": "invalid Content-Length"}, 0
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return 413, {"error": f"request body exceeds {MAX_BODY_BYTES} bytes"}, 0
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            return 400, {"error": f"invalid JSON: {exc}"}, 0
+        single = isinstance(payload, dict)
+        records = [payload] if single else payload
+        if not isinstance(records, list):
+            return 400, {"error": "expected a company object or an array of companies"}, 0
+        for i, record in enumerate(records):
+            problem = check_record(record)
+            if problem:
+                return 400, {"error": problem if single else f"company {i}: {problem}"}, 0
+        try:
+            results = self.server.batcher.score(records)
+        except (KeyError, TypeError, ValueError) as exc:
+            return 400, {"error": f"could not score: {exc!r}"}, 0
+        return 200, results[0] if single else results, len(records)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """Threaded HTTP server whose request threads share one micro-batcher and one metrics object."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address: tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT), max_batch: int = DEFAULT_MAX_BATCH,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, verbose: bool = False):
+        self.verbose = verbose
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(max_batch, max_wait_ms, self.metrics)
+        super().__init__(address, ScoringHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.batcher.close()
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_batch: int = DEFAULT_MAX_BATCH,
+          max_wait_ms: float = DEFAULT_MAX_WAIT_MS, verbose: bool = False) -> None:
+    """Runs the service until interrupted."""
+    with ScoringServer((host, port), max_batch, max_wait_ms, verbose) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+# --- Load generator ---
+
+def sample_companies(n: int = 64, seed: int = 0) -> list[Dict[str, Any]]:
+    """Plausible company records in the request format (the benchmark's synthetic inputs)."""
+    from esg_bench import synthetic_columns
+    from esg_scoring import QUESTION_IDS, THRESHOLD_KEYS
+
+    columns = synthetic_columns(n, seed)
+    return [{INDUSTRY_COLUMN: THRESHOLD_KEYS[int(columns["codes"][i])],
+             **{qid: "Yes" if columns[qid][i] else "No" for qid in QUESTION_IDS},
+             **{col: float(columns[col][i]) for col in NUMERIC_INPUTS}} for i in range(n)]
+
+
+def load_test(url: str, requests: int = 10_000, concurrency: int = 32, batch_size: int = 1,
+              companies: Optional[list[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Sends ``requests`` POSTs of ``batch_size`` companies each from ``concurrency``
+    keep-alive connections; returns throughput (requests and companies per
+    second), latency percentiles (ms) and the error count.
+    """
+    parts = urllib.parse.urlsplit(url)
+    companies = companies or sample_companies()
+    bodies = []
+    for i in range(len(companies)):
+        chunk = [companies[(i + j) % len(companies)] for j in range(batch_size)]
+        bodies.append(json.dumps(chunk[0] if batch_size == 1 else chunk).encode("utf-8"))
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+    latencies: list[float] = []
+    errors = [0]
+
+    def worker() -> None:
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        own = []
+        while True:
+            with counter_lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            started = time.perf_counter()
+            try:
+                connection.request("POST", "/score", body=bodies[i % len(bodies)],
+                                   headers={"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+                ok = False
+            own.append((time.perf_counter() - started) * 1000)
+            if not ok:
+                with counter_lock:
+                    errors[0] += 1
+        connection.close()
+        with counter_lock:
+            latencies.extend(own)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latency = np.array(latencies)
+    return {
+        "requests": requests,
+        "companies": requests * batch_size,
+        "concurrency": concurrency,
+        "errors": errors[0],
+        "elapsed_s": elapsed,
+        "requests_per_s": requests / elapsed,
+        "companies_per_s": requests * batch_size / elapsed,
+        **{f"latency_p{q}_ms": float(np.percentile(latency, q)) for q in (50, 95, 99)},
+    }
@@ -0,0 +1,284 @@
+"""Persistent results store: one SQLite row per scored company snapshot.
+
+Each snapshot keeps the company key, industry, as-of date, config version, the
+35 answers (packed 5-byte ``AnswerMatrix`` rows), the 16 numeric inputs, the 12
+metric scores, ``score``, ``risk_score`` and ``grade``. The store is a single
+file; no server is needed.
+
+* Batch loads go through ``write`` with ``executemany`` in one transaction per
+  ``batch_rows`` rows (WAL journal, ``synchronous=NORMAL``).
+* ``submit`` hands rows to a background writer thread and returns at once, so the
+  Streamlit script never waits on disk; ``flush`` waits for queued writes.
+* Indexes on ``(company, as_of)``, ``(industry, as_of)`` and ``as_of`` serve
+  ``history`` (one company over time) and ``cohort`` (an industry or the whole
+  book on a date, latest snapshot per company) without table scans.
+
+The app records every named scorecard to ``esg_results.db`` next to this module (or
+the path in ``ESG_STORE``; ``ESG_STORE=off`` disables it), whatever the working directory.
+"""
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Optional
+
+import numpy as np
+
+from esg_answers import AnswerMatrix
+from esg_scoring import INDUSTRY_COLUMN, METRIC_COLUMNS, NUMERIC_INPUTS, QUESTION_IDS, answer_value, get_config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "esg_results.db")
+DEFAULT_BATCH_ROWS = 50_000
+COMPANY_COLUMN = "company"
+AS_OF_COLUMN = "as_of"
+RESULT_COLUMNS = METRIC_COLUMNS + ["total_disclosure_score", "score", "risk_score", "grade"]
+
+# Table columns after the id, in insert order
+_COLUMNS = ([COMPANY_COLUMN, INDUSTRY_COLUMN, AS_OF_COLUMN, "recorded_at", "config_version", "answers"]
+            + NUMERIC_INPUTS + RESULT_COLUMNS)
+_TYPES = {
+    COMPANY_COLUMN: "TEXT NOT NULL", INDUSTRY_COLUMN: "TEXT", AS_OF_COLUMN: "TEXT NOT NULL",
+    "recorded_at": "TEXT NOT NULL", "config_version": "TEXT NOT NULL", "answers": "BLOB NOT NULL",
+    "total_disclosure_score": "INTEGER", "grade": "TEXT",
+}  # everything else is REAL
+_QUOTED = [f'"{c}"' for c in _COLUMNS]
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS snapshots (id INTEGER PRIMARY KEY, "
+    + ", ".join(f"{q} {_TYPES.get(c, 'REAL')}" for c, q in zip(_COLUMNS, _QUOTED)) + ")",
+    f"CREATE INDEX IF NOT EXISTS ix_snapshots_company ON snapshots ({COMPANY_COLUMN}, {AS_OF_COLUMN})",
+    # (industry, company, as_of) lists the companies ever recorded in an industry cohort
+    f"CREATE INDEX IF NOT EXISTS ix_snapshots_industry ON snapshots ({INDUSTRY_COLUMN}, {COMPANY_COLUMN}, {AS_OF_COLUMN})",
+    f"CREATE INDEX IF NOT EXISTS ix_snapshots_as_of ON snapshots ({AS_OF_COLUMN})",
+]
+_INSERT = f"INSERT INTO snapshots ({', '.join(_QUOTED)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+_STOP = object()
+
+
+def _iso_date(value: Any) -> str:
+    """``YYYY-MM-DD`` for a date, datetime or ISO string (default: today)."""
+    if value is None:
+        return datetime.date.today().isoformat()
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()[:10]
+    return str(value)[:10]
+
+
+def snapshot_rows(companies: "pd.DataFrame", scored: "pd.DataFrame", config_version: Optional[str] = None,
+                  as_of: Any = None, company_column: str = COMPANY_COLUMN) -> list[tuple]:
+    """
+    Insert rows for a normalized portfolio frame and its ``score_portfolio`` output.
+
+    The company key comes from ``company_column`` (the frame index when that column
+    is missing) and the as-of date from an ``as_of`` column, else from ``as_of``.
+    """
+    n = len(companies)
+    names = (companies[company_column] if company_column in companies.columns else companies.index).astype(str)
+    dates = (companies[AS_OF_COLUMN].map(_iso_date) if AS_OF_COLUMN in companies.columns
+             else [_iso_date(as_of)] * n)
+    industries = companies[INDUSTRY_COLUMN].astype(object)
+    packed = AnswerMatrix.from_frame(companies).packed
+    columns = [
+        list(names),
+        list(industries.where(industries.notna(), None)),
+        list(dates),
+        [datetime.datetime.now().isoformat(timespec="seconds")] * n,
+        [config_version or get_config().version] * n,
+        [packed[i].tobytes() for i in range(n)],
+    ]
+    for col in NUMERIC_INPUTS:
+        columns.append(np.asarray(companies[col], dtype=np.float64).tolist())
+    for col in RESULT_COLUMNS:
+        values = scored[col].to_numpy()
+        columns.append(values.tolist() if values.dtype != object else [str(v) for v in values])
+    return list(zip(*columns))
+
+
+def record_row(record: Mapping[str, Any], result: Mapping[str, Any], config_version: str,
+               company: str, as_of: Any = None) -> tuple:
+    """One insert row for a single company (an input dict and its result dict, as in the app)."""
+    bits = np.array([[answer_value(record.get(qid)) for qid in QUESTION_IDS]], dtype=np.uint8)
+    return ((str(company), record.get(INDUSTRY_COLUMN), _iso_date(as_of),
+             datetime.datetime.now().isoformat(timespec="seconds"), config_version,
+             AnswerMatrix.from_bits(bits).packed[0].tobytes())
+            + tuple(float(record[col]) for col in NUMERIC_INPUTS)
+            + tuple(str(result[col]) if col == "grade" else
+                    int(result[col]) if col == "total_disclosure_score" else float(result[col])
+                    for col in RESULT_COLUMNS))
+
+
+class ResultStore:
+    """SQLite-backed snapshot history with bulk and background (non-blocking) writes."""
+
+    def __init__(self, path: str = DEFAULT_PATH, batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.path = path
+        self.batch_rows = batch_rows
+        self._local = threading.local()
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self.last_error: Optional[BaseException] = None
+        conn = self._connect()
+        try:
+            with conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+        finally:
+            conn.close()
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultStore"]:
+        """The store at ``ESG_STORE`` (default ``DEFAULT_PATH``), or None when set to ``off``."""
+        path = os.environ.get("ESG_STORE", DEFAULT_PATH)
+        if path.strip().lower() in ("", "off", "0", "false", "no"):
+            return None
+        return cls(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """One read connection per thread (SQLite connections are not shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # --- Writes ---
+
+    def write_rows(self, rows: Iterable[tuple]) -> int:
+        """Bulk-inserts rows (from ``snapshot_rows``/``record_row``), one transaction per batch."""
+        rows = list(rows)
+        conn = self._connect()
+        try:
+            for start in range(0, len(rows), self.batch_rows):
+                with conn:
+                    conn.executemany(_INSERT, rows[start:start + self.batch_rows])
+        finally:
+            conn.close()
+        self.last_error = None  # a failed earlier write is no longer the store's state
+        return len(rows)
+
+    def write(self, companies: "pd.DataFrame", scored: "pd.DataFrame", config_version: Optional[str] = None,
+              as_of: Any = None, company_column: str = COMPANY_COLUMN) -> int:
+        """Synchronously stores a scored portfolio; returns the number of snapshots written."""
+        return self.write_rows(snapshot_rows(companies, scored, config_version, as_of, company_column))
+
+    def submit(self, rows: Iterable[tuple]) -> None:
+        """Queues rows for the background writer and returns immediately."""
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._drain, name="esg-store-writer", daemon=True)
+                self._writer.start()
+        self._queue.put(list(rows))
+
+    def _drain(self) -> None:
+        while True:
+            rows = self._queue.get()
+            try:
+                if rows is _STOP:
+                    return
+                # Coalesce everything queued meanwhile into one bulk insert
+                while True:
+                    try:
+                        more = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if more is _STOP:
+                        self._queue.task_done()
+                        self._queue.put(_STOP)
+                        break
+                    rows.extend(more)
+                    self._queue.task_done()
+                self.write_rows(rows)
+            except Exception as exc:  # keep the writer alive; surfaced through last_error
+                self.last_error = exc
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Blocks until every submitted row is written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- Queries ---
+
+    def _frame(self, sql: str, params: tuple) -> "pd.DataFrame":
+        import pandas as pd
+        cursor = self._reader().execute(sql, params)
+        return pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+
+    def count(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+    @staticmethod
+    def _select(columns: Optional[Iterable[str]]) -> str:
+        if columns is None:
+            return "*"
+        unknown = [c for c in columns if c != "id" and c not in _COLUMNS]
+        if unknown:
+            raise ValueError(f"unknown snapshot column(s): {', '.join(unknown)}")
+        return ", ".join(f'"{c}"' for c in columns)
+
+    def history(self, company: str, start: Any = None, end: Any = None,
+                columns: Optional[Iterable[str]] = None) -> "pd.DataFrame":
+        """Every snapshot of one company, oldest first (optionally within ``start``..``end``)."""
+        sql = f"SELECT {self._select(columns)} FROM snapshots WHERE {COMPANY_COLUMN} = ?"
+        params: tuple = (str(company),)
+        if start is not None:
+            sql += f" AND {AS_OF_COLUMN} >= ?"
+            params += (_iso_date(start),)
+        if end is not None:
+            sql += f" AND {AS_OF_COLUMN} <= ?"
+            params += (_iso_date(end),)
+        return self._frame(sql + f" ORDER BY {AS_OF_COLUMN}, id", params)
+
+    def cohort(self, industry: Optional[str] = None, as_of: Any = None,
+               columns: Optional[Iterable[str]] = None) -> "pd.DataFrame":
+        """
+        Latest snapshot per company on or before ``as_of`` (default: all dates),
+        for one industry or the whole book. With ``industry``, a company belongs to
+        the cohort when its latest snapshot is in that industry, so a company that
+        has since moved to another industry is left out. Selecting only the needed
+        ``columns`` keeps large cohorts fast, as most of the time goes into
+        materializing rows.
+        """
+        # One index probe per company for its latest id (cheaper than a window over every snapshot).
+        # Candidates are the companies ever recorded in the industry; the industry is then checked on
+        # the latest snapshot itself, not used to pick it.
+        latest = f"SELECT id FROM snapshots t WHERE t.{COMPANY_COLUMN} = s.{COMPANY_COLUMN}"
+        names = f"SELECT DISTINCT {COMPANY_COLUMN} FROM snapshots"
+        params: list = []
+        if as_of is not None:
+            latest += f" AND t.{AS_OF_COLUMN} <= ?"
+            params.append(_iso_date(as_of))
+        where = ""
+        if industry is not None:
+            names += f" WHERE {INDUSTRY_COLUMN} = ?"
+            where = f" AND {INDUSTRY_COLUMN} = ?"
+            params += [industry, industry]
+        sql = (f"SELECT {self._select(columns)} FROM snapshots WHERE id IN "
+               f"(SELECT ({latest} ORDER BY t.{AS_OF_COLUMN} DESC, t.id DESC LIMIT 1) FROM ({names}) s)"
+               f"{where} ORDER BY {COMPANY_COLUMN}")
+        return self._frame(sql, tuple(params))
+
+    @staticmethod
+    def answers(frame: "pd.DataFrame") -> AnswerMatrix:
+        """The packed answers of a query result, as one ``AnswerMatrix``."""
+        return AnswerMatrix(np.frombuffer(b"".join(frame["answers"]), dtype=np.uint8), len(frame))
@@ -0,0 +1,294 @@
+"""Monte Carlo stress testing of ESG grades under threshold and weight uncertainty.
+
+Each scenario multiplies every *named* threshold of the scoring config
+(``ghg_high``, ``div_medium``, ...) and both weights by an independent lognormal
+factor ``exp(sigma * z)``; literal ladder thresholds (e.g. "0 injuries") are
+counts and stay fixed. The whole portfolio is rescored under every scenario as a
+scenarios x obligors block computation:
+
+* everything that does not depend on thresholds or weights (the derived ladder
+  values, disclosure sums, industry lookups and metrics with only literal
+  thresholds) is computed once per obligor;
+* per block, each metric ladder is evaluated against a ``(scenarios, obligors)``
+  threshold grid and accumulated in the same order as ``score_columns``, so a
+  scenario with all factors at 1.0 reproduces the base scores bit for bit.
+
+Obligors are processed in chunks (optionally on a process pool), each chunk
+against all scenarios, which keeps memory bounded and gives exact per-obligor
+quantiles. Results are per-obligor grade-flip / downgrade / upgrade
+probabilities, grade probabilities and the ``risk_score`` distribution (mean,
+standard deviation, quantiles), plus per-scenario portfolio summaries.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Mapping, Optional
+
+import numpy as np
+
+from esg_config import ScoringConfig
+from esg_scoring import (
+    INDUSTRY_COLUMN, METRIC_GUARDS, NUMERIC_INPUTS, QUESTION_IDS,
+    get_config, grade_index, industry_codes, ladder_values, score_columns,
+)
+from esg_thresholds import OPERATORS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+WEIGHT_NAMES = ("disclosure_weight", "performance_weight")
+QUANTILES = (0.05, 0.50, 0.95)
+
+DEFAULT_OBLIGOR_CHUNK = 1_000
+# Scenario x obligor cells evaluated at once (bounds the temporaries of one block)
+DEFAULT_BLOCK_CELLS = 2_000_000
+
+
+@dataclass(frozen=True)
+class StressSpec:
+    """How scenarios are drawn. ``sigmas`` overrides the shock size per threshold or weight name."""
+    n_scenarios: int = 1_000
+    threshold_sigma: float = 0.10
+    weight_sigma: float = 0.10
+    sigmas: Mapping[str, float] = field(default_factory=dict)
+    seed: Optional[int] = 0
+
+
+def shocked_names(config: ScoringConfig) -> list[str]:
+    """Named thresholds referenced by the metric ladders, in ladder order, then the weights."""
+    names: list[str] = []
+    for _, ladder in config.metric_ladders.values():
+        for _, threshold, _ in ladder:
+            if isinstance(threshold, str) and threshold not in names:
+                names.append(threshold)
+    return names + list(WEIGHT_NAMES)
+
+
+def draw_scenarios(spec: StressSpec, config: Optional[ScoringConfig] = None) -> Dict[str, np.ndarray]:
+    """Multiplicative factor per shocked name, one value per scenario."""
+    config = config or get_config()
+    names = shocked_names(config)
+    unknown = set(spec.sigmas) - set(names)
+    if unknown:
+        raise ValueError(f"unknown stress sigma name(s) {sorted(unknown)}; expected some of {names}")
+    rng = np.random.default_rng(spec.seed)
+    factors = {}
+    for name in names:
+        sigma = spec.sigmas.get(name, spec.weight_sigma if name in WEIGHT_NAMES else spec.threshold_sigma)
+        draws = rng.standard_normal(spec.n_scenarios)  # drawn even when sigma is 0 to keep streams stable
+        factors[name] = np.exp(sigma * draws) if sigma > 0 else np.ones(spec.n_scenarios)
+    return factors
+
+
+# --- Scenario engine ---
+
+def _resolve_base(name: str, config: ScoringConfig) -> np.ndarray:
+    """Base value of a named threshold per industry code (industry map first, then performance)."""
+    return np.array([th[name] if name in th else config.performance_thresholds[name]
+                     for th in config.industry_thresholds.values()], dtype=np.float64)
+
+
+class _Engine:
+    """Rescoring of obligor chunks under every scenario; picklable for pool workers."""
+
+    def __init__(self, config: ScoringConfig, factors: Dict[str, np.ndarray], block_cells: int):
+        self.config = config
+        self.n_scenarios = len(next(iter(factors.values())))
+        self.block_cells = block_cells
+        self.performance_weight = config.performance_weight * factors["performance_weight"]
+        self.disclosure_weight = config.disclosure_weight * factors["disclosure_weight"]
+        self.max_score = (config.total_disclosure_questions * self.disclosure_weight
+                          + len(config.metric_columns) * self.performance_weight)
+        self.cutoffs = [cutoff for cutoff, _, _ in config.grade_bands]
+        # Per metric: (value name, rows of (operator, kind, base, factor, score)); kind is
+        # 'literal' (fixed scalar), 'global' (same base in every industry) or 'industry'
+        self.metrics = {}
+        for column in config.metric_columns:
+            value, ladder = config.metric_ladders[column]
+            rows = []
+            for op, threshold, score in ladder:
+                if isinstance(threshold, str):
+                    base = _resolve_base(threshold, config)
+                    kind = "global" if (base == base[0]).all() else "industry"
+                    rows.append((OPERATORS[op], kind, base[0] if kind == "global" else base, factors[threshold], score))
+                else:
+                    rows.append((OPERATORS[op], "literal", float(threshold), None, score))
+            self.metrics[column] = (value, rows)
+
+    def value_names(self) -> list[str]:
+        return sorted({value for value, _ in self.metrics.values()} | set(METRIC_GUARDS.values()))
+
+    def _ladder(self, value: np.ndarray, rows: list, codes: np.ndarray, sl: slice) -> np.ndarray:
+        """Ladder scores, (scenarios in ``sl``, obligors) or (1, obligors) when every threshold is literal."""
+        result = np.float64(0.0)  # else_score of compiled ladders
+        v = value[None, :]
+        for op, kind, base, factor, score in reversed(rows):  # reversed: the first matching row wins
+            if kind == "literal":
+                threshold = base
+            elif kind == "global":
+                threshold = (base * factor[sl])[:, None]
+            else:
+                threshold = factor[sl][:, None] * base.take(codes)[None, :]
+            result = np.where(op(v, threshold), score, result)
+        return np.broadcast_to(result, (1, len(value))) if np.ndim(result) == 0 else result
+
+    def run(self, chunk: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        codes, disclosure, base_grade = chunk["codes"], chunk["disclosure"], chunk["base_grade"]
+        base_risk = chunk["base_risk"]
+        n_obligors, n_scenarios = len(codes), self.n_scenarios
+        n_grades = len(self.cutoffs) + 1
+        # Moments and quantiles are taken of the shift from the base risk_score: exact (zero) for
+        # unshocked scenarios, and float32 storage of small shifts keeps quantiles precise
+        shift = np.empty((n_scenarios, n_obligors), dtype=np.float32)
+        shift_sum = np.zeros(n_obligors)
+        shift_sq_sum = np.zeros(n_obligors)
+        grade_counts = np.zeros((n_grades, n_obligors), dtype=np.int64)
+        downgrades = np.zeros(n_obligors, dtype=np.int64)
+        upgrades = np.zeros(n_obligors, dtype=np.int64)
+        scenario_risk_sum = np.zeros(n_scenarios)
+        scenario_flips = np.zeros(n_scenarios, dtype=np.int64)
+
+        # Metrics with only literal thresholds are the same in every scenario
+        fixed = {}
+        for column, (value, rows) in self.metrics.items():
+            if all(kind == "literal" for _, kind, _, _, _ in rows):
+                fixed[column] = self._ladder(chunk[value], rows, codes, slice(None))
+        guards = {column: chunk[guard] > 0 for column, guard in METRIC_GUARDS.items()}
+
+        step = max(1, self.block_cells // max(1, n_obligors))
+        for start in range(0, n_scenarios, step):
+            sl = slice(start, min(start + step, n_scenarios))
+            pw = self.performance_weight[sl][:, None]
+            total_weighted_performance_score = np.zeros((sl.stop - sl.start, n_obligors))
+            for column, (value, rows) in self.metrics.items():
+                metric = fixed[column] if column in fixed else self._ladder(chunk[value], rows, codes, sl)
+                if column in guards:
+                    metric = np.where(guards[column], metric, 0.0)
+                total_weighted_performance_score = total_weighted_performance_score + metric * pw
+            total_weighted_score = disclosure[None, :] * self.disclosure_weight[sl][:, None] \
+                + total_weighted_performance_score
+            score = (total_weighted_score / self.max_score[sl][:, None]) * 100
+            block_risk = 100 - score
+
+            # Grade index = number of cutoffs (best first) the score falls below
+            grade = np.zeros(score.shape, dtype=np.int8)
+            for cutoff in self.cutoffs:
+                grade += score < cutoff
+            for g in range(n_grades):
+                grade_counts[g] += (grade == g).sum(axis=0)
+            downgrades += (grade > base_grade).sum(axis=0)
+            upgrades += (grade < base_grade).sum(axis=0)
+            scenario_flips[sl] = (grade != base_grade).sum(axis=1)
+
+            block_shift = block_risk - base_risk
+            shift[sl] = block_shift
+            shift_sum += block_shift.sum(axis=0)
+            shift_sq_sum += np.square(block_shift).sum(axis=0)
+            scenario_risk_sum[sl] = block_risk.sum(axis=1)
+
+        mean_shift = shift_sum / n_scenarios
+        return {
+            "grade_counts": grade_counts,
+            "downgrades": downgrades,
+            "upgrades": upgrades,
+            "risk_mean": base_risk + mean_shift,
+            "risk_std": np.sqrt(np.maximum(shift_sq_sum / n_scenarios - np.square(mean_shift), 0.0)),
+            "risk_quantiles": base_risk + np.quantile(shift, QUANTILES, axis=0),
+            "scenario_risk_sum": scenario_risk_sum,
+            "scenario_flips": scenario_flips,
+        }
+
+
+# Pool worker state, set by _init_worker()
+_worker_engine: Optional[_Engine] = None
+
+
+def _init_worker(engine: _Engine) -> None:
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _run_chunk(chunk: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return _worker_engine.run(chunk)
+
+
+# --- Public entry point ---
+
+@dataclass
+class StressResult:
+    obligors: "pd.DataFrame"  # per obligor: base grade, flip probabilities, grade probabilities, risk distribution
+    scenarios: "pd.DataFrame"  # per scenario: factors, mean portfolio risk_score, share of obligors flipped
+    spec: StressSpec
+    config_version: str
+
+
+def stress_test(companies: "pd.DataFrame", spec: StressSpec = StressSpec(), config: Optional[ScoringConfig] = None,
+                workers: Optional[int] = None, obligor_chunk: int = DEFAULT_OBLIGOR_CHUNK,
+                block_cells: int = DEFAULT_BLOCK_CELLS) -> StressResult:
+    """
+    Rescores ``companies`` (answers already 0/1) under ``spec.n_scenarios`` perturbed configs.
+
+    ``workers`` > 1 spreads obligor chunks over a process pool. Grade flips are
+    measured against the base grade under the unperturbed ``config``.
+    """
+    if len(companies) == 0:
+        raise ValueError("no companies to stress")
+    config = config or get_config()
+    factors = draw_scenarios(spec, config)
+    engine = _Engine(config, factors, block_cells)
+
+    codes = industry_codes(companies[INDUSTRY_COLUMN], config)
+    columns = {col: companies[col].to_numpy() for col in QUESTION_IDS + NUMERIC_INPUTS}
+    base = score_columns(columns, codes, config=config)
+    base_grade = grade_index(base["score"], config).astype(np.int8)
+    values = ladder_values(columns)
+    arrays = {name: values[name] for name in engine.value_names()}
+    arrays.update(codes=codes, disclosure=base["total_disclosure_score"],
+                  base_risk=base["risk_score"], base_grade=base_grade)
+
+    def chunks() -> Iterator[Dict[str, np.ndarray]]:
+        for start in range(0, len(codes), obligor_chunk):
+            yield {key: array[start:start + obligor_chunk] for key, array in arrays.items()}
+
+    if workers is not None and workers > 1 and len(codes) > obligor_chunk:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine,)) as pool:
+            parts = list(pool.map(_run_chunk, chunks()))
+    else:
+        parts = [engine.run(chunk) for chunk in chunks()]
+
+    return _collect(companies.index, parts, base, base_grade, factors, spec, config)
+
+
+def _collect(index: Any, parts: list[Dict[str, np.ndarray]], base: Dict[str, np.ndarray], base_grade: np.ndarray,
+             factors: Dict[str, np.ndarray], spec: StressSpec, config: ScoringConfig) -> StressResult:
+    import pandas as pd
+
+    n_scenarios = spec.n_scenarios
+    n_obligors = len(base_grade)
+
+    def joined(key: str) -> np.ndarray:
+        return np.concatenate([part[key] for part in parts], axis=-1)
+
+    grade_counts = joined("grade_counts")
+    flips = n_scenarios - grade_counts[base_grade, np.arange(n_obligors)]
+    quantiles = joined("risk_quantiles")
+
+    obligors = pd.DataFrame({
+        "base_score": base["score"],
+        "base_risk_score": base["risk_score"],
+        "base_grade": base["grade"],
+        "flip_probability": flips / n_scenarios,
+        "downgrade_probability": joined("downgrades") / n_scenarios,
+        "upgrade_probability": joined("upgrades") / n_scenarios,
+        "risk_mean": joined("risk_mean"),
+        "risk_std": joined("risk_std"),
+        **{f"risk_p{round(q * 100):02d}": quantiles[i] for i, q in enumerate(QUANTILES)},
+        **{f"p_grade_{grade}": grade_counts[i] / n_scenarios for i, grade in enumerate(config.grades)},
+    }, index=index)
+
+    scenario_risk = sum(part["scenario_risk_sum"] for part in parts)
+    scenario_flips = sum(part["scenario_flips"] for part in parts)
+    scenarios = pd.DataFrame({f"factor_{name}": factor for name, factor in factors.items()})
+    scenarios["mean_risk_score"] = scenario_risk / n_obligors
+    scenarios["flip_share"] = scenario_flips / n_obligors
+    scenarios.index.name = "scenario"
+    return StressResult(obligors, scenarios, spec, config.version)
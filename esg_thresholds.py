@@ -0,0 +1,124 @@
+"""Compiled threshold tables for the performance metrics.
+
+Each metric is declared as a *ladder*: the Calculate block's if/elif chain written
+as data, ``[(operator, threshold, score), ...]``, where the first condition that
+holds wins and anything else scores ``else_score``. ``compile_ladders`` turns
+every ladder into sorted cut points and score levels for every industry, stored
+in contiguous ``(n_industries, ...)`` arrays indexed by industry code. Scoring a
+column is then one binning step (``np.searchsorted`` for wide tables, a few
+vectorized comparisons for narrow ones) and one level lookup, with no
+per-metric branching.
+
+Cuts are inclusive lower bounds: a value ``v`` falls in bin ``i`` when
+``cuts[i - 1] <= v < cuts[i]``. Strict operators are made inclusive with
+``np.nextafter``, so the compiled table reproduces the ladder exactly for every
+float, including values that sit on a threshold.
+"""
+import operator
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+
+Threshold = Union[str, float]
+Ladder = Sequence[Tuple[str, Threshold, float]]
+
+OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+}
+
+# Tables with more cuts than this are binned with np.searchsorted; below it a
+# handful of vectorized comparisons is faster than the binary search
+SEARCHSORTED_MIN_CUTS = 8
+
+
+@dataclass(frozen=True)
+class ThresholdTable:
+    """Cut points and score levels of one metric for every industry code."""
+    value: str  # name of the (derived) input the ladder is evaluated on
+    cuts: np.ndarray  # (n_industries, k) float64, ascending per row
+    levels: np.ndarray  # (n_industries, k + 1) float64
+    else_score: float  # score for NaN values (no ladder condition holds)
+    industry_specific: bool
+
+    def bins(self, values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Per-row level index: how many of the row's cuts are <= the value (NaN -> last level)."""
+        n_cuts = self.cuts.shape[1]
+        if not self.industry_specific and n_cuts > SEARCHSORTED_MIN_CUTS:
+            return np.searchsorted(self.cuts[0], values, side="right")
+        # Few cuts: counting cuts above the value is the same binning without the binary search
+        above = np.zeros(len(values), dtype=np.intp)
+        for j in range(n_cuts):
+            above += values < (self.cuts[:, j].take(codes) if self.industry_specific else self.cuts[0, j])
+        return n_cuts - above
+
+    def score(self, values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Scores ``values`` for rows whose industry codes are ``codes``."""
+        values = np.asarray(values, dtype=np.float64)
+        bins = self.bins(values, codes)
+        if self.industry_specific:
+            scores = self.levels.ravel().take(codes * self.levels.shape[1] + bins)
+        else:
+            scores = self.levels[0].take(bins)
+        if (self.levels[:, -1] != self.else_score).any():
+            scores = np.where(np.isnan(values), self.else_score, scores)
+        return scores
+
+
+def _resolve(threshold: Threshold, industry_thresholds: Mapping[str, float],
+             performance_thresholds: Mapping[str, float]) -> float:
+    if isinstance(threshold, str):
+        if threshold in industry_thresholds:
+            return float(industry_thresholds[threshold])
+        return float(performance_thresholds[threshold])
+    return float(threshold)
+
+
+def _evaluate(ladder: Sequence[Tuple[str, float, float]], value: float, else_score: float) -> float:
+    for op, threshold, score in ladder:
+        if OPERATORS[op](value, threshold):
+            return score
+    return else_score
+
+
+def compile_ladder(ladder: Sequence[Tuple[str, float, float]], else_score: float = 0.0) -> Tuple[list, list]:
+    """Compiles a ladder with numeric thresholds into ``(cuts, levels)`` lists."""
+    points = sorted({p for _, t, _ in ladder for p in (t, float(np.nextafter(t, np.inf)))})
+    # Every condition is constant between consecutive points, so one probe per interval suffices
+    levels = [_evaluate(ladder, -np.inf, else_score)] + [_evaluate(ladder, p, else_score) for p in points]
+    cuts = []
+    merged = [levels[0]]
+    for point, level in zip(points, levels[1:]):
+        if level != merged[-1]:
+            cuts.append(point)
+            merged.append(level)
+    return cuts, merged
+
+
+def compile_ladders(ladders: Mapping[str, Tuple[str, Ladder]],
+                    industry_map: Mapping[str, Mapping[str, float]],
+                    performance_thresholds: Mapping[str, float],
+                    else_score: float = 0.0) -> Dict[str, ThresholdTable]:
+    """
+    Compiles ``{score_column: (value_name, ladder)}`` into one ``ThresholdTable`` per metric.
+
+    Table rows follow the order of ``industry_map`` (the industry codes). String
+    thresholds name an industry threshold or, failing that, a performance threshold.
+    """
+    tables = {}
+    for column, (value, ladder) in ladders.items():
+        industry_specific = any(isinstance(t, str) and t in th for _, t, _ in ladder for th in industry_map.values())
+        rows = []
+        for th in industry_map.values():
+            resolved = [(op, _resolve(t, th, performance_thresholds), score) for op, t, score in ladder]
+            rows.append(compile_ladder(resolved, else_score))
+        width = max(len(cuts) for cuts, _ in rows)
+        # Pad rows that merged bins with +inf cuts (never reached) and a repeated last level
+        cuts = np.array([c + [np.inf] * (width - len(c)) for c, _ in rows], dtype=np.float64)
+        levels = np.array([lv + [lv[-1]] * (width - len(lv) + 1) for _, lv in rows], dtype=np.float64)
+        tables[column] = ThresholdTable(value, cuts, levels, else_score, industry_specific)
+    return tables
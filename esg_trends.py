@@ -0,0 +1,196 @@
+"""Multi-period trends: year-on-year deltas and rolling statistics per company.
+
+Reporting periods come as a long frame, one row per company and as-of date: a
+results-store ``history``/``cohort`` query or a ``load_runs`` frame from the
+archive. Tracked columns are the emissions, water, hazardous waste and renewable
+inputs the environmental questions ask about year on year, plus ``risk_score``.
+
+* ``yoy_deltas`` computes, in one vectorized pass over a whole history, every
+  row's change against the same company's previous period.
+* ``RollingTrends`` keeps rolling statistics (mean, standard deviation and
+  least-squares slope per period over the last ``window`` periods) that are
+  updated in O(rows) when a new period arrives. Each company has a ring buffer
+  plus running sums of ``y``, ``y**2`` and ``i * y`` (and of ``1``, ``i`` and
+  ``i**2``) per column. When the window slides, the evicted value is subtracted
+  instead of recomputing the history. Missing (NaN or infinite) values stay out
+  of the sums, so statistics cover the valid values in the window.
+"""
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import numpy as np
+
+from esg_store import AS_OF_COLUMN, COMPANY_COLUMN
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TREND_COLUMNS = ["ghg_emissions", "water_consumption", "hazardous_waste", "renewable_pct", "risk_score"]
+DEFAULT_WINDOW = 3
+
+
+def yoy_deltas(history: "pd.DataFrame", columns: Iterable[str] = TREND_COLUMNS, key: str = COMPANY_COLUMN,
+               period: str = AS_OF_COLUMN) -> "pd.DataFrame":
+    """
+    ``history`` sorted by company and period, with ``<col>_yoy`` (change since the
+    company's previous period) and ``<col>_yoy_pct`` (relative to the previous value)
+    for every column; NaN on each company's first period.
+    """
+    columns = list(columns)
+    frame = history.sort_values([key, period], kind="stable").reset_index(drop=True)
+    values = frame[columns].to_numpy(dtype=np.float64)
+    keys = frame[key].to_numpy()
+    previous = np.full_like(values, np.nan)
+    previous[1:] = values[:-1]
+    previous[np.r_[True, keys[1:] != keys[:-1]]] = np.nan  # first period of every company
+    delta = values - previous
+    pct = np.divide(delta, np.abs(previous), out=np.full_like(delta, np.nan), where=previous != 0) * 100
+    for j, col in enumerate(columns):
+        frame[f"{col}_yoy"] = delta[:, j]
+        frame[f"{col}_yoy_pct"] = pct[:, j]
+    return frame
+
+
+class RollingTrends:
+    """Per-company rolling statistics over the last ``window`` periods, updated one period at a time."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, columns: Iterable[str] = TREND_COLUMNS,
+                 key: str = COMPANY_COLUMN, period: str = AS_OF_COLUMN, capacity: int = 1024):
+        if window < 2:
+            raise ValueError("window must cover at least 2 periods")
+        self.window = window
+        self.columns = list(columns)
+        self.key = key
+        self.period = period
+        self.keys: list = []
+        self._positions: dict = {}
+        k = len(self.columns)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.last_period = np.empty(capacity, dtype=object)
+        self.last = np.full((capacity, k), np.nan)
+        self.previous = np.full((capacity, k), np.nan)
+        self._buffer = np.zeros((capacity, window, k))
+        # Sums over the valid values in the window; i = 0 is the oldest period in the window
+        self._n = np.zeros((capacity, k))
+        self._sum = np.zeros((capacity, k))
+        self._sum_sq = np.zeros((capacity, k))
+        self._sum_i = np.zeros((capacity, k))
+        self._sum_ii = np.zeros((capacity, k))
+        self._sum_iy = np.zeros((capacity, k))
+
+    @classmethod
+    def from_history(cls, history: "pd.DataFrame", window: int = DEFAULT_WINDOW,
+                     columns: Iterable[str] = TREND_COLUMNS, key: str = COMPANY_COLUMN,
+                     period: str = AS_OF_COLUMN) -> "RollingTrends":
+        """Replays a long history one period at a time."""
+        trends = cls(window, columns, key, period, capacity=max(16, history[key].nunique()))
+        for _, rows in history.sort_values(period, kind="stable").groupby(period, sort=True):
+            trends.update(rows)
+        return trends
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.count)
+        if needed <= capacity:
+            return
+        new = max(needed, 2 * capacity)
+        for name in ("count", "last_period", "last", "previous", "_buffer", "_n", "_sum", "_sum_sq", "_sum_i",
+                     "_sum_ii", "_sum_iy"):
+            old = getattr(self, name)
+            grown = np.full((new,) + old.shape[1:], np.nan) if name in ("last", "previous") else \
+                np.zeros((new,) + old.shape[1:], dtype=old.dtype)
+            grown[:capacity] = old
+            setattr(self, name, grown)
+
+    def _rows(self, keys: np.ndarray) -> np.ndarray:
+        rows = np.empty(len(keys), dtype=np.intp)
+        for i, company in enumerate(keys):
+            row = self._positions.get(company)
+            if row is None:
+                row = self._positions[company] = len(self.keys)
+                self.keys.append(company)
+            rows[i] = row
+        self._grow(len(self.keys))
+        return rows
+
+    def update(self, rows: "pd.DataFrame") -> None:
+        """
+        Adds one period for the companies in ``rows`` (one row per company, with the
+        key, period and tracked columns). A company's periods must arrive in order.
+        """
+        keys = rows[self.key].to_numpy()
+        if len(np.unique(keys)) != len(keys):
+            raise ValueError("update() takes at most one row per company")
+        idx = self._rows(keys)
+        periods = rows[self.period].to_numpy()
+        seen = self.count[idx] > 0
+        if (self.last_period[idx[seen]] >= periods[seen]).any():
+            raise ValueError("periods must be added in increasing order for every company")
+
+        y = rows[self.columns].to_numpy(dtype=np.float64)
+        c = self.count[idx]
+        slot = c % self.window
+        full = (c >= self.window)[:, None]
+        evicted = np.where(full, self._buffer[idx, slot], 0.0)
+        evicted_valid = np.isfinite(evicted) & full
+        evicted = np.where(evicted_valid, evicted, 0.0)
+        valid = np.isfinite(y)
+        y_valid = np.where(valid, y, 0.0)
+
+        # Drop the evicted value (index 0, so it adds nothing to the i-weighted sums)
+        n = self._n[idx] - evicted_valid
+        total = self._sum[idx] - evicted
+        sum_sq = self._sum_sq[idx] - evicted * evicted
+        sum_i, sum_ii, sum_iy = self._sum_i[idx], self._sum_ii[idx], self._sum_iy[idx]
+        # Sliding shifts every remaining index down by one
+        sum_iy = np.where(full, sum_iy - total, sum_iy)
+        sum_ii = np.where(full, sum_ii - 2 * sum_i + n, sum_ii)
+        sum_i = np.where(full, sum_i - n, sum_i)
+        # The new period sits at the end of the window
+        i = np.where(full, self.window - 1, c[:, None]).astype(np.float64)
+        self._n[idx] = n + valid
+        self._sum[idx] = total + y_valid
+        self._sum_sq[idx] = sum_sq + y_valid * y_valid
+        self._sum_i[idx] = sum_i + valid * i
+        self._sum_ii[idx] = sum_ii + valid * i * i
+        self._sum_iy[idx] = sum_iy + i * y_valid
+        self._buffer[idx, slot] = y
+        self.previous[idx] = np.where(seen[:, None], self.last[idx], np.nan)
+        self.last[idx] = y
+        self.last_period[idx] = periods
+        self.count[idx] = c + 1
+
+    def stats(self, companies: Optional[Iterable] = None) -> "pd.DataFrame":
+        """
+        One row per company: ``periods``, ``last_period`` and, per column, ``last``,
+        ``yoy`` (change since the previous period), rolling ``mean``, ``std`` (sample)
+        and ``slope`` (least-squares change per period) over the window. Missing
+        values are skipped: a statistic is NaN only when the window holds too few
+        valid values for it (one for the mean, two for the std and slope).
+        """
+        import pandas as pd
+
+        if companies is None:
+            idx = np.arange(len(self.keys))
+            index = pd.Index(self.keys, name=self.key)
+        else:
+            companies = list(companies)
+            idx = np.array([self._positions[c] for c in companies], dtype=np.intp)
+            index = pd.Index(companies, name=self.key)
+        n = self._n[idx]
+        s, s2, siy = self._sum[idx], self._sum_sq[idx], self._sum_iy[idx]
+        mean = np.divide(s, n, out=np.full_like(s, np.nan), where=n > 0)
+        var = np.divide(s2 - s * mean, n - 1, out=np.full_like(s, np.nan), where=n > 1)
+        sx, sxx = self._sum_i[idx], self._sum_ii[idx]
+        denominator = n * sxx - sx * sx
+        slope = np.divide(n * siy - sx * s, denominator, out=np.full_like(s, np.nan), where=denominator > 0)
+
+        out = {"periods": self.count[idx], "last_period": self.last_period[idx]}
+        for j, col in enumerate(self.columns):
+            out[f"{col}_last"] = self.last[idx, j]
+            out[f"{col}_yoy"] = self.last[idx, j] - self.previous[idx, j]
+            out[f"{col}_mean"] = mean[:, j]
+            out[f"{col}_std"] = np.sqrt(np.maximum(var[:, j], 0.0))
+            out[f"{col}_slope"] = slope[:, j]
+        return pd.DataFrame(out, index=index)
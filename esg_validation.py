@@ -0,0 +1,212 @@
+"""Vectorized input validation of portfolio rows, with a compact per-row error report.
+
+The dashboard guards its inputs with widget limits and two checks on submit
+(industry selected, every question answered); portfolio files get the same
+checks, and more, here. ``validate_portfolio`` evaluates every check over a
+whole chunk in one pass. Each check is a column expression giving a bool mask,
+and the result is one ``uint64`` bitmask per row (bit ``i`` set = ``CHECKS[i]``
+failed), so a million-row chunk costs a few dozen array comparisons and 8 bytes
+per row. Only the invalid rows are decoded into the report. The answers are
+normalized to 0/1 while being checked, so the valid rows go straight to
+``score_portfolio`` without another pass.
+
+Checks (codes in the report):
+
+* ``industry_missing`` / ``industry_unknown``: blank, or not one of the config's
+  industries (the UI's "Select Industry..." placeholder counts as unknown).
+* ``answers_missing`` / ``answers_invalid``: an unanswered question, or an answer
+  that is not a recognized Yes/No spelling (``ANSWER_VALUES``).
+* ``<input>_missing``: a numeric input that is empty or not a number.
+* ``<count>_negative`` / ``<count>_fractional``: headcounts, attrition, injuries,
+  whistleblower cases and incidents must be whole numbers >= 0.
+* ``<amount>_negative``: pay, emissions, water, waste and CSR utilisation.
+* ``<pct>_out_of_range``: percentages outside 0-100.
+* ``no_employees``: zero total headcount (diversity and attrition are undefined).
+* ``male_attrition_above_headcount`` / ``female_attrition_above_headcount``.
+* ``female_pay_out_of_bounds``: average female pay above ``MAX_PAY_RATIO`` times
+  the average male pay, or positive female pay with no male pay.
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Mapping, Optional
+
+import numpy as np
+
+from esg_config import ScoringConfig
+from esg_scoring import ANSWER_VALUES, INDUSTRY_COLUMN, NUMERIC_INPUTS, QUESTION_IDS, get_config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COUNT_INPUTS = ["male_employees", "female_employees", "male_attrition", "female_attrition",
+                "workplace_injuries", "whistleblower_resolved", "regulatory_noncompliance"]
+AMOUNT_INPUTS = ["avg_male_pay", "avg_female_pay", "ghg_emissions", "water_consumption", "hazardous_waste",
+                 "csr_utilisation_pct"]
+PERCENT_INPUTS = ["women_manager_pct", "employee_turnover_pct", "renewable_pct"]
+MAX_PAY_RATIO = 2.0  # female average pay above twice the male average is treated as a unit or entry error
+
+Columns = Mapping[str, np.ndarray]
+
+
+def _checks() -> Dict[str, Callable[[Columns], np.ndarray]]:
+    """Check code -> mask of failing rows over the float64 numeric columns (NaN never fails a range check)."""
+    checks: Dict[str, Callable[[Columns], np.ndarray]] = {}
+    for col in NUMERIC_INPUTS:
+        checks[f"{col}_missing"] = lambda x, col=col: np.isnan(x[col])
+    for col in COUNT_INPUTS:
+        checks[f"{col}_negative"] = lambda x, col=col: x[col] < 0
+        checks[f"{col}_fractional"] = lambda x, col=col: np.isfinite(x[col]) & (x[col] != np.floor(x[col]))
+    for col in AMOUNT_INPUTS:
+        checks[f"{col}_negative"] = lambda x, col=col: x[col] < 0
+    for col in PERCENT_INPUTS:
+        checks[f"{col}_out_of_range"] = lambda x, col=col: (x[col] < 0) | (x[col] > 100)
+    checks["no_employees"] = lambda x: x["male_employees"] + x["female_employees"] == 0
+    checks["male_attrition_above_headcount"] = lambda x: x["male_attrition"] > x["male_employees"]
+    checks["female_attrition_above_headcount"] = lambda x: x["female_attrition"] > x["female_employees"]
+    checks["female_pay_out_of_bounds"] = lambda x: ((x["avg_female_pay"] > MAX_PAY_RATIO * x["avg_male_pay"])
+                                                    & (x["avg_female_pay"] > 0))
+    return checks
+
+
+_ROW_CHECKS = ["industry_missing", "industry_unknown", "answers_missing", "answers_invalid"]
+_COLUMN_CHECKS = _checks()
+CHECKS = _ROW_CHECKS + list(_COLUMN_CHECKS)  # bit i of a row's mask = CHECKS[i] failed (at most 64)
+
+
+def _answers(col: "pd.Series") -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """0/1 int8 answers (unanswered or unrecognized -> 0, as ``normalize_answers``), plus missing/invalid masks."""
+    import pandas as pd
+
+    missing = col.isna().to_numpy()
+    if pd.api.types.is_bool_dtype(col) or pd.api.types.is_numeric_dtype(col):
+        values = col.to_numpy(dtype=np.float64, na_value=np.nan)
+        invalid = ~missing & (values != 0) & (values != 1)
+        return np.where(values == 1, 1, 0).astype(np.int8), missing, invalid
+    # Map each distinct spelling once instead of every cell
+    codes, uniques = pd.factorize(col)
+    lookup = np.array([ANSWER_VALUES.get(str(u).strip().lower(), -1) for u in uniques] + [0], dtype=np.int8)
+    values = lookup[codes]  # the -1 NA code picks the trailing 0
+    invalid = values < 0
+    return np.maximum(values, 0), missing, invalid
+
+
+@dataclass
+class Validation:
+    """A validated chunk: ``companies`` with answers normalized to 0/1, and one failed-check bitmask per row."""
+    companies: "pd.DataFrame"
+    failed: np.ndarray  # uint64, 0 = valid
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.failed == 0
+
+    @property
+    def n_invalid(self) -> int:
+        return int(np.count_nonzero(self.failed))
+
+    def valid_companies(self) -> "pd.DataFrame":
+        """The valid rows, ready for ``score_portfolio``."""
+        return self.companies if not self.n_invalid else self.companies[self.valid]
+
+    def counts(self) -> Dict[str, int]:
+        """Rows failing each check (checks no row failed are left out)."""
+        counts = {code: int(np.count_nonzero((self.failed >> np.uint64(i)) & np.uint64(1)))
+                  for i, code in enumerate(CHECKS)}
+        return {code: n for code, n in counts.items() if n}
+
+    def report(self, key: Optional[str] = None, first_row: int = 0) -> "pd.DataFrame":
+        """
+        One row per invalid company: ``row`` (position in the file, counting from
+        ``first_row``), the ``key`` column if given, and ``errors`` (the failed
+        check codes, ``;``-separated).
+        """
+        import pandas as pd
+
+        rows = np.flatnonzero(self.failed)
+        failed = self.failed[rows]
+        errors = [[] for _ in range(len(rows))]
+        for i, code in enumerate(CHECKS):
+            for j in np.flatnonzero((failed >> np.uint64(i)) & np.uint64(1)):
+                errors[j].append(code)
+        report = pd.DataFrame({"row": rows + first_row})
+        if key is not None:
+            report[key] = self.companies[key].to_numpy()[rows]
+        report["errors"] = [";".join(codes) for codes in errors]
+        return report
+
+
+def validate_portfolio(companies: "pd.DataFrame", config: Optional[ScoringConfig] = None) -> Validation:
+    """
+    Runs every check over every row of ``companies`` (``industry``, the 35 answer
+    columns and the 16 ``NUMERIC_INPUTS``) in one vectorized pass. Numeric inputs
+    that are not numbers (e.g. text in a CSV column) fail their ``_missing`` check.
+    """
+    import pandas as pd
+
+    config = config or get_config()
+    missing = [c for c in [INDUSTRY_COLUMN] + QUESTION_IDS + NUMERIC_INPUTS if c not in companies.columns]
+    if missing:
+        raise ValueError(f"Portfolio file is missing required columns: {', '.join(missing)}")
+    n = len(companies)
+    failed = np.zeros(n, dtype=np.uint64)
+
+    def flag(code: str, mask: np.ndarray) -> None:
+        failed[mask] |= np.uint64(1 << CHECKS.index(code))
+
+    industry = companies[INDUSTRY_COLUMN].astype("string").str.strip()
+    blank = industry.isna().to_numpy() | (industry == "").fillna(False).to_numpy()
+    flag("industry_missing", blank)
+    flag("industry_unknown", ~blank & ~industry.isin(config.industry_options[1:]).fillna(False).to_numpy())
+
+    normalized = {}
+    answers_missing = np.zeros(n, dtype=bool)
+    answers_invalid = np.zeros(n, dtype=bool)
+    for qid in QUESTION_IDS:
+        normalized[qid], absent, invalid = _answers(companies[qid])
+        answers_missing |= absent
+        answers_invalid |= invalid
+    flag("answers_missing", answers_missing)
+    flag("answers_invalid", answers_invalid)
+
+    x = {}
+    for col in NUMERIC_INPUTS:
+        values = companies[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = normalized[col] = pd.to_numeric(values, errors="coerce")
+        x[col] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid="ignore"):
+        for code, check in _COLUMN_CHECKS.items():
+            flag(code, check(x))
+
+    companies = companies.assign(**normalized)
+    return Validation(companies, failed)
+
+
+def validate_chunks(chunks: Iterator["pd.DataFrame"],
+                    config: Optional[ScoringConfig] = None) -> Iterator[Validation]:
+    """``validate_portfolio`` of each chunk, all against the same config."""
+    config = config or get_config()
+    for chunk in chunks:
+        yield validate_portfolio(chunk, config)
+
+
+def validate_file(src: str, dst: str, chunksize: Optional[int] = None,
+                  key: Optional[str] = None) -> tuple[int, Dict[str, int]]:
+    """
+    Validates a portfolio file (CSV or Parquet) chunk by chunk and writes the
+    per-row error report to ``dst``. Returns the number of rows read and the rows
+    failing each check.
+    """
+    from esg_batch import DEFAULT_CHUNKSIZE, read_portfolio_chunks, write_chunks
+
+    reports = []
+    counts: Dict[str, int] = {}
+    rows = 0
+    for checked in validate_chunks(read_portfolio_chunks(src, chunksize or DEFAULT_CHUNKSIZE)):
+        if checked.n_invalid:
+            reports.append(checked.report(key, rows))
+            for code, n in checked.counts().items():
+                counts[code] = counts.get(code, 0) + n
+        rows += len(checked.failed)
+    columns = ["row"] + ([key] if key else []) + ["errors"]
+    write_chunks(iter(reports), dst, columns)
+    return rows, counts
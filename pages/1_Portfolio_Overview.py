@@ -0,0 +1,163 @@
+"""Portfolio overview: every scored obligor, paged, sorted and filtered on the server.
+
+The portfolio (the latest results-store snapshot per company, or one archive run)
+is loaded once per data version into a shared ``PortfolioView``. Each rerun sends
+the browser one table page and a few dozen pre-aggregated bars, never the whole
+book. Per-industry distributions are served from quantile sketches: the one saved
+next to an archive run, or one built from the loaded view. Selecting a row and
+opening it loads that company's stored inputs into the single-company dashboard,
+which scores them on arrival.
+"""
+import os
+from typing import Optional
+
+import plotly.express as px
+import streamlit as st
+
+from esg_overview import DEFAULT_PAGE_SIZE, OverviewFilter, PortfolioView, dashboard_inputs
+from esg_scoring import INDUSTRY_COLUMN
+from esg_sketches import ALL_INDUSTRIES, PortfolioSketch
+from esg_store import ResultStore
+
+st.set_page_config(page_title="Portfolio Overview", page_icon="📂", layout="wide")
+
+ARCHIVE_DIR = os.environ.get("ESG_ARCHIVE", "runs")
+STORE_SOURCE = "Results store (latest per company)"
+DISTRIBUTION_LABELS = {"risk_score": "ESG risk score", "ghg_emissions": "GHG emissions (tCO₂e)",
+                       "water_consumption": "Water consumption (KL)", "hazardous_waste": "Hazardous waste (t)",
+                       "pay_gap": "Gender pay gap"}
+
+
+@st.cache_resource
+def get_store() -> Optional[ResultStore]:
+    """A read-only handle on the results store; None when ESG_STORE=off."""
+    return ResultStore.from_env()
+
+
+@st.cache_resource(max_entries=2)
+def load_store_view(_store: ResultStore, version: int) -> PortfolioView:
+    """The store's portfolio, rebuilt only when ``version`` (the snapshot count) changes."""
+    return PortfolioView.from_store(_store)
+
+
+@st.cache_resource(max_entries=2)
+def load_archive_view(path: str, modified: float) -> PortfolioView:
+    return PortfolioView.from_archive(path)
+
+
+@st.cache_resource(max_entries=4)
+def load_run_sketch(path: str, modified: float) -> PortfolioSketch:
+    """The distribution sketch saved next to an archive run (it also covers the raw inputs)."""
+    return PortfolioSketch.load(path)
+
+
+def archive_runs() -> list[dict]:
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    from esg_archive import list_runs
+    return list_runs(ARCHIVE_DIR)
+
+
+st.title("📂 Portfolio Overview")
+
+# --- Data source ---
+store = get_store()
+runs = archive_runs()
+sources = ([STORE_SOURCE] if store is not None else []) + [f"Archive run {run['as_of']}" for run in reversed(runs)]
+if not sources:
+    st.info("No scored portfolio yet: submit scorecards on the dashboard or archive a run "
+            f"(`esg_cli.py archive`) into `{ARCHIVE_DIR}/`.")
+    st.stop()
+source = st.sidebar.selectbox("Portfolio", sources)
+run_sketch = None
+if source == STORE_SOURCE:
+    view = load_store_view(store, store.count())
+else:
+    from esg_archive import sketch_path
+
+    run = next(r for r in runs if f"Archive run {r['as_of']}" == source)
+    view = load_archive_view(run["path"], os.path.getmtime(run["path"]))
+    if os.path.exists(sketch_path(run["path"])):
+        run_sketch = load_run_sketch(sketch_path(run["path"]), os.path.getmtime(sketch_path(run["path"])))
+if not len(view):
+    st.info("The selected portfolio is empty.")
+    st.stop()
+
+# --- Filters ---
+st.sidebar.header("Filters")
+search = st.sidebar.text_input(f"Search {view.key}")
+industries = st.sidebar.multiselect("Industry", view.industries)
+grades = st.sidebar.multiselect("Grade", view.grades)
+risk_range = st.sidebar.slider("Risk score", 0.0, 100.0, (0.0, 100.0), step=0.5)
+flt = OverviewFilter(tuple(industries), tuple(grades), None if risk_range == (0.0, 100.0) else risk_range, search)
+keep = view.mask(flt)
+
+summary = view.summary(keep)
+kpi1, kpi2, kpi3 = st.columns(3)
+kpi1.metric("Obligors", f"{summary['obligors']:,}", f"of {len(view):,}", delta_color="off")
+kpi2.metric("Mean risk score", f"{summary['mean_risk_score']:.1f}" if summary["obligors"] else "–")
+kpi3.metric("Median risk score", f"{summary['median_risk_score']:.1f}" if summary["obligors"] else "–")
+
+# --- Charts (aggregated on the server) ---
+chart1, chart2 = st.columns(2)
+with chart1:
+    histogram = view.risk_histogram(keep)
+    fig = px.bar(histogram, x="risk_score", y="obligors", title="Risk score distribution",
+                 hover_data={"risk_from": ":.1f", "risk_to": ":.1f", "risk_score": False})
+    fig.update_traces(width=100 / len(histogram))
+    st.plotly_chart(fig, use_container_width=True)
+with chart2:
+    st.plotly_chart(px.bar(view.grade_counts(keep), x="grade", y="obligors", color="grade",
+                           title="Obligors by grade"), use_container_width=True)
+heatmap = view.industry_grade_counts(keep)
+heatmap = heatmap[heatmap.sum(axis=1) > 0]
+if not heatmap.empty:
+    st.plotly_chart(px.imshow(heatmap, text_auto=True, aspect="auto", color_continuous_scale="Blues",
+                              title="Obligors by industry and grade"), use_container_width=True)
+
+# --- Distributions by industry (quantile sketches; constant memory whatever the book size) ---
+st.subheader("Distributions by industry")
+sketch = run_sketch or view.sketch()
+col_measure, col_industry = st.columns(2)
+measure = col_measure.selectbox("Measure", sketch.columns, format_func=lambda c: DISTRIBUTION_LABELS.get(c, c))
+industry = col_industry.selectbox("Industry", sketch.industries, index=0)
+histogram = sketch.histogram(measure, industry, value_range=(0.0, 100.0) if measure == "risk_score" else None)
+if not histogram.empty:
+    fig = px.bar(histogram, x="mid", y="count", labels={"mid": DISTRIBUTION_LABELS.get(measure, measure),
+                                                        "count": "obligors"},
+                 title=f"{DISTRIBUTION_LABELS.get(measure, measure)}: "
+                       f"{'all industries' if industry == ALL_INDUSTRIES else industry}",
+                 hover_data={"from": ":.4g", "to": ":.4g", "mid": False})
+    fig.update_traces(width=float(histogram["to"].iloc[0] - histogram["from"].iloc[0]))
+    st.plotly_chart(fig, use_container_width=True)
+st.dataframe(sketch.quantiles(measure), use_container_width=True)
+st.caption("Percentiles and bin counts are estimated from streaming quantile sketches (rank error up to about 1% "
+           "of the obligors) and cover the whole portfolio, not the filters above.")
+
+# --- Table (one page at a time) ---
+st.subheader("Obligors")
+sort_columns = [view.key, INDUSTRY_COLUMN] + [c for c in view.frame.columns if c not in (view.key, INDUSTRY_COLUMN)]
+col_sort, col_dir, col_size, col_page = st.columns([2, 1, 1, 1])
+sort_by = col_sort.selectbox("Sort by", sort_columns, index=sort_columns.index("risk_score"))
+ascending = col_dir.radio("Order", ["Descending", "Ascending"], horizontal=True) == "Ascending"
+page_size = col_size.selectbox("Rows per page", [25, DEFAULT_PAGE_SIZE, 100, 250], index=1)
+pages = max(1, -(-summary["obligors"] // page_size))
+page = col_page.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1)
+rows, total = view.page(flt, sort_by, ascending, int(page), page_size)
+st.caption(f"Rows {(page - 1) * page_size + 1 if total else 0:,}-{(page - 1) * page_size + len(rows):,} "
+           f"of {total:,}")
+selection = st.dataframe(rows, hide_index=True, use_container_width=True, on_select="rerun", selection_mode="single-row")
+
+# --- Drill-down into the single-company dashboard ---
+selected = selection.selection.rows
+if selected:
+    company = rows.iloc[selected[0]][view.key]
+    if store is None:
+        st.info("Opening an obligor needs the results store (ESG_STORE is off).")
+    elif st.button(f"🔎 Open {company} in the dashboard"):
+        inputs = dashboard_inputs(store, str(company))
+        if inputs is None:
+            st.warning(f"The results store holds no inputs for {company}; only scored outputs are archived.")
+        else:
+            st.session_state["prefill_company"] = inputs
+            st.switch_page("ESG_.py")
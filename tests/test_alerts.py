@@ -0,0 +1,83 @@
+"""Alert rules: message validation, vectorized evaluation and the rule-to-obligor index."""
+import copy
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_alerts import AlertIndex, alert_masks, alert_messages
+from esg_config import ConfigError, parse_config
+from esg_scoring import CONFIG_PATH, LADDER_VALUES, METRIC_COLUMNS, NUMERIC_INPUTS, QUESTION_IDS, get_config
+
+with open(CONFIG_PATH, encoding="utf-8") as handle:
+    DOCUMENT = json.load(handle)
+
+BASE = {"industry": "Technology", **{qid: 1 for qid in QUESTION_IDS},
+        **dict(zip(NUMERIC_INPUTS, [500, 200, 1_500_000.0, 50, 25, 1_300_000.0, 25.0, 15.0, 300.0, 15_000.0,
+                                    15.0, 30.0, 1, 105.0, 5, 0]))}
+
+
+def _parse(message: str):
+    data = copy.deepcopy(DOCUMENT)
+    data["alert_rules"][0]["message"] = message
+    return parse_config(data, "test", METRIC_COLUMNS, LADDER_VALUES)
+
+
+@pytest.mark.parametrize("message", ["GHG {val} too high", "{} too high", "{value[0]}", "{value.real}",
+                                     "{threshold:d}", "{value:%Y}", "unclosed {value"])
+def test_unformattable_messages_are_rejected(message):
+    with pytest.raises(ConfigError, match=r"alert_rules\[1\]\.message"):
+        _parse(message)
+
+
+@pytest.mark.parametrize("message", ["plain", "gap {value:.1%} above {threshold:.0%}", "{{literal}} {value}"])
+def test_messages_using_threshold_and_value_are_accepted(message):
+    assert _parse(message).alert_rules[0][4] == message
+
+
+def test_alert_messages_format_the_triggered_rules():
+    company = {**BASE, "ghg_emissions": 900.0, "workplace_injuries": 5}
+    assert alert_messages(company) == [
+        "Severe **Carbon Emissions** Risk (GHG exceeds 500 Tonnes CO₂e)",
+        "High **Operational Safety** Risk (Multiple workplace injuries recorded)",
+    ]
+    assert alert_messages(BASE) == []
+
+
+def test_masks_use_each_industry_threshold():
+    # A 0.21 pay gap breaches Technology's medium threshold (0.20) but not Financial Services' (0.22)
+    frame = pd.DataFrame([{**BASE, "avg_female_pay": 1_185_000.0},
+                          {**BASE, "industry": "Financial Services", "avg_female_pay": 1_185_000.0}])
+    rule = [r[0] for r in get_config().alert_rules].index("pay_equity")
+    assert alert_masks(frame)[:, rule].tolist() == [True, False]
+
+
+def test_alert_index_tracks_entries_and_clears():
+    frame = pd.DataFrame([{**BASE, "id": f"c{i}", "ghg_emissions": 100.0 * i} for i in range(10)])
+    index = AlertIndex.from_portfolio(frame, key="id")
+    assert len(index) == 10
+    assert index.obligors("carbon").tolist() == ["c6", "c7", "c8", "c9"]
+
+    changes = index.update(pd.DataFrame([{**BASE, "id": "c7", "ghg_emissions": 10.0},
+                                         {**BASE, "id": "c2", "ghg_emissions": 800.0},
+                                         {**BASE, "id": "new", "ghg_emissions": 501.0}]))
+    entered, cleared = changes["carbon"]
+    assert sorted(entered) == ["c2", "new"] and list(cleared) == ["c7"]
+    assert set(changes) == {"carbon"}
+    assert index.obligors("carbon").tolist() == ["c2", "c6", "c8", "c9", "new"]
+    assert index.rules_for("c2") == ["carbon"] and index.rules_for("missing") == []
+
+    index.remove(["c6", "missing"])
+    assert index.counts()["carbon"] == 4 and len(index) == 10
+    frame_view = index.to_frame()
+    assert "c6" not in frame_view.index and frame_view.loc["new", "carbon"]
+    # The index always agrees with a full re-evaluation of the remaining obligors
+    assert np.array_equal(frame_view.loc[["c0", "c9"]].to_numpy(),
+                          alert_masks(frame.set_index("id").loc[["c0", "c9"]]))
+
+
+def test_alert_index_rejects_duplicate_keys():
+    index = AlertIndex(key="id")
+    with pytest.raises(ValueError):
+        index.update(pd.DataFrame([{**BASE, "id": "a"}, {**BASE, "id": "a"}]))
@@ -0,0 +1,57 @@
+"""Bit-packed answers: packing, popcount sums, serialization and scoring from the packed form."""
+import pickle
+
+import numpy as np
+import pytest
+
+from esg_answers import CATEGORY_KEYS, N_QUESTIONS, SECTION_KEYS, SEGMENTS, AnswerMatrix, score_packed
+from esg_bench import synthetic_columns
+from esg_scoring import NUMERIC_INPUTS, QUESTION_IDS, score_columns
+
+
+@pytest.fixture(scope="module")
+def columns():
+    return synthetic_columns(1_000, seed=3)
+
+
+def test_packing_round_trips_every_answer(columns):
+    answers = AnswerMatrix.from_columns(columns)
+    bits = np.column_stack([columns[qid] for qid in QUESTION_IDS])
+    assert answers.packed.shape == (1_000, 5)
+    np.testing.assert_array_equal(answers.bits(), bits)
+    np.testing.assert_array_equal(AnswerMatrix.from_bits(bits).packed, answers.packed)
+    np.testing.assert_array_equal(AnswerMatrix.from_lists(bits.tolist()).packed, answers.packed)
+    for qid in (QUESTION_IDS[0], QUESTION_IDS[17], QUESTION_IDS[-1]):
+        np.testing.assert_array_equal(answers.column(qid), columns[qid])
+
+
+def test_segment_sums_match_column_sums(columns):
+    answers = AnswerMatrix.from_columns(columns)
+    bits = answers.bits().astype(np.int64)
+    for key in CATEGORY_KEYS + SECTION_KEYS:
+        np.testing.assert_array_equal(answers.segment_sum(key), bits[:, SEGMENTS[key]].sum(axis=1), err_msg=key)
+    assert sum(SEGMENTS[key].stop - SEGMENTS[key].start for key in CATEGORY_KEYS) == N_QUESTIONS
+
+
+def test_serialization_round_trips(columns):
+    answers = AnswerMatrix.from_columns(columns)
+    restored = AnswerMatrix.from_bytes(answers.to_bytes())
+    np.testing.assert_array_equal(restored.packed, answers.packed)
+    np.testing.assert_array_equal(pickle.loads(pickle.dumps(answers)).bits(), answers.bits())
+    assert len(answers.to_bytes()) == 16 + 1_000 * 5
+
+
+def test_bad_input_is_rejected():
+    with pytest.raises(ValueError, match="expected an"):
+        AnswerMatrix.from_bits(np.zeros((3, N_QUESTIONS - 1)))
+    with pytest.raises(ValueError, match="not a serialized AnswerMatrix"):
+        AnswerMatrix.from_bytes(b"XXXX" + bytes(12))
+
+
+def test_score_packed_matches_score_columns(columns):
+    answers = AnswerMatrix.from_columns(columns)
+    numeric = {col: columns[col] for col in NUMERIC_INPUTS}
+    packed = score_packed(answers, numeric, columns["codes"])
+    expected = score_columns(columns, columns["codes"])
+    for key, values in expected.items():
+        np.testing.assert_array_equal(packed[key], values, err_msg=key)
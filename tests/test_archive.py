@@ -0,0 +1,83 @@
+"""Snapshot archive: writing runs, reading them back and summarizing across runs."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from esg_archive import (  # noqa: E402
+    ARCHIVE_COLUMNS, RunWriter, archive_file, list_runs, load_runs, open_run, run_summary, sketch_path, write_run,
+)
+from esg_bench import as_frame, synthetic_columns  # noqa: E402
+from esg_scoring import METRIC_COLUMNS, get_config, score_portfolio  # noqa: E402
+
+
+def _scored(n: int, seed: int) -> pd.DataFrame:
+    companies = as_frame(synthetic_columns(n, seed))
+    scored = pd.concat([companies, score_portfolio(companies)], axis=1)
+    scored["obligor_id"] = [f"o{i}" for i in range(n)]
+    return scored
+
+
+def test_run_round_trips_every_archived_column(tmp_path):
+    scored = _scored(500, seed=1)
+    path = write_run(scored, str(tmp_path), "2024-12-31")
+    table = open_run(path)
+    assert table.column_names == ["obligor_id"] + ARCHIVE_COLUMNS
+    frame = table.to_pandas()
+    assert frame["obligor_id"].tolist() == scored["obligor_id"].tolist()
+    assert frame["industry"].tolist() == scored["industry"].tolist()
+    for col in METRIC_COLUMNS + ["score", "risk_score"]:
+        np.testing.assert_array_equal(frame[col].to_numpy(np.float64), scored[col].to_numpy(np.float64), err_msg=col)
+    assert frame["grade"].astype(str).tolist() == scored["grade"].tolist()
+    assert open_run(path, ["risk_score"]).column_names == ["risk_score"]
+
+
+def test_chunked_writes_and_metadata(tmp_path):
+    with RunWriter(str(tmp_path), "2024-06-30", config_version="v-test") as writer:
+        writer.write(_scored(100, seed=2))
+        writer.write(_scored(50, seed=3))
+    (run,) = list_runs(str(tmp_path))
+    assert (run["as_of"], run["rows"], run["config_version"]) == ("2024-06-30", 150, "v-test")
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_failed_write_leaves_no_run(tmp_path):
+    with pytest.raises(KeyError):
+        with RunWriter(str(tmp_path), "2024-06-30") as writer:
+            writer.write(_scored(10, seed=4))
+            writer.write(_scored(10, seed=5).drop(columns=["risk_score"]))
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(ValueError, match="no rows"):
+        RunWriter(str(tmp_path), "2024-06-30").close()
+
+
+def test_load_runs_and_summary_across_dates(tmp_path):
+    for seed, as_of in enumerate(["2023-12-31", "2024-06-30", "2024-12-31"]):
+        write_run(_scored(200, seed), str(tmp_path), as_of)
+    assert [run["as_of"] for run in list_runs(str(tmp_path), start="2024-01-01")] == ["2024-06-30", "2024-12-31"]
+    long = load_runs(str(tmp_path), ["obligor_id", "risk_score"], end="2024-06-30")
+    assert list(long.columns) == ["as_of", "obligor_id", "risk_score"]
+    assert long["as_of"].value_counts().to_dict() == {"2023-12-31": 200, "2024-06-30": 200}
+
+    summary = run_summary(str(tmp_path))
+    assert summary["obligors"].tolist() == [200, 200, 200]
+    shares = summary[[f"share_{grade}" for grade in get_config().grades]]
+    np.testing.assert_allclose(shares.sum(axis=1), 1.0)
+    expected = _scored(200, seed=2)["risk_score"].mean()
+    assert summary.loc[2, "mean_risk_score"] == pytest.approx(expected)
+    by_industry = run_summary(str(tmp_path), by="industry")
+    assert by_industry.groupby("as_of")["obligors"].sum().tolist() == [200, 200, 200]
+
+
+def test_archive_file_scores_into_a_run_and_saves_sketches(tmp_path):
+    src = tmp_path / "portfolio.csv"
+    companies = as_frame(synthetic_columns(300, seed=9))
+    companies["obligor_id"] = [f"o{i}" for i in range(300)]
+    companies.to_csv(src, index=False)
+    path = archive_file(str(src), str(tmp_path / "runs"), "2024-12-31", chunksize=128)
+    frame = open_run(path).to_pandas()
+    np.testing.assert_allclose(frame["risk_score"], score_portfolio(companies)["risk_score"])
+    assert os.path.exists(sketch_path(path))
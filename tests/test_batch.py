@@ -0,0 +1,80 @@
+"""Chunked file scoring: round trips, Parquet schemas across chunks and empty inputs."""
+import numpy as np
+import pandas as pd
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from esg_batch import normalize_answers, score_file, write_chunks  # noqa: E402
+from esg_scoring import NUMERIC_INPUTS, QUESTION_IDS, score_portfolio  # noqa: E402
+
+BASE = {"industry": "Technology", **{qid: "Yes" for qid in QUESTION_IDS},
+        **dict(zip(NUMERIC_INPUTS, [500, 200, 1_500_000.0, 50, 25, 1_300_000.0, 25.0, 15.0, 300.0, 15_000.0,
+                                    15.0, 30.0, 1, 105.0, 5, 0]))}
+
+
+def _portfolio(n: int) -> pd.DataFrame:
+    frame = pd.DataFrame([BASE] * n, columns=list(BASE))
+    frame["obligor_id"] = [f"o{i}" for i in range(n)]
+    frame["ghg_emissions"] = np.linspace(0.0, 2_000.0, n)
+    return frame
+
+
+def _types(schema) -> dict:
+    """Arrow type per column, with string and large_string both as ``string``."""
+    return {f.name: "string" if "string" in str(f.type) else str(f.type) for f in schema}
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_score_file_matches_score_portfolio(tmp_path, suffix):
+    src, dst = tmp_path / f"in{suffix}", tmp_path / f"out{suffix}"
+    portfolio = _portfolio(25)
+    portfolio.to_csv(src, index=False) if suffix == ".csv" else portfolio.to_parquet(src, index=False)
+    assert score_file(str(src), str(dst), chunksize=7) == 25
+    out = pd.read_csv(dst) if suffix == ".csv" else pd.read_parquet(dst)
+    expected = score_portfolio(normalize_answers(portfolio))
+    np.testing.assert_allclose(out["risk_score"], expected["risk_score"])
+    assert out["grade"].tolist() == expected["grade"].tolist()
+
+
+def test_parquet_columns_empty_in_the_first_chunks_take_a_later_type(tmp_path):
+    dst = tmp_path / "out.parquet"
+    chunks = [
+        pd.DataFrame({"count": [1, 2], "note": [None, None], "value": [np.nan, np.nan]}),
+        pd.DataFrame({"count": [3, 4], "note": [None, None], "value": [np.nan, np.nan]}),
+        pd.DataFrame({"count": [5.5, 6.0], "note": ["late", None], "value": ["a", "b"]}),
+        pd.DataFrame({"count": [7, 8], "note": [None, None], "value": [np.nan, np.nan]}),
+    ]
+    assert write_chunks(iter(chunks), str(dst)) == 8
+    schema = pq.read_schema(dst)
+    assert _types(schema) == {"count": "double", "note": "string", "value": "string"}
+    out = pd.read_parquet(dst)
+    assert out["count"].tolist() == [1, 2, 3, 4, 5.5, 6, 7, 8]
+    assert out["note"].tolist()[4] == "late" and out["value"].isna().sum() == 6
+
+
+def test_parquet_columns_that_stay_empty_keep_the_first_chunks_type(tmp_path):
+    dst = tmp_path / "out.parquet"
+    chunks = [pd.DataFrame({"value": [np.nan], "note": [None]}), pd.DataFrame({"value": [np.nan], "note": [None]})]
+    write_chunks(iter(chunks), str(dst))
+    assert _types(pq.read_schema(dst)) == {"value": "double", "note": "string"}
+
+
+def test_parquet_type_conflicts_after_the_schema_is_fixed_are_reported(tmp_path):
+    chunks = [pd.DataFrame({"value": [1.5]}), pd.DataFrame({"value": ["text"]})]
+    with pytest.raises(ValueError, match="'value' holds .*string"):
+        write_chunks(iter(chunks), str(tmp_path / "out.parquet"))
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_empty_input_writes_the_expected_columns(tmp_path, suffix):
+    src, dst = tmp_path / "in.parquet", tmp_path / f"out{suffix}"
+    _portfolio(0).to_parquet(src, index=False)
+    assert score_file(str(src), str(dst)) == 0
+    out = pd.read_csv(dst) if suffix == ".csv" else pd.read_parquet(dst)
+    assert len(out) == 0
+    assert {"obligor_id", "risk_score", "grade"} <= set(out.columns)
+
+    assert score_file(str(src), str(dst), columns=["obligor_id", "risk_score"]) == 0
+    out = pd.read_csv(dst) if suffix == ".csv" else pd.read_parquet(dst)
+    assert list(out.columns) == ["obligor_id", "risk_score"]
@@ -0,0 +1,61 @@
+"""Company fingerprints and the two-tier result cache."""
+import os
+
+import pytest
+
+from esg_cache import ResultCache, company_fingerprint
+from esg_scoring import NUMERIC_INPUTS, QUESTION_IDS
+
+BASE = {"industry": "Technology", **{qid: "Yes" for qid in QUESTION_IDS},
+        **dict(zip(NUMERIC_INPUTS, [500, 200, 1_500_000.0, 50, 25, 1_300_000.0, 25.0, 15.0, 300.0, 15_000.0,
+                                    15.0, 30.0, 1, 105.0, 5, 0]))}
+
+
+def test_fingerprint_depends_only_on_the_scoring_inputs():
+    key = company_fingerprint(BASE, "v1")
+    # Same answers and numbers in another spelling, plus a non-input key
+    same = {**BASE, **{qid: 1 for qid in QUESTION_IDS}, "male_employees": 500.0, "company": "Acme"}
+    assert company_fingerprint(same, "v1") == key
+    assert company_fingerprint({**BASE, "E.1.1": "No"}, "v1") != key
+    assert company_fingerprint({**BASE, "ghg_emissions": 300.0000001}, "v1") != key
+    assert company_fingerprint({**BASE, "industry": "Retail"}, "v1") != key
+    assert company_fingerprint(BASE, "v2") != key
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a is now the most recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats == {"memory_hits": 3, "disk_hits": 0, "misses": 1}
+
+
+def test_disk_tier_survives_a_new_process(tmp_path):
+    ResultCache(directory=str(tmp_path)).put("key", {"score": 0.5})
+    fresh = ResultCache(directory=str(tmp_path))
+    assert fresh.get("key") == {"score": 0.5}
+    assert fresh.get("key") == {"score": 0.5}
+    assert fresh.stats["disk_hits"] == 1 and fresh.stats["memory_hits"] == 1
+
+
+def test_disk_tier_evicts_down_to_its_budget(tmp_path):
+    cache = ResultCache(max_entries=1, directory=str(tmp_path), max_bytes=10_000)
+    for i in range(20):
+        cache.put(f"k{i}", b"x" * 1_000)
+        os.utime(tmp_path / f"k{i}.pkl", (i, i))  # distinct LRU clock per entry
+    sizes = [entry.stat().st_size for entry in os.scandir(tmp_path)]
+    assert sum(sizes) <= 10_000
+    assert cache.get("k19") == b"x" * 1_000
+    assert cache.get("k0") is None
+
+
+@pytest.mark.parametrize("content", [b"", b"not a pickle"])
+def test_unreadable_disk_entries_are_misses(tmp_path, content):
+    (tmp_path / "bad.pkl").write_bytes(content)
+    cache = ResultCache(directory=str(tmp_path))
+    assert cache.get("bad") is None
+    cache.clear()
+    assert list(os.scandir(tmp_path)) == []
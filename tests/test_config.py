@@ -0,0 +1,98 @@
+"""Scoring config validation and ConfigStore hot reload."""
+import copy
+import json
+import os
+
+import pytest
+
+from esg_config import MAX_QUESTIONS, ConfigError, ConfigStore, parse_config
+from esg_scoring import CONFIG_PATH, LADDER_VALUES, METRIC_COLUMNS, _same_layout
+
+with open(CONFIG_PATH, encoding="utf-8") as handle:
+    DOCUMENT = json.load(handle)
+
+
+def _write(path, data, text: str = None) -> None:
+    """Writes the document and moves the mtime forward, so the change is seen even within one clock tick."""
+    previous = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(text if text is not None else json.dumps(data))
+    os.utime(path, ns=(previous + 10**9, previous + 10**9))
+
+
+def _with(**changes) -> dict:
+    data = copy.deepcopy(DOCUMENT)
+    data.update(changes)
+    return data
+
+
+@pytest.fixture()
+def store(tmp_path):
+    path = str(tmp_path / "esg_config.json")
+    _write(path, DOCUMENT)
+    return ConfigStore(path, METRIC_COLUMNS, LADDER_VALUES, check=_same_layout)
+
+
+def test_edit_is_picked_up_once(store):
+    first = store.get()
+    assert store.get() is first  # unchanged file: no re-parse
+    _write(store.path, _with(performance_weight=4))
+    second = store.get()
+    assert second.performance_weight == 4 and second.version != first.version
+    assert store.reloads == 1 and store.last_error is None
+    assert store.get() is second
+
+
+@pytest.mark.parametrize("text", ["{ not json", json.dumps(_with(performance_weight=-1))])
+def test_broken_edit_keeps_the_last_good_config(store, text):
+    good = store.get()
+    _write(store.path, None, text)
+    assert store.get() is good
+    assert store.last_error
+    _write(store.path, _with(performance_weight=2))
+    assert store.get().performance_weight == 2 and store.last_error is None
+
+
+def test_broken_yaml_keeps_the_last_good_config(tmp_path):
+    yaml = pytest.importorskip("yaml")
+    path = str(tmp_path / "esg_config.yaml")
+    _write(path, None, yaml.safe_dump(DOCUMENT, allow_unicode=True, sort_keys=False))
+    store = ConfigStore(path, METRIC_COLUMNS, LADDER_VALUES)
+    good = store.get()
+    _write(path, None, "industry_options: [unclosed\n  - : :")
+    assert store.get() is good
+    assert "invalid YAML" in store.last_error
+
+
+def test_layout_change_is_rejected_on_reload(store):
+    good = store.get()
+    data = copy.deepcopy(DOCUMENT)
+    data["detailed_questions"]["E"]["sections"][0][1].append("An extra question?")
+    _write(store.path, data)
+    assert store.get() is good
+    assert "restart" in store.last_error
+
+
+def test_first_load_errors_are_raised(tmp_path):
+    path = str(tmp_path / "broken.json")
+    _write(path, None, "[")
+    with pytest.raises(ConfigError, match="invalid JSON"):
+        ConfigStore(path, METRIC_COLUMNS, LADDER_VALUES).get()
+
+
+def test_more_questions_than_a_packed_word_holds_are_rejected():
+    data = copy.deepcopy(DOCUMENT)
+    total = sum(len(questions) for category in data["detailed_questions"].values()
+                for _, questions in category["sections"])
+    data["detailed_questions"]["G"]["sections"].append(
+        ["Extra", [f"Question {i}?" for i in range(MAX_QUESTIONS - total + 1)]])
+    with pytest.raises(ConfigError, match=f"{MAX_QUESTIONS + 1} questions"):
+        parse_config(data, "test", METRIC_COLUMNS, LADDER_VALUES)
+    data["detailed_questions"]["G"]["sections"][-1][1].pop()
+    assert parse_config(data, "test", METRIC_COLUMNS, LADDER_VALUES).total_disclosure_questions == MAX_QUESTIONS
+
+
+def test_every_problem_is_reported_at_once():
+    with pytest.raises(ConfigError) as error:
+        parse_config(_with(disclosure_weight=0, grade_bands=[]), "test", METRIC_COLUMNS, LADDER_VALUES)
+    assert len(error.value.problems) == 2
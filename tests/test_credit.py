@@ -0,0 +1,83 @@
+"""ESG credit overlay: obligor factors, adjusted PD/LGD/expected loss and IRB capital."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_credit import UNSCORED, ObligorOverlay, OverlaySpec, irb_capital, norm_cdf, norm_ppf, sector_summary
+from esg_scoring import METRIC_COLUMNS
+
+OBLIGORS = pd.DataFrame({
+    "obligor_id": ["o1", "o2"],
+    "industry": ["Energy", "Technology"],
+    "grade": ["C", "A+"],
+    **{col: [0.0, 1.0] for col in METRIC_COLUMNS},
+})
+FACILITIES = pd.DataFrame({
+    "obligor_id": ["o1", "o2", "unknown"],
+    "ead": [1_000_000.0, 2_000_000.0, 500_000.0],
+    "pd": [0.02, 0.01, 0.05],
+    "lgd": [0.45, 0.40, 0.50],
+})
+
+
+def test_normal_approximations():
+    x = np.array([-3.0, -1.0, 0.0, 1.96])
+    np.testing.assert_allclose(norm_cdf(x), [0.0013498980, 0.1586552539, 0.5, 0.9750021049], rtol=1e-6)
+    p = np.array([1e-6, 0.001, 0.3, 0.5, 0.999])
+    np.testing.assert_allclose(norm_cdf(norm_ppf(p)), p, rtol=1e-6)
+
+
+def test_irb_capital_matches_the_basel_formula():
+    # Basel corporate risk-weight function for PD 1%, LGD 45%, M 2.5: risk weight 92.32%
+    k = irb_capital(np.array([0.01]), np.array([0.45]), np.array([2.5]))
+    assert k[0] * 12.5 == pytest.approx(0.9232, abs=5e-4)
+    # Capital rises with maturity; defaulted facilities carry none
+    longer = irb_capital(np.array([0.01]), np.array([0.45]), np.array([5.0]))
+    assert longer[0] > k[0]
+    assert irb_capital(np.array([1.0]), np.array([0.45]), np.array([2.5]))[0] == 0.0
+
+
+def test_overlay_applies_grade_multipliers_and_sensitivities():
+    spec = OverlaySpec()
+    out = ObligorOverlay(OBLIGORS, spec).apply(FACILITIES)
+    # o1: grade C with every metric score 0 gets the full sensitivity add-ons
+    pd_factor = spec.pd_multipliers["C"] * (1 + sum(spec.pd_sensitivity.values()))
+    lgd_factor = spec.lgd_multipliers["C"] * (1 + sum(spec.lgd_sensitivity.values()))
+    # o2: grade A+ with every metric score 1 only gets the grade multipliers
+    expected_pd = [0.02 * pd_factor, 0.01 * spec.pd_multipliers["A+"], 0.05]
+    expected_lgd = [0.45 * lgd_factor, 0.40 * spec.lgd_multipliers["A+"], 0.50]
+    np.testing.assert_allclose(out["pd_esg"], expected_pd)
+    np.testing.assert_allclose(out["lgd_esg"], expected_lgd)
+    np.testing.assert_allclose(out["el"], FACILITIES["pd"] * FACILITIES["lgd"] * FACILITIES["ead"])
+    np.testing.assert_allclose(out["el_esg"], np.array(expected_pd) * expected_lgd * FACILITIES["ead"])
+    np.testing.assert_allclose(out["capital_esg"],
+                               irb_capital(np.array(expected_pd), np.array(expected_lgd), np.full(3, 2.5))
+                               * FACILITIES["ead"])
+    assert out["sector"].tolist() == ["Energy", "Technology", UNSCORED]
+    # Unscored facilities keep their own PD and LGD
+    assert out.loc[2, "capital"] == pytest.approx(out.loc[2, "capital_esg"])
+
+
+def test_sector_summary_totals_and_uplifts():
+    summary = sector_summary(ObligorOverlay(OBLIGORS).apply(FACILITIES))
+    assert list(summary.index) == ["Energy", "Technology", UNSCORED, "TOTAL"]
+    assert summary.loc["TOTAL", "facilities"] == 3
+    assert summary.loc["TOTAL", "ead"] == pytest.approx(FACILITIES["ead"].sum())
+    assert summary.loc["Energy", "el_uplift_pct"] > 0 > summary.loc["Technology", "el_uplift_pct"]
+    assert summary.loc[UNSCORED, "capital_uplift_pct"] == pytest.approx(0.0)
+
+
+def test_overlay_names_missing_obligor_columns():
+    with pytest.raises(ValueError, match="grade, ghg_score"):
+        ObligorOverlay(OBLIGORS.drop(columns=["grade", "ghg_score"]))
+    with pytest.raises(ValueError, match="lgd"):
+        ObligorOverlay(OBLIGORS).apply(FACILITIES.drop(columns=["lgd"]))
+
+
+def test_overlay_spec_rejects_unknown_grades_and_metrics():
+    with pytest.raises(ValueError, match="unknown grade"):
+        OverlaySpec(pd_multipliers={"Z": 1.0})
+    with pytest.raises(ValueError, match="unknown overlay setting"):
+        OverlaySpec.from_dict({"pd_sensitivities": {}})
+    with pytest.raises(ValueError, match="unknown metric"):
+        OverlaySpec(lgd_sensitivity={"not_a_score": 0.1})
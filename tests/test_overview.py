@@ -0,0 +1,122 @@
+"""PortfolioView: filtered, sorted pages and chart aggregates against the same queries done in pandas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_bench import as_frame, synthetic_columns
+from esg_overview import OverviewFilter, PortfolioView, dashboard_inputs
+from esg_scoring import NUMERIC_INPUTS, QUESTION_IDS, get_config, score_portfolio, score_records
+from esg_store import ResultStore, record_row
+
+BASE = {"industry": "Technology", **{qid: "Yes" for qid in QUESTION_IDS},
+        **dict(zip(NUMERIC_INPUTS, [500, 200, 1_500_000.0, 50, 25, 1_300_000.0, 25.0, 15.0, 300.0, 15_000.0,
+                                    15.0, 30.0, 1, 105.0, 5, 0]))}
+
+
+@pytest.fixture(scope="module")
+def frame() -> pd.DataFrame:
+    companies = as_frame(synthetic_columns(500, seed=6))
+    scored = pd.concat([companies, score_portfolio(companies)], axis=1)
+    scored["company"] = [f"Company {i:03d}" for i in range(500)]
+    scored.loc[[5, 50], "ghg_emissions"] = np.nan
+    return scored
+
+
+def _reference(frame: pd.DataFrame, flt: OverviewFilter) -> pd.DataFrame:
+    keep = pd.Series(True, index=frame.index)
+    if flt.industries:
+        keep &= frame["industry"].isin(flt.industries)
+    if flt.grades:
+        keep &= frame["grade"].isin(flt.grades)
+    if flt.risk_range is not None:
+        keep &= frame["risk_score"].between(*flt.risk_range)
+    if flt.search:
+        keep &= frame["company"].str.lower().str.contains(flt.search.lower(), regex=False)
+    return frame[keep]
+
+
+FILTERS = [
+    OverviewFilter(),
+    OverviewFilter(industries=("Technology", "Retail")),
+    OverviewFilter(grades=("A", "B"), risk_range=(10.0, 60.0)),
+    OverviewFilter(search="COMPANY 01"),
+    OverviewFilter(industries=("No such industry",)),
+]
+
+
+@pytest.mark.parametrize("flt", FILTERS)
+def test_mask_matches_pandas(frame, flt):
+    view = PortfolioView(frame)
+    np.testing.assert_array_equal(view.mask(flt), frame.index.isin(_reference(frame, flt).index))
+
+
+@pytest.mark.parametrize("sort_by, ascending", [("risk_score", True), ("risk_score", False),
+                                                ("ghg_emissions", False), ("company", True)])
+def test_pages_walk_the_sorted_filtered_rows(frame, sort_by, ascending):
+    view = PortfolioView(frame)
+    flt = OverviewFilter(risk_range=(0.0, 80.0))
+    expected = _reference(frame, flt).sort_values(sort_by, ascending=ascending, kind="stable", na_position="last")
+    pages = []
+    for number in range(1, 100):
+        page, total = view.page(flt, sort_by, ascending, page=number, page_size=64)
+        assert total == len(expected)
+        if page.empty:
+            break
+        assert len(page) <= 64
+        pages.append(page)
+    pd.testing.assert_frame_equal(pd.concat(pages), expected)
+    assert view.order(sort_by, ascending) is view.order(sort_by, ascending)
+
+
+def test_grade_sorts_in_band_order(frame):
+    view = PortfolioView(frame)
+    page, _ = view.page(OverviewFilter(), "grade", page_size=len(frame))
+    ranks = page["grade"].map(view.grades.index)
+    assert ranks.is_monotonic_increasing
+
+
+def test_chart_aggregates_match_pandas(frame):
+    view = PortfolioView(frame)
+    flt = OverviewFilter(industries=("Technology", "Retail", "Energy & Utilities"))
+    keep = view.mask(flt)
+    rows = _reference(frame, flt)
+
+    summary = view.summary(keep)
+    assert summary["obligors"] == len(rows)
+    assert summary["mean_risk_score"] == pytest.approx(rows["risk_score"].mean())
+    assert summary["median_risk_score"] == pytest.approx(rows["risk_score"].median())
+
+    histogram = view.risk_histogram(keep, bins=20)
+    assert histogram["obligors"].sum() == len(rows)
+    assert histogram["obligors"].tolist() == np.histogram(rows["risk_score"], bins=20, range=(0, 100))[0].tolist()
+
+    grades = view.grade_counts(keep).set_index("grade")["obligors"]
+    assert grades.to_dict() == rows["grade"].value_counts().reindex(get_config().grades, fill_value=0).to_dict()
+
+    table = view.industry_grade_counts(keep)
+    expected = pd.crosstab(rows["industry"], rows["grade"]).reindex(
+        index=view.industries, columns=view.grades, fill_value=0)
+    np.testing.assert_array_equal(table.to_numpy(), expected.to_numpy())
+
+    empty = view.summary(np.zeros(len(frame), dtype=bool))
+    assert empty["obligors"] == 0 and np.isnan(empty["mean_risk_score"])
+
+
+def test_dashboard_inputs_read_the_latest_snapshot(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    try:
+        rows = []
+        for as_of, ghg in [("2023-12-31", 100.0), ("2024-12-31", 900.0)]:
+            record = {**BASE, "ghg_emissions": ghg, QUESTION_IDS[0]: "No"}
+            rows.append(record_row(record, score_records([record])[0], get_config().version, "Acme", as_of))
+        store.write_rows(rows)
+        inputs = dashboard_inputs(store, "Acme")
+        assert (inputs["company"], inputs["industry"], inputs["as_of"]) == ("Acme", "Technology", "2024-12-31")
+        assert inputs["ghg_emissions"] == 900.0
+        assert inputs[QUESTION_IDS[0]] == 0 and inputs[QUESTION_IDS[1]] == 1
+        assert set(NUMERIC_INPUTS) <= set(inputs)
+        assert dashboard_inputs(store, "Nobody") is None
+        view = PortfolioView.from_store(store)
+        assert len(view) == 1 and view.frame.loc[0, "ghg_emissions"] == 900.0
+    finally:
+        store.close()
@@ -0,0 +1,36 @@
+"""ParallelScorer against the serial score_portfolio, on the pool and in-process paths."""
+import pandas as pd
+import pytest
+
+from esg_bench import as_frame, synthetic_columns
+from esg_parallel import MIN_ROWS_PER_WORKER, OUTPUT_COLUMNS, ParallelScorer, score_parallel
+from esg_scoring import score_portfolio
+
+WORKERS = 2
+
+
+@pytest.fixture(scope="module")
+def companies() -> pd.DataFrame:
+    frame = as_frame(synthetic_columns(WORKERS * MIN_ROWS_PER_WORKER + 1_234, seed=3))
+    frame.index = frame.index + 10  # results must keep the caller's index
+    return frame
+
+
+def test_pool_path_matches_serial(companies):
+    with ParallelScorer(workers=WORKERS, capacity=len(companies)) as scorer:
+        parallel = scorer.score(companies)
+        assert scorer._pool is not None  # large enough to be split across the workers
+    pd.testing.assert_frame_equal(parallel, score_portfolio(companies))
+    assert list(parallel.columns) == OUTPUT_COLUMNS
+
+
+def test_chunks_larger_than_capacity_match_serial(companies):
+    subset = companies.head(25_000)
+    with ParallelScorer(workers=WORKERS, capacity=10_000) as scorer:
+        pd.testing.assert_frame_equal(scorer.score(subset), score_portfolio(subset))
+        pd.testing.assert_frame_equal(scorer.score(subset.tail(99)), score_portfolio(subset.tail(99)))
+
+
+def test_in_process_path_matches_serial(companies):
+    small = companies.head(500)
+    pd.testing.assert_frame_equal(score_parallel(small, workers=WORKERS), score_portfolio(small))
@@ -0,0 +1,97 @@
+"""Peer percentiles against a brute-force mid-rank, across buffer merges, replacements and removals."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_bench import as_frame, synthetic_columns
+from esg_peers import LOWER_IS_BETTER, PeerIndex, peer_standing
+from esg_scoring import ladder_values
+
+COLUMNS = ["ghg_emissions", "pay_gap", "risk_score"]
+
+
+def _frame(n: int, seed: int) -> pd.DataFrame:
+    frame = as_frame(synthetic_columns(n, seed))
+    frame["company"] = [f"c{i}" for i in range(n)]
+    frame["risk_score"] = np.round(np.random.default_rng(seed).uniform(0, 100, n), 0)  # many ties
+    return frame
+
+
+def _expected(peers: pd.DataFrame, industry: str, column: str, value: float) -> float:
+    """Mid-rank percentile of ``value`` among the non-NaN peer values, computed directly."""
+    if column == "pay_gap":  # derived by the index from the numeric inputs
+        column_values = pd.Series(ladder_values(peers)["pay_gap"], index=peers.index)
+    else:
+        column_values = peers[column]
+    values = column_values[peers["industry"] == industry].dropna().to_numpy()
+    if not len(values) or np.isnan(value):
+        return float("nan")
+    return 100 * ((values < value).sum() + (values == value).sum() / 2) / len(values)
+
+
+@pytest.mark.parametrize("buffer_rows", [4, 256])
+def test_percentiles_match_a_brute_force_rank(buffer_rows):
+    index = PeerIndex(COLUMNS, buffer_rows=buffer_rows)
+    frame = _frame(300, seed=1)
+    for start in range(0, 300, 37):  # several adds, so merged and buffered peers mix
+        index.add(frame.iloc[start:start + 37])
+    assert len(index) == 300
+    for industry in index.industries():
+        for column in COLUMNS:
+            for value in (0.0, 0.2, 50.0, 500.0):
+                assert index.percentile(industry, column, value) == pytest.approx(
+                    _expected(frame, industry, column, value), nan_ok=True)
+    ranked = index.rank(frame.head(20))
+    for i in range(20):
+        row = frame.iloc[i]
+        assert ranked.iloc[i]["risk_score_pct"] == pytest.approx(
+            _expected(frame, row["industry"], "risk_score", row["risk_score"]))
+
+
+def test_re_adding_a_company_replaces_it_and_remove_drops_it():
+    index = PeerIndex(COLUMNS, buffer_rows=4)
+    frame = _frame(40, seed=2)
+    index.add(frame)
+    changed = frame.iloc[[3, 7]].assign(risk_score=[1000.0, -5.0])
+    index.add(changed)
+    assert len(index) == 40
+    current = pd.concat([frame.drop(index=[3, 7]), changed])
+    industry = frame.iloc[3]["industry"]
+    assert index.percentile(industry, "risk_score", 50.0) == pytest.approx(
+        _expected(current, industry, "risk_score", 50.0))
+
+    assert index.remove("c3") and not index.remove("c3")
+    remaining = current[current["company"] != "c3"]
+    assert len(index) == 39
+    assert index.peer_count(industry) == (remaining["industry"] == industry).sum()
+    assert index.percentile(industry, "risk_score", 50.0) == pytest.approx(
+        _expected(remaining, industry, "risk_score", 50.0))
+
+
+def test_exclude_leaves_the_benchmarked_company_out():
+    index = PeerIndex(COLUMNS)
+    frame = _frame(60, seed=3)
+    index.add(frame)
+    row = frame.iloc[0]
+    others = frame.iloc[1:]
+    assert index.peer_count(row["industry"], exclude="c0") == (others["industry"] == row["industry"]).sum()
+    assert index.percentile(row["industry"], "risk_score", row["risk_score"], exclude="c0") == pytest.approx(
+        _expected(others, row["industry"], "risk_score", row["risk_score"]))
+
+
+def test_missing_values_are_not_peers():
+    index = PeerIndex(COLUMNS)
+    frame = _frame(30, seed=4)
+    frame.loc[:9, "ghg_emissions"] = np.nan
+    frame["industry"] = "Retail"
+    index.add(frame)
+    assert index.peer_count("Retail", "ghg_emissions") == 20
+    assert np.isnan(index.percentile("Retail", "ghg_emissions", np.nan))
+    assert np.isnan(index.percentile("Unknown", "ghg_emissions", 1.0))
+    assert index.rank(frame.head(10))["ghg_emissions_pct"].isna().all()
+
+
+def test_peer_standing_inverts_lower_is_better_columns():
+    assert "risk_score" in LOWER_IS_BETTER
+    assert peer_standing("risk_score", 80.0) == 20.0
+    assert peer_standing("renewable_pct", 80.0) == 80.0
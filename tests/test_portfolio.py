@@ -0,0 +1,97 @@
+"""Exposure-weighted portfolio aggregates: loading, rescoring and booking or removing facilities."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import esg_cli
+from esg_portfolio import NOT_RATED, Portfolio
+
+SCORED = pd.DataFrame({"obligor_id": ["a", "b", "c"], "risk_score": [0.2, 0.6, 0.9], "grade": ["A", "B", "C"]})
+FACILITIES = pd.DataFrame({
+    "obligor_id": ["a", "a", "b", "c", "d"],
+    "ead": [100.0, 50.0, 200.0, 300.0, 80.0],
+    "sector": ["Energy", "Retail", "Energy", "Retail", "Energy"],
+    "region": ["EU", "EU", "US", "US", "EU"],
+})
+
+
+def _regrouped(facilities: pd.DataFrame, scored: pd.DataFrame) -> Portfolio:
+    """A portfolio loaded from scratch, to compare incremental updates against."""
+    return Portfolio.from_frames(scored, facilities, baseline=SCORED)
+
+
+def _assert_same(portfolio: Portfolio, expected: Portfolio) -> None:
+    assert portfolio.total_ead == pytest.approx(expected.total_ead)
+    assert portfolio.exposure_weighted_risk() == pytest.approx(expected.exposure_weighted_risk())
+    for by in ("sector", "region"):
+        pd.testing.assert_frame_equal(portfolio.breakdown(by).sort_index(), expected.breakdown(by).sort_index())
+    pd.testing.assert_frame_equal(portfolio.migration_table(), expected.migration_table())
+    pd.testing.assert_frame_equal(portfolio.migration_table("count"), expected.migration_table("count"))
+
+
+def test_exposure_weighted_aggregates():
+    portfolio = Portfolio.from_frames(SCORED, FACILITIES)
+    assert portfolio.total_ead == 730.0
+    # d has exposure but no score, so it is left out of the weighted risk
+    assert portfolio.exposure_weighted_risk() == pytest.approx((150 * 0.2 + 200 * 0.6 + 300 * 0.9) / 650)
+    sectors = portfolio.breakdown("sector")
+    assert sectors.loc["Energy", "ead"] == 380.0
+    assert sectors.loc["Energy", "weighted_risk_score"] == pytest.approx((100 * 0.2 + 200 * 0.6) / 300)
+    assert sectors.loc["Energy", f"ead_{NOT_RATED}"] == 80.0
+    assert portfolio.breakdown("region").loc["US", "ead_C"] == 300.0
+
+
+def test_rescoring_matches_a_full_regroup():
+    portfolio = Portfolio.from_frames(SCORED, FACILITIES)
+    rescored = pd.DataFrame({"obligor_id": ["a", "d"], "risk_score": [0.7, 0.4], "grade": ["C", "B"]})
+    portfolio.rescore_frame(rescored)
+    expected = _regrouped(FACILITIES, pd.concat([SCORED[SCORED["obligor_id"] != "a"], rescored]))
+    _assert_same(portfolio, expected)
+    assert portfolio.migration_table().loc["A", "C"] == 150.0
+    assert portfolio.migration_table("count").loc[NOT_RATED, "B"] == 1
+
+
+def test_adding_and_removing_facilities_matches_a_full_regroup():
+    portfolio = Portfolio.from_frames(SCORED, FACILITIES.iloc[:4])
+    booked = pd.DataFrame({"obligor_id": ["d", "a"], "ead": [80.0, 40.0], "sector": ["Energy", "Mining"],
+                           "region": ["EU", "APAC"]})
+    portfolio.add_facilities(booked)
+    everything = pd.concat([FACILITIES.iloc[:4], booked], ignore_index=True)
+    _assert_same(portfolio, _regrouped(everything, SCORED))
+    assert portfolio.breakdown("region").loc["APAC", "ead_A"] == 40.0
+
+    repaid = pd.DataFrame({"obligor_id": ["a", "b", "d"], "ead": [50.0, 120.0, 80.0],
+                           "sector": ["Retail", "Energy", "Energy"], "region": ["EU", "US", "EU"]})
+    portfolio.remove_facilities(repaid)
+    remaining = everything.drop(index=[1, 4]).assign(ead=[100.0, 80.0, 300.0, 40.0])
+    _assert_same(portfolio, _regrouped(remaining, SCORED))
+    # d is unscored and fully repaid, so it drops out of the migration counts
+    assert portfolio.migration_table("count").loc[NOT_RATED, NOT_RATED] == 0
+
+
+def test_removing_more_than_is_booked_changes_nothing():
+    portfolio = Portfolio.from_frames(SCORED, FACILITIES)
+    too_much = pd.DataFrame({"obligor_id": ["a", "b"], "ead": [10.0, 500.0],
+                             "sector": ["Energy", "Energy"], "region": ["EU", "US"]})
+    with pytest.raises(ValueError, match="cannot remove more exposure"):
+        portfolio.remove_facilities(too_much)
+    _assert_same(portfolio, _regrouped(FACILITIES, SCORED))
+    with pytest.raises(ValueError, match="region"):
+        portfolio.add_facilities(FACILITIES.drop(columns=["region"]))
+
+
+def test_cli_reports_the_updated_book(tmp_path, capsys):
+    paths = {name: tmp_path / f"{name}.csv" for name in ("facilities", "scored", "booked", "repaid", "migration")}
+    FACILITIES.iloc[[0, 1, 2, 4]].to_csv(paths["facilities"], index=False)
+    SCORED.to_csv(paths["scored"], index=False)
+    FACILITIES.iloc[[3]].to_csv(paths["booked"], index=False)
+    FACILITIES.iloc[[1]].to_csv(paths["repaid"], index=False)
+    assert esg_cli.main(["portfolio", str(paths["facilities"]), str(paths["scored"]), "--add", str(paths["booked"]),
+                         "--remove", str(paths["repaid"]), "--migration", str(paths["migration"])]) == 0
+    out = capsys.readouterr()
+    assert "Energy" in out.out and "over 680 EAD" in out.err
+    migration = pd.read_csv(paths["migration"], index_col=0)
+    assert migration.loc["A", "A"] == 100.0 and migration.loc[NOT_RATED, NOT_RATED] == 80.0
+    # c was booked after the baseline, so it migrates from not rated to its score's grade
+    assert migration.loc[NOT_RATED, "C"] == 300.0
+    assert np.isclose(migration.to_numpy().sum(), 680.0)
@@ -0,0 +1,32 @@
+"""Scorecard export: one file per obligor, colliding names included."""
+import os
+
+import pytest
+
+from esg_bench import as_frame, synthetic_columns
+from esg_reports import export_reports
+
+
+@pytest.fixture()
+def portfolio(tmp_path):
+    frame = as_frame(synthetic_columns(6, seed=0))
+    frame["obligor"] = ["A B", "A/B", "A_B", "a_b", "A_B_2", "Acme"]
+    path = tmp_path / "portfolio.csv"
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_colliding_names_get_suffixes(portfolio, tmp_path, workers):
+    out = tmp_path / f"out_{workers}"
+    assert export_reports(portfolio, str(out), key="obligor", chunksize=2, workers=workers, batch=2) == 6
+    assert sorted(os.listdir(out)) == ["A_B.html", "A_B_2.html", "A_B_2_2.html", "A_B_3.html", "Acme.html",
+                                       "a_b_4.html"]
+    # Each file still shows the obligor's own name
+    assert "A/B" in (out / "A_B_2.html").read_text(encoding="utf-8")
+
+
+def test_rows_are_named_by_position(portfolio, tmp_path):
+    out = tmp_path / "rows"
+    assert export_reports(portfolio, str(out), chunksize=4) == 6
+    assert sorted(os.listdir(out)) == [f"row_{i}.html" for i in range(6)]
@@ -0,0 +1,169 @@
+"""score_portfolio against a scalar transcription of the original Calculate block of ESG_.py."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_bench import as_frame, synthetic_columns
+from esg_scoring import (
+    ENV_QUESTION_IDS, GOV_QUESTION_IDS, METRIC_COLUMNS, NUMERIC_INPUTS, QUESTION_IDS, SOCIAL_QUESTION_IDS,
+    score_portfolio, score_records,
+)
+
+# Thresholds, weights and grade bands exactly as the original ESG_.py declared them
+INDUSTRY_THRESHOLDS_MAP = {
+    "Technology": {"div_high": 0.35, "div_medium": 0.20, "pay_gap_low": 0.08, "pay_gap_medium": 0.20,
+                   "attrition_gap_low": 0.04, "attrition_gap_medium": 0.10},
+    "Financial Services": {"div_high": 0.45, "div_medium": 0.30, "pay_gap_low": 0.10, "pay_gap_medium": 0.22,
+                           "attrition_gap_low": 0.06, "attrition_gap_medium": 0.12},
+    "Manufacturing": {"div_high": 0.20, "div_medium": 0.10, "pay_gap_low": 0.12, "pay_gap_medium": 0.28,
+                      "attrition_gap_low": 0.08, "attrition_gap_medium": 0.15},
+    "Construction": {"div_high": 0.15, "div_medium": 0.08, "pay_gap_low": 0.15, "pay_gap_medium": 0.30,
+                     "attrition_gap_low": 0.10, "attrition_gap_medium": 0.20},
+    "Energy & Utilities": {"div_high": 0.25, "div_medium": 0.15, "pay_gap_low": 0.10, "pay_gap_medium": 0.25,
+                           "attrition_gap_low": 0.07, "attrition_gap_medium": 0.14},
+    "Healthcare": {"div_high": 0.55, "div_medium": 0.40, "pay_gap_low": 0.05, "pay_gap_medium": 0.15,
+                   "attrition_gap_low": 0.03, "attrition_gap_medium": 0.08},
+    "Retail": {"div_high": 0.50, "div_medium": 0.35, "pay_gap_low": 0.08, "pay_gap_medium": 0.20,
+               "attrition_gap_low": 0.05, "attrition_gap_medium": 0.12},
+    "DEFAULT": {"div_high": 0.40, "div_medium": 0.25, "pay_gap_low": 0.10, "pay_gap_medium": 0.25,
+                "attrition_gap_low": 0.05, "attrition_gap_medium": 0.12},
+}
+PT = {"ghg_high": 500, "ghg_medium": 150, "water_high": 10000, "water_medium": 50000,
+      "waste_haz_high": 10, "waste_haz_medium": 50, "renew_high": 0.50, "renew_medium": 0.20,
+      "csr_high": 1.10, "csr_medium": 1.00}
+DISCLOSURE_WEIGHT = 1
+PERFORMANCE_WEIGHT = 3
+
+
+def _step(condition_high: bool, condition_medium: bool) -> float:
+    return 1.0 if condition_high else 0.5 if condition_medium else 0.0
+
+
+def calculate(row: dict) -> dict:
+    """The original Calculate block for one company, with its if/elif chains folded into ``_step``."""
+    industry = row["industry"]
+    thresholds_key = industry if industry in INDUSTRY_THRESHOLDS_MAP else "DEFAULT"
+    TH = INDUSTRY_THRESHOLDS_MAP[thresholds_key]
+    env = [row[q] for q in ENV_QUESTION_IDS]
+    social = [row[q] for q in SOCIAL_QUESTION_IDS]
+    gov = [row[q] for q in GOV_QUESTION_IDS]
+    all_responses = env + social + gov
+
+    total_employees = row["male_employees"] + row["female_employees"]
+    if total_employees > 0:
+        gender_diversity_pct = row["female_employees"] / total_employees
+        diversity_score = _step(gender_diversity_pct > TH["div_high"], gender_diversity_pct >= TH["div_medium"])
+    else:
+        gender_diversity_pct = diversity_score = 0.0
+    if row["avg_male_pay"] > 0:
+        pay_gap = (row["avg_male_pay"] - row["avg_female_pay"]) / row["avg_male_pay"]
+        pay_equity_score = _step(pay_gap <= TH["pay_gap_low"], pay_gap <= TH["pay_gap_medium"])
+    else:
+        pay_gap = pay_equity_score = 0.0
+    male_rate = row["male_attrition"] / row["male_employees"] if row["male_employees"] > 0 else 0.0
+    female_rate = row["female_attrition"] / row["female_employees"] if row["female_employees"] > 0 else 0.0
+    attrition_gap = abs(male_rate - female_rate)
+    renewable_ratio = row["renewable_pct"] / 100
+    csr_ratio = row["csr_utilisation_pct"] / 100
+    mechanism = gov[3]
+    metrics = {
+        "diversity_score": diversity_score,
+        "pay_equity_score": pay_equity_score,
+        "attrition_score": _step(attrition_gap <= TH["attrition_gap_low"], attrition_gap <= TH["attrition_gap_medium"]),
+        "ghg_score": _step(row["ghg_emissions"] <= PT["ghg_medium"], row["ghg_emissions"] <= PT["ghg_high"]),
+        "renewable_score": _step(renewable_ratio >= PT["renew_high"], renewable_ratio >= PT["renew_medium"]),
+        "waste_score": _step(row["hazardous_waste"] <= PT["waste_haz_high"],
+                             row["hazardous_waste"] <= PT["waste_haz_medium"]),
+        "water_score": _step(row["water_consumption"] <= PT["water_high"],
+                             row["water_consumption"] <= PT["water_medium"]),
+        "csr_score": _step(csr_ratio >= PT["csr_high"], csr_ratio >= PT["csr_medium"]),
+        "compliance_score": _step(row["regulatory_noncompliance"] == 0, row["regulatory_noncompliance"] <= 2),
+        "injury_score": _step(row["workplace_injuries"] == 0, row["workplace_injuries"] <= 2),
+        "turnover_score": _step(row["employee_turnover_pct"] <= 10.0, row["employee_turnover_pct"] <= 20.0),
+        "whistleblower_score": _step(mechanism == 1 and row["whistleblower_resolved"] > 0, mechanism == 1),
+    }
+    total_weighted_performance_score = sum(v * PERFORMANCE_WEIGHT for v in metrics.values())
+    total_weighted_max_score = len(all_responses) * DISCLOSURE_WEIGHT + len(metrics) * PERFORMANCE_WEIGHT
+    total_weighted_score = sum(all_responses) * DISCLOSURE_WEIGHT + total_weighted_performance_score
+    score = (total_weighted_score / total_weighted_max_score) * 100
+    grade = next((g for cutoff, g in ((90, "A+"), (80, "A"), (70, "B+"), (60, "B"), (50, "C+")) if score >= cutoff),
+                 "C")
+    total_attrition = row["male_attrition"] + row["female_attrition"]
+    return {
+        **metrics,
+        "thresholds_key": thresholds_key,
+        "env_pct": sum(env) / len(env) * 100,
+        "social_pct": sum(social) / len(social) * 100,
+        "gov_pct": sum(gov) / len(gov) * 100,
+        "gender_diversity_pct": gender_diversity_pct,
+        "pay_gap": pay_gap,
+        "attrition_gap": attrition_gap,
+        "total_attrition_rate": (total_attrition / total_employees) * 100 if total_employees > 0 else 0,
+        "total_weighted_performance_score": total_weighted_performance_score,
+        "total_weighted_score": total_weighted_score,
+        "score": score,
+        "risk_score": 100 - score,
+        "grade": grade,
+    }
+
+
+def _edge_rows() -> pd.DataFrame:
+    """Companies sitting on the ladder thresholds, with empty workforces and pay, and every whistleblower case."""
+    base = {qid: 1 for qid in QUESTION_IDS}
+    base.update(dict(zip(NUMERIC_INPUTS, [500, 200, 1_500_000.0, 50, 25, 1_300_000.0, 25.0, 15.0, 300.0, 15_000.0,
+                                          15.0, 30.0, 1, 105.0, 5, 0])))
+    cases = [
+        {"male_employees": 65, "female_employees": 35},  # diversity exactly div_high (Technology)
+        {"male_employees": 80, "female_employees": 20},  # exactly div_medium
+        {"male_employees": 0, "female_employees": 0},
+        {"avg_male_pay": 100.0, "avg_female_pay": 92.0},  # pay gap exactly 0.08
+        {"avg_male_pay": 0.0},
+        {"ghg_emissions": 150.0}, {"ghg_emissions": 500.0}, {"ghg_emissions": 500.0000001},
+        {"water_consumption": 10_000.0}, {"water_consumption": 50_000.0},
+        {"hazardous_waste": 10.0}, {"hazardous_waste": 50.0},
+        {"renewable_pct": 50.0}, {"renewable_pct": 20.0}, {"csr_utilisation_pct": 110.0},
+        {"csr_utilisation_pct": 100.0},
+        {"regulatory_noncompliance": 2}, {"regulatory_noncompliance": 3}, {"workplace_injuries": 0},
+        {"employee_turnover_pct": 10.0}, {"employee_turnover_pct": 20.0},
+        {"whistleblower_resolved": 0}, {GOV_QUESTION_IDS[3]: 0},
+        {qid: 0 for qid in QUESTION_IDS},
+    ]
+    rows = []
+    for industry in list(INDUSTRY_THRESHOLDS_MAP) + ["Other", "Select Industry..."]:
+        rows += [{**base, "industry": industry, **case} for case in cases]
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope="module")
+def companies() -> pd.DataFrame:
+    return pd.concat([as_frame(synthetic_columns(5_000, seed=7)), _edge_rows()], ignore_index=True)
+
+
+def test_score_portfolio_matches_calculate_block_exactly(companies):
+    scored = score_portfolio(companies)
+    expected = pd.DataFrame([calculate(row) for row in companies.to_dict("records")])
+    for col in expected.columns:
+        # Bit-identical: exact equality, not a tolerance
+        np.testing.assert_array_equal(scored[col].to_numpy(), expected[col].to_numpy(), err_msg=col)
+
+
+def test_score_records_matches_score_portfolio(companies):
+    records = companies.head(500).to_dict("records")
+    for row in records:  # the record format takes Yes/No answers
+        row.update({qid: "Yes" if row[qid] else "No" for qid in QUESTION_IDS})
+    results = pd.DataFrame(score_records(records))
+    scored = score_portfolio(companies.head(500))
+    for col in METRIC_COLUMNS + ["score", "risk_score", "grade"]:
+        np.testing.assert_array_equal(results[col].to_numpy(), scored[col].to_numpy(), err_msg=col)
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda row: row.pop("ghg_emissions"), r"company 3: missing numeric input\(s\): ghg_emissions"),
+    (lambda row: row.update(renewable_pct=float("nan")), r"company 3: .*finite numbers: renewable_pct"),
+    (lambda row: row.update(water_consumption="lots"), r"company 3: .*finite numbers: water_consumption"),
+])
+def test_score_records_names_the_company_and_the_bad_input(companies, change, message):
+    records = companies.head(5).to_dict("records")
+    change(records[3])
+    with pytest.raises(ValueError, match=message):
+        score_records(records)
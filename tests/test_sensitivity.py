@@ -0,0 +1,65 @@
+"""What-if moves: applying a move's target must reach its band and its risk reduction."""
+import numpy as np
+import pytest
+
+from esg_bench import as_frame, synthetic_columns
+from esg_scoring import NUMERIC_INPUTS, QUESTION_IDS, get_config, industry_codes, ladder_values, score_columns
+from esg_sensitivity import metric_moves, rank_actions, top_actions
+
+
+@pytest.fixture(scope="module")
+def portfolio():
+    companies = as_frame(synthetic_columns(400, seed=7))
+    config = get_config()
+    codes = industry_codes(companies["industry"], config)
+    columns = {col: companies[col].to_numpy() for col in QUESTION_IDS + NUMERIC_INPUTS}
+    scored = score_columns(columns, codes, config=config)
+    moves = metric_moves(ladder_values(columns), codes, scored, config)
+    return companies, columns, codes, scored, moves
+
+
+def test_moves_on_direct_inputs_reach_the_target_band(portfolio):
+    companies, columns, codes, scored, moves = portfolio
+    config = get_config()
+    direct = [(m, column) for m, column in enumerate(config.metric_columns)
+              if config.tables[column].value in NUMERIC_INPUTS]
+    assert direct
+    for m, column in direct:
+        rows = np.flatnonzero(moves["risk_reduction"][:, m] > 0)
+        assert len(rows)
+        moved = {col: values[rows] for col, values in columns.items()}
+        moved[config.tables[column].value] = moves["target"][rows, m]
+        rescored = score_columns(moved, codes[rows], config=config)
+        np.testing.assert_array_equal(rescored[column], moves["target_score"][rows, m], err_msg=column)
+        np.testing.assert_allclose(scored["risk_score"][rows] - rescored["risk_score"],
+                                   moves["risk_reduction"][rows, m], err_msg=column)
+
+
+def test_metrics_in_their_best_band_have_no_move(portfolio):
+    _, _, _, scored, moves = portfolio
+    for m, column in enumerate(get_config().metric_columns):
+        assert (moves["risk_reduction"][scored[column] == 1.0, m] == 0).all(), column
+        assert np.isnan(moves["target"][moves["risk_reduction"][:, m] == 0, m]).all(), column
+
+
+def test_top_actions_are_the_largest_reductions_best_first(portfolio):
+    _, _, _, _, moves = portfolio
+    actions = top_actions(moves, k=3)
+    reduction = moves["risk_reduction"]
+    expected = -np.sort(-reduction, axis=1)[:, :3]
+    np.testing.assert_allclose(actions["risk_reduction"], expected)
+    assert ((actions["metric"] == -1) == (actions["risk_reduction"] == 0)).all()
+    # Ties go to the smaller relative change
+    tied = (actions["risk_reduction"][:, 0] == actions["risk_reduction"][:, 1]) & (actions["metric"][:, 1] >= 0)
+    assert tied.any()
+    assert (actions["effort"][tied, 0] <= actions["effort"][tied, 1]).all()
+
+
+def test_rank_actions_names_the_metrics(portfolio):
+    companies = portfolio[0]
+    ranked = rank_actions(companies.head(50), k=2)
+    assert list(ranked.columns[:5]) == ["action_1_metric", "action_1_value", "action_1_target",
+                                        "action_1_target_score", "action_1_risk_reduction"]
+    metrics = set(ranked["action_1_metric"].dropna())
+    assert metrics and metrics <= set(get_config().metric_columns)
+    assert (ranked["action_1_risk_reduction"] >= ranked["action_2_risk_reduction"]).all()
@@ -0,0 +1,57 @@
+"""The HTTP scoring service: results, input checks and error replies."""
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from esg_scoring import NUMERIC_INPUTS, score_records
+from esg_service import ScoringServer, sample_companies
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ScoringServer(("127.0.0.1", 0), max_wait_ms=0.5)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(server, body: str) -> tuple[int, dict]:
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    connection.request("POST", "/score", body=body.encode("utf-8"))
+    response = connection.getresponse()
+    status, payload = response.status, json.loads(response.read())
+    connection.close()
+    return status, payload
+
+
+def test_scores_single_and_bulk_requests(server):
+    companies = sample_companies(8)
+    expected = score_records(companies)
+    assert _post(server, json.dumps(companies[0])) == (200, expected[0])
+    assert _post(server, json.dumps(companies)) == (200, expected)
+
+
+@pytest.mark.parametrize("value", ["NaN", "Infinity", "-Infinity", "\"12\"", "true", "null", "[]"])
+def test_non_finite_or_non_numeric_inputs_are_rejected(server, value):
+    company = json.dumps({**sample_companies(1)[0], NUMERIC_INPUTS[3]: 0})
+    status, payload = _post(server, company.replace(f'"{NUMERIC_INPUTS[3]}": 0', f'"{NUMERIC_INPUTS[3]}": {value}'))
+    assert status == 400 and NUMERIC_INPUTS[3] in payload["error"]
+
+
+def test_unexpected_errors_get_500_and_are_counted(server, monkeypatch):
+    errors = server.metrics.snapshot()["errors"]
+    monkeypatch.setattr(server.batcher, "score", lambda records: [{"score": float("nan")}])
+    status, payload = _post(server, json.dumps(sample_companies(1)[0]))
+    assert status == 500 and "internal error" in payload["error"]
+    monkeypatch.setattr(server.batcher, "score", lambda records: 1 / 0)
+    assert _post(server, json.dumps(sample_companies(1)[0]))[0] == 500
+    # The request is counted just after its reply is sent
+    deadline = time.monotonic() + 5
+    while server.metrics.snapshot()["errors"] < errors + 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.metrics.snapshot()["errors"] == errors + 2
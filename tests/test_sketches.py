@@ -0,0 +1,136 @@
+"""QuantileSketch rank-error and memory bounds, merges and persistence."""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_sketches import ALL_INDUSTRIES, DEFAULT_K, PortfolioSketch, QuantileSketch
+
+K = DEFAULT_K
+RANK_ERROR = 4 / K  # the documented bound
+QUANTILES = np.arange(1, 1000) / 1000
+
+
+def _rank_error(sketch: QuantileSketch, data: np.ndarray) -> float:
+    """Worst distance, as a share of ``len(data)``, between a requested rank and the returned value's ranks."""
+    ordered = np.sort(data)
+    values = sketch.quantile(QUANTILES)
+    low = np.searchsorted(ordered, values, side="left")
+    high = np.searchsorted(ordered, values, side="right")
+    target = QUANTILES * len(data)
+    error = np.where(target < low, low - target, np.where(target > high, target - high, 0.0))
+    return float(error.max() / len(data))
+
+
+def _inputs(kind: str, n: int, seed: int) -> np.ndarray:
+    data = np.random.default_rng(seed).lognormal(size=n)
+    if kind == "sorted":
+        return np.sort(data)
+    if kind == "reversed":
+        return np.sort(data)[::-1]
+    if kind == "ties":
+        return np.round(data, 1)
+    return data
+
+
+def _retained_bound(count: int) -> float:
+    return 3 * K + 8 * math.log2(count)
+
+
+@pytest.mark.parametrize("kind", ["random", "sorted", "reversed", "ties"])
+def test_batched_updates_stay_within_rank_error(kind):
+    data = _inputs(kind, 300_000, seed=1)
+    sketch = QuantileSketch(seed=1)
+    for start in range(0, len(data), 10_000):
+        sketch.update(data[start:start + 10_000])
+    assert sketch.count == len(data) and sketch.min == data.min() and sketch.max == data.max()
+    assert _rank_error(sketch, data) <= RANK_ERROR
+    assert sketch.retained <= _retained_bound(len(data))
+
+
+@pytest.mark.parametrize("kind", ["random", "sorted"])
+def test_single_value_updates_stay_within_rank_error(kind):
+    data = _inputs(kind, 30_000, seed=2)
+    sketch = QuantileSketch(seed=2)
+    for value in data:
+        sketch.update([value])
+    assert _rank_error(sketch, data) <= RANK_ERROR
+    assert sketch.retained <= _retained_bound(len(data))
+
+
+def test_merged_sketches_stay_within_rank_error():
+    parts = [_inputs("random", 20_000, seed) * (1 + seed) for seed in range(20)]
+    merged = QuantileSketch(seed=0)
+    for seed, part in enumerate(parts):
+        merged.merge(QuantileSketch(seed=seed).update(part))
+    data = np.concatenate(parts)
+    assert merged.count == len(data) and merged.max == data.max()
+    assert _rank_error(merged, data) <= RANK_ERROR
+
+
+def test_cdf_histogram_and_ignored_values():
+    data = _inputs("random", 100_000, seed=4)
+    sketch = QuantileSketch(seed=4).update(np.concatenate([data, [np.nan, np.inf, -np.inf]]))
+    assert sketch.count == len(data)
+    edges = np.quantile(data, np.linspace(0, 1, 11))
+    exact = np.histogram(data, edges)[0]
+    assert np.abs(sketch.histogram(edges) - exact).max() <= 2 * RANK_ERROR * len(data)
+    assert abs(sketch.cdf(np.median(data)) - 0.5) <= RANK_ERROR
+    assert sketch.quantile(0.0) == data.min() and sketch.quantile(1.0) == data.max()
+    assert np.isnan(QuantileSketch().quantile(0.5))
+
+
+def test_merge_rejects_other_k():
+    with pytest.raises(ValueError):
+        QuantileSketch(k=100).merge(QuantileSketch(k=200).update([1.0]))
+
+
+def test_portfolio_sketch_round_trip(tmp_path):
+    rng = np.random.default_rng(5)
+    chunk = pd.DataFrame({"industry": rng.choice(["Retail", "Technology", None], 50_000),
+                          "risk_score": rng.uniform(0, 100, 50_000)})
+    sketch = PortfolioSketch(columns=["risk_score"], seed=5).update(chunk)
+    path = tmp_path / "sketch.json"
+    sketch.save(str(path))
+    loaded = PortfolioSketch.load(str(path))
+    pd.testing.assert_frame_equal(loaded.quantiles("risk_score"), sketch.quantiles("risk_score"))
+    table = loaded.quantiles("risk_score")
+    assert table.loc[ALL_INDUSTRIES, "count"] == 50_000
+    assert table["count"].drop(ALL_INDUSTRIES).sum() == 50_000
+    retail = chunk.loc[chunk["industry"] == "Retail", "risk_score"].to_numpy()
+    assert _rank_error(loaded.sketch("Retail", "risk_score"), retail) <= RANK_ERROR
+
+
+
+def test_sketch_file_reads_ahead_a_bounded_window(tmp_path, monkeypatch):
+    import esg_batch
+    from esg_bench import as_frame, synthetic_columns
+    from esg_sketches import PENDING_PER_WORKER, sketch_file
+
+    path = tmp_path / "portfolio.csv"
+    as_frame(synthetic_columns(6_000, seed=6)).to_csv(path, index=False)
+    serial = sketch_file(str(path), chunksize=500)
+
+    read, read_at_merge = [], []
+    real_chunks, real_merge = esg_batch.read_portfolio_chunks, PortfolioSketch.merge
+
+    def counting_chunks(*args, **kwargs):
+        for chunk in real_chunks(*args, **kwargs):
+            read.append(len(chunk))
+            yield chunk
+
+    def counting_merge(self, other):
+        read_at_merge.append(len(read))
+        return real_merge(self, other)
+
+    monkeypatch.setattr(esg_batch, "read_portfolio_chunks", counting_chunks)
+    monkeypatch.setattr(PortfolioSketch, "merge", counting_merge)
+    parallel = sketch_file(str(path), chunksize=500, workers=2)
+    assert len(read) == 12 and len(read_at_merge) == 12
+    # The first part is merged before the file has been read past the window (plus the chunk that waits)
+    assert read_at_merge[0] <= PENDING_PER_WORKER * 2 + 1
+    for column in ("risk_score", "pay_gap"):
+        # Counts and extremes are exact whichever process built each part
+        pd.testing.assert_frame_equal(parallel.quantiles(column)[["count", "min", "max"]],
+                                      serial.quantiles(column)[["count", "min", "max"]], check_like=True)
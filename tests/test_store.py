@@ -0,0 +1,74 @@
+"""ResultStore: bulk and background writes, history and cohort queries."""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from esg_scoring import NUMERIC_INPUTS, QUESTION_IDS, get_config, score_portfolio, score_records
+from esg_store import ResultStore, record_row
+
+BASE = {"industry": "Technology", **{qid: "Yes" for qid in QUESTION_IDS},
+        **dict(zip(NUMERIC_INPUTS, [500, 200, 1_500_000.0, 50, 25, 1_300_000.0, 25.0, 15.0, 300.0, 15_000.0,
+                                    15.0, 30.0, 1, 105.0, 5, 0]))}
+
+
+def _row(company: str, as_of: str, **changes) -> tuple:
+    record = {**BASE, **changes}
+    return record_row(record, score_records([record])[0], get_config().version, company, as_of)
+
+
+@pytest.fixture()
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    yield store
+    store.close()
+
+
+def test_history_is_ordered_and_bounded(store):
+    store.write_rows([_row("Acme", "2024-12-31", ghg_emissions=900.0), _row("Acme", "2022-12-31"),
+                      _row("Beta", "2023-12-31"), _row("Acme", "2023-12-31", ghg_emissions=100.0)])
+    history = store.history("Acme", columns=["as_of", "ghg_score"])
+    assert history["as_of"].tolist() == ["2022-12-31", "2023-12-31", "2024-12-31"]
+    assert history["ghg_score"].tolist() == [0.5, 1.0, 0.0]
+    assert store.history("Acme", start="2023-01-01", end="2023-12-31")["as_of"].tolist() == ["2023-12-31"]
+    assert store.count() == 4
+
+
+def test_cohort_takes_each_company_latest_snapshot_then_filters(store):
+    store.write_rows([
+        _row("Acme", "2022-12-31"), _row("Acme", "2023-12-31", industry="Retail"),  # moved to Retail
+        _row("Beta", "2022-12-31"), _row("Beta", "2023-12-31", ghg_emissions=900.0),
+        _row("Gamma", "2023-12-31", industry="Retail"),
+    ])
+    tech = store.cohort("Technology", columns=["company", "as_of", "ghg_emissions"])
+    assert tech.to_dict("records") == [{"company": "Beta", "as_of": "2023-12-31", "ghg_emissions": 900.0}]
+    assert store.cohort("Retail", columns=["company"])["company"].tolist() == ["Acme", "Gamma"]
+    # As of 2022 Acme was still in Technology
+    assert store.cohort("Technology", as_of="2022-12-31", columns=["company"])["company"].tolist() == ["Acme", "Beta"]
+    assert store.cohort(columns=["company"])["company"].tolist() == ["Acme", "Beta", "Gamma"]
+
+
+def test_bulk_write_round_trips_scores_and_answers(store):
+    companies = pd.DataFrame([{**BASE, "company": f"c{i}", "ghg_emissions": 100.0 * i} for i in range(5)])
+    companies[QUESTION_IDS] = 1
+    scored = score_portfolio(companies)
+    assert store.write(companies, scored, as_of="2024-06-30") == 5
+    cohort = store.cohort(as_of="2024-06-30")
+    pd.testing.assert_series_equal(cohort["risk_score"], scored["risk_score"], check_names=False)
+    assert ResultStore.answers(cohort).bits().all()
+
+
+def test_background_errors_clear_after_a_successful_write(store):
+    store.submit([("too", "short")])
+    store.flush()
+    assert isinstance(store.last_error, sqlite3.Error)
+    store.submit([_row("Acme", "2024-12-31")])
+    store.flush()
+    assert store.last_error is None and store.count() == 1
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("ESG_STORE", "off")
+    assert ResultStore.from_env() is None
+    monkeypatch.setenv("ESG_STORE", str(tmp_path / "env.db"))
+    assert ResultStore.from_env().path == str(tmp_path / "env.db")
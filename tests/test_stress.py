@@ -0,0 +1,80 @@
+"""Monte Carlo stress test against rescoring under each scenario's perturbed config."""
+import copy
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_bench import as_frame, synthetic_columns
+from esg_config import parse_config
+from esg_scoring import (
+    CONFIG_PATH, LADDER_VALUES, METRIC_COLUMNS, NUMERIC_INPUTS, QUESTION_IDS, get_config, grade_index,
+    industry_codes, score_columns,
+)
+from esg_stress import WEIGHT_NAMES, StressSpec, draw_scenarios, stress_test
+
+with open(CONFIG_PATH, encoding="utf-8") as handle:
+    DOCUMENT = json.load(handle)
+
+
+@pytest.fixture(scope="module")
+def companies() -> pd.DataFrame:
+    return as_frame(synthetic_columns(300, seed=11))
+
+
+def _scenario_scores(companies: pd.DataFrame, factors: dict, s: int) -> dict:
+    """Scores under scenario ``s``: every named threshold and both weights multiplied by its factor."""
+    data = copy.deepcopy(DOCUMENT)
+    for name, factor in factors.items():
+        if name in WEIGHT_NAMES:
+            data[name] = data[name] * factor[s]
+            continue
+        for thresholds in list(data["industry_thresholds"].values()) + [data["performance_thresholds"]]:
+            if name in thresholds:
+                thresholds[name] = thresholds[name] * factor[s]
+    config = parse_config(data, "scenario", METRIC_COLUMNS, LADDER_VALUES)
+    columns = {col: companies[col].to_numpy() for col in QUESTION_IDS + NUMERIC_INPUTS}
+    return score_columns(columns, industry_codes(companies["industry"], config), config=config)
+
+
+def test_scenarios_match_rescoring_with_a_perturbed_config(companies):
+    spec = StressSpec(n_scenarios=12, threshold_sigma=0.3, weight_sigma=0.2, seed=5)
+    result = stress_test(companies, spec, obligor_chunk=64)
+    factors = draw_scenarios(spec)
+    base_grade = grade_index(result.obligors["base_score"].to_numpy())
+    flips = np.zeros(len(companies))
+    for s in range(spec.n_scenarios):
+        scored = _scenario_scores(companies, factors, s)
+        flipped = grade_index(scored["score"]) != base_grade
+        flips += flipped
+        assert result.scenarios.loc[s, "mean_risk_score"] == pytest.approx(scored["risk_score"].mean())
+        assert result.scenarios.loc[s, "flip_share"] == pytest.approx(flipped.mean())
+    np.testing.assert_allclose(result.obligors["flip_probability"], flips / spec.n_scenarios)
+    assert result.obligors["flip_probability"].max() > 0
+    grade_probabilities = result.obligors[[f"p_grade_{grade}" for grade in get_config().grades]]
+    np.testing.assert_allclose(grade_probabilities.sum(axis=1), 1.0)
+
+
+def test_zero_sigma_reproduces_the_base_scores(companies):
+    result = stress_test(companies, StressSpec(n_scenarios=5, threshold_sigma=0.0, weight_sigma=0.0))
+    obligors = result.obligors
+    assert (obligors["flip_probability"] == 0).all()
+    np.testing.assert_array_equal(obligors["risk_mean"], obligors["base_risk_score"])
+    np.testing.assert_array_equal(obligors["risk_p50"], obligors["base_risk_score"])
+    assert (obligors["risk_std"] == 0).all()
+
+
+def test_process_pool_gives_the_same_result(companies):
+    spec = StressSpec(n_scenarios=20, seed=2)
+    serial = stress_test(companies, spec, obligor_chunk=100)
+    pooled = stress_test(companies, spec, obligor_chunk=100, workers=2)
+    pd.testing.assert_frame_equal(serial.obligors, pooled.obligors)
+    pd.testing.assert_frame_equal(serial.scenarios, pooled.scenarios)
+
+
+def test_bad_specs_are_rejected(companies):
+    with pytest.raises(ValueError, match="unknown stress sigma"):
+        stress_test(companies, StressSpec(n_scenarios=2, sigmas={"ghg_hihg": 0.2}))
+    with pytest.raises(ValueError, match="no companies"):
+        stress_test(companies.iloc[:0], StressSpec(n_scenarios=2))
@@ -0,0 +1,43 @@
+"""Compiled threshold tables against their ladders, on and next to every threshold."""
+import numpy as np
+import pytest
+
+from esg_scoring import get_config
+from esg_thresholds import SEARCHSORTED_MIN_CUTS, _evaluate, _resolve, compile_ladders
+
+CONFIG = get_config()
+
+
+def _probes(thresholds) -> np.ndarray:
+    """Every threshold, the floats either side of it, and values far outside the ladder."""
+    points = np.array(sorted(set(thresholds)), dtype=np.float64)
+    return np.concatenate([points, np.nextafter(points, -np.inf), np.nextafter(points, np.inf),
+                           [-np.inf, -1e300, 0.0, -0.0, 1e300, np.inf, np.nan]])
+
+
+@pytest.mark.parametrize("column", list(CONFIG.metric_ladders))
+def test_config_ladders_match_at_boundaries(column):
+    value, ladder = CONFIG.metric_ladders[column]
+    table = CONFIG.tables[column]
+    for code, th in enumerate(CONFIG.industry_thresholds.values()):
+        resolved = [(op, _resolve(t, th, CONFIG.performance_thresholds), score) for op, t, score in ladder]
+        probes = _probes([t for _, t, _ in resolved])
+        expected = [_evaluate(resolved, v, table.else_score) for v in probes]
+        got = table.score(probes, np.full(len(probes), code, dtype=np.intp))
+        np.testing.assert_array_equal(got, expected, err_msg=f"{column} for {list(CONFIG.industry_thresholds)[code]}")
+
+
+def test_wide_ladder_uses_searchsorted_and_matches():
+    steps = 12
+    ladder = [("<" if i % 2 else "<=", float(i), float(i) / steps) for i in range(steps)]
+    table = compile_ladders({"wide": ("v", ladder)}, {"DEFAULT": {}}, {})["wide"]
+    assert table.cuts.shape[1] > SEARCHSORTED_MIN_CUTS and not table.industry_specific
+    probes = _probes([t for _, t, _ in ladder])
+    expected = [_evaluate(ladder, v, 0.0) for v in probes]
+    np.testing.assert_array_equal(table.score(probes, np.zeros(len(probes), dtype=np.intp)), expected)
+
+
+def test_equality_rung_scores_only_the_exact_value():
+    table = CONFIG.tables["injury_score"]
+    codes = np.zeros(4, dtype=np.intp)
+    np.testing.assert_array_equal(table.score(np.array([0.0, 1e-12, 2.0, 2.5]), codes), [1.0, 0.5, 0.5, 0.0])
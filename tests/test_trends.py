@@ -0,0 +1,89 @@
+"""Year-on-year deltas and the incrementally updated rolling statistics."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_trends import TREND_COLUMNS, RollingTrends, yoy_deltas
+
+PERIODS = pd.date_range("2015-12-31", periods=8, freq="YE")
+
+
+def _history(n_companies: int = 4, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = [{"company": f"Co {c}", "as_of": as_of, **dict(zip(TREND_COLUMNS, rng.uniform(0, 100, len(TREND_COLUMNS))))}
+            for c in range(n_companies) for as_of in PERIODS]
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=seed)
+
+
+def _reference(values: np.ndarray):
+    """Mean, sample std and least-squares slope of the finite values, indexed by window position."""
+    positions = np.arange(len(values), dtype=np.float64)
+    valid = np.isfinite(values)
+    y, x = values[valid], positions[valid]
+    mean = y.mean() if len(y) else np.nan
+    std = y.std(ddof=1) if len(y) > 1 else np.nan
+    slope = np.polyfit(x, y, 1)[0] if len(y) > 1 else np.nan
+    return mean, std, slope
+
+
+def test_yoy_deltas_compare_each_company_with_its_previous_period():
+    history = _history()
+    frame = yoy_deltas(history)
+    for company, group in frame.groupby("company"):
+        values = group["ghg_emissions"].to_numpy()
+        assert np.isnan(group["ghg_emissions_yoy"].iloc[0])
+        np.testing.assert_allclose(group["ghg_emissions_yoy"].to_numpy()[1:], np.diff(values))
+        np.testing.assert_allclose(group["ghg_emissions_yoy_pct"].to_numpy()[1:],
+                                   np.diff(values) / np.abs(values[:-1]) * 100)
+
+
+@pytest.mark.parametrize("window", [2, 3, 5])
+def test_rolling_stats_match_a_recomputation_over_the_window(window):
+    history = _history()
+    stats = RollingTrends.from_history(history, window=window).stats()
+    for company, group in history.sort_values("as_of").groupby("company"):
+        for col in TREND_COLUMNS:
+            mean, std, slope = _reference(group[col].to_numpy()[-window:])
+            row = stats.loc[company]
+            assert row["periods"] == len(PERIODS)
+            assert row[f"{col}_mean"] == pytest.approx(mean)
+            assert row[f"{col}_std"] == pytest.approx(std)
+            assert row[f"{col}_slope"] == pytest.approx(slope)
+
+
+def test_missing_values_are_left_out_of_the_window():
+    history = _history(n_companies=1).sort_values("as_of").reset_index(drop=True)
+    history.loc[[2, 4], "risk_score"] = np.nan
+    trends = RollingTrends(window=4)
+    for position, (_, rows) in enumerate(history.groupby("as_of", sort=True)):
+        trends.update(rows)
+        stats = trends.stats().iloc[0]
+        window = history["risk_score"].to_numpy()[max(0, position - 3):position + 1]
+        mean, std, slope = _reference(window)
+        assert stats["risk_score_mean"] == pytest.approx(mean, nan_ok=True)
+        assert stats["risk_score_std"] == pytest.approx(std, nan_ok=True)
+        assert stats["risk_score_slope"] == pytest.approx(slope, nan_ok=True)
+    # Other columns keep their full window
+    assert trends.stats().iloc[0]["ghg_emissions_mean"] == pytest.approx(history["ghg_emissions"].iloc[-4:].mean())
+
+
+def test_a_window_of_only_missing_values_has_no_statistics():
+    trends = RollingTrends(window=2)
+    for as_of in PERIODS[:3]:
+        trends.update(pd.DataFrame({"company": ["Co"], "as_of": [as_of],
+                                    **{col: [np.nan] for col in TREND_COLUMNS}}))
+    stats = trends.stats().iloc[0]
+    assert np.isnan(stats["risk_score_mean"]) and np.isnan(stats["risk_score_slope"])
+    trends.update(pd.DataFrame({"company": ["Co"], "as_of": [PERIODS[3]], **{col: [1.0] for col in TREND_COLUMNS}}))
+    stats = trends.stats().iloc[0]
+    assert stats["risk_score_mean"] == 1.0 and np.isnan(stats["risk_score_std"])
+
+
+def test_update_rejects_duplicates_and_out_of_order_periods():
+    trends = RollingTrends()
+    rows = pd.DataFrame({"company": ["A", "A"], "as_of": PERIODS[:2], **{col: [1.0, 2.0] for col in TREND_COLUMNS}})
+    with pytest.raises(ValueError, match="one row per company"):
+        trends.update(rows)
+    trends.update(rows.iloc[[1]])
+    with pytest.raises(ValueError, match="increasing order"):
+        trends.update(rows.iloc[[0]])
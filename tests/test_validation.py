@@ -0,0 +1,71 @@
+"""validate_portfolio: each check flags exactly the rows that break it, and the report names them."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from esg_scoring import NUMERIC_INPUTS, QUESTION_IDS, get_config, score_portfolio
+from esg_validation import CHECKS, validate_portfolio
+
+VALID = {"industry": "Technology", **{qid: "Yes" for qid in QUESTION_IDS},
+         **dict(zip(NUMERIC_INPUTS, [500, 200, 1_500_000.0, 50, 25, 1_300_000.0, 25.0, 15.0, 300.0, 15_000.0,
+                                     15.0, 30.0, 1, 105.0, 5, 0]))}
+
+CASES = [
+    ({"industry": None}, {"industry_missing"}),
+    ({"industry": "  "}, {"industry_missing"}),
+    ({"industry": "Select Industry..."}, {"industry_unknown"}),
+    ({QUESTION_IDS[0]: None}, {"answers_missing"}),
+    ({QUESTION_IDS[1]: "Maybe"}, {"answers_invalid"}),
+    ({QUESTION_IDS[2]: " no "}, set()),
+    ({"ghg_emissions": None}, {"ghg_emissions_missing"}),
+    ({"ghg_emissions": "n/a"}, {"ghg_emissions_missing"}),
+    ({"male_attrition": -1}, {"male_attrition_negative"}),
+    ({"workplace_injuries": 1.5}, {"workplace_injuries_fractional"}),
+    ({"water_consumption": -0.01}, {"water_consumption_negative"}),
+    ({"renewable_pct": 100.5}, {"renewable_pct_out_of_range"}),
+    ({"renewable_pct": 100.0}, set()),
+    ({"male_employees": 0, "female_employees": 0, "male_attrition": 0, "female_attrition": 0}, {"no_employees"}),
+    ({"female_attrition": 201}, {"female_attrition_above_headcount"}),
+    ({"avg_female_pay": 3_000_001.0}, {"female_pay_out_of_bounds"}),
+    ({"avg_male_pay": 0.0}, {"female_pay_out_of_bounds"}),
+]
+
+
+def _errors(validation, row: int) -> set:
+    return {code for i, code in enumerate(CHECKS) if int(validation.failed[row]) >> i & 1}
+
+
+@pytest.mark.parametrize("change, expected", CASES)
+def test_each_check_flags_only_its_row(change, expected):
+    frame = pd.DataFrame([VALID, {**VALID, **change}, VALID])
+    validation = validate_portfolio(frame)
+    assert _errors(validation, 0) == set() and _errors(validation, 2) == set()
+    assert _errors(validation, 1) == expected
+    assert validation.n_invalid == (1 if expected else 0)
+
+
+def test_report_and_counts():
+    frame = pd.DataFrame([{**VALID, "id": "A"}, {**VALID, "id": "B", "industry": None, "renewable_pct": -5.0},
+                          {**VALID, "id": "C"}, {**VALID, "id": "D", "male_employees": 500.5}])
+    validation = validate_portfolio(frame)
+    report = validation.report(key="id", first_row=100)
+    assert report.to_dict("records") == [
+        {"row": 101, "id": "B", "errors": "industry_missing;renewable_pct_out_of_range"},
+        {"row": 103, "id": "D", "errors": "male_employees_fractional"},
+    ]
+    assert validation.counts() == {"industry_missing": 1, "renewable_pct_out_of_range": 1,
+                                   "male_employees_fractional": 1}
+
+
+def test_valid_rows_are_normalized_for_scoring():
+    frame = pd.DataFrame([VALID, {**VALID, QUESTION_IDS[0]: "No", "industry": None}, {**VALID, "industry": "Retail"}])
+    validation = validate_portfolio(frame)
+    valid = validation.valid_companies()
+    assert list(valid.index) == [0, 2]
+    assert set(np.unique(valid[QUESTION_IDS].to_numpy())) == {1}
+    assert list(score_portfolio(valid)["thresholds_key"]) == ["Technology", "Retail"]
+
+
+def test_missing_columns_raise():
+    with pytest.raises(ValueError, match="ghg_emissions"):
+        validate_portfolio(pd.DataFrame([VALID]).drop(columns="ghg_emissions"), get_config())